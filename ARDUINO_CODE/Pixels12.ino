@@ -3,7 +3,7 @@
 // This program interfaces with a Python script to receive LED control commands via serial communication.
 // It supports a variety of LED effects and LCD messages. Commands are sent from Python in the following format:
 //    "LED|<led_number>|<bank>|<place>|<effect>|<brightness>|<color>\n"
-//    "DISPLAY_LCD|<row>|<message>\n" or "CLEAR_LCD\n"
+//    "DISPLAY_LCD|<row>|<message>\n", "LCD_RUN|<row>|<col>|<text>\n" or "CLEAR_LCD\n"
 // After processing a command, the Arduino sends back an "<ACK>" to confirm reception and processing.
 // #########################################################################################################
 
@@ -139,9 +139,14 @@ void loop() {
   // Parse serial commands
   while (Serial.available()) {
     String command = Serial.readStringUntil('\n');
+    if (command.startsWith("PING")) {
+      // Round-trip probe: echo its sequence number so the Pi can't mistake an earlier <ACK> for the reply
+      Serial.println("<PONG" + command.substring(4) + ">");
+      continue;
+    }
     parseCommand(command);
     // Send acknowledgment back to the sender
-++    Serial.println("<ACK>");
+    Serial.println("<ACK>");
   }
 
   // Apply effects to each LED strip
@@ -203,6 +208,15 @@ void parseCommand(String command) {
     String message = command.substring(firstSep + 3);
     lcd.setCursor(0, row);
     lcd.print(message);
+  } else if (command.startsWith("LCD_RUN")) {
+    // Write only a changed run of characters: LCD_RUN|<row>|<col>|<text>
+    int firstSep = command.indexOf('|');
+    int secondSep = command.indexOf('|', firstSep + 1);
+    int thirdSep = command.indexOf('|', secondSep + 1);
+    int row = command.substring(firstSep + 1, secondSep).toInt();
+    int col = command.substring(secondSep + 1, thirdSep).toInt();
+    lcd.setCursor(col, row);
+    lcd.print(command.substring(thirdSep + 1));
   }
 } // End parseCommand
 
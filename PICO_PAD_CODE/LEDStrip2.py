@@ -5,6 +5,7 @@
 import array, time
 from machine import Pin
 import rp2
+import uasyncio as asyncio
 
 # Configure the number of WS2812 LEDs.
 NUM_LEDS = 9
@@ -34,23 +35,58 @@ sm.active(1)
 # Display a pattern on the LEDs via an array of LED RGB values.
 ar = array.array("I", [0 for _ in range(NUM_LEDS)])
 
+# Dimmed frame as it goes out to the PIO FIFO, allocated once and reused
+_out = array.array("I", [0 for _ in range(NUM_LEDS)])
+
+# Brightness lookup: _lut[v] is channel value v (0-255) scaled by brightness
+_lut = bytearray(256)
+
+# WS2812 latches after the line idles low for >50us; one pixel takes 30us at 800kHz
+LATCH_US = 80
+FRAME_US = NUM_LEDS * 30 + LATCH_US
+_next_push = time.ticks_us()
+
+# DMA feeds the FIFO when the port has it (MicroPython 1.22+); otherwise sm.put is used
+DREQ_PIO0_TX0 = 0
+try:
+    _dma = rp2.DMA()
+    _dma_ctrl = _dma.pack_ctrl(size=2, inc_write=False, treq_sel=DREQ_PIO0_TX0)
+except (AttributeError, OSError):
+    _dma = None
+
 ##########################################################################
+def set_brightness(level):
+    global brightness
+    brightness = level
+    for v in range(256):
+        _lut[v] = (v * int(level * 256)) >> 8
+
+set_brightness(brightness)
+
 def pixels_show():
-    dimmer_ar = array.array("I", [0 for _ in range(NUM_LEDS)])
-    for i,c in enumerate(ar):
-        r = int(((c >> 8) & 0xFF) * brightness)
-        g = int(((c >> 16) & 0xFF) * brightness)
-        b = int((c & 0xFF) * brightness)
-        dimmer_ar[i] = (g<<16) + (r<<8) + b
-    sm.put(dimmer_ar, 8)
-    time.sleep_ms(10)
+    global _next_push
+    lut = _lut
+    out = _out
+    # Only wait out whatever is left of the previous frame (still reading _out) and its latch gap
+    while time.ticks_diff(_next_push, time.ticks_us()) > 0:
+        pass
+    for i in range(NUM_LEDS):
+        c = ar[i]
+        # Pre-shift into the top 24 bits, which is where the PIO program reads from
+        out[i] = (lut[(c >> 16) & 0xFF] << 24) | (lut[(c >> 8) & 0xFF] << 16) | (lut[c & 0xFF] << 8)
+    if _dma:
+        _dma.config(read=out, write=sm, count=NUM_LEDS, ctrl=_dma_ctrl, trigger=True)
+    else:
+        sm.put(out)
+    _next_push = time.ticks_add(time.ticks_us(), FRAME_US)
 
 def pixels_set(i, color):
     ar[i] = (color[1]<<16) + (color[0]<<8) + color[2]
 
 def pixels_fill(color):
-    for i in range(len(ar)):
-        pixels_set(i, color)
+    value = (color[1]<<16) + (color[0]<<8) + color[2]
+    for i in range(NUM_LEDS):
+        ar[i] = value
 
 def color_chase(color, wait):
     for i in range(NUM_LEDS):
@@ -128,15 +164,37 @@ def LightPlace(LightBank, Place, color=(255, 0, 0)):  # Default color is Red
     pixels_show()
     
 
+##########################################################################
+# Frame-based animations: a frame function sets every pixel for step n, then the
+# caller pushes it once. play() runs one as a uasyncio task at a steady rate.
+
+def rainbow_frame(n):
+    for i in range(NUM_LEDS):
+        pixels_set(i, wheel(((i * 256 // NUM_LEDS) + n) & 255))
+
+def chase_frame(n, color):
+    pixels_set(n % NUM_LEDS, color)
+
+def flash_frame(n, color):
+    pixels_fill(color if n % 2 == 0 else (0, 0, 0))
+
 def rainbow_cycle(wait):
     for j in range(255):
-        for i in range(NUM_LEDS):
-            rc_index = (i * 256 // NUM_LEDS) + j
-            pixels_set(i, wheel(rc_index & 255))
-            time.sleep(wait)
-            pixels_show()
+        rainbow_frame(j)
+        pixels_show()
         time.sleep(wait)
 
+async def play(frame, count, *args, fps=50):
+    # Frames are scheduled against a deadline so slow frames do not drift the rate,
+    # and every frame awaits, leaving the RFID and link tasks time to run
+    period = 1000 // fps
+    deadline = time.ticks_ms()
+    for n in range(count):
+        frame(n, *args)
+        pixels_show()
+        deadline = time.ticks_add(deadline, period)
+        await asyncio.sleep_ms(max(0, time.ticks_diff(deadline, time.ticks_ms())))
+
 BLACK = (0, 0, 0)
 RED = (255, 0, 0)
 YELLOW = (255, 150, 0)
@@ -1,3 +1,4 @@
 # RMSettings.py
 SERVER_IP = "192.168.0.12"  # Replace with the actual Raspberry Pi's IP address
-SERVER_PORT = 12345  # The same port used by the server
\ No newline at end of file
+SERVER_PORT = 12345  # The same port used by the server
+PAD_ID = "1"  # Unique id for this pad when several pads load the same track
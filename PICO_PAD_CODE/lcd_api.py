@@ -203,6 +203,15 @@ class LcdApi:
         """
         raise NotImplementedError
 
+    def hal_write_data_run(self, data):
+        """Write a run of data bytes to the LCD at the current address.
+
+        The default writes one byte at a time. A derived HAL class may
+        override this to send the whole run in one bus transaction.
+        """
+        for byte in data:
+            self.hal_write_data(byte)
+
     # This is a default implementation of hal_sleep_us which is suitable
     # for most micropython implementations. For platforms which don't
     # support `time.sleep_us()` they should provide their own implementation
@@ -0,0 +1,74 @@
+# lcd_buffer.py
+# Frame-buffered front end for the 20x4 character LCD.
+# Drawing calls (clear, move_to, putstr) only change an in-memory frame. flush() diffs
+# the frame against a shadow of what the LCD is showing and sends just the changed
+# character runs, each as one address command plus one batched data write. Replacing
+# "Data: 3|Smith" with "Data: 4|Jones" costs a few bytes instead of a clear and redraw.
+
+GAP = 3  # Unchanged characters worth rewriting to avoid another address command
+
+
+class LcdBuffer:
+
+    def __init__(self, lcd):
+        self.lcd = lcd
+        self.rows = lcd.num_lines
+        self.cols = lcd.num_columns
+        self.frame = [bytearray(b" " * self.cols) for _ in range(self.rows)]
+        self.shadow = [bytearray(b" " * self.cols) for _ in range(self.rows)]
+        self.cursor_x = 0
+        self.cursor_y = 0
+        lcd.clear()  # Start from a known blank screen that matches the shadow
+
+    def clear(self):
+        for row in self.frame:
+            for i in range(self.cols):
+                row[i] = 32
+        self.cursor_x = 0
+        self.cursor_y = 0
+
+    def move_to(self, cursor_x, cursor_y):
+        self.cursor_x = cursor_x
+        self.cursor_y = cursor_y
+
+    def putstr(self, string):
+        # Same wrapping rules as LcdApi.putstr: newline or the right edge moves to the next row
+        for char in string:
+            if char == "\n":
+                self.cursor_x = 0
+                self.cursor_y = (self.cursor_y + 1) % self.rows
+                continue
+            if self.cursor_x >= self.cols:
+                self.cursor_x = 0
+                self.cursor_y = (self.cursor_y + 1) % self.rows
+            self.frame[self.cursor_y][self.cursor_x] = ord(char) & 0xFF
+            self.cursor_x += 1
+
+    def line(self, row, text):
+        # Replace a whole row, padding or truncating to the display width
+        self.frame[row][:] = (text + " " * self.cols)[:self.cols].encode()
+
+    def flush(self):
+        # Send every changed run to the LCD; returns the number of characters written
+        sent = 0
+        for y in range(self.rows):
+            frame = self.frame[y]
+            shadow = self.shadow[y]
+            x = 0
+            while x < self.cols:
+                if frame[x] == shadow[x]:
+                    x += 1
+                    continue
+                start = end = x
+                # Extend the run across short unchanged gaps
+                while x < self.cols and x - end <= GAP + 1:
+                    if frame[x] != shadow[x]:
+                        end = x
+                    x += 1
+                run = frame[start:end + 1]
+                self.lcd.move_to(start, y)
+                self.lcd.hal_write_data_run(run)
+                shadow[start:end + 1] = run
+                sent += len(run)
+                x = end + 1
+        return sent
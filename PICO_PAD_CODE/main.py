@@ -1,32 +1,36 @@
 # main.py
-
-import time
-import network
-import socket
-from mfrc522 import MFRC522
-from rotary_irq_rp2 import RotaryIRQ  
+# Pad firmware, run as cooperative uasyncio tasks:
+#   link_task   - PadLink connection to the Pi (reconnect, heartbeat, pipelined frames)
+#   rfid_task   - polls the MFRC522 on its own schedule and queues taps
+#   button_task - loading button, woken by a pin IRQ instead of polling
+#   rotary_task - encoder pages through the status line on the LCD
+#   reply_task  - handles Pi replies and link changes, drives the LCD
+#   led_task    - runs LED commands; animations are played frame by frame
+# Tasks talk through small queues so a slow one (LCD, LEDs) never holds up scanning.
+
+import uasyncio as asyncio
+from tag_reader import TagReader
+from rotary_irq_rp2 import RotaryIRQ
 from pico_i2c_lcd import I2cLcd
-from machine import Pin, I2C, reset
+from lcd_buffer import LcdBuffer
+from machine import Pin, I2C
 from secret import ssid, password
 import RMSettings  # RMSettings contains SERVER_IP, SERVER_PORT
 import LEDStrip2 as LED # LED Library that mimics PI
+from padlink import PadLink, ONLINE, LOST
+from padqueue import Queue
 
-lcd = None  # Define lcd as a global variable
-button_pin = Pin(15, Pin.IN, Pin.PULL_UP)  # Define button PIN as a global variable
-client_socket = None  # Define client_socket as a global variable
-
-# Function to handle button press
-def is_button_pressed(button_pin):
-    button_state = button_pin.value()
-    print(f"Button state: {button_state}")
-    return button_state == 0
+DEBOUNCE_MS = 20   # Button must read the same for this long to count
+FLASH_MS = 200     # On/off time of one LED flash
 
-# Function to convert UID to decimal string
-def uid_to_decimal_str(uid):
-    decimal_id = 0
-    for byte in uid:
-        decimal_id = decimal_id * 256 + byte
-    return str(decimal_id)
+lcd = None  # Define lcd (frame-buffered LCD) as a global variable
+button_pin = Pin(15, Pin.IN, Pin.PULL_UP)  # Define button PIN as a global variable
+link = None  # Define link (connection to the Pi) as a global variable
+leds = Queue(4)  # LED commands: ("bank", lane, color), ("flash", color), ("rainbow",), ("reset",)
+started = asyncio.Event()  # Set by the first button press after power-up
+last_tag = ""
+menu_page = 0
+MENU_PAGES = ("Status", "Last tag", "Queue", "Pi")
 
 # Function to display RFID tag information on LCD
 def display_rfid_tag(lcd, tag_id):
@@ -34,130 +38,165 @@ def display_rfid_tag(lcd, tag_id):
     lcd.putstr("RFID Tag ID:")
     lcd.move_to(0, 1)
     lcd.putstr(tag_id)
-    
+    lcd.flush()
+
 # Function to display RFID tag information on LCD
 def display_socketResponse(lcd, data):
     lcd.clear()
     lcd.putstr("Data:")
     lcd.move_to(0, 1)
     lcd.putstr(data)
-   
+    lcd.flush()
+
 # Function to display error information on LCD
 def display_err(lcd, err_id):
     lcd.clear()
     lcd.move_to(0, 1)
     lcd.putstr(err_id)
+    lcd.flush()
 
 # Function to display "Next Tag Please" on LCD
 def display_next_tag_message(lcd):
     lcd.clear()
     lcd.putstr("Next Tag Please")
+    lcd.flush()
+
+# Function to display the selected menu page on the bottom row of the LCD
+def display_menu(lcd):
+    name = MENU_PAGES[menu_page]
+    if name == "Status":
+        text = "Link " + link.state
+    elif name == "Last tag":
+        text = last_tag or "-"
+    elif name == "Queue":
+        text = "%d unacked" % len(link.pending)
+    else:
+        text = RMSettings.SERVER_IP
+    lcd.line(3, "%s: %s" % (name, text))
+    lcd.flush()
 
 def init_LCD():
     global lcd  # Declare lcd as global
     # Initialize I2C for the LCD
     i2c = I2C(0, sda=Pin(0), scl=Pin(1), freq=400000)
     I2C_ADDR = 0x27
-    lcd = I2cLcd(i2c, I2C_ADDR, 4, 20)
-    lcd.clear()
+    lcd = LcdBuffer(I2cLcd(i2c, I2C_ADDR, 4, 20))  # Only changed characters go over I2C
     lcd.putstr('Starting ' + ssid + "\n")
+    lcd.flush()
     return lcd
 
-def init_WIFI():
-    global lcd  # Declare lcd as global
-    lcd = init_LCD()  # Initialize LCD and assign to the global variable
-    wlan = network.WLAN(network.STA_IF)
-    wlan.active(True)
-    wlan.connect(ssid, password, channel=2)
-
-    max_wait = 100
-    while max_wait > 0:
-        if wlan.status() < 0 or wlan.status() >= 3:
-            print(str(wlan.status()))
+def init_LINK():
+    global link  # Declare link as global
+    link = PadLink(RMSettings.PAD_ID, RMSettings.SERVER_IP, RMSettings.SERVER_PORT, ssid, password)
+    lcd.clear()
+    lcd.putstr('SSID = ' + ssid + "\n")
+    lcd.putstr('pi = ' + RMSettings.SERVER_IP + "\n")
+    lcd.flush()
+    return link
+
+async def rfid_task(reader):
+    global last_tag
+    await started.wait()
+    while True:
+        await asyncio.sleep_ms(reader.ms_until_poll())
+        card = reader.poll()
+        if card:
+            print("CARD ID: " + card)
+            last_tag = card
+            # Queued and sent at once; reply_task handles the answer when it arrives
+            link.send("TAP", card)
+            display_rfid_tag(lcd, card)
+
+async def button_task():
+    flag = asyncio.ThreadSafeFlag()
+    button_pin.irq(lambda pin: flag.set(), Pin.IRQ_FALLING)
+    while True:
+        await flag.wait()
+        await asyncio.sleep_ms(DEBOUNCE_MS)
+        if button_pin.value() != 0:
+            continue  # Contact bounce or noise, not a press
+        if not started.is_set():
+            print('INIT COMPLETE')
             lcd.clear()
-            lcd.putstr(str(wlan.status()) + "\n")
-            if wlan.status() == -1:
-                lcd.clear()
-                lcd.putstr('Connect Fail' + "\n")
-                reset()
-            break
-        max_wait -= 1
-        print('waiting for connection')
-        time.sleep(1)
-
-    # Handle connection error
-    if wlan.status() != 3:
-        raise RuntimeError('network connection failed')
-    else:
-        print('connected')
-        status = wlan.ifconfig()
-        print('ip = ' + status[0])
-        lcd.clear()
-        lcd.putstr('SSID = ' + ssid + "\n")
-        lcd.putstr('ip = ' + status[0] + "\n")
-        lcd.putstr('pi = ' + RMSettings.SERVER_IP + "\n")
-        return 0
-
-def init_SOCKET():
-    global lcd, client_socket  # Declare lcd and client_socket as global
-    try:
-        client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        client_socket.settimeout(10)
-        client_socket.connect((RMSettings.SERVER_IP, RMSettings.SERVER_PORT))
-        lcd.putstr('Socket Connected\n')
-    except OSError as e:
-        lcd.putstr('Socket Error\n')
-        print("Socket Error:", e)
-
-def init_LED():
-        LED.resetLEDS()
-        LED.flashLEDS(color=(0, 0, 255))
+            lcd.putstr('Start Scanning\n')
+            lcd.flush()
+            started.set()
+        else:
+            # Button press confirms the lane has been loaded
+            link.send("BTN", "88")
+        while button_pin.value() == 0:
+            await asyncio.sleep_ms(DEBOUNCE_MS)
+
+async def rotary_task():
+    global menu_page
+    flag = asyncio.ThreadSafeFlag()
+    encoder = RotaryIRQ(pin_num_clk=14, pin_num_dt=13, min_val=0, max_val=len(MENU_PAGES) - 1,
+                        reverse=True, range_mode=RotaryIRQ.RANGE_WRAP)
+    encoder.add_listener(flag.set)
+    while True:
+        await flag.wait()
+        if encoder.value() != menu_page:
+            menu_page = encoder.value()
+            display_menu(lcd)
 
-def main():
-    global button_pin, client_socket
-    LED.testLEDS(color=(255, 0, 0))
-    init_WIFI()
-    init_SOCKET()
-    init_LED()
-    while button_pin.value() == 1:
-        continue
-    print('INIT COMPLETE')
-    lcd.clear()
-    lcd.putstr('Start Scanning\n')
+async def reply_task():
     while True:
-        reader = MFRC522(spi_id=0, sck=6, miso=4, mosi=7, cs=5, rst=22)
-        reader.init()
-        (stat, tag_type) = reader.request(reader.REQIDL)
-
-        if stat == reader.OK:
-            (stat, uid) = reader.SelectTagSN()
-            if stat == reader.OK:
-                card = uid_to_decimal_str(uid)
-                print("CARD ID: " + card)
-
-                client_socket.send(card.encode())
-
-                response = client_socket.recv(1024).decode()
-                print(f"Response: {response}")
-                
-                # display_rfid_tag(lcd, card)
-                display_socketResponse(lcd, response)
-                
+        ftype, status, payload = await link.replies.get()
+        print(f"Response: {ftype} {status} {payload}")
+        if status == LOST:
+            # Queue overflowed while the link was down: the Pi never got this tap or press
+            display_err(lcd, "Tap lost, retap" if ftype == "TAP" else "Press lost, again")
+            leds.put_nowait(("flash", (255, 0, 0)))
+        elif ftype == "TAP":
+            display_socketResponse(lcd, payload)
+            lane = payload.split("|")[0]
+            if status == "ACK" and lane.isdigit():
                 # Lookup the lane number from response
-                lane = int(response[0])
-                LED.LightLEDBank(lane, color=(255, 0, 0))
-                
-                while button_pin.value() == 1:
-                    continue
-                
-                # client_socket.send(bytes([88]))
-                client_socket.send(b'88')
-
-                response = client_socket.recv(1024).decode()
-                print(f"Response: {response}")
-                
-                LED.resetLEDS()
-                display_next_tag_message(lcd)   
+                leds.put_nowait(("bank", int(lane), (255, 0, 0)))
+        elif ftype == "BTN":
+            leds.put_nowait(("reset",))
+            display_next_tag_message(lcd)
+
+async def link_state_task():
+    while True:
+        state = await link.states.get()
+        if state != ONLINE:
+            display_err(lcd, 'Link ' + state)
+        display_menu(lcd)
+
+async def led_task():
+    while True:
+        command = await leds.get()
+        if command[0] == "bank":
+            LED.LightLEDBank(command[1], color=command[2])
+        elif command[0] == "reset":
+            LED.pixels_fill((0, 0, 0))
+            LED.pixels_show()
+        elif command[0] == "flash":
+            await LED.play(LED.flash_frame, 6, command[1], fps=1000 // FLASH_MS)
+        elif command[0] == "rainbow":
+            await LED.play(LED.rainbow_frame, 255)
+
+async def run():
+    LED.testLEDS(color=(255, 0, 0))
+    init_LCD()
+    init_LINK()
+    reader = TagReader(spi_id=0, sck=6, miso=4, mosi=7, cs=5, rst=22)  # Initialized once
+    leds.put_nowait(("reset",))
+    leds.put_nowait(("flash", (0, 0, 255)))
+    asyncio.create_task(link.run())
+    asyncio.create_task(led_task())
+    asyncio.create_task(reply_task())
+    asyncio.create_task(link_state_task())
+    asyncio.create_task(button_task())
+    asyncio.create_task(rotary_task())
+    await rfid_task(reader)
+
+def main():
+    try:
+        asyncio.run(run())
+    finally:
+        asyncio.new_event_loop()
 
 # Call the main function to execute the code
 if __name__ == "__main__":
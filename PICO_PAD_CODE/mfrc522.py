@@ -1,5 +1,6 @@
 # mfrc522.py
 
+import time
 from machine import Pin, SPI
 from os import uname
  
@@ -19,10 +20,25 @@ class MFRC522:
     PICC_ANTICOLL1 = 0x93
     PICC_ANTICOLL2 = 0x95
     PICC_ANTICOLL3 = 0x97
+
+    POLL_US = 100        # Delay between ComIrqReg reads while waiting without an IRQ pin
+    TIMEOUT_MS = 30      # Give up on a card command after this long (chip timer fires at ~15 ms)
   
  
-    def __init__(self, sck, mosi, miso, rst, cs,baudrate=1000000,spi_id=0):
- 
+    def __init__(self, sck, mosi, miso, rst, cs,baudrate=1000000,spi_id=0,irq=None):
+ 
+        # Preallocated SPI transfer buffers: register access allocates nothing
+        self._wbuf = bytearray(2)
+        self._rbuf = bytearray(2)
+        self._fifo_tx = bytearray(19)   # FIFO address + up to 18 bytes (16 data + CRC)
+        self._fifo_rx = bytearray(19)
+        self._irq_fired = False
+        self.irq = None
+        if irq is not None:
+            # Optional IRQ pin (active low): wait for the chip instead of polling it over SPI
+            self.irq = Pin(irq, Pin.IN, Pin.PULL_UP)
+            self.irq.irq(self._on_irq, Pin.IRQ_FALLING)
+
         self.sck = Pin(sck, Pin.OUT)
         self.mosi = Pin(mosi, Pin.OUT)
         self.miso = Pin(miso)
@@ -48,21 +64,47 @@ class MFRC522:
         self.rst.value(1)
         self.init()
  
+    def _on_irq(self, pin):
+        self._irq_fired = True
+
     def _wreg(self, reg, val):
  
+        self._wbuf[0] = (reg << 1) & 0x7e
+        self._wbuf[1] = val & 0xff
         self.cs.value(0)
-        self.spi.write(b'%c' % int(0xff & ((reg << 1) & 0x7e)))
-        self.spi.write(b'%c' % int(0xff & val))
+        self.spi.write(self._wbuf)
         self.cs.value(1)
  
     def _rreg(self, reg):
  
+        self._wbuf[0] = ((reg << 1) & 0x7e) | 0x80
+        self._wbuf[1] = 0
         self.cs.value(0)
-        self.spi.write(b'%c' % int(0xff & (((reg << 1) & 0x7e) | 0x80)))
-        val = self.spi.read(1)
+        self.spi.write_readinto(self._wbuf, self._rbuf)
         self.cs.value(1)
  
-        return val[0]
+        return self._rbuf[1]
+
+    def _wfifo(self, data):
+        # Burst-write bytes to FIFODataReg (0x09) in one SPI transaction
+        n = len(data)
+        self._fifo_tx[0] = (0x09 << 1) & 0x7e
+        for i in range(n):
+            self._fifo_tx[i + 1] = data[i] & 0xff
+        self.cs.value(0)
+        self.spi.write(memoryview(self._fifo_tx)[:n + 1])
+        self.cs.value(1)
+
+    def _rfifo(self, n):
+        # Burst-read n bytes from FIFODataReg (0x09) in one SPI transaction
+        addr = ((0x09 << 1) & 0x7e) | 0x80
+        for i in range(n):
+            self._fifo_tx[i] = addr
+        self._fifo_tx[n] = 0
+        self.cs.value(0)
+        self.spi.write_readinto(memoryview(self._fifo_tx)[:n + 1], memoryview(self._fifo_rx)[:n + 1])
+        self.cs.value(1)
+        return list(self._fifo_rx[1:n + 1])
  
     def _sflags(self, reg, mask):
         self._wreg(reg, self._rreg(reg) | mask)
@@ -85,26 +127,33 @@ class MFRC522:
  
         self._wreg(0x02, irq_en | 0x80)
         self._cflags(0x04, 0x80)
+        self._irq_fired = False
         self._sflags(0x0A, 0x80)
         self._wreg(0x01, 0x00)
  
-        for c in send:
-            self._wreg(0x09, c)
+        self._wfifo(send)
         self._wreg(0x01, cmd)
  
         if cmd == 0x0C:
             self._sflags(0x0D, 0x80)
  
-        i = 2000
+        # Wait for completion (wait_irq) or the chip's timeout timer (0x01), sleeping between checks
+        # rather than spinning on SPI reads. With an IRQ pin, ComIrqReg is only read once it fires.
+        deadline = time.ticks_add(time.ticks_ms(), self.TIMEOUT_MS)
+        timed_out = False
         while True:
-            n = self._rreg(0x04)
-            i -= 1
-            if ~((i != 0) and ~(n & 0x01) and ~(n & wait_irq)):
+            if self.irq is None or self._irq_fired or self.irq.value() == 0:
+                n = self._rreg(0x04)
+                if n & (wait_irq | 0x01):
+                    break
+            if time.ticks_diff(deadline, time.ticks_ms()) < 0:
+                timed_out = True
                 break
+            time.sleep_us(self.POLL_US)
  
         self._cflags(0x0D, 0x80)
  
-        if i:
+        if not timed_out:
             if (self._rreg(0x06) & 0x1B) == 0x00:
                 stat = self.OK
  
@@ -123,8 +172,7 @@ class MFRC522:
                     elif n > 16:
                         n = 16
  
-                    for _ in range(n):
-                        recv.append(self._rreg(0x09))
+                    recv = self._rfifo(n)
             else:
                 stat = self.ERR
  
@@ -135,8 +183,7 @@ class MFRC522:
         self._cflags(0x05, 0x04)
         self._sflags(0x0A, 0x80)
  
-        for c in data:
-            self._wreg(0x09, c)
+        self._wfifo(data)
  
         self._wreg(0x01, 0x03)
  
@@ -281,7 +328,7 @@ class MFRC522:
                 if status != self.OK:
                     return (self.ERR,[])
                 if self.DEBUG: print("Anticol(3) {}".format(uid))
-                if self.MFRC522_PcdSelect(uid,self.PICC_ANTICOLL3) == 0:
+                if self.PcdSelect(uid,self.PICC_ANTICOLL3) == 0:
                     return (self.ERR,[])
                 if self.DEBUG: print("PcdSelect(3) {}".format(uid))
         valid_uid.extend(uid[0:5])
@@ -0,0 +1,158 @@
+# padlink.py
+# Persistent, framed connection from the RFID pad to the Pi, run as a uasyncio task.
+#
+# Frames are single ASCII lines:
+#   pad -> Pi : PICO|<pad_id>|<seq>|<TYPE>|<payload>\n   TYPE is HELLO, TAP, BTN or HB
+#   Pi -> pad : <seq>|<STATUS>|<payload>\n               STATUS is ACK, ERR or DUP
+# Every frame carries a sequence number and stays queued until the Pi acknowledges it,
+# so frames are pipelined (the next tap is sent without waiting for the previous reply)
+# and anything unacknowledged is resent after a reconnect. The Pi ignores repeats of a
+# sequence number it has already handled, so a resend never assigns a racer twice (DUP
+# means the Pi handled it but no longer has the original reply).
+# HELLO carries a per-boot id so the Pi knows when the pad has restarted its numbering.
+# If the link stays down long enough for MAX_QUEUE frames to pile up, the oldest is
+# dropped and handed to the reply queue with status LOST, so the pad can show it.
+
+import os
+import time
+import network
+import uasyncio as asyncio
+from padqueue import Queue
+
+HEARTBEAT_MS = 3000       # Send a heartbeat after this long without traffic
+REPLY_TIMEOUT_MS = 8000   # Reconnect if the oldest frame waits this long for an ACK
+WIFI_TIMEOUT_MS = 10000   # Give up on one Wi-Fi join attempt after this long
+BACKOFF_MIN_MS = 500      # First reconnect delay
+BACKOFF_MAX_MS = 8000     # Reconnect delay cap
+MAX_QUEUE = 16            # Frames held while offline; the oldest are dropped (and reported LOST) beyond this
+
+LOST = "LOST"             # Reply status of a frame dropped from a full queue, never sent to the Pi
+
+# Link states
+OFFLINE = "offline"
+CONNECTING = "connecting"
+ONLINE = "online"
+
+
+class PadLink:
+
+    def __init__(self, pad_id, server_ip, server_port, ssid, password):
+        self.pad_id = pad_id
+        self.server_ip = server_ip
+        self.server_port = server_port
+        self.ssid = ssid
+        self.password = password
+        self.wlan = network.WLAN(network.STA_IF)
+        self.wlan.active(True)
+        self.state = OFFLINE
+        self.boot_id = "%08x" % int.from_bytes(os.urandom(4), "big")
+        self.seq = 0
+        self.pending = []          # [seq, type, payload, sent] awaiting ACK, oldest first
+        # (type, status, payload) for each acknowledged or LOST frame. Room for a full queue's worth of
+        # replies plus the LOST reports made while it filled, so none is dropped before the pad shows it
+        self.replies = Queue(2 * MAX_QUEUE)
+        self.states = Queue(4)     # Link state changes, for the display
+        self._wake = asyncio.Event()
+        self._rx_error = None
+        self.reader = self.writer = None
+        self.last_rx = time.ticks_ms()
+
+    # Queue a frame for the Pi and return its sequence number
+    def send(self, ftype, payload=""):
+        self.seq += 1
+        self.pending.append([self.seq, ftype, payload, False])
+        if len(self.pending) > MAX_QUEUE:
+            # The Pi will never see this frame: tell the pad so the racer taps (or presses) again
+            lost = self.pending.pop(0)
+            self.replies.put_nowait((lost[1], LOST, lost[2]))
+        self._wake.set()
+        return self.seq
+
+    # Task: keep the link up forever, reconnecting with exponential backoff
+    async def run(self):
+        backoff = BACKOFF_MIN_MS
+        while True:
+            try:
+                await self._connect()
+                backoff = BACKOFF_MIN_MS
+                await self._session()
+            except (OSError, asyncio.TimeoutError) as e:
+                print("Link error:", e)
+            self._close()
+            await asyncio.sleep_ms(backoff)
+            backoff = min(backoff * 2, BACKOFF_MAX_MS)
+
+    def _set_state(self, state):
+        if state != self.state:
+            self.state = state
+            self.states.put_nowait(state)
+
+    async def _connect(self):
+        self._set_state(CONNECTING)
+        if not self.wlan.isconnected():
+            self.wlan.connect(self.ssid, self.password)
+            deadline = time.ticks_add(time.ticks_ms(), WIFI_TIMEOUT_MS)
+            while not self.wlan.isconnected():
+                if time.ticks_diff(deadline, time.ticks_ms()) < 0:
+                    raise OSError("wifi timeout")
+                await asyncio.sleep_ms(100)
+        self.reader, self.writer = await asyncio.wait_for_ms(
+            asyncio.open_connection(self.server_ip, self.server_port), 3000)
+        self._rx_error = None
+        self.last_rx = time.ticks_ms()
+        self._set_state(ONLINE)
+        # Announce this boot, then resend everything still unacknowledged
+        self.writer.write("PICO|%s|0|HELLO|%s\n" % (self.pad_id, self.boot_id))
+        for frame in self.pending:
+            frame[3] = False
+
+    async def _session(self):
+        receiver = asyncio.create_task(self._receive())
+        try:
+            while True:
+                for frame in self.pending:
+                    if not frame[3]:
+                        self.writer.write("PICO|%s|%d|%s|%s\n" % (self.pad_id, frame[0], frame[1], frame[2]))
+                        frame[3] = True
+                await self.writer.drain()
+                try:
+                    await asyncio.wait_for_ms(self._wake.wait(), HEARTBEAT_MS)
+                except asyncio.TimeoutError:
+                    self.writer.write("PICO|%s|0|HB|\n" % self.pad_id)
+                self._wake.clear()
+                if self._rx_error:
+                    raise self._rx_error
+                waiting = self.pending and self.pending[0][3]
+                if waiting and time.ticks_diff(time.ticks_ms(), self.last_rx) > REPLY_TIMEOUT_MS:
+                    raise OSError("reply timeout")
+        finally:
+            receiver.cancel()
+
+    async def _receive(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    raise OSError("closed by server")
+                self.last_rx = time.ticks_ms()
+                parts = line.decode().strip().split("|", 2)
+                if len(parts) < 3 or parts[0] == "0":
+                    continue  # Heartbeat / HELLO acknowledgements
+                seq = int(parts[0])
+                for i, frame in enumerate(self.pending):
+                    if frame[0] == seq:
+                        self.replies.put_nowait((frame[1], parts[1], parts[2]))
+                        self.pending.pop(i)
+                        break
+        except OSError as e:
+            self._rx_error = e
+            self._wake.set()
+
+    def _close(self):
+        if self.writer:
+            try:
+                self.writer.close()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+        self._set_state(OFFLINE)
@@ -0,0 +1,29 @@
+# padqueue.py
+# Small event queue for uasyncio tasks on the pad (uasyncio has no Queue of its own).
+# One consumer per queue. put_nowait() never blocks: when the queue is full the oldest
+# item is dropped, so a stalled consumer cannot stall the producer.
+
+import uasyncio as asyncio
+
+
+class Queue:
+
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self._items = []
+        self._event = asyncio.Event()
+
+    def __len__(self):
+        return len(self._items)
+
+    def put_nowait(self, item):
+        if len(self._items) >= self.maxsize:
+            self._items.pop(0)
+        self._items.append(item)
+        self._event.set()
+
+    async def get(self):
+        while not self._items:
+            self._event.clear()
+            await self._event.wait()
+        return self._items.pop(0)
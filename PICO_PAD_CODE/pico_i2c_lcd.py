@@ -83,4 +83,20 @@ class I2cLcd(LcdApi):
                 ((data & 0x0f) << SHIFT_DATA))      
         self.i2c.writeto(self.i2c_addr, bytes([byte | MASK_E]))
         self.i2c.writeto(self.i2c_addr, bytes([byte]))
-        gc.collect()
\ No newline at end of file
+        gc.collect()
+
+    def hal_write_data_run(self, data):
+        # Write a run of characters in a single I2C transaction: four PCF8574
+        # writes (E high/low for each nibble) per character, sent back to back.
+        base = MASK_RS | (self.backlight << SHIFT_BACKLIGHT)
+        buf = bytearray(len(data) * 4)
+        i = 0
+        for ch in data:
+            hi = base | (((ch >> 4) & 0x0f) << SHIFT_DATA)
+            lo = base | ((ch & 0x0f) << SHIFT_DATA)
+            buf[i] = hi | MASK_E
+            buf[i + 1] = hi
+            buf[i + 2] = lo | MASK_E
+            buf[i + 3] = lo
+            i += 4
+        self.i2c.writeto(self.i2c_addr, buf)
@@ -0,0 +1,53 @@
+# tag_reader.py
+# Debounced RFID tag reader for the pad.
+# The MFRC522 (SPI bus, pins and chip registers) is set up once, polling is rate-limited
+# so the CPU idles between checks, and a tag resting on the reader is reported once:
+# the same UID is only reported again after it has been away for RELEASE_MS.
+
+import time
+from mfrc522 import MFRC522
+
+POLL_INTERVAL_MS = 50   # Minimum time between card checks
+RELEASE_MS = 1000       # Same tag must be absent this long before it is reported again
+
+
+# Function to convert UID to decimal string
+def uid_to_decimal_str(uid):
+    decimal_id = 0
+    for byte in uid:
+        decimal_id = decimal_id * 256 + byte
+    return str(decimal_id)
+
+
+class TagReader:
+
+    def __init__(self, spi_id=0, sck=6, miso=4, mosi=7, cs=5, rst=22, irq=None):
+        self.reader = MFRC522(spi_id=spi_id, sck=sck, miso=miso, mosi=mosi, cs=cs, rst=rst, irq=irq)
+        self.next_poll = time.ticks_ms()
+        self.last_uid = None
+        self.last_seen = time.ticks_ms()
+
+    # Milliseconds until the next card check is due (0 if due now)
+    def ms_until_poll(self):
+        return max(0, time.ticks_diff(self.next_poll, time.ticks_ms()))
+
+    # Check for a card; returns a new tag's decimal id, or None
+    def poll(self):
+        now = time.ticks_ms()
+        if time.ticks_diff(now, self.next_poll) < 0:
+            return None
+        self.next_poll = time.ticks_add(now, POLL_INTERVAL_MS)
+
+        reader = self.reader
+        (stat, tag_type) = reader.request(reader.REQIDL)
+        if stat != reader.OK:
+            return None
+        (stat, uid) = reader.SelectTagSN()
+        if stat != reader.OK:
+            return None
+
+        card = uid_to_decimal_str(uid)
+        repeat = card == self.last_uid and time.ticks_diff(now, self.last_seen) < RELEASE_MS
+        self.last_uid = card
+        self.last_seen = now
+        return None if repeat else card
@@ -3,7 +3,8 @@ cubcar26/__init__.py
 
 Package initializer for the cubcar26 application. Defines package metadata, version, and imports key modules.
 
-Usage: Implicitly executed on import to set up package-level variables.
+Usage: Implicitly executed on import. Importing has no side effects such as opening a database connection;
+call get_db_handler() for a shared DatabaseHandler, created on first use.
 """
 
 __version__ = "1.0.0"
@@ -15,6 +16,12 @@ from .config import Config
 from .db_handler import DatabaseHandler
 from .race_manager import RaceManager
 
-# Package-level variables
-config = Config()
-db_handler = DatabaseHandler()
\ No newline at end of file
+_db_handler = None
+
+
+def get_db_handler():
+    """Returns the package-level DatabaseHandler, connecting on first call."""
+    global _db_handler
+    if _db_handler is None:
+        _db_handler = DatabaseHandler()
+    return _db_handler
@@ -0,0 +1,128 @@
+"""
+clock_sync.py
+
+Purpose: NTP-style clock offset and drift estimation between the Pi and a remote device (ESP32 or Pico).
+
+Each sample is one TIME round trip over the device's existing socket: the Pi notes when it sent the request and
+when the reply arrived, and the device reports its microsecond clock. Assuming the reply was stamped halfway
+through the round trip, the offset is known to within half the round-trip time. Wi-Fi round trips vary a lot, so
+only the fastest samples in a sliding window are trusted (a minimum filter), and a least-squares line through
+them gives the offset and its drift. Device timestamps can then be converted into the Pi's time.monotonic()
+timebase, and Pi instants into device time for scheduling.
+
+Usage: clock = ClockSync(); clock.sync(link.ping); clock.start(link.ping) for background resyncs;
+clock.to_local(device_us) and clock.to_device_us(local_s).
+"""
+
+import threading
+from collections import deque
+from logger import logger
+
+
+class ClockSync:
+    def __init__(self, window=64, best=8, name="device"):
+        """
+        Initializes the ClockSync.
+
+        Args:
+            window (int): Most recent samples considered.
+            best (int): Lowest-latency samples from the window used for the fit.
+            name (str): Name used in log messages.
+        """
+        self.samples = deque(maxlen=window)  # (local midpoint s, offset us, round trip us)
+        self.best = best
+        self.name = name
+        self.offset_us = None  # device_us - local_us at ref_time
+        self.drift = 0.0  # Change in offset per local microsecond (1e-6 == 1 ppm)
+        self.ref_time = 0.0
+        self.uncertainty_us = None
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+
+    @property
+    def synced(self):
+        return self.offset_us is not None
+
+    def add_sample(self, sent, device_us, received):
+        """
+        Adds one round-trip measurement and refits the estimate.
+
+        Args:
+            sent (float): time.monotonic() when the request was sent.
+            device_us (int): Device clock in the reply.
+            received (float): time.monotonic() when the reply arrived.
+        """
+        midpoint = (sent + received) / 2
+        round_trip_us = (received - sent) * 1_000_000
+        with self.lock:
+            self.samples.append((midpoint, device_us - midpoint * 1_000_000, round_trip_us))
+            self._fit()
+
+    def _fit(self):
+        # Caller holds self.lock
+        best = sorted(self.samples, key=lambda s: s[2])[:self.best]
+        ref = sum(s[0] for s in best) / len(best)
+        mean_offset = sum(s[1] for s in best) / len(best)
+        spread = sum((s[0] - ref) ** 2 for s in best)
+        drift = 0.0
+        if len(best) >= 3 and spread > 1.0:  # Need samples spread over time before drift means anything
+            drift = sum((s[0] - ref) * (s[1] - mean_offset) for s in best) / spread / 1_000_000
+        self.ref_time = ref
+        self.offset_us = mean_offset
+        self.drift = drift
+        self.uncertainty_us = best[0][2] / 2
+
+    def offset_at(self, local_s):
+        """
+        Returns the estimated device-minus-Pi offset in microseconds at a Pi instant.
+        """
+        if self.offset_us is None:
+            raise RuntimeError(f"Clock for {self.name} has not been synchronized")
+        return self.offset_us + self.drift * (local_s - self.ref_time) * 1_000_000
+
+    def to_device_us(self, local_s):
+        """
+        Converts a time.monotonic() instant to the device clock.
+        """
+        return int(local_s * 1_000_000 + self.offset_at(local_s))
+
+    def to_local(self, device_us):
+        """
+        Converts a device timestamp to the Pi's time.monotonic() timebase.
+        """
+        local_s = (device_us - self.offset_at(self.ref_time)) / 1_000_000
+        # One refinement accounts for drift between ref_time and the stamp
+        return (device_us - self.offset_at(local_s)) / 1_000_000
+
+    def sync(self, ping, samples=8):
+        """
+        Takes several samples back to back.
+
+        Args:
+            ping (function): Returns (sent, device_us, received), e.g. DeviceLink.ping.
+            samples (int): Number of round trips.
+        """
+        for _ in range(samples):
+            self.add_sample(*ping())
+        logger.info(f"Clock sync with {self.name}: offset {self.offset_us:.0f} us, "
+                    f"drift {self.drift * 1_000_000:.1f} ppm, +/-{self.uncertainty_us:.0f} us")
+
+    def start(self, ping, interval=10.0):
+        """
+        Resynchronizes in a background thread every interval seconds until stop().
+        """
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.sync(ping, samples=4)
+                except Exception as e:
+                    logger.warning(f"Clock sync with {self.name} failed: {e}")
+
+        self._stop.clear()
+        threading.Thread(target=run, daemon=True).start()
+
+    def stop(self):
+        """
+        Stops background resyncs.
+        """
+        self._stop.set()
@@ -0,0 +1,202 @@
+"""
+device_link.py
+
+Purpose: Persistent, pipelined command channel to a Wi-Fi device (the drag-gate and drag-start ESP32s).
+
+One TCP connection is kept open and commands are pipelined over it: each carries a sequence number and returns a
+Future, so a slow command never holds up a fast one. The device may also push unsolicited events (button presses)
+on the same connection, stamped with its own clock.
+
+Protocol (one ASCII line per frame):
+    Pi -> device : <seq>|<COMMAND>|<args>\n
+    device -> Pi : <seq>|<ACK or ERR>|<payload>\n     reply to a command
+                   0|EVENT|<name>|<args>\n           unsolicited event
+Every device answers TIME with its microsecond clock, which ping() uses for round trips and clock sync.
+
+The reader blocks on the socket without a timeout, since replies to scheduled commands (a relay fire, a stepper
+move) legitimately take a while. A reply that does not arrive within the timeout of request() or wait() is taken
+to mean the connection is dead: it is closed, every command in flight fails, and the next command reconnects.
+
+Usage: Subclass DeviceLink (see devices/esp32_draggate.py), or instantiate it directly and call request().
+"""
+
+import socket
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from config import Config
+from logger import logger
+
+
+class DeviceCommandError(Exception):
+    """Raised when a device answers ERR or the connection drops before a reply."""
+
+
+class DeviceLink:
+    def __init__(self, host, port, name="device", timeout=None, on_event=None):
+        """
+        Initializes the DeviceLink. The connection is opened on first use.
+
+        Args:
+            host (str): Device address.
+            port (int): Device port.
+            name (str): Name used in log messages.
+            timeout (float, optional): Seconds to wait for a reply. Defaults to Config.SOCKET_TIMEOUT.
+            on_event (function, optional): Called as on_event(name, args) for each event the device pushes.
+                                           Runs on the reader thread.
+        """
+        self.host = host
+        self.port = port
+        self.name = name
+        self.timeout = timeout or Config.SOCKET_TIMEOUT
+        self.on_event = on_event
+        self.sock = None
+        self.seq = 0
+        self.pending = {}  # seq -> Future awaiting the device's reply
+        self.lock = threading.Lock()
+
+    def connect(self):
+        """
+        Opens the persistent connection and starts the reply reader.
+        """
+        with self.lock:
+            self._connect()
+
+    def _connect(self):
+        # Caller holds self.lock
+        if self.sock:
+            return
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # Frames are tiny; never batch them
+        sock.settimeout(None)  # Replies may be slow on purpose; wait() and request() detect a dead link
+        self.sock = sock
+        threading.Thread(target=self._read_replies, args=(sock,), daemon=True).start()
+        logger.info(f"Connected to {self.name} at {self.host}:{self.port}")
+
+    def send_command(self, command, *args):
+        """
+        Sends one command without waiting for its reply.
+
+        Args:
+            command (str): Command name.
+            *args: Command arguments.
+
+        Returns:
+            Future: Resolves to the reply payload, or raises DeviceCommandError.
+        """
+        future = Future()
+        with self.lock:
+            self._connect()
+            self.seq += 1
+            self.pending[self.seq] = future
+            frame = "|".join([str(self.seq), command] + [str(a) for a in args]) + "\n"
+            try:
+                self.sock.sendall(frame.encode())
+            except OSError as e:
+                self._drop(e)
+        return future
+
+    def request(self, command, *args):
+        """
+        Sends one command and waits for its reply payload.
+        """
+        return self.wait(self.send_command(command, *args))
+
+    def wait(self, future, timeout=None):
+        """
+        Waits for a command's reply. If none arrives in time the connection is dropped, so that a dead link fails
+        every command in flight and the next command reconnects, instead of each caller waiting out its timeout.
+
+        Args:
+            future (Future): A Future returned by send_command() or built on one.
+            timeout (float, optional): Seconds to wait. Defaults to the link's timeout.
+
+        Returns:
+            The future's result.
+
+        Raises:
+            TimeoutError: If no reply arrived in time.
+            DeviceCommandError: If the device answered ERR or the connection dropped.
+        """
+        timeout = timeout or self.timeout
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            with self.lock:
+                if self.sock and not future.done():
+                    self._drop(OSError(f"no reply within {timeout}s"))
+            raise TimeoutError(f"No reply from {self.name} within {timeout}s") from None
+
+    def _read_replies(self, sock):
+        buffer = ""
+        try:
+            while True:
+                data = sock.recv(1024)
+                if not data:
+                    raise OSError(f"connection closed by {self.name}")
+                buffer += data.decode()
+                *lines, buffer = buffer.split("\n")
+                for line in lines:
+                    self._handle_line(line.strip())
+        except OSError as e:
+            with self.lock:
+                if self.sock is sock:
+                    self._drop(e)
+
+    def _handle_line(self, line):
+        parts = line.split("|")
+        if len(parts) < 2 or not parts[0].isdigit():
+            return
+        if parts[0] == "0" and parts[1] == "EVENT":
+            if self.on_event and len(parts) > 2:
+                try:
+                    self.on_event(parts[2], parts[3:])
+                except Exception as e:
+                    logger.error(f"Error handling {self.name} event {line}: {e}")
+            return
+        with self.lock:
+            future = self.pending.pop(int(parts[0]), None)
+        if future is None:
+            return
+        payload = "|".join(parts[2:])
+        if parts[1] == "ACK":
+            future.set_result(payload)
+        else:
+            future.set_exception(DeviceCommandError(payload or "ERR"))
+
+    def _drop(self, error, log=True):
+        # Caller holds self.lock. Fails everything in flight; the next command reconnects.
+        if log:
+            logger.warning(f"{self.name} connection lost: {error}")
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)  # Wakes the reader blocked in recv()
+        except OSError:
+            pass
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+        self.sock = None
+        pending, self.pending = self.pending, {}
+        for future in pending.values():
+            future.set_exception(DeviceCommandError(str(error)))
+
+    def ping(self):
+        """
+        Measures one round trip and reads the device clock.
+
+        Returns:
+            tuple: (sent, device_us, received) with sent/received in time.monotonic() seconds.
+        """
+        sent = time.monotonic()
+        device_us = int(self.request("TIME"))
+        return sent, device_us, time.monotonic()
+
+    def close(self):
+        """
+        Closes the connection to the device.
+        """
+        with self.lock:
+            if self.sock:
+                self._drop(OSError("closed"), log=False)
+        logger.info(f"{self.name} connection closed.")
@@ -4,13 +4,20 @@ serial_comm.py
 Purpose: Manages serial communication with Arduino Nano over a specified port and baud rate.
 Includes methods to send and receive framed messages with logging and error handling.
 
-Usage: Instantiate SerialCommunicator, then call send() and read().
+Usage: Instantiate SerialCommunicator, then call send() and read(); ping() measures the round trip to the Nano.
+A single reader thread owns the port's input: ping replies are matched to their ping, and every other line is
+buffered for read(), so pinging from diagnostics never swallows a reply meant for someone else.
 """
 
+import threading
+import time
+from collections import deque
 import serial
 from logger import logger
 from config import Config  # Import Config for port and baud rate configuration
 
+LINE_BUFFER = 256  # Unread lines kept for read(); the Nano acknowledges every command, so old ones are dropped
+
 
 class SerialCommunicator:
     def __init__(self, port=None, baud=None, timeout=1):
@@ -19,13 +26,20 @@ class SerialCommunicator:
 
         Args:
             port (str, optional): The serial port to connect to (e.g., "/dev/ttyUSB0").
-                                  Defaults to Config.SERIAL_PORT.
+                                  Defaults to Config.ARDUINO_PORT.
             baud (int, optional): The baud rate for the serial connection.
-                                  Defaults to Config.SERIAL_BAUD.
+                                  Defaults to Config.ARDUINO_BAUD.
             timeout (int): Timeout for the serial connection in seconds.
         """
-        self.port = port or Config.SERIAL_PORT
-        self.baud = baud or Config.SERIAL_BAUD
+        self.port = port or Config.ARDUINO_PORT
+        self.baud = baud or Config.ARDUINO_BAUD
+        self.timeout = timeout
+        self.lock = threading.Lock()  # Keeps a command and a ping from interleaving on the wire
+        self.ping_seq = 0  # Sequence number of the last ping, echoed back by the sketch
+        self.received = threading.Condition()  # Notified by the reader thread for every line
+        self.lines = deque(maxlen=LINE_BUFFER)  # Lines other than ping replies, oldest first
+        self.waiting = set()  # Sequence numbers of pings still waiting for their reply
+        self.pongs = {}  # Ping sequence number -> time.monotonic() its reply arrived
 
         try:
             self.ser = serial.Serial(self.port, self.baud, timeout=timeout)
@@ -33,6 +47,27 @@ class SerialCommunicator:
         except serial.SerialException as e:
             logger.error(f"Serial open error: {e}")
             raise
+        threading.Thread(target=self._receive, name="serial-reader", daemon=True).start()
+
+    def _receive(self):
+        while self.ser.is_open:
+            try:
+                line = self.ser.readline()
+            except Exception as e:
+                if self.ser.is_open:
+                    logger.error(f"Serial read error: {e}")
+                break
+            if not line:
+                continue
+            arrived = time.monotonic()
+            line = line.decode(errors="replace").strip()
+            with self.received:
+                if line.startswith("<PONG|") and line.endswith(">"):
+                    if line[6:-1] in self.waiting:  # A reply to a ping that gave up is dropped
+                        self.pongs[line[6:-1]] = arrived
+                else:
+                    self.lines.append(line)
+                self.received.notify_all()
 
     def send(self, message: str):
         """
@@ -42,7 +77,8 @@ class SerialCommunicator:
             message (str): The message to send.
         """
         try:
-            self.ser.write(message.encode())
+            with self.lock:
+                self.ser.write(message.encode())
             logger.debug(f"Sent over serial: {message}")
         except Exception as e:
             logger.error(f"Serial send error: {e}")
@@ -53,15 +89,41 @@ class SerialCommunicator:
         Reads a message from the serial connection.
 
         Returns:
-            str: The message received from the serial connection.
+            str: The oldest unread message, or "" if none arrives within the port timeout.
         """
-        try:
-            line = self.ser.readline().decode().strip()
-            logger.debug(f"Received from serial: {line}")
-            return line
-        except Exception as e:
-            logger.error(f"Serial read error: {e}")
-            raise
+        with self.received:
+            if not self.received.wait_for(lambda: self.lines, self.timeout):
+                return ""
+            line = self.lines.popleft()
+        logger.debug(f"Received from serial: {line}")
+        return line
+
+    def ping(self) -> float:
+        """
+        Measures one round trip to the Nano. "PING|<n>" carries a fresh sequence number that the sketch echoes as
+        "<PONG|<n>>", so a late "<ACK>" of an earlier LED command is never timed as the reply. The lock is held only
+        while writing; the reply is stamped by the reader thread when it arrives.
+
+        Returns:
+            float: Round-trip time in seconds.
+
+        Raises:
+            TimeoutError: If no reply arrives within the port timeout.
+        """
+        with self.lock:
+            self.ping_seq += 1
+            seq = str(self.ping_seq)
+            with self.received:
+                self.waiting.add(seq)
+            sent = time.monotonic()
+            self.ser.write(f"PING|{seq}\n".encode())
+        with self.received:
+            try:
+                if not self.received.wait_for(lambda: seq in self.pongs, self.timeout):
+                    raise TimeoutError(f"No reply to ping {seq} from {self.port}")
+                return self.pongs.pop(seq) - sent
+            finally:
+                self.waiting.discard(seq)
 
     def close(self):
         """
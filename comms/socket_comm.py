@@ -2,10 +2,16 @@
 socket_comm.py
 
 Purpose: Provides a generic socket communication interface for handling multiple devices.
+
+Events:
+    socket_message -- device, time (monotonic time the message was read); published once the device's handler has
+                      run, so subscribers see how long the message took to handle.
 """
 
 import socket
 import threading
+import time
+from event_bus import bus
 from logger import logger
 from config import Config  # Import Config for IP and port configuration
 
@@ -15,7 +21,7 @@ class SocketCommunicator:
         """
         Initializes the SocketCommunicator with host and port from Config.
         """
-        self.host = Config.SOCKET_HOST if hasattr(Config, 'SOCKET_HOST') else "0.0.0.0"
+        self.host = Config.SOCKET_HOST
         self.port = Config.SOCKET_PORT
         self.server_socket = None
         self.running = False
@@ -58,26 +64,28 @@ class SocketCommunicator:
         """
         Handles communication with a connected client.
         """
+        buffer = ""
+        framed = False  # Set once the client is seen to terminate messages with newlines
         try:
             while True:
-                data = client_socket.recv(1024).decode().strip()
+                data = client_socket.recv(1024).decode()
+                received = time.monotonic()
                 if not data:
                     break
 
-                logger.info(f"Received data: {data}")
-                # Parse the device name from the incoming data
-                if "|" in data:
-                    device_name, command = data.split("|", 1)
-                    if device_name in self.device_handlers:
-                        # Call the registered handler for the device
-                        response = self.device_handlers[device_name](command)
-                        client_socket.send(response.encode())
-                    else:
-                        logger.warning(f"No handler registered for device: {device_name}")
-                        client_socket.send(b"Unknown device\n")
+                # Messages are newline-framed so several can arrive in one read (pipelined clients).
+                # Until a newline is seen, each read is treated as one message, as older clients send.
+                buffer += data
+                framed = framed or "\n" in data
+                if not framed:
+                    messages, buffer = [buffer], ""
                 else:
-                    logger.warning(f"Invalid data format: {data}")
-                    client_socket.send(b"Invalid data format\n")
+                    *messages, buffer = buffer.split("\n")
+
+                for message in messages:
+                    message = message.strip()
+                    if message:
+                        client_socket.sendall(self.dispatch(message, received).encode())
 
         except (ConnectionResetError, socket.error) as e:
             logger.warning(f"Connection error: {e}")
@@ -85,6 +93,32 @@ class SocketCommunicator:
             client_socket.close()
             logger.info("Client connection closed")
 
+    def dispatch(self, data, received=None):
+        """
+        Routes one "<device>|<command>" message to its registered handler.
+
+        Args:
+            data (str): The message.
+            received (float, optional): time.monotonic() when it was read. Defaults to now.
+
+        Returns:
+            str: The newline-terminated response to send back.
+        """
+        logger.info(f"Received data: {data}")
+        # Parse the device name from the incoming data
+        if "|" in data:
+            device_name, command = data.split("|", 1)
+            if device_name in self.device_handlers:
+                # Call the registered handler for the device
+                response = self.device_handlers[device_name](command)
+                bus.publish("socket_message", device=device_name,
+                            time=time.monotonic() if received is None else received)
+                return response if response.endswith("\n") else response + "\n"
+            logger.warning(f"No handler registered for device: {device_name}")
+            return "Unknown device\n"
+        logger.warning(f"Invalid data format: {data}")
+        return "Invalid data format\n"
+
     def shutdown(self):
         """
         Shuts down the socket server and releases resources.
@@ -3,9 +3,23 @@ config.py
 
 Purpose: Central configuration for CubCar application. Defines constants and loads environment variables for database, communication, GUI, and logging settings.
 
-Usage: Import Config class to access application settings across modules.
+The constants in Config are the defaults. load_config() layers a settings file over them (an INI file: a [cubcar]
+section, plus "[profile NAME]" sections for per-track profiles, chosen by CUBCAR_PROFILE or a PROFILE key in
+[cubcar]) and then environment variables named after the settings. Every value is parsed to the type of its default
+(or TYPES) and validated; errors are reported together, and main.py stops the program on them at startup (an import
+alone reports them on stderr and keeps the defaults). The resolved values are stored back on the Config class, so
+reading Config.X stays a plain attribute lookup. reload_config() re-reads the file when it has changed and applies
+the settings in HOT_RELOAD, which are safe to change between heats; any other change is reported as needing a
+restart.
+
+Usage: Import Config class to access application settings across modules. Call reload_config() between heats and
+save_settings() to edit the file.
 """
+import ast
+import configparser
 import os
+import sys
+from itertools import permutations
 
 class Config:
     # Database settings
@@ -13,25 +27,88 @@ class Config:
     DB_USER = os.getenv('DB_USER', 'cubcaradmin')
     DB_PASS = os.getenv('DB_PASS', 'cubsrock')
     DB_NAME = os.getenv('DB_NAME', 'cubcar')
+    DB_BACKEND = os.getenv('DB_BACKEND', 'mysql')  # "mysql" or "sqlite" (offline / single-track events)
+    DB_SQLITE_PATH = os.getenv('DB_SQLITE_PATH', 'cubcar.db')  # Local database file for the sqlite backend
 
     # Serial port for Arduino Nano
     ARDUINO_PORT = os.getenv('ARDUINO_PORT', '/dev/ttyS0')
     ARDUINO_BAUD = 57600
 
     # Socket settings
+    SOCKET_HOST = os.getenv('SOCKET_HOST', '0.0.0.0')
     SOCKET_PORT = 12345
     SOCKET_TIMEOUT = 5  # seconds
 
+    # Drag-gate ESP32 (relays and gate-reset stepper); empty host disables it
+    ESP32_GATE_HOST = os.getenv('ESP32_GATE_HOST', '')
+    ESP32_GATE_PORT = int(os.getenv('ESP32_GATE_PORT', '12500'))
+    RELAY_HOLD_MS = 250  # How long a gate relay stays energized
+    GATE_RESET_STEPS = 200  # Stepper steps to raise the gates after a race
+
+    # Drag-start ESP32 (lane start buttons and countdown tree); empty host disables it
+    ESP32_START_HOST = os.getenv('ESP32_START_HOST', '')
+    ESP32_START_PORT = int(os.getenv('ESP32_START_PORT', '12501'))
+    COUNTDOWN_SECONDS = 3  # From starting the countdown tree to "go"
+    TREE_STEP_MS = 500  # Time between countdown tree lights
+    CLOCK_RESYNC_SECONDS = 10  # How often device clocks are re-synchronized
+
+    # Gate hardware wired to the Pi's GPIO (used when there is no drag-gate ESP32); None if absent
+    RELAY_SR_PINS = None  # (data, clock, latch) BCM pins of the relay shift register
+    STEPPER_PINS = None  # (step, dir, enable) BCM pins of the gate-reset stepper driver
+    STEPPER_MAX_SPEED = 800  # Steps per second
+    STEPPER_ACCELERATION = 4000  # Steps per second squared
+
+    # Buttons wired to the Pi's GPIO
+    BUTTON_DEBOUNCE_MS = 20  # Edges closer together than this are contact bounce
+    BUTTON_HOLD_SECONDS = 2.5  # Press length that counts as a hold (starts the countdown)
+    START_SWITCH_PIN = None  # BCM pin of the start switch at the top of the track ("simple"/"free"); None if absent
+
+    # Finish-line IR sensors wired to the Pi's GPIO, and the trace kept for reviewing close finishes
+    IR_SENSOR_PINS = None  # BCM pins of the finish sensors in lane order, e.g. [5, 6, 13]; None if absent
+    TRACE_SAMPLE_HZ = 2000  # Sensor levels sampled per second per lane (edges are always recorded)
+    TRACE_BUFFER_SECONDS = None  # Seconds of samples held in each lane's ring buffer; None holds a whole race
+    TRACE_SECONDS_BEFORE = 0.25  # Trace kept before the first finish
+    TRACE_SECONDS_AFTER = 0.25  # Trace kept after the last finish
+    TRACE_DIR = os.getenv('TRACE_DIR', 'traces')  # One binary trace file per heat
+
+    # Sensor diagnostics window (Config > Testing Sensors)
+    DIAG_RATE_WINDOW_SECONDS = 10.0  # Event rates are averaged over this many seconds
+    DIAG_PING_SECONDS = 1.0  # Time between round-trip measurements to the Nano and the ESP32s
+
     # GUI settings
     WINDOW_TITLE = "CubCar Race Tracker"
     WINDOW_SIZE = "800x480"
 
+    # Crash-safe race state (counter, heat, lane assignments, in-flight timings)
+    STATE_JOURNAL_PATH = os.getenv('STATE_JOURNAL_PATH', 'race_state.json')
+    EVENT_JOURNAL_DIR = os.getenv('EVENT_JOURNAL_DIR', 'journals')  # One binary event journal per run; None disables
+
     # Logging
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
 
+    # Settings file and per-track profile (see load_config())
+    CONFIG_PATH = os.getenv('CUBCAR_CONFIG', 'cubcar.ini')
+    PROFILE = os.getenv('CUBCAR_PROFILE', '')  # Active "[profile NAME]" section; empty for the base settings only
+
     # Track settings
     TRACK_NUMBER = 1  # What is this track's number? MUST BE UNIQUE
     NUMBER_LANES = 3  # How many lanes is the track (2, 3, 4)
+    PAD_LANES = {}  # RFID pad id -> lanes that pad fills first, e.g. {"1": [1, 2], "2": [3]} for one pad per side
+    HEAT_SCHEDULE = False  # Run heats from a balanced lane-rotation chart instead of filling lanes as racers tap
+    SCHEDULE_PASSES = 1  # Times each car runs each lane in the chart
+    SCHEDULE_SEARCH_SECONDS = 2  # Time limit for choosing the chart's lane offsets
+    SCHEDULE_NO_SHOW_SECONDS = 120  # Seconds before a scheduled heat races without its no-shows; None waits
+    TOURNAMENT_FORMAT = None  # Finals format: "single", "double" (elimination) or "points"; None races no tournament
+    TOURNAMENT_ADVANCE = None  # Racers going through from each elimination heat; None for half the lanes
+    TOURNAMENT_ROUNDS = 3  # Rounds in the "points" format
+    TOURNAMENT_PATH = os.getenv('TOURNAMENT_PATH', 'tournament.json')  # Saved bracket, for resuming after a restart
+
+    # Multi-track coordination (several tracks sharing one raceresults table)
+    RACE_COUNTER_STRATEGY = os.getenv('RACE_COUNTER_STRATEGY', 'sequence')  # "sequence", or "range" (opt-in)
+    RACE_COUNTER_RANGE_SIZE = 1000000  # Counters owned by each track in "range" mode
+    RACE_COUNTER_BLOCK_SIZE = 100  # Counters reserved per database round trip in "sequence" mode
+    HUB_HOST = os.getenv('HUB_HOST', '')  # Leaderboard hub host; empty disables publishing
+    HUB_PORT = int(os.getenv('HUB_PORT', '12400'))
 
     # Race Start Mode
     RACE_START_MODE = "drag"  # Mode to use for starting races
@@ -48,6 +125,9 @@ class Config:
     RACE_MAX_RACE_TIME = 20  # How long in seconds should a race be before timing out (default 12 seconds)
     RACE_MIN_RACE_TIME = 1  # Default minimum race time (ignore LDR trips before this time)
     RACE_SLOW_BEAVER_TIME = 5  # Time for slow start in "drag" or "collaborate" modes (default 3 seconds)
+    TIE_WINDOW_MS = 1.0  # Finishes closer together than this are declared a tie
+    TIE_POLICY = "share"  # "share" -- tied lanes get the same place; "time" -- keep timestamp order, flag the tie
+    LANE_BIAS_CONFIDENCE = 0.95  # Confidence level of the lane bias intervals in the calibration report
 
     # LED settings
     LED_WINNERLIGHTS_RGB = "RGB"  # Color order for winner lights (RGB, RBG, GRB, etc.)
@@ -56,12 +136,423 @@ class Config:
     # CYAN = (0, 255, 255), BLUE = (0, 0, 255), PURPLE = (180, 0, 255), WHITE = (255, 255, 255)
 
     LED_WINNERLIGHTS_BRIGHTNESS = 100  # Brightness value (0-255) for winner lights
+    LED_WINNERLIGHTS_PIN = None  # BCM pin (18 for PWM) driving the Pi's winner light strip; None if absent
+    LED_WINNERLIGHTS_PER_LANE = 10  # LEDs in each lane's segment of the winner light strip
+    LED_FPS = 50  # Winner light render rate (frames per second)
 
     @staticmethod
     def show_config():
         """Prints all config settings for debugging."""
-        for key, value in Config.__dict__.items():
-            if not key.startswith("__"):
-                print(f"{key}: {value}")
+        for name in schema():
+            print(f"{name}: {getattr(Config, name)}")
+
+
+class ConfigError(ValueError):
+    """Raised when the settings file or environment holds settings that fail validation."""
+
+
+BASE_SECTION = "cubcar"
+PROFILE_PREFIX = "profile "
+
+# Types of settings whose default doesn't show it (None, or whole seconds that may be given as fractions)
+TYPES = {
+    "RELAY_SR_PINS": tuple,
+    "STEPPER_PINS": tuple,
+    "START_SWITCH_PIN": int,
+    "IR_SENSOR_PINS": list,
+    "LED_WINNERLIGHTS_PIN": int,
+    "TOURNAMENT_FORMAT": str,
+    "TOURNAMENT_ADVANCE": int,
+    "SOCKET_TIMEOUT": float,
+    "TRACE_BUFFER_SECONDS": float,
+    "SCHEDULE_NO_SHOW_SECONDS": float,
+    "COUNTDOWN_SECONDS": float,
+    "RACE_MAX_RACE_TIME": float,
+    "RACE_MIN_RACE_TIME": float,
+    "RACE_SLOW_BEAVER_TIME": float,
+}
+
+# Settings that may be None (absent hardware, feature switched off)
+OPTIONAL = frozenset({"RELAY_SR_PINS", "STEPPER_PINS", "START_SWITCH_PIN", "IR_SENSOR_PINS", "LED_WINNERLIGHTS_PIN",
+                      "TOURNAMENT_FORMAT", "TOURNAMENT_ADVANCE", "EVENT_JOURNAL_DIR",
+                      "TRACE_BUFFER_SECONDS", "SCHEDULE_NO_SHOW_SECONDS"})
+
+CHOICES = {
+    "DB_BACKEND": ("mysql", "sqlite"),
+    "RACE_START_MODE": ("drag", "collaborate", "starter", "fast", "simple", "free"),
+    "RACE_COUNTER_STRATEGY": ("sequence", "range"),
+    "TIE_POLICY": ("share", "time"),
+    "TOURNAMENT_FORMAT": ("single", "double", "points"),
+    "LOG_LEVEL": ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"),
+    "LED_WINNERLIGHTS_RGB": tuple("".join(order) for order in permutations("RGB")),
+}
+
+# Inclusive (low, high) bounds; None leaves that side open
+RANGES = {
+    "NUMBER_LANES": (1, 8),
+    "TRACK_NUMBER": (1, None),
+    "SOCKET_PORT": (1, 65535),
+    "HUB_PORT": (1, 65535),
+    "ESP32_GATE_PORT": (1, 65535),
+    "ESP32_START_PORT": (1, 65535),
+    "SOCKET_TIMEOUT": (0.1, None),
+    "COUNTDOWN_SECONDS": (0, 30),
+    "RACE_MAX_RACE_TIME": (1, 300),
+    "RACE_MIN_RACE_TIME": (0, 60),
+    "RACE_SLOW_BEAVER_TIME": (0, 60),
+    "TIE_WINDOW_MS": (0, 100),
+    "LANE_BIAS_CONFIDENCE": (0.5, 0.9999),
+    "LED_WINNERLIGHTS_BRIGHTNESS": (0, 255),
+    "LED_FPS": (1, 240),
+    "TRACE_SAMPLE_HZ": (1, 100000),
+    "DIAG_RATE_WINDOW_SECONDS": (1, 3600),
+    "DIAG_PING_SECONDS": (0.05, 60),
+    "SCHEDULE_PASSES": (1, None),
+    "SCHEDULE_NO_SHOW_SECONDS": (1, None),
+    "TOURNAMENT_ROUNDS": (1, None),
+    "TOURNAMENT_ADVANCE": (1, None),
+}
+
+# Settings read afresh for each heat, so they can change between heats without a restart
+HOT_RELOAD = frozenset({
+    "RACE_START_MODE", "RACE_MAX_RACE_TIME", "RACE_MIN_RACE_TIME", "RACE_SLOW_BEAVER_TIME", "COUNTDOWN_SECONDS",
+    "TREE_STEP_MS", "RELAY_HOLD_MS", "GATE_RESET_STEPS", "TIE_WINDOW_MS", "TIE_POLICY", "LED_WINNERLIGHTS_BRIGHTNESS",
+    "LED_WINNERLIGHTS_DEF", "TRACE_SECONDS_BEFORE", "TRACE_SECONDS_AFTER", "PAD_LANES", "LOG_LEVEL",
+    "SCHEDULE_NO_SHOW_SECONDS",
+})
+
+# Not settings themselves: where the settings come from
+_SOURCE_SETTINGS = ("CONFIG_PATH", "PROFILE")
+
+_defaults = {}  # name -> class default, captured before the first load
+_loaded = {"path": None, "mtime": None, "profile": None, "sources": {}}
+
+
+def schema():
+    """
+    Returns the settings and their types, in declaration order.
+
+    Returns:
+        dict: name -> type (bool, int, float, str, list, tuple or dict).
+    """
+    if not _defaults:
+        _defaults.update((name, value) for name, value in vars(Config).items()
+                         if name.isupper() and name not in _SOURCE_SETTINGS)
+    return {name: TYPES.get(name, type(default)) for name, default in _defaults.items()}
+
+
+def format_value(value):
+    """
+    Formats a setting the way parse_value() reads it back.
+    """
+    if value is None:
+        return "None"
+    if isinstance(value, str):
+        return value
+    return repr(value)
+
+
+def parse_value(name, text):
+    """
+    Parses a setting from file or environment text to its type.
+
+    Args:
+        name (str): Setting name.
+        text (str): Text to parse.
+
+    Returns:
+        The typed value.
+
+    Raises:
+        ConfigError: If the text is not a valid value of the setting's type.
+    """
+    kind = schema()[name]
+    text = text.strip()
+    if name in OPTIONAL and text.lower() in ("", "none"):
+        return None
+    try:
+        if kind is bool:
+            if text.lower() in ("1", "true", "yes", "on"):
+                return True
+            if text.lower() in ("0", "false", "no", "off"):
+                return False
+            raise ValueError("expected true or false")
+        if kind is int:
+            return int(text)
+        if kind is float:
+            return float(text)
+        if kind is str:
+            return text
+        value = ast.literal_eval(text)
+        if kind is tuple and isinstance(value, list):
+            value = tuple(value)
+        if kind is list and isinstance(value, tuple):
+            value = list(value)
+        if not isinstance(value, kind):
+            raise ValueError(f"expected a {kind.__name__}")
+        return value
+    except (ValueError, SyntaxError) as e:
+        raise ConfigError(f"{name}: cannot read {text!r} ({e})")
+
+
+def validate(values):
+    """
+    Checks settings against their types, choices and ranges, and against each other.
+
+    Args:
+        values (dict): name -> value for every setting.
+
+    Returns:
+        list: Problems found, as messages; empty if the settings are valid.
+    """
+    problems = []
+    for name, kind in schema().items():
+        value = values[name]
+        if value is None:
+            if name not in OPTIONAL:
+                problems.append(f"{name}: a value is required")
+            continue
+        if not isinstance(value, kind) or (kind is not bool and isinstance(value, bool)):
+            if not (kind is float and isinstance(value, int)):
+                problems.append(f"{name}: expected {kind.__name__}, got {value!r}")
+                continue
+        if name in CHOICES and value not in CHOICES[name]:
+            problems.append(f"{name}: {value!r} is not one of {', '.join(CHOICES[name])}")
+        if name in RANGES:
+            low, high = RANGES[name]
+            if (low is not None and value < low) or (high is not None and value > high):
+                problems.append(f"{name}: {value} is outside {low if low is not None else '...'}"
+                                f"..{high if high is not None else ''}")
+    if isinstance(values["PAD_LANES"], dict):
+        # The type check above only sees the dict; its entries are checked before the lanes are compared
+        for pad, lanes in values["PAD_LANES"].items():
+            if not isinstance(pad, str):
+                problems.append(f"PAD_LANES: pad ids are text, as the pads send them; got {pad!r}")
+            if not isinstance(lanes, (list, tuple)) or \
+                    any(not isinstance(lane, int) or isinstance(lane, bool) for lane in lanes):
+                problems.append(f"PAD_LANES: pad {pad} needs a list of lane numbers, got {lanes!r}")
+    if not problems:
+        if values["RACE_MIN_RACE_TIME"] >= values["RACE_MAX_RACE_TIME"]:
+            problems.append("RACE_MIN_RACE_TIME must be less than RACE_MAX_RACE_TIME")
+        if values["IR_SENSOR_PINS"] is not None and len(values["IR_SENSOR_PINS"]) < values["NUMBER_LANES"]:
+            problems.append("IR_SENSOR_PINS needs a pin for each of the NUMBER_LANES lanes")
+        for pad, lanes in values["PAD_LANES"].items():
+            if any(not 1 <= lane <= values["NUMBER_LANES"] for lane in lanes):
+                problems.append(f"PAD_LANES: pad {pad} lists a lane outside 1..{values['NUMBER_LANES']}")
+    return problems
+
+
+def _read_file(path):
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.optionxform = str.upper  # Setting names are case-insensitive in the file
+    try:
+        parser.read(path)
+    except configparser.Error as e:
+        raise ConfigError(f"{path}: {e}")
+    return parser
+
+
+def resolve(path=None, profile=None):
+    """
+    Resolves every setting from the defaults, the settings file, the profile and the environment, in that order.
+
+    Args:
+        path (str, optional): Settings file. Defaults to Config.CONFIG_PATH.
+        profile (str, optional): Profile to apply. Defaults to CUBCAR_PROFILE, then the file's PROFILE key.
+
+    Returns:
+        tuple: (values, profile, sources); sources maps each setting to "default", "file", "profile NAME" or "env".
+
+    Raises:
+        ConfigError: If the file cannot be parsed, the profile does not exist, or a value cannot be read.
+    """
+    path = path or Config.CONFIG_PATH
+    kinds = schema()
+    parser = _read_file(path)
+    base = parser[BASE_SECTION] if parser.has_section(BASE_SECTION) else {}
+    profile = profile or os.getenv("CUBCAR_PROFILE") or base.get("PROFILE", "")
+    if profile and not parser.has_section(PROFILE_PREFIX + profile):
+        raise ConfigError(f"{path}: no [{PROFILE_PREFIX}{profile}] section")
+
+    values = dict(_defaults)
+    sources = dict.fromkeys(values, "default")
+    errors = []
+    layers = [(base, "file")]
+    if profile:
+        layers.append((parser[PROFILE_PREFIX + profile], f"profile {profile}"))
+    layers.append(({name: os.environ[name] for name in kinds if name in os.environ}, "env"))
+    for section, source in layers:
+        for name, text in section.items():
+            if name == "PROFILE":
+                continue
+            if name not in kinds:
+                errors.append(f"{name}: unknown setting ({source})")
+                continue
+            try:
+                values[name] = parse_value(name, text)
+                sources[name] = source
+            except ConfigError as e:
+                errors.append(f"{e} ({source})")
+    if errors:
+        raise ConfigError("Invalid configuration:\n  " + "\n  ".join(errors))
+    return values, profile, sources
+
+
+def load_config(path=None, profile=None):
+    """
+    Resolves and validates every setting and stores the values on Config. Called once at import; call it again to
+    switch the settings file or profile.
+
+    Raises:
+        ConfigError: If any setting is invalid.
+    """
+    values, profile, sources = resolve(path, profile)
+    problems = validate(values)
+    if problems:
+        raise ConfigError("Invalid configuration:\n  " + "\n  ".join(problems))
+    path = path or Config.CONFIG_PATH
+    for name, value in values.items():
+        setattr(Config, name, value)
+    Config.CONFIG_PATH, Config.PROFILE = path, profile
+    _loaded.update(path=path, mtime=_mtime(path), profile=profile, sources=sources)
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def sources():
+    """
+    Returns where each setting's current value came from ("default", "file", "profile NAME" or "env").
+    """
+    return dict(_loaded["sources"])
+
+
+def reload_config(force=False):
+    """
+    Re-reads the settings file if it changed since it was loaded and applies the settings that are safe to change
+    between heats. Invalid files are logged and ignored, keeping the current settings.
+
+    Args:
+        force (bool): Re-read the file even if its modification time is unchanged.
+
+    Returns:
+        dict: name -> new value of every setting applied.
+    """
+    from logger import logger
+    path = _loaded["path"] or Config.CONFIG_PATH
+    mtime = _mtime(path)
+    if not force and mtime == _loaded["mtime"]:
+        return {}
+    _loaded["mtime"] = mtime
+    try:
+        values, profile, value_sources = resolve(path, _loaded["profile"])
+        problems = validate(values)
+        if problems:
+            raise ConfigError("Invalid configuration:\n  " + "\n  ".join(problems))
+    except ConfigError as e:
+        logger.error(f"Settings not reloaded: {e}")
+        return {}
+    applied, restart = {}, []
+    for name, value in values.items():
+        if value == getattr(Config, name):
+            continue
+        if name in HOT_RELOAD:
+            setattr(Config, name, value)
+            _loaded["sources"][name] = value_sources[name]
+            applied[name] = value
+        else:
+            restart.append(name)
+    if applied:
+        logger.info("Settings reloaded: " + ", ".join(f"{name}={format_value(v)}" for name, v in applied.items()))
+        if "LOG_LEVEL" in applied:
+            logger.setLevel(applied["LOG_LEVEL"])
+            for handler in logger.handlers:
+                handler.setLevel(applied["LOG_LEVEL"])
+    if restart:
+        logger.warning(f"Restart to apply changed settings: {', '.join(restart)}")
+    from event_bus import bus
+    bus.publish("config_changed", changed=applied, restart=restart)
+    return applied
+
+
+def _set_lines(lines, section, changes):
+    """
+    Sets settings in the lines of a settings file, keeping every other line (comments, blank lines, ordering and
+    other sections) as it is. Existing keys are rewritten in place; new ones are added at the end of the section,
+    which is appended to the file if it does not exist yet.
+    """
+    pending = {name.upper(): text for name, text in changes.items()}
+    out, in_section, end_of_section, skipping = [], False, None, False
+    for line in lines:
+        stripped = line.strip()
+        if skipping and line[:1].isspace() and stripped:
+            continue  # Continuation line of a multi-line value being replaced
+        skipping = False
+        if stripped.startswith("[") and stripped.endswith("]"):
+            in_section = stripped[1:-1] == section
+        elif in_section and stripped and stripped[0] not in "#;" and not line[:1].isspace():
+            key = stripped.split("=", 1)[0].split(":", 1)[0].strip()
+            if key.upper() in pending:
+                line = f"{key} = {pending.pop(key.upper())}\n"
+                skipping = True
+        out.append(line)
+        if in_section and stripped:
+            end_of_section = len(out)  # Just after the section's last non-blank line
+    if pending:
+        added = [f"{name} = {text}\n" for name, text in pending.items()]
+        if end_of_section is None:
+            if out and not out[-1].endswith("\n"):
+                out[-1] += "\n"
+            out += (["\n"] if out else []) + [f"[{section}]\n"] + added
+        else:
+            if not out[end_of_section - 1].endswith("\n"):
+                out[end_of_section - 1] += "\n"
+            out[end_of_section:end_of_section] = added
+    return out
+
+
+def save_settings(changes, path=None, profile=None):
+    """
+    Writes settings into the settings file, in the active profile's section (or [cubcar] without a profile). The
+    new values are validated together with the current ones before anything is written. Only the lines of the
+    changed settings are touched, so comments and layout survive.
+
+    Args:
+        changes (dict): name -> value.
+        path (str, optional): Settings file. Defaults to the loaded one.
+        profile (str, optional): Profile section to write. Defaults to the active profile.
+
+    Raises:
+        ConfigError: If a setting is unknown or the result would be invalid.
+    """
+    path = path or _loaded["path"] or Config.CONFIG_PATH
+    profile = _loaded["profile"] if profile is None else profile
+    unknown = [name for name in changes if name not in schema()]
+    if unknown:
+        raise ConfigError(f"Unknown setting(s): {', '.join(unknown)}")
+    problems = validate({**{name: getattr(Config, name) for name in schema()}, **changes})
+    if problems:
+        raise ConfigError("Invalid configuration:\n  " + "\n  ".join(problems))
+    _read_file(path)  # Refuse to edit a file that does not parse
+    try:
+        with open(path) as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        lines = []
+    section = PROFILE_PREFIX + profile if profile else BASE_SECTION
+    lines = _set_lines(lines, section, {name: format_value(value) for name, value in changes.items()})
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.writelines(lines)
+    os.replace(tmp_path, path)
+
+try:
+    load_config()
+except ConfigError as e:  # main.py calls load_config() again and stops on the error
+    print(f"{e}\nUsing the default settings.", file=sys.stderr)
 
 
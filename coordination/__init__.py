@@ -0,0 +1,8 @@
+"""
+coordination/__init__.py
+
+Purpose: Initializes the coordination subpackage that lets several track controllers share one results database.
+
+Usage: Import RaceCounterAllocator for collision-free race counters, and the leaderboard hub modules for
+merging live results from all tracks.
+"""
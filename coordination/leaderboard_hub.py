@@ -0,0 +1,333 @@
+"""
+leaderboard_hub.py
+
+Purpose: Hub process that merges live results from every track into one leaderboard and pushes each update
+to subscribed displays as it happens, so the tracks can be shown side by side without polling the database.
+Tracks and displays talk to the hub over TCP using newline-delimited JSON messages:
+    {"type": "results", "track": <TrackID>, "results": [<race dict>, ...]}   track -> hub
+    {"type": "subscribe"}                                                    display -> hub
+    {"type": "leaderboard", "standings": [...], "tracks": {...}}             hub -> display (pushed)
+
+Each display has its own sender thread holding only the latest leaderboard, so a slow or stalled display never
+delays the others or the tracks' result messages; it simply skips to the newest standings when it catches up.
+
+Usage: Run `python -m coordination.leaderboard_hub` on the hub machine. Track controllers publish with
+TrackResultPublisher; displays receive updates through LeaderboardClient.
+"""
+
+import json
+import socket
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import deque
+from queue import Queue
+from config import Config
+from logger import logger
+
+
+def _encode(message):
+    return (json.dumps(message, default=str) + "\n").encode()
+
+
+class Leaderboard:
+    def __init__(self, recent_heats=5):
+        """
+        Initializes an empty leaderboard.
+
+        Args:
+            recent_heats (int): Number of recent heats kept per track for the side-by-side view.
+        """
+        self.recent_heats = recent_heats
+        self.best = {}  # RacerID -> best result across all tracks
+        self.ranking = []  # Sorted (RaceTime, RacerID); updated with bisect instead of re-sorting
+        self.tracks = {}  # TrackID -> deque of recent heats
+        self.lock = threading.Lock()
+
+    def add_results(self, track, results):
+        """
+        Merges one heat's results from a track.
+
+        Args:
+            track (int): The TrackID that ran the heat.
+            results (list[dict]): Race entries as stored by RaceManager.
+
+        Returns:
+            bool: True if any racer's best time improved.
+        """
+        improved = False
+        with self.lock:
+            self.tracks.setdefault(track, deque(maxlen=self.recent_heats)).append(results)
+            for result in results:
+                race_time = float(result.get("RaceTime") or 0)
+                racer_id = result.get("RacerID")
+                if race_time <= 0 or racer_id is None:
+                    continue
+                previous = self.best.get(racer_id)
+                if previous is not None and previous["RaceTime"] <= race_time:
+                    continue
+                if previous is not None:
+                    del self.ranking[bisect_left(self.ranking, (previous["RaceTime"], racer_id))]
+                insort(self.ranking, (race_time, racer_id))
+                self.best[racer_id] = {
+                    "RacerID": racer_id,
+                    "RaceTime": race_time,
+                    "TrackID": track,
+                    "RaceCounter": result.get("RaceCounter"),
+                    "RacerFirstName": result.get("RacerFirstName"),
+                    "RacerLastName": result.get("RacerLastName"),
+                    "RacerCarName": result.get("RacerCarName"),
+                }
+                improved = True
+        return improved
+
+    def snapshot(self, limit=None):
+        """
+        Returns the leaderboard message pushed to subscribers.
+        """
+        with self.lock:
+            ranked = self.ranking[:limit] if limit else self.ranking
+            standings = [dict(self.best[racer_id], Rank=rank) for rank, (_, racer_id) in enumerate(ranked, start=1)]
+            tracks = {track: list(heats) for track, heats in self.tracks.items()}
+        return {"type": "leaderboard", "standings": standings, "tracks": tracks}
+
+
+class _Subscriber:
+    def __init__(self, sock, on_failed):
+        """
+        Starts a sender for one display connection.
+
+        Args:
+            sock (socket.socket): The display's connection.
+            on_failed (function): Called with this subscriber when a send fails.
+        """
+        self.sock = sock
+        self.on_failed = on_failed
+        self.pending = None  # Latest encoded leaderboard not yet sent; newer ones replace it
+        self.closed = False
+        self.condition = threading.Condition()
+        threading.Thread(target=self._run, name="hub-subscriber", daemon=True).start()
+
+    def push(self, payload):
+        """
+        Queues a leaderboard for sending, replacing any not sent yet.
+        """
+        with self.condition:
+            self.pending = payload
+            self.condition.notify()
+
+    def close(self):
+        """
+        Stops the sender.
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending is not None or self.closed)
+                if self.closed:
+                    return
+                payload, self.pending = self.pending, None
+            try:
+                self.sock.sendall(payload)
+            except OSError:
+                self.on_failed(self)
+                return
+
+
+class LeaderboardHub:
+    def __init__(self, host=None, port=None, leaderboard=None):
+        """
+        Initializes the hub server.
+
+        Args:
+            host (str, optional): Interface to listen on. Defaults to all interfaces.
+            port (int, optional): Port to listen on. Defaults to Config.HUB_PORT.
+            leaderboard (Leaderboard, optional): Leaderboard to merge into.
+        """
+        self.host = host or "0.0.0.0"
+        self.port = port or Config.HUB_PORT
+        self.leaderboard = leaderboard or Leaderboard()
+        self.server_socket = None
+        self.running = False
+        self.subscribers = []  # _Subscriber per display connection
+        self.subscribers_lock = threading.Lock()
+
+    def start_server(self):
+        """
+        Starts listening and serves clients until shutdown() is called.
+        """
+        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server_socket.bind((self.host, self.port))
+        self.server_socket.listen(16)
+        self.running = True
+        logger.info(f"Leaderboard hub started on {self.host}:{self.port}")
+
+        try:
+            while self.running:
+                client_socket, client_address = self.server_socket.accept()
+                client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                logger.info(f"Hub connection from {client_address}")
+                threading.Thread(target=self.handle_client, args=(client_socket,), daemon=True).start()
+        except OSError as e:
+            if self.running:
+                logger.error(f"Error in hub server loop: {e}")
+        finally:
+            self.shutdown()
+
+    def handle_client(self, client_socket):
+        """
+        Reads messages from a track or display connection.
+        """
+        subscriber = None
+        try:
+            for line in client_socket.makefile("r"):
+                if not line.strip():
+                    continue
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Hub received invalid message: {line.strip()}")
+                    continue
+                if message.get("type") == "results":
+                    self.leaderboard.add_results(message.get("track"), message.get("results", []))
+                    self.broadcast()
+                elif message.get("type") == "subscribe" and subscriber is None:
+                    subscriber = _Subscriber(client_socket, self.remove_subscriber)
+                    with self.subscribers_lock:
+                        # Under the lock, so no broadcast can queue an older leaderboard after this one
+                        subscriber.push(_encode(self.leaderboard.snapshot()))
+                        self.subscribers.append(subscriber)
+        except OSError as e:
+            logger.warning(f"Hub connection error: {e}")
+        finally:
+            if subscriber:
+                self.remove_subscriber(subscriber)
+            client_socket.close()
+
+    def remove_subscriber(self, subscriber):
+        """
+        Stops pushing to a display whose connection closed or failed.
+        """
+        with self.subscribers_lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+        subscriber.close()
+
+    def broadcast(self):
+        """
+        Queues the current leaderboard for every subscriber. Nothing is sent on the calling thread: each
+        subscriber's own thread does the sending.
+        """
+        with self.subscribers_lock:
+            payload = _encode(self.leaderboard.snapshot())
+            for subscriber in self.subscribers:
+                subscriber.push(payload)
+
+    def shutdown(self):
+        """
+        Stops the hub and closes the listening socket.
+        """
+        self.running = False
+        if self.server_socket:
+            self.server_socket.close()
+            logger.info("Leaderboard hub shut down")
+
+
+class TrackResultPublisher:
+    def __init__(self, track_id, host=None, port=None, reconnect_delay=2):
+        """
+        Initializes the publisher. Results are queued and sent from a background thread, so a slow
+        or absent hub never delays the race workflow.
+
+        Args:
+            track_id (int): This track's TrackID.
+            host (str, optional): Hub host. Defaults to Config.HUB_HOST.
+            port (int, optional): Hub port. Defaults to Config.HUB_PORT.
+            reconnect_delay (int): Seconds to wait before reconnecting after a failure.
+        """
+        self.track_id = track_id
+        self.host = host or Config.HUB_HOST
+        self.port = port or Config.HUB_PORT
+        self.reconnect_delay = reconnect_delay
+        self.queue = Queue()
+        self.sock = None
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def publish(self, results):
+        """
+        Queues one heat's results for the hub.
+        """
+        self.queue.put({"type": "results", "track": self.track_id, "results": list(results)})
+
+    def _run(self):
+        while True:
+            payload = _encode(self.queue.get())
+            while True:
+                try:
+                    if self.sock is None:
+                        self.sock = socket.create_connection((self.host, self.port), timeout=Config.SOCKET_TIMEOUT)
+                        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                        logger.info(f"Connected to leaderboard hub at {self.host}:{self.port}")
+                    self.sock.sendall(payload)
+                    break
+                except OSError as e:
+                    logger.warning(f"Leaderboard hub unavailable: {e}")
+                    self.close()
+                    time.sleep(self.reconnect_delay)
+
+    def close(self):
+        """
+        Closes the hub connection; the next publish reconnects.
+        """
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+
+class LeaderboardClient:
+    def __init__(self, on_update, host=None, port=None, reconnect_delay=2):
+        """
+        Initializes a display-side subscriber.
+
+        Args:
+            on_update (function): Called with each pushed leaderboard message (from a background thread).
+            host (str, optional): Hub host. Defaults to Config.HUB_HOST.
+            port (int, optional): Hub port. Defaults to Config.HUB_PORT.
+            reconnect_delay (int): Seconds to wait before reconnecting after a failure.
+        """
+        self.on_update = on_update
+        self.host = host or Config.HUB_HOST
+        self.port = port or Config.HUB_PORT
+        self.reconnect_delay = reconnect_delay
+        self.running = False
+
+    def start(self):
+        """
+        Starts receiving updates in a background thread.
+        """
+        self.running = True
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while self.running:
+            try:
+                with socket.create_connection((self.host, self.port)) as sock:
+                    sock.sendall(_encode({"type": "subscribe"}))
+                    for line in sock.makefile("r"):
+                        if line.strip():
+                            self.on_update(json.loads(line))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Leaderboard subscription lost: {e}")
+            time.sleep(self.reconnect_delay)
+
+    def stop(self):
+        self.running = False
+
+
+if __name__ == "__main__":
+    LeaderboardHub().start_server()
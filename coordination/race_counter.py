@@ -0,0 +1,107 @@
+"""
+race_counter.py
+
+Purpose: Allocates race counters that never collide between tracks writing to the same raceresults table.
+Two strategies are supported, neither of which takes a lock shared between tracks:
+    "sequence" -- (default) tracks reserve blocks of RACE_COUNTER_BLOCK_SIZE counters from the auto-increment
+                  racecounter_blocks table and hand them out locally (hi/lo allocation). A single track counts
+                  up without gaps.
+    "range"    -- opt-in: each track owns a fixed slice of the counter space
+                  [TRACK_NUMBER * RACE_COUNTER_RANGE_SIZE, (TRACK_NUMBER + 1) * RACE_COUNTER_RANGE_SIZE), so
+                  counters show which track ran a heat, but even a lone track starts far from 1.
+Either way the only database round trips are one lookup at startup and, for "sequence", one insert per block.
+
+Usage: Instantiate RaceCounterAllocator(db_handler, track_number), pass it to RaceManager, call next().
+"""
+
+from threading import Lock
+from config import Config
+from logger import logger
+
+
+class RaceCounterAllocator:
+    def __init__(self, db_handler, track_number, strategy=None, range_size=None, block_size=None, resume_from=None):
+        """
+        Initializes the allocator and resumes after the last counter this track used.
+
+        Args:
+            db_handler (DatabaseHandler): Handler on the shared results database.
+            track_number (int): This track's TrackID.
+            strategy (str, optional): "range" or "sequence". Defaults to Config.RACE_COUNTER_STRATEGY.
+            range_size (int, optional): Counters per track for "range". Defaults to Config.RACE_COUNTER_RANGE_SIZE.
+            block_size (int, optional): Counters per block for "sequence". Defaults to Config.RACE_COUNTER_BLOCK_SIZE.
+            resume_from (int, optional): Last counter used, e.g. from the state journal. When it lies in this
+                                         track's range or block, the MAX(RaceCounter) lookup is skipped.
+        """
+        self.db = db_handler
+        self.track_number = track_number
+        self.strategy = (strategy or Config.RACE_COUNTER_STRATEGY).lower()
+        self.range_size = range_size or Config.RACE_COUNTER_RANGE_SIZE
+        self.block_size = block_size or Config.RACE_COUNTER_BLOCK_SIZE
+        self.lock = Lock()  # Local to this track; tracks never wait on each other
+
+        if self.strategy == "range":
+            self._low = self.track_number * self.range_size
+            self._high = self._low + self.range_size
+        elif self.strategy == "sequence":
+            self._low, self._high = self._latest_block()
+        else:
+            raise ValueError(f"Unknown race counter strategy: {self.strategy}")
+
+        if resume_from is not None and self._low <= resume_from < self._high:
+            last = resume_from
+        else:
+            last = self._last_used(self._low, self._high) if self._high else None
+        self._current = last if last is not None else self._low - 1
+        logger.info(f"Race counter allocator ({self.strategy}) for track {track_number} resumes after {self._current}")
+
+    def current(self):
+        """
+        Returns the most recently allocated counter, or None if this track has not raced yet.
+        """
+        with self.lock:
+            return self._current if self._current >= self._low else None
+
+    def next(self):
+        """
+        Allocates the next race counter for this track.
+
+        Returns:
+            int: A counter no other track will be given.
+        """
+        with self.lock:
+            if self._current + 1 >= self._high:
+                if self.strategy == "range":
+                    raise RuntimeError(f"Race counter range for track {self.track_number} is exhausted")
+                self._low, self._high = self._reserve_block()
+                self._current = self._low - 1
+            self._current += 1
+            return self._current
+
+    def _last_used(self, low, high):
+        row = self.db.query(
+            "SELECT MAX(RaceCounter) AS RaceCounter FROM raceresults "
+            "WHERE TrackID = %s AND RaceCounter >= %s AND RaceCounter < %s",
+            (self.track_number, low, high),
+            fetch_one=True
+        )
+        return row["RaceCounter"] if row else None
+
+    def _latest_block(self):
+        row = self.db.query(
+            "SELECT MAX(BlockID) AS BlockID FROM racecounter_blocks WHERE TrackID = %s",
+            (self.track_number,),
+            fetch_one=True
+        )
+        if not row or row["BlockID"] is None:
+            return 0, 0
+        low = row["BlockID"] * self.block_size
+        return low, low + self.block_size
+
+    def _reserve_block(self):
+        # The auto-increment key hands every track a distinct BlockID without any shared lock.
+        # Only this track inserts rows with its TrackID, so MAX(BlockID) is the row just inserted.
+        self.db.execute("INSERT INTO racecounter_blocks (TrackID) VALUES (%s)", (self.track_number,))
+        low, high = self._latest_block()
+        logger.info(f"Track {self.track_number} reserved race counters {low}-{high - 1}")
+        return low, high
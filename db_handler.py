@@ -1,38 +1,38 @@
 """
 db_handler.py
 
-Purpose: Provides DatabaseHandler class for managing MySQL connections, queries, transactions, and error handling.
+Purpose: Provides DatabaseHandler class for managing database connections, queries, transactions, and error handling.
+The connection itself is made by a storage backend (MySQL or embedded SQLite, see storage/).
 
-Usage: Instantiate DatabaseHandler in workflows to perform safe queries and execute commands.
+Usage: Instantiate DatabaseHandler in workflows to perform safe queries and execute commands. One handler may be shared
+by several threads (pads look racers up in parallel): each attempt holds a lock, since a backend has a single cursor.
 """
 
-import mysql.connector
-from mysql.connector import Error
 from logger import logger
 from config import Config
+from storage import create_backend
+import threading
 import time
 
 class DatabaseHandler:
-    def __init__(self, max_retries=3, retry_delay=2):
+    def __init__(self, max_retries=3, retry_delay=2, backend=None):
         """
         Initializes the DatabaseHandler with a connection to the database.
 
         Args:
             max_retries (int): Maximum number of retries for transient errors.
             retry_delay (int): Delay in seconds between retries.
+            backend (StorageBackend, optional): Backend to use. Defaults to the one named by Config.DB_BACKEND.
         """
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.backend = backend or create_backend(Config.DB_BACKEND)
+        self.dialect = self.backend.dialect
+        self.lock = threading.Lock()  # One statement and its fetch or commit at a time on the shared cursor
         try:
-            self.conn = mysql.connector.connect(
-                host=Config.DB_HOST,
-                user=Config.DB_USER,
-                password=Config.DB_PASS,
-                database=Config.DB_NAME
-            )
-            self.cursor = self.conn.cursor(dictionary=True)
-            logger.info("Database connection established")
-        except mysql.connector.Error as err:
+            self.backend.connect()
+            logger.info(f"Database connection established ({self.backend.describe()})")
+        except self.backend.Error as err:
             logger.error(f"DB connection error: {err}")
             raise
 
@@ -52,14 +52,15 @@ class DatabaseHandler:
         retries = 0
         while retries < self.max_retries:
             try:
-                self.cursor.execute(sql, params or ())
-                if fetch_one:
-                    result = self.cursor.fetchone()
-                else:
-                    result = self.cursor.fetchall()
+                with self.lock:
+                    self.backend.execute(sql, params or ())
+                    if fetch_one:
+                        result = self.backend.fetchone()
+                    else:
+                        result = self.backend.fetchall()
                 logger.debug(f"DB query executed successfully: {sql}")
                 return result
-            except mysql.connector.Error as err:
+            except self.backend.Error as err:
                 logger.error(f"DB query error: {err}")
                 retries += 1
                 if retries < self.max_retries:
@@ -83,13 +84,17 @@ class DatabaseHandler:
         retries = 0
         while retries < self.max_retries:
             try:
-                self.cursor.execute(sql, params or ())
-                self.conn.commit()
+                with self.lock:
+                    try:
+                        self.backend.execute(sql, params or ())
+                        self.backend.commit()
+                    except self.backend.Error:
+                        self.backend.rollback()
+                        raise
                 logger.debug(f"DB execute committed successfully: {sql}")
                 return
-            except mysql.connector.Error as err:
+            except self.backend.Error as err:
                 logger.error(f"DB execute error: {err}")
-                self.conn.rollback()
                 retries += 1
                 if retries < self.max_retries:
                     logger.warning(f"Retrying execute... Attempt {retries}/{self.max_retries}")
@@ -103,8 +108,8 @@ class DatabaseHandler:
         Closes the database connection and cursor.
         """
         try:
-            self.cursor.close()
-            self.conn.close()
+            with self.lock:
+                self.backend.close()
             logger.info("Database connection closed")
-        except Error as err:
+        except self.backend.Error as err:
             logger.error(f"Error closing database connection: {err}")
\ No newline at end of file
@@ -19,6 +19,11 @@ Supported Commands:
    Command Format: 
    - "CLEAR_LCD\n": Clears the LCD display.
    - "DISPLAY_LCD|<row>|<message>\n": Displays a message on the specified row of the LCD.
+   - "LCD_RUN|<row>|<col>|<text>\n": Writes text starting at row/col without touching the rest.
+
+   The interface keeps a shadow of the 4x20 screen. DISPLAY requests are diffed against it
+   and only the changed character runs are sent as LCD_RUN commands; unchanged rows cost
+   nothing, and CLEAR is skipped when the screen is already blank.
 
 After processing a command, the Arduino sends back an "<ACK>" to confirm reception and processing.
 """
@@ -26,6 +31,38 @@ After processing a command, the Arduino sends back an "<ACK>" to confirm recepti
 from comms.serial_comm import SerialCommunicator
 from logger import logger
 
+LCD_ROWS = 4
+LCD_COLUMNS = 20
+LCD_RUN_GAP = 3  # Unchanged characters worth resending to save a separate LCD_RUN command
+
+
+def changed_runs(old, new, gap=LCD_RUN_GAP):
+    """
+    Finds the character runs that differ between two equal-length rows.
+
+    Args:
+        old (str): The row currently on the display.
+        new (str): The row that should be displayed.
+        gap (int): Unchanged characters allowed inside one run before it is split.
+
+    Returns:
+        list: (column, text) tuples covering every changed character.
+    """
+    runs = []
+    start = end = None
+    for col, (a, b) in enumerate(zip(old, new)):
+        if a == b:
+            continue
+        if start is not None and col - end > gap + 1:
+            runs.append((start, new[start:end + 1]))
+            start = None
+        if start is None:
+            start = col
+        end = col
+    if start is not None:
+        runs.append((start, new[start:end + 1]))
+    return runs
+
 
 class ArduinoNanoInterface:
     def __init__(self, port, baudrate=9600, timeout=1):
@@ -43,6 +80,7 @@ class ArduinoNanoInterface:
         except Exception as e:
             logger.error(f"Failed to initialize ArduinoNanoInterface: {e}")
             self.serial_comm = None
+        self.lcd_shadow = [" " * LCD_COLUMNS for _ in range(LCD_ROWS)]
 
     def send_effect_command(self, led_number, effect, bank, place, brightness, color, debug=False):
         """
@@ -84,10 +122,18 @@ class ArduinoNanoInterface:
 
         try:
             if action == "CLEAR":
-                self.serial_comm.send("CLEAR_LCD\n")
+                blank = " " * LCD_COLUMNS
+                if any(line != blank for line in self.lcd_shadow):
+                    self.serial_comm.send("CLEAR_LCD\n")
+                    self.lcd_shadow = [blank for _ in range(LCD_ROWS)]
             elif action == "DISPLAY" and row is not None and message is not None:
-                command = f"DISPLAY_LCD|{row}|{message}\n"
-                self.serial_comm.send(command)
+                row = int(row)
+                old = self.lcd_shadow[row]
+                # Same effect as DISPLAY_LCD: the message overwrites the start of the row
+                new = (str(message)[:LCD_COLUMNS] + old[len(str(message)):])[:LCD_COLUMNS]
+                for col, text in changed_runs(old, new):
+                    self.serial_comm.send(f"LCD_RUN|{row}|{col}|{text}\n")
+                self.lcd_shadow[row] = new
             else:
                 logger.warning(f"Invalid LCD command: action={action}, row={row}, message={message}")
         except Exception as e:
@@ -3,6 +3,104 @@ esp32_draggate.py
 
 Purpose: Controls relays and stepper motors via ESP32 over sockets for gate reset and relay defaults.
 
-Usage: Instantiate ESP32RelayController(host), call activate_relay(), move_stepper().
+The controller keeps one persistent TCP connection to the gate ESP32 and pipelines commands over it: every
+command carries a sequence number and returns a Future, so a slow stepper move never holds up a relay trigger.
+All lane relays are fired by a single RELAY frame carrying a lane bitmask, so the ESP32 switches them in the same
+port write and the gates drop within a millisecond of each other ("collaborate" and "starter" modes).
+
+Frames follow the DeviceLink protocol (comms/device_link.py). Commands:
+    TIME                              -- reply payload is the ESP32's microsecond clock
+    RELAY|<lane mask>|<when>|<hold_ms> -- fire the relays in the mask. <when> is 0 (now), an absolute ESP32
+                                         clock time in microseconds, or "+<us>" (delay from receipt).
+                                         Reply payload is the ESP32 clock time the relays actually switched.
+    STEPPER|<steps>|<direction>       -- move the gate-reset stepper; replies when the move is done
+
+Usage: Instantiate ESP32RelayController(host), call activate_relay() or fire_relays(), move_stepper().
+devices/esp32_emulator.py provides a local stand-in ESP32 for bench testing.
 """
-# TODO: Implement ESP32RelayController methods
\ No newline at end of file
+
+import time
+from concurrent.futures import Future
+from comms.device_link import DeviceLink
+from config import Config
+
+
+class ESP32RelayController(DeviceLink):
+    def __init__(self, host, port=None, clock=None, timeout=None):
+        """
+        Initializes the ESP32RelayController. The connection is opened on first use.
+
+        Args:
+            host (str): ESP32 address.
+            port (int, optional): ESP32 port. Defaults to Config.ESP32_GATE_PORT.
+            clock (ClockSync, optional): Clock estimator for the ESP32 with to_device_us(local_s) and
+                                         to_local(device_us), used to schedule relays at an exact time. Without
+                                         one, scheduled fires are sent as a delay and fire times are
+                                         approximated on arrival.
+            timeout (float, optional): Seconds to wait for a reply. Defaults to Config.SOCKET_TIMEOUT.
+        """
+        super().__init__(host, port or Config.ESP32_GATE_PORT, "ESP32 gate controller", timeout)
+        self.clock = clock
+
+    def fire_relays(self, lanes, at=None, hold_ms=None):
+        """
+        Fires the relays for several lanes in one frame, so they switch together.
+
+        Args:
+            lanes (iterable): Lane numbers (1-based).
+            at (float, optional): time.monotonic() instant to fire at; None fires immediately.
+            hold_ms (int, optional): How long the relays stay energized. Defaults to Config.RELAY_HOLD_MS.
+
+        Returns:
+            Future: Resolves to the time.monotonic() instant the relays actually switched.
+        """
+        mask = 0
+        for lane in lanes:
+            mask |= 1 << (lane - 1)
+        if at is None:
+            when = 0
+        elif self.clock:
+            when = self.clock.to_device_us(at)
+        else:
+            when = "+%d" % max(0, int((at - time.monotonic()) * 1_000_000))
+        reply = self.send_command("RELAY", mask, when, hold_ms or Config.RELAY_HOLD_MS)
+        fired = Future()
+
+        def convert(done):
+            try:
+                device_us = int(done.result())
+            except Exception as e:
+                fired.set_exception(e)
+                return
+            fired.set_result(self.clock.to_local(device_us) if self.clock else time.monotonic())
+
+        reply.add_done_callback(convert)
+        return fired
+
+    def activate_relay(self, lane, at=None, hold_ms=None):
+        """
+        Fires the relay for one lane.
+
+        Returns:
+            Future: Resolves to the time.monotonic() instant the relay switched.
+        """
+        return self.fire_relays([lane], at, hold_ms)
+
+    def move_stepper(self, steps, direction=1):
+        """
+        Moves the gate-reset stepper.
+
+        Args:
+            steps (int): Steps to move.
+            direction (int): 1 to raise the gates, -1 to lower them.
+
+        Returns:
+            Future: Resolves when the move is finished.
+        """
+        return self.send_command("STEPPER", steps, direction)
+
+    def reset_gates(self):
+        """
+        Raises the starting gates back into position and waits for the move to finish.
+        """
+        self.move_stepper(Config.GATE_RESET_STEPS).result(self.timeout + Config.GATE_RESET_STEPS / 100)
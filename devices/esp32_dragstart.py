@@ -3,6 +3,105 @@ esp32_dragstart.py
 
 Purpose: Manages drag-starter ESP32: button presses and LED indicators over Wi-Fi sockets.
 
-Usage: Instantiate ESP32DragStarter(host), call connect(), listen_for_start().
+The drag-start box stamps each lane button press with its own microsecond clock and pushes it to the Pi. A
+ClockSync kept up to date over the same connection converts those stamps into the Pi's time.monotonic()
+timebase, so reaction times measured against the countdown are not blurred by Wi-Fi latency. The countdown tree
+is scheduled for an exact instant in the box's clock, so the lights and the Pi agree on when "go" is.
+
+Frames follow the DeviceLink protocol (comms/device_link.py). Commands:
+    TIME                          -- reply payload is the ESP32's microsecond clock
+    TREE|<go_us>|<step_ms>        -- run the countdown lights so the last one lights at ESP32 time go_us
+    LED|<lane>|<ON or OFF>        -- lane indicator LED
+Events:
+    0|EVENT|BTN|<lane>|<device_us> -- a lane's start button was pressed
+
+Usage: Instantiate ESP32DragStarter(host), call connect(), start_tree(go_at), then wait_for_press() per lane.
 """
-# TODO: Implement ESP32DragStarter logic
\ No newline at end of file
+
+import queue
+from comms.clock_sync import ClockSync
+from comms.device_link import DeviceLink
+from config import Config
+from event_bus import bus
+from logger import logger
+
+
+class ESP32DragStarter(DeviceLink):
+    def __init__(self, host, port=None, timeout=None):
+        """
+        Initializes the ESP32DragStarter. Call connect() to open the link and synchronize clocks.
+
+        Args:
+            host (str): ESP32 address.
+            port (int, optional): ESP32 port. Defaults to Config.ESP32_START_PORT.
+            timeout (float, optional): Seconds to wait for a reply. Defaults to Config.SOCKET_TIMEOUT.
+        """
+        super().__init__(host, port or Config.ESP32_START_PORT, "ESP32 drag starter", timeout,
+                         on_event=self._on_event)
+        self.clock = ClockSync(name=self.name)
+        self.presses = queue.Queue()  # (lane, time.monotonic() of the press)
+
+    def connect(self):
+        """
+        Opens the connection, synchronizes clocks and keeps them synchronized in the background.
+        """
+        super().connect()
+        self.clock.sync(self.ping)
+        self.clock.start(self.ping, Config.CLOCK_RESYNC_SECONDS)
+
+    def _on_event(self, name, args):
+        if name != "BTN" or len(args) < 2:
+            logger.warning(f"Unknown event from {self.name}: {name} {args}")
+            return
+        lane = int(args[0])
+        pressed_at = self.clock.to_local(int(args[1]))
+        self.presses.put((lane, pressed_at))
+        bus.publish("lane_button", lane=lane, pressed_at=pressed_at)
+
+    def start_tree(self, go_at, step_ms=None):
+        """
+        Schedules the countdown lights to finish at a Pi instant.
+
+        Args:
+            go_at (float): time.monotonic() instant of "go".
+            step_ms (int, optional): Time between countdown lights. Defaults to Config.TREE_STEP_MS.
+
+        Returns:
+            Future: Resolves when the ESP32 has accepted the schedule.
+        """
+        return self.send_command("TREE", self.clock.to_device_us(go_at), step_ms or Config.TREE_STEP_MS)
+
+    def set_lane_led(self, lane, on):
+        """
+        Turns a lane's indicator LED on or off.
+        """
+        return self.send_command("LED", lane, "ON" if on else "OFF")
+
+    def clear_presses(self):
+        """
+        Discards presses left over from before the current countdown.
+        """
+        while not self.presses.empty():
+            self.presses.get_nowait()
+
+    def wait_for_press(self, timeout=None):
+        """
+        Waits for the next lane button press.
+
+        Args:
+            timeout (float, optional): Seconds to wait; None waits forever.
+
+        Returns:
+            tuple or None: (lane, time.monotonic() of the press), or None on timeout.
+        """
+        try:
+            return self.presses.get(timeout=None if timeout is None else max(0.0, timeout))
+        except queue.Empty:
+            return None
+
+    def close(self):
+        """
+        Stops clock synchronization and closes the connection.
+        """
+        self.clock.stop()
+        super().close()
@@ -0,0 +1,171 @@
+"""
+esp32_emulator.py
+
+Purpose: Local stand-in for the drag-gate and drag-start ESP32s. Speaks the same line protocol as the firmware
+(see comms/device_link.py, esp32_draggate.py and esp32_dragstart.py) on a TCP port, keeps its own microsecond
+clock with a configurable offset, drift and reply jitter, fires scheduled relay commands on time, records every
+actuation and can simulate lane button presses, so the controllers, clock sync and race workflow can be
+exercised on a bench without hardware.
+
+Usage: emulator = ESP32Emulator(); emulator.start(); connect ESP32RelayController("127.0.0.1", emulator.port);
+inspect emulator.fired, or call emulator.press(lane). Run "python -m devices.esp32_emulator [port]" to serve
+until interrupted.
+"""
+
+import random
+import socket
+import sys
+import threading
+import time
+from logger import logger
+
+STEP_SECONDS = 0.001  # Simulated time per stepper step
+
+
+class ESP32Emulator:
+    def __init__(self, host="127.0.0.1", port=0, clock_offset_us=0, drift_ppm=0.0, jitter_ms=0.0):
+        """
+        Initializes the emulator.
+
+        Args:
+            host (str): Address to listen on.
+            port (int): Port to listen on; 0 picks a free port (read it from .port after start()).
+            clock_offset_us (int): Offset of the emulated ESP32 clock from the Pi's monotonic clock.
+            drift_ppm (float): Emulated clock drift in parts per million.
+            jitter_ms (float): Maximum random delay added on each side of a TIME reply, like Wi-Fi latency.
+        """
+        self.host = host
+        self.port = port
+        self.clock_offset_us = clock_offset_us
+        self.drift_ppm = drift_ppm
+        self.jitter_ms = jitter_ms
+        self.clients = []  # reply functions of connected clients, for pushing events
+        self.tree_go_us = None
+        self.fired = []  # (lane mask, device clock us) for every relay actuation
+        self.steps = 0
+        self.server_socket = None
+        self.running = False
+
+    def now_us(self):
+        """
+        Returns the emulated ESP32 clock in microseconds.
+        """
+        return int(time.monotonic() * 1_000_000 * (1 + self.drift_ppm / 1_000_000)) + self.clock_offset_us
+
+    def start(self):
+        """
+        Starts listening in a background thread.
+        """
+        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server_socket.bind((self.host, self.port))
+        self.server_socket.listen(2)
+        self.port = self.server_socket.getsockname()[1]
+        self.running = True
+        threading.Thread(target=self._accept, daemon=True).start()
+        logger.info(f"ESP32 emulator listening on {self.host}:{self.port}")
+
+    def _accept(self):
+        while self.running:
+            try:
+                client, _ = self.server_socket.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve, args=(client,), daemon=True).start()
+
+    def _serve(self, client):
+        send_lock = threading.Lock()
+
+        def reply(line):
+            with send_lock:
+                client.sendall((line + "\n").encode())
+
+        self.clients.append(reply)
+        buffer = ""
+        try:
+            while True:
+                data = client.recv(1024)
+                if not data:
+                    break
+                buffer += data.decode()
+                *lines, buffer = buffer.split("\n")
+                for line in lines:
+                    self._handle(line.strip().split("|"), reply)
+        except OSError:
+            pass
+        finally:
+            self.clients.remove(reply)
+            client.close()
+
+    def _handle(self, parts, reply):
+        seq, command, args = parts[0], parts[1] if len(parts) > 1 else "", parts[2:]
+        if command == "TIME":
+            if self.jitter_ms:
+                threading.Thread(target=self._time_reply, args=(seq, reply), daemon=True).start()
+            else:
+                reply(f"{seq}|ACK|{self.now_us()}")
+        elif command == "TREE" and len(args) == 2:
+            self.tree_go_us = int(args[0])
+            reply(f"{seq}|ACK|")
+        elif command == "LED" and len(args) == 2:
+            reply(f"{seq}|ACK|")
+        elif command == "RELAY" and len(args) == 3:
+            mask, when = int(args[0]), args[1]
+            if when.startswith("+"):
+                target = self.now_us() + int(when[1:])
+            else:
+                target = int(when) or self.now_us()
+            threading.Thread(target=self._fire, args=(seq, mask, target, reply), daemon=True).start()
+        elif command == "STEPPER" and len(args) == 2:
+            threading.Thread(target=self._step, args=(seq, int(args[0]), int(args[1]), reply), daemon=True).start()
+        else:
+            reply(f"{seq}|ERR|Unknown command")
+
+    def _fire(self, seq, mask, target_us, reply):
+        # Sleep most of the way, then spin for the last millisecond, as the firmware's timer would
+        remaining = target_us - self.now_us()
+        if remaining > 2000:
+            time.sleep((remaining - 1000) / 1_000_000)
+        while self.now_us() < target_us:
+            pass
+        fired_us = self.now_us()
+        self.fired.append((mask, fired_us))
+        reply(f"{seq}|ACK|{fired_us}")
+
+    def _time_reply(self, seq, reply):
+        time.sleep(random.random() * self.jitter_ms / 1000)
+        stamp = self.now_us()
+        time.sleep(random.random() * self.jitter_ms / 1000)
+        reply(f"{seq}|ACK|{stamp}")
+
+    def press(self, lane):
+        """
+        Simulates a lane start button press, stamped with the emulated clock.
+        """
+        stamp = self.now_us()
+        for reply in list(self.clients):
+            reply(f"0|EVENT|BTN|{lane}|{stamp}")
+        return stamp
+
+    def _step(self, seq, steps, direction, reply):
+        time.sleep(steps * STEP_SECONDS)
+        self.steps += steps * direction
+        reply(f"{seq}|ACK|{self.steps}")
+
+    def stop(self):
+        """
+        Stops listening.
+        """
+        self.running = False
+        if self.server_socket:
+            self.server_socket.close()
+
+
+if __name__ == "__main__":
+    emulator = ESP32Emulator("0.0.0.0", int(sys.argv[1]) if len(sys.argv) > 1 else 12500)
+    emulator.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        emulator.stop()
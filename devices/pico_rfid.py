@@ -2,14 +2,34 @@
 pico_rfid.py
 
 Purpose: Handles specific communication logic for the Pico RFID device.
+
+Pads speak a framed, sequence-numbered protocol (see PICO_PAD_CODE/padlink.py). Each frame arrives here as
+"<pad_id>|<seq>|<TYPE>|<payload>" and is answered with "<seq>|<ACK or ERR>|<payload>". A frame whose sequence
+number has already been handled (a resend after a reconnect) gets the original reply again without being
+re-processed; a resend that arrives while the original is still being handled (on the old connection's thread)
+waits for that reply. If the original reply has already left the cache, the resend is answered
+"<seq>|DUP|Already handled", since its outcome is no longer known. HELLO frames carry a per-boot id; a new boot id resets that pad's sequence tracking.
+
+TAP frames are passed to the LaneAssignmentService registered with set_lane_service(), which reserves a lane
+for the racer; several pads can load the same heat concurrently.
 """
 
+import time
+from collections import OrderedDict
+from lane_assignment import LaneAssignmentError
 from logger import logger
-from threading import Lock
+from threading import Condition, Event, Lock
 
 # Thread-safe global variables
 lock = Lock()
-latest_rfid = None
+replied = Condition(lock)  # Notified when a pad frame's reply is cached
+latest_rfid = None  # Most recent tag from any pad
+latest_rfids = {}  # pad_id -> most recent tag from that pad
+lane_service = None  # LaneAssignmentService, registered by the workflow once the database is up
+button_pressed = Event()  # Set when a pad's button confirms a loaded lane
+pads = {}  # pad_id -> protocol state (boot id, last accepted seq, frames in flight, recent replies, last seen time)
+
+REPLY_CACHE_SIZE = 32  # Replies kept per pad for answering resent frames
 
 def handle_pico_command(command):
     """
@@ -21,18 +41,17 @@ def handle_pico_command(command):
     Returns:
         str: The response to send back to the Pico device.
     """
-    global latest_rfid
-
     try:
+        parts = command.split("|", 3)
+        if len(parts) == 4 and parts[1].isdigit():
+            return handle_pad_frame(parts[0], int(parts[1]), parts[2], parts[3])
         if command == "RESET_LEDS":
             reset_leds()
             return "LEDs reset"
         elif command.startswith("RFID"):
             _, rfid = command.split(":")
-            update_latest_rfid(rfid)
-            lane = get_current_lane()
-            increment_current_lane()
-            return f"Lane {lane} assigned to RFID {rfid}"
+            _, reply = dispatch_pad_frame("legacy", "TAP", rfid)
+            return reply.split("|", 1)[-1]
         else:
             logger.warning(f"Unknown command from Pico: {command}")
             return "Unknown command"
@@ -41,6 +60,94 @@ def handle_pico_command(command):
         return "Error"
 
 
+def handle_pad_frame(pad_id, seq, frame_type, payload):
+    """
+    Handles one framed message from a pad.
+
+    Args:
+        pad_id (str): The pad that sent the frame.
+        seq (int): The frame's sequence number (0 for HELLO and heartbeats).
+        frame_type (str): HELLO, TAP, BTN or HB.
+        payload (str): Frame payload.
+
+    Returns:
+        str: "<seq>|<status>|<payload>"
+    """
+    with lock:
+        pad = pads.setdefault(pad_id, {"boot": None, "last_seq": 0, "in_flight": set(), "replies": OrderedDict(),
+                                       "last_seen": 0.0})
+        pad["last_seen"] = time.monotonic()
+        if frame_type == "HELLO":
+            if pad["boot"] != payload:
+                logger.info(f"Pad {pad_id} connected (boot {payload})")
+                pad.update(boot=payload, last_seq=0, in_flight=set(), replies=OrderedDict())
+            return "0|ACK|"
+        if frame_type == "HB":
+            return "0|ACK|"
+        if seq <= pad["last_seq"]:
+            logger.info(f"Pad {pad_id} resent frame {seq}; replaying reply")
+            in_flight = pad["in_flight"]
+            replied.wait_for(lambda: seq not in in_flight)
+            return pad["replies"].get(seq, f"{seq}|DUP|Already handled")
+        # Accepted in the same critical section as the check, so a resend can never dispatch it again
+        in_flight, replies = pad["in_flight"], pad["replies"]
+        pad["last_seq"] = seq
+        in_flight.add(seq)
+
+    try:
+        status, reply_payload = dispatch_pad_frame(pad_id, frame_type, payload)
+    except Exception as e:
+        logger.error(f"Error handling pad {pad_id} frame {seq}: {e}")
+        status, reply_payload = "ERR", "Error"
+    reply = f"{seq}|{status}|{reply_payload}"
+
+    with lock:
+        replies[seq] = reply  # The state of this boot, even if the pad has rebooted meanwhile
+        while len(replies) > REPLY_CACHE_SIZE:
+            replies.popitem(last=False)
+        in_flight.discard(seq)
+        replied.notify_all()
+    return reply
+
+
+def dispatch_pad_frame(pad_id, frame_type, payload):
+    """
+    Performs the action for a new (not resent) pad frame.
+
+    Returns:
+        tuple: (status, reply payload)
+    """
+    if frame_type == "TAP":
+        update_latest_rfid(payload, pad_id)
+        if lane_service is None:
+            return "ERR", "Not ready"
+        try:
+            lane, racer = lane_service.assign(payload, pad_id)
+        except LaneAssignmentError as e:
+            return "ERR", str(e).capitalize()
+        return "ACK", f"{lane}|Lane {lane}: {racer['RacerFirstName']} {racer['RacerLastName']}"
+    if frame_type == "BTN":
+        button_pressed.set()
+        return "ACK", "Next Tag Please"
+    logger.warning(f"Unknown frame type from pad {pad_id}: {frame_type}")
+    return "ERR", "Unknown command"
+
+
+def wait_for_button_press(timeout=None):
+    """
+    Blocks until a pad's button is pressed.
+
+    Args:
+        timeout (float, optional): Seconds to wait; None waits forever.
+
+    Returns:
+        bool: True if the button was pressed, False on timeout.
+    """
+    pressed = button_pressed.wait(timeout)
+    button_pressed.clear()
+    return pressed
+
+
 def reset_leds():
     """
     Resets LEDs (placeholder for actual LED reset logic).
@@ -49,22 +156,33 @@ def reset_leds():
     # TODO: Implement LED reset logic
 
 
-def update_latest_rfid(rfid):
+def set_lane_service(service):
+    """
+    Registers the LaneAssignmentService that handles pad taps.
+    """
+    global lane_service
+    lane_service = service
+
+
+def update_latest_rfid(rfid, pad_id=None):
     """
     Updates the latest RFID value in a thread-safe manner.
     """
     global latest_rfid
     with lock:
         latest_rfid = rfid
-        logger.info(f"Updated latest RFID: {rfid}")
+        latest_rfids[pad_id] = rfid
+        logger.info(f"Updated latest RFID from pad {pad_id}: {rfid}")
 
 
-def get_latest_rfid():
+def get_latest_rfid(pad_id=None):
     """
     Retrieves the latest RFID value in a thread-safe manner.
+
+    Args:
+        pad_id (str, optional): Pad to ask about; None returns the latest tag from any pad.
     """
-    global latest_rfid
     with lock:
-        return latest_rfid
+        return latest_rfid if pad_id is None else latest_rfids.get(pad_id)
 
 
@@ -0,0 +1,259 @@
+"""
+diagnostics.py
+
+Purpose: Live sensor diagnostics for troubleshooting flaky beams, buttons and devices. Diagnostics subscribes to
+every event on the shared bus ("*"), so it measures the same path the race uses, and keeps per-source statistics:
+event counts and rates over a sliding window, edge-to-handler latency histograms (the time from an edge's
+time.monotonic() stamp to the moment its event reaches the bus subscribers), lane rejections by reason, button
+debounce rejections, and round-trip times to the Nano and the ESP32s.
+
+Overhead is bounded: each event costs one lock, a deque append and a binary search into fixed histogram bins, and
+nothing is kept per event beyond the last RATE_SAMPLES timestamps of each source. Round trips are only measured
+while start() is active.
+
+Usage: diagnostics = Diagnostics(); watch_button(button), add_round_trip(name, ping) or add_link(name, link) for
+each device; start() while the diagnostics window is open, snapshot() to read the statistics, stop() when done.
+"""
+
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+from config import Config
+from event_bus import bus as default_bus
+from logger import logger
+
+# Event field holding the edge timestamp, for events that carry one
+EDGE_FIELDS = {
+    "finish_line": "time",
+    "button": "time",
+    "lane_button": "pressed_at",
+    "relays_latched": "time",
+    "stepper_moved": "time",
+    "socket_message": "time",
+}
+
+# Histogram bin edges in seconds: 1-2-5 steps from 10 us to 5 s
+BIN_EDGES = [m * 10.0 ** e for e in range(-5, 1) for m in (1, 2, 5)]
+
+RATE_SAMPLES = 1024  # Timestamps kept per source for its event rate
+
+
+def _source(topic, data):
+    # Groups events by the physical sensor or device that produced them
+    if topic == "finish_line":
+        return f"lane {data['lane']} finish beam"
+    if topic == "lane_button":
+        return f"lane {data['lane']} start button"
+    if topic == "button":
+        return f"button {data['name']}"
+    if topic in ("lane_assigned", "lane_rejected"):
+        return f"RFID pad {data.get('pad_id')}"
+    if topic == "socket_message":
+        return f"socket {data.get('device')}"
+    return topic
+
+
+class LatencyHistogram:
+    def __init__(self):
+        """
+        Initializes an empty histogram over BIN_EDGES (plus an overflow bin).
+        """
+        self.counts = [0] * (len(BIN_EDGES) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        """
+        Adds one latency sample.
+        """
+        self.counts[bisect_right(BIN_EDGES, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p):
+        """
+        Returns the upper edge of the bin holding the p-th percentile (0-100), or None without samples.
+        """
+        if not self.count:
+            return None
+        target, seen = self.count * p / 100, 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return BIN_EDGES[index] if index < len(BIN_EDGES) else self.max
+        return self.max
+
+    def summary(self):
+        """
+        Returns {"count", "mean", "p50", "p95", "max", "bins"} with times in seconds.
+        """
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "max": self.max if self.count else None,
+            "bins": list(self.counts),
+        }
+
+
+class Diagnostics:
+    def __init__(self, bus=None, window=None, ping_interval=None):
+        """
+        Initializes Diagnostics. Nothing is measured until start().
+
+        Args:
+            bus (EventBus, optional): Bus to watch. Defaults to the shared bus.
+            window (float, optional): Seconds over which event rates are measured.
+                                      Defaults to Config.DIAG_RATE_WINDOW_SECONDS.
+            ping_interval (float, optional): Seconds between round-trip measurements.
+                                             Defaults to Config.DIAG_PING_SECONDS.
+        """
+        self.bus = bus or default_bus
+        self.window = window or Config.DIAG_RATE_WINDOW_SECONDS
+        self.ping_interval = ping_interval or Config.DIAG_PING_SECONDS
+        self.lock = threading.Lock()
+        self.buttons = []
+        self.pings = {}  # name -> function returning one round trip in seconds
+        self.running = False
+        self.stop_event = threading.Event()
+        self.reset()
+
+    def reset(self):
+        """
+        Clears every statistic.
+        """
+        with self.lock:
+            self.started_at = time.monotonic()
+            self.counts = {}  # source -> events seen
+            self.recent = {}  # source -> deque of recent event times
+            self.latency = {}  # source -> LatencyHistogram
+            self.rejections = {}  # reason -> lane assignments rejected
+            self.round_trips = {}  # device -> LatencyHistogram
+            self.ping_errors = {}  # device -> failed round trips
+            self.bounce_base = {button.name: button.bounces for button in self.buttons}
+
+    def watch_button(self, button):
+        """
+        Reports a Button's debounce rejections.
+        """
+        if button is not None:
+            self.buttons.append(button)
+            self.bounce_base[button.name] = button.bounces
+
+    def add_round_trip(self, name, ping):
+        """
+        Registers a device whose round-trip time is measured while running.
+
+        Args:
+            name (str): Device name shown in the report.
+            ping (function): Performs one round trip and returns its duration in seconds.
+        """
+        self.pings[name] = ping
+
+    def add_link(self, name, link):
+        """
+        Registers a DeviceLink (ESP32) whose round-trip time is measured while running.
+        """
+        def ping():
+            sent, device_us, received = link.ping()
+            return received - sent
+
+        self.add_round_trip(name, ping)
+
+    def start(self):
+        """
+        Subscribes to every bus event and starts measuring round trips.
+        """
+        if self.running:
+            return
+        self.reset()
+        self.running = True
+        self.stop_event.clear()
+        self.bus.subscribe("*", self._on_event)
+        if self.pings:
+            threading.Thread(target=self._measure_round_trips, name="diagnostics-ping", daemon=True).start()
+        logger.info("Sensor diagnostics started.")
+
+    def stop(self):
+        """
+        Stops watching the bus and measuring round trips.
+        """
+        if not self.running:
+            return
+        self.running = False
+        self.stop_event.set()
+        self.bus.unsubscribe("*", self._on_event)
+        logger.info("Sensor diagnostics stopped.")
+
+    def _on_event(self, topic, data):
+        # Runs on the publishing thread (often a GPIO callback), so it only records
+        now = time.monotonic()
+        source = _source(topic, data)
+        field = EDGE_FIELDS.get(topic)
+        with self.lock:
+            self.counts[source] = self.counts.get(source, 0) + 1
+            recent = self.recent.get(source)
+            if recent is None:
+                recent = self.recent[source] = deque(maxlen=RATE_SAMPLES)
+            recent.append(now)
+            if field and data.get(field) is not None:
+                histogram = self.latency.get(source)
+                if histogram is None:
+                    histogram = self.latency[source] = LatencyHistogram()
+                histogram.add(max(0.0, now - data[field]))
+            if topic == "lane_rejected":
+                reason = data.get("reason")
+                self.rejections[reason] = self.rejections.get(reason, 0) + 1
+
+    def _measure_round_trips(self):
+        while not self.stop_event.wait(self.ping_interval):
+            for name, ping in list(self.pings.items()):
+                try:
+                    round_trip = ping()
+                except Exception as e:
+                    with self.lock:
+                        self.ping_errors[name] = self.ping_errors.get(name, 0) + 1
+                    logger.debug(f"Diagnostics round trip to {name} failed: {e}")
+                    continue
+                with self.lock:
+                    self.round_trips.setdefault(name, LatencyHistogram()).add(round_trip)
+
+    def snapshot(self):
+        """
+        Returns the statistics gathered since start().
+
+        Returns:
+            dict: "elapsed" (seconds), "sources" (source -> {"count", "rate" (events per second over the window),
+                  "latency" (LatencyHistogram.summary() or None)}), "bounces" (button -> debounce rejections),
+                  "rejections" (reason -> count), "round_trips" (device -> summary, plus "errors").
+        """
+        now = time.monotonic()
+        with self.lock:
+            window_start = now - min(self.window, now - self.started_at)
+            span = max(now - window_start, 1e-9)
+            sources = {}
+            for source, count in self.counts.items():
+                recent = self.recent[source]
+                in_window = len(recent) - bisect_right(recent, window_start)
+                histogram = self.latency.get(source)
+                sources[source] = {
+                    "count": count,
+                    "rate": in_window / span,
+                    "latency": histogram.summary() if histogram else None,
+                }
+            round_trips = {name: dict(histogram.summary(), errors=self.ping_errors.get(name, 0))
+                           for name, histogram in self.round_trips.items()}
+            for name, errors in self.ping_errors.items():
+                round_trips.setdefault(name, dict(LatencyHistogram().summary(), errors=errors))
+            return {
+                "elapsed": now - self.started_at,
+                "sources": sources,
+                "bounces": {button.name: button.bounces - self.bounce_base.get(button.name, 0)
+                            for button in self.buttons},
+                "rejections": dict(self.rejections),
+                "round_trips": round_trips,
+            }
@@ -0,0 +1,64 @@
+"""
+event_bus.py
+
+Purpose: In-process publish/subscribe bus. Producers (the lane assignment service, sensors, the race workflow)
+publish named events; consumers (GUI, LEDs, diagnostics) subscribe without the producer knowing about them.
+Handlers run synchronously on the publishing thread, so GUI handlers must hand work to the Tk thread with
+RaceGUI.call_soon(). A failing handler is logged and does not stop delivery to the others.
+
+Usage: from event_bus import bus; bus.subscribe("lane_assigned", handler); bus.publish("lane_assigned", lane=1).
+Handlers are called as handler(topic, data). Subscribing to "*" receives every event.
+"""
+
+import time
+from threading import Lock
+from logger import logger
+
+
+class EventBus:
+    def __init__(self):
+        """
+        Initializes an EventBus with no subscribers.
+        """
+        self.subscribers = {}  # topic -> tuple of handlers
+        self.lock = Lock()
+
+    def subscribe(self, topic, handler):
+        """
+        Registers a handler for a topic.
+
+        Args:
+            topic (str): Event name, or "*" for every event.
+            handler (function): Called as handler(topic, data).
+        """
+        with self.lock:
+            self.subscribers[topic] = self.subscribers.get(topic, ()) + (handler,)
+
+    def unsubscribe(self, topic, handler):
+        """
+        Removes a handler registered with subscribe().
+        """
+        with self.lock:
+            self.subscribers[topic] = tuple(h for h in self.subscribers.get(topic, ()) if h != handler)  # Bound methods are equal, not identical
+
+    def publish(self, topic, **data):
+        """
+        Delivers an event to every handler subscribed to its topic and to "*".
+
+        Args:
+            topic (str): Event name.
+            **data: Event fields. A monotonic "time" field is added if not given.
+        """
+        data.setdefault("time", time.monotonic())
+        # Handler tuples are replaced, never mutated, so they can be read without the lock. "*" handlers (the event
+        # journal, diagnostics) go first, so they see an event before any event its handlers publish in turn.
+        handlers = self.subscribers.get("*", ()) + self.subscribers.get(topic, ())
+        for handler in handlers:
+            try:
+                handler(topic, data)
+            except Exception as e:
+                logger.error(f"Event handler for {topic} failed: {e}")
+
+
+# Shared bus for the whole program
+bus = EventBus()
@@ -0,0 +1,398 @@
+"""
+event_journal.py
+
+Purpose: Event-sourced record of a race day. EventJournal appends every event published on the bus (taps, button
+presses, gate releases, beam breaks, timeouts and the race state changes they cause) to a compact binary file, one
+per run, with each event's time.monotonic() timestamp. Replayer feeds a journal back through a fresh RaceManager and
+PlacingEngine, at recorded speed, faster, or as fast as possible, so a disputed heat can be reproduced exactly and
+real race-day traffic can drive regression checks and benchmarks.
+
+The journal is written on the publishing thread, so each event costs one encode and a buffered write; the buffer
+is flushed as each heat starts and finishes. A run cut short leaves at most a partial last record, which read()
+ignores.
+
+File format (little-endian):
+    header : b"CCEJ", version (H), wall-clock start (d, time.time()), monotonic start (d)
+    records: topic id (H), time (d, time.monotonic()), payload length (I), payload
+    Topic id 0 defines a topic: its payload is the new id (H) and the topic name (UTF-8). Other payloads are the
+    event's fields (without "time") in a tagged binary encoding (see _encode()).
+
+Replay is deterministic: events are applied one at a time in journal order, and every input to the race state is
+in the journal, so the same journal always gives the same results. Events the replayed RaceManager and
+PlacingEngine produce themselves (heat_started, placings_changed, ...) are regenerated rather than copied; every
+other event is republished on the replay's own bus, which observers can subscribe to.
+
+Usage: journal = EventJournal(); start() before the devices come up, stop() at shutdown. To replay,
+Replayer(read(path)).run(speed), then finished holds the replayed heats and differences() compares them with the
+results recorded at the time. Run "python event_journal.py JOURNAL [SPEED]" to replay a journal and print it.
+"""
+
+import datetime
+import os
+import struct
+import time
+from decimal import Decimal
+from threading import Lock
+from config import Config
+from event_bus import EventBus, bus as default_bus
+from logger import logger
+from placing import PlacingEngine
+from race_manager import RaceManager
+
+MAGIC = b"CCEJ"
+VERSION = 1
+HEADER = struct.Struct("<4sHdd")
+RECORD = struct.Struct("<HdI")
+TOPIC_ID = struct.Struct("<H")
+INT = struct.Struct("<q")
+FLOAT = struct.Struct("<d")
+LENGTH = struct.Struct("<I")
+
+# Writes are flushed to the file at these heat boundaries
+FLUSH_TOPICS = frozenset({"heat_started", "heat_finished", "heat_voided"})
+
+# Settings the replay depends on, recorded when the journal starts and followed through config_changed
+REPLAY_SETTINGS = ("TRACK_NUMBER", "NUMBER_LANES", "RACE_START_MODE", "RACE_MIN_RACE_TIME", "TIE_WINDOW_MS",
+                   "TIE_POLICY")
+
+# Events the replayed RaceManager and PlacingEngine publish themselves, so they are not copied to the replay bus
+REGENERATED = frozenset({"journal_started", "race_state_restored", "race_counter_incremented", "heat_started",
+                         "heat_finished", "heat_voided", "start_recorded", "reaction_recorded", "placings_changed",
+                         "heat_recorded"})
+
+# Result fields differences() compares
+COMPARED_FIELDS = ("RacerID", "RaceTime", "ReactionTime", "Placing")
+
+
+def _encode(value, out):
+    # Tag byte, then the value: N/T/F none and booleans, i int, f float, s str, b bytes, n Decimal, t datetime,
+    # D date, l list, u tuple, d dict. Anything else is stored as its str().
+    if value is None:
+        out += b"N"
+    elif value is True or value is False:
+        out += b"T" if value else b"F"
+    elif isinstance(value, int):
+        out += b"i" + INT.pack(value)
+    elif isinstance(value, float):
+        out += b"f" + FLOAT.pack(value)
+    elif isinstance(value, (bytes, bytearray)):
+        out += b"b" + LENGTH.pack(len(value)) + value
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        out += (b"u" if isinstance(value, tuple) else b"l") + LENGTH.pack(len(value))
+        for item in value:
+            _encode(item, out)
+    elif isinstance(value, dict):
+        out += b"d" + LENGTH.pack(len(value))
+        for key, item in value.items():
+            _encode(key, out)
+            _encode(item, out)
+    else:
+        tag = b"s"
+        if isinstance(value, Decimal):
+            tag = b"n"
+        elif isinstance(value, datetime.datetime):
+            tag, value = b"t", value.isoformat()
+        elif isinstance(value, datetime.date):
+            tag, value = b"D", value.isoformat()
+        text = str(value).encode()
+        out += tag + LENGTH.pack(len(text)) + text
+
+
+def _decode(data, offset):
+    tag = data[offset:offset + 1]
+    offset += 1
+    if tag == b"N":
+        return None, offset
+    if tag in (b"T", b"F"):
+        return tag == b"T", offset
+    if tag == b"i":
+        return INT.unpack_from(data, offset)[0], offset + INT.size
+    if tag == b"f":
+        return FLOAT.unpack_from(data, offset)[0], offset + FLOAT.size
+    (length,) = LENGTH.unpack_from(data, offset)
+    offset += LENGTH.size
+    if tag in (b"l", b"u"):
+        items = []
+        for _ in range(length):
+            item, offset = _decode(data, offset)
+            items.append(item)
+        return (tuple(items) if tag == b"u" else items), offset
+    if tag == b"d":
+        result = {}
+        for _ in range(length):
+            key, offset = _decode(data, offset)
+            result[key], offset = _decode(data, offset)
+        return result, offset
+    raw = bytes(data[offset:offset + length])
+    offset += length
+    if tag == b"b":
+        return raw, offset
+    text = raw.decode()
+    if tag == b"n":
+        return Decimal(text), offset
+    if tag == b"t":
+        return datetime.datetime.fromisoformat(text), offset
+    if tag == b"D":
+        return datetime.date.fromisoformat(text), offset
+    if tag == b"s":
+        return text, offset
+    raise ValueError(f"Unknown event journal tag {tag!r}")
+
+
+class EventJournal:
+    def __init__(self, directory=None, bus=None):
+        """
+        Initializes the EventJournal. Nothing is written until start().
+
+        Args:
+            directory (str, optional): Where journals are written. Defaults to Config.EVENT_JOURNAL_DIR.
+            bus (EventBus, optional): Bus to record. Defaults to the shared bus.
+        """
+        self.directory = directory or Config.EVENT_JOURNAL_DIR
+        self.bus = bus or default_bus
+        self.path = None
+        self.file = None
+        self.topics = {}  # topic -> id in this file
+        self.lock = Lock()
+
+    def start(self):
+        """
+        Opens a new journal file for this run and records every event from now on.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, time.strftime("%Y%m%d-%H%M%S"))
+        path, number = base + ".evj", 1
+        while os.path.exists(path):
+            number += 1
+            path = f"{base}-{number}.evj"
+        self.path = path
+        self.file = open(path, "xb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, time.time(), time.monotonic()))
+        self._write("journal_started", {"settings": {name: getattr(Config, name) for name in REPLAY_SETTINGS}},
+                    time.monotonic())
+        self.bus.subscribe("*", self._on_event)
+        logger.info(f"Recording events to {path}")
+
+    def stop(self):
+        """
+        Stops recording and closes the journal file.
+        """
+        self.bus.unsubscribe("*", self._on_event)
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+                logger.info(f"Event journal {self.path} closed.")
+
+    def _on_event(self, topic, data):
+        self._write(topic, {key: value for key, value in data.items() if key != "time"}, data["time"])
+        if topic in FLUSH_TOPICS:
+            with self.lock:
+                if self.file:
+                    self.file.flush()
+
+    def _write(self, topic, fields, at):
+        payload = bytearray()
+        _encode(fields, payload)  # Encoded before taking the lock, so a bad field never leaves a torn record
+        with self.lock:
+            if self.file is None:
+                return
+            topic_id = self.topics.get(topic)
+            if topic_id is None:
+                topic_id = self.topics[topic] = len(self.topics) + 1
+                name = topic.encode()
+                self.file.write(RECORD.pack(0, at, TOPIC_ID.size + len(name)) + TOPIC_ID.pack(topic_id) + name)
+            self.file.write(RECORD.pack(topic_id, at, len(payload)) + payload)
+
+
+def read_header(path):
+    """
+    Reads when a journal was started.
+
+    Returns:
+        tuple: (wall-clock start as time.time(), the time.monotonic() at that moment), to convert event times.
+    """
+    with open(path, "rb") as f:
+        data = f.read(HEADER.size)
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is not an event journal")
+    magic, version, started, monotonic_start = HEADER.unpack(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} event journal")
+    return started, monotonic_start
+
+
+def read(path):
+    """
+    Reads a journal's events in the order they were recorded.
+
+    Args:
+        path (str): Journal file.
+
+    Yields:
+        tuple: (topic, time, fields); fields includes "time", as published.
+    """
+    read_header(path)
+    with open(path, "rb") as f:
+        data = memoryview(f.read())
+    topics = {}
+    offset = HEADER.size
+    while offset < len(data):
+        if offset + RECORD.size > len(data):
+            logger.warning(f"{path} ends in a partial record; ignoring it.")
+            return
+        topic_id, at, length = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        if offset + length > len(data):
+            logger.warning(f"{path} ends in a partial record; ignoring it.")
+            return
+        if topic_id == 0:
+            (new_id,) = TOPIC_ID.unpack_from(data, offset)
+            topics[new_id] = bytes(data[offset + TOPIC_ID.size:offset + length]).decode()
+        else:
+            fields, _ = _decode(data, offset)
+            fields["time"] = at
+            yield topics[topic_id], at, fields
+        offset += length
+
+
+class Replayer:
+    def __init__(self, events, db_handler=None, bus=None):
+        """
+        Initializes the Replayer.
+
+        Args:
+            events (iterable): (topic, time, fields) tuples, as read() yields.
+            db_handler (DatabaseHandler, optional): Database to write the replayed heats to; None writes nothing.
+            bus (EventBus, optional): Bus the replay publishes on. Defaults to a new, private bus.
+        """
+        self.events = events
+        self.db_handler = db_handler
+        self.bus = bus or EventBus()
+        self.settings = {name: getattr(Config, name) for name in REPLAY_SETTINGS}
+        self.race_times = {}  # lane -> race time string of the heat being replayed
+        self.finished = []  # Replayed HeatStates, in the order they finished
+        self.recorded = {}  # race_counter -> results recorded at the time (heat_recorded)
+        self.actions = {
+            "journal_started": self._on_journal_started,
+            "config_changed": self._on_config_changed,
+            "race_state_restored": lambda fields: self.race_manager.restore(fields["state"]),
+            "race_counter_incremented": lambda fields: self.race_manager.increment_race_counter(fields["race_counter"]),
+            "lane_assigned": self._on_lane_assigned,
+            "heat_started": self._on_heat_started,
+            "start_recorded": lambda fields: self.race_manager.record_start_times(fields["lanes"], fields["start_time"]),
+            "reaction_recorded": lambda fields: self.race_manager.record_reaction_time(fields["lane"],
+                                                                                       fields["reaction_time"]),
+            "finish_line": lambda fields: self._record_finish(fields["lane"], fields["time"]),
+            "heat_finished": self._on_heat_finished,
+            "heat_voided": lambda fields: self.race_manager.void_interrupted_heat(),
+            "heat_recorded": lambda fields: self.recorded.__setitem__(fields["race_counter"], fields["results"]),
+        }
+        self.bus.subscribe("placings_changed", self._on_placings_changed)
+        self._setup()
+
+    def _setup(self):
+        self.race_manager = RaceManager(self.db_handler, 0, 1, self.settings["TRACK_NUMBER"],
+                                        self.settings["RACE_START_MODE"], bus=self.bus)
+        self.placing_engine = PlacingEngine(self.settings["TIE_WINDOW_MS"], self.settings["TIE_POLICY"], bus=self.bus)
+
+    def run(self, speed=None):
+        """
+        Replays the events.
+
+        Args:
+            speed (float, optional): 1.0 replays at the recorded pace, 10 ten times faster; None replays as fast as
+                                     possible.
+
+        Returns:
+            list: The replayed heats (HeatState), in the order they finished.
+        """
+        started, first = time.monotonic(), None
+        for topic, at, fields in self.events:
+            if speed:
+                first = at if first is None else first
+                delay = (at - first) / speed - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            if topic not in REGENERATED:
+                self.bus.publish(topic, **fields)
+            action = self.actions.get(topic)
+            if action:
+                action(fields)
+        return self.finished
+
+    def _on_journal_started(self, fields):
+        self.settings.update(fields["settings"])
+        self._setup()
+
+    def _on_config_changed(self, fields):
+        changed = {name: value for name, value in fields["changed"].items() if name in self.settings}
+        self.settings.update(changed)
+        if "RACE_START_MODE" in changed:
+            self.race_manager.race_start_mode = changed["RACE_START_MODE"].lower()
+        if "TIE_WINDOW_MS" in changed or "TIE_POLICY" in changed:
+            self.placing_engine = PlacingEngine(self.settings["TIE_WINDOW_MS"], self.settings["TIE_POLICY"],
+                                                bus=self.bus)
+
+    def _on_lane_assigned(self, fields):
+        race_counter = fields.get("race_counter", self.race_manager.race_counter)
+        self.race_manager.initialize_race_entry(race_counter, fields["lane"], fields["rfid"], fields["racer"])
+
+    def _on_heat_started(self, fields):
+        self.placing_engine.reset()
+        self.race_times.clear()
+        self.race_manager.start_heat()
+
+    def _on_heat_finished(self, fields):
+        heat = self.race_manager.finish_heat()
+        self.finished.append(heat)
+        if self.db_handler:
+            self.race_manager.write_races_to_db(heat)
+
+    def _record_finish(self, lane, finished_at):
+        # The rule RaceWorkflow.record_finish() applies to a live finish
+        started_at = self.race_manager.racing_start_times.get(lane)
+        if started_at is not None:
+            if finished_at - started_at < self.settings["RACE_MIN_RACE_TIME"]:
+                return
+            self.race_times[lane] = f"{finished_at - started_at:09.6f}"
+        self.placing_engine.add_finish(lane, finished_at)
+
+    def _on_placings_changed(self, topic, event):
+        for lane, place in event["changed"].items():
+            self.race_manager.record_race_finish(lane, self.race_times.get(lane, "00.000000"), place)
+
+    def differences(self):
+        """
+        Compares the replayed heats with the results recorded when they were raced.
+
+        Returns:
+            list: (race_counter, lane, field, recorded, replayed) for every field in COMPARED_FIELDS that differs.
+        """
+        replayed = {heat.race_counter: heat.races for heat in self.finished}
+        differences = []
+        for race_counter, results in self.recorded.items():
+            races = {race["Lane"]: race for race in replayed.get(race_counter, [])}
+            for result in results:
+                race = races.get(result["Lane"], {})
+                for field in COMPARED_FIELDS:
+                    if race.get(field) != result.get(field):
+                        differences.append((race_counter, result["Lane"], field, result.get(field), race.get(field)))
+        return differences
+
+
+if __name__ == "__main__":
+    import sys
+
+    replayer = Replayer(read(sys.argv[1]))
+    replayer.run(float(sys.argv[2]) if len(sys.argv) > 2 else None)
+    for heat in replayer.finished:
+        print(f"Race {heat.race_counter}")
+        for race in sorted(heat.races, key=lambda race: race["Lane"]):
+            print(f"  Lane {race['Lane']}: {race['RacerFirstName']} {race['RacerLastName']:<20} "
+                  f"time {race['RaceTime']}  reaction {race['ReactionTime']}  place {race['Placing']}")
+    differences = replayer.differences()
+    print(f"\n{len(replayer.finished)} heats replayed; {len(replayer.recorded)} recorded results compared, "
+          f"{len(differences)} difference(s).")
+    for race_counter, lane, field, recorded, replayed in differences:
+        print(f"  Race {race_counter} lane {lane} {field}: recorded {recorded}, replayed {replayed}")
@@ -6,10 +6,16 @@ Purpose: Manages the graphical user interface (GUI) for the CubCar application,
 Usage: Instantiate RaceGUI, call update_lane_status() and show_message(), then start().
 """
 
+import glob
+import os
+import queue
 import tkinter as tk
 from tkinter import ttk, Menu, messagebox
+import config
+import diagnostics
 from config import Config
 from logger import logger
+from sensors import trace_recorder
 
 
 class RaceGUI:
@@ -18,8 +24,13 @@ class RaceGUI:
         self.root.title(Config.WINDOW_TITLE)
         self.root.geometry(Config.WINDOW_SIZE)
         self.race_mode_frame = None
+        self.device_labels = {}
+        self.diagnostics = None  # diagnostics.Diagnostics shown by the sensor test window, set by the workflow
+        self._ui_queue = queue.Queue()  # Callables queued from worker threads, run on the Tk thread
         self._setup_menu()
+        self._setup_status_bar()
         self._bind_shortcuts()
+        self.root.after(50, self._drain_ui_queue)
 
     def _setup_menu(self):
         """Sets up the menu and keyboard shortcuts."""
@@ -34,6 +45,50 @@ class RaceGUI:
         self.root.config(menu=menubar)
         logger.info("Menu setup complete.")
 
+    def add_menu_command(self, label, command):
+        """Adds an operator action (e.g. from the race workflow) to the menu, above Exit."""
+        self.config_menu.insert_command(self.config_menu.index("end") - 1, label=label, command=command)
+
+    def _setup_status_bar(self):
+        """Creates the bottom status bar showing per-device startup state."""
+        self.status_bar = ttk.Frame(self.root, relief="sunken")
+        self.status_bar.pack(side="bottom", fill="x")
+        self.startup_label = ttk.Label(self.status_bar, text="Starting...")
+        self.startup_label.pack(side="right", padx=5)
+        self.status_label = ttk.Label(self.status_bar, text="", font=("Helvetica", 12, "bold"))
+        self.status_label.pack(side="right", padx=15)
+
+    def _drain_ui_queue(self):
+        """Runs callables queued by call_soon() on the Tk thread."""
+        try:
+            while True:
+                function, args = self._ui_queue.get_nowait()
+                function(*args)
+        except queue.Empty:
+            pass
+        self.root.after(50, self._drain_ui_queue)
+
+    def call_soon(self, function, *args):
+        """Schedules a GUI update from any thread."""
+        self._ui_queue.put((function, args))
+
+    def update_device_status(self, name, status, elapsed_ms):
+        """Shows a device's startup status in the status bar; safe to call from any thread."""
+        self.call_soon(self._set_device_status, name, status, elapsed_ms)
+
+    def _set_device_status(self, name, status, elapsed_ms):
+        colors = {"starting": "orange", "ready": "green", "failed": "red"}
+        label = self.device_labels.get(name)
+        if label is None:
+            label = tk.Label(self.status_bar, font=("Helvetica", 10))
+            label.pack(side="left", padx=5)
+            self.device_labels[name] = label
+        label.config(text=f"{name}: {status} ({elapsed_ms:.0f} ms)", fg=colors.get(status, "black"))
+
+    def show_startup_complete(self, elapsed_ms):
+        """Shows the total startup time; safe to call from any thread."""
+        self.call_soon(lambda: self.startup_label.config(text=f"Ready in {elapsed_ms:.0f} ms"))
+
     def _bind_shortcuts(self):
         """Binds global keyboard shortcuts."""
         self.root.bind_all("<Control-c>", lambda event: self._config_screen())
@@ -48,27 +103,268 @@ class RaceGUI:
             self.root.destroy()
 
     def _config_screen(self):
-        """Placeholder for configuration screens."""
-        messagebox.showinfo("Config", "Configuration screens placeholder")
+        """Opens the settings editor: edits are validated and saved to the active profile in the settings file."""
+        window = tk.Toplevel(self.root)
+        profile = f"profile {Config.PROFILE}" if Config.PROFILE else "base settings"
+        window.title(f"Configuration - {Config.CONFIG_PATH} ({profile})")
+        window.geometry(Config.WINDOW_SIZE)
+
+        buttons = ttk.Frame(window)
+        buttons.pack(side="bottom", fill="x", pady=5)
+        ttk.Label(buttons, text="* applies at the next heat, others after a restart; environment settings win",
+                  font=("Helvetica", 9)).pack(side="left", padx=5)
+        canvas = tk.Canvas(window, highlightthickness=0)
+        scrollbar = ttk.Scrollbar(window, orient="vertical", command=canvas.yview)
+        grid = ttk.Frame(canvas)
+        grid.bind("<Configure>", lambda event: canvas.configure(scrollregion=canvas.bbox("all")))
+        canvas.create_window((0, 0), window=grid, anchor="nw")
+        canvas.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        canvas.pack(side="left", fill="both", expand=True, padx=5, pady=5)
+
+        entries = {}
+        sources = config.sources()
+        for row, name in enumerate(config.schema()):
+            hot = "*" if name in config.HOT_RELOAD else ""
+            ttk.Label(grid, text=f"{name}{hot}").grid(row=row, column=0, sticky="w", padx=5)
+            choices = config.CHOICES.get(name)
+            if choices:
+                entry = ttk.Combobox(grid, values=(("None",) if name in config.OPTIONAL else ()) + choices, width=40)
+            else:
+                entry = ttk.Entry(grid, width=42)
+            entry.insert(0, config.format_value(getattr(Config, name)))
+            entry.grid(row=row, column=1, sticky="w", padx=5, pady=1)
+            ttk.Label(grid, text=sources.get(name, "default"), foreground="gray").grid(row=row, column=2, sticky="w")
+            entries[name] = entry
+
+        def save():
+            try:
+                changes = {}
+                for name, entry in entries.items():
+                    if entry.get() != config.format_value(getattr(Config, name)):
+                        changes[name] = config.parse_value(name, entry.get())
+                if not changes:
+                    return
+                config.save_settings(changes)
+            except (config.ConfigError, OSError) as e:
+                messagebox.showerror("Configuration", str(e), parent=window)
+                return
+            # The race workflow picks the file up between heats, so nothing changes mid-race
+            waiting = sorted(name for name in changes if name not in config.HOT_RELOAD)
+            message = f"Saved {len(changes)} setting(s)."
+            if waiting:
+                message += f"\nRestart to apply: {', '.join(waiting)}"
+            messagebox.showinfo("Configuration", message, parent=window)
+
+        ttk.Button(buttons, text="Close", command=window.destroy).pack(side="right", padx=5)
+        ttk.Button(buttons, text="Save", command=save).pack(side="right", padx=5)
 
     def _test_sensors(self):
-        """Placeholder for testing sensors."""
-        messagebox.showinfo("Testing", "Testing sensors placeholder")
+        """Opens the live sensor diagnostics: event rates, edge-to-handler latency, bounces and device round trips."""
+        if self.diagnostics is None:
+            messagebox.showinfo("Testing Sensors", "Sensor diagnostics are not available until startup completes.")
+            return
+        window = tk.Toplevel(self.root)
+        window.title("Testing Sensors - Diagnostics")
+        window.geometry(Config.WINDOW_SIZE)
+
+        columns = ("events", "rate", "p50", "p95", "max")
+        headings = ("Events", "Rate (/s)", "p50 (ms)", "p95 (ms)", "Max (ms)")
+        tree = ttk.Treeview(window, columns=columns, height=12)
+        tree.heading("#0", text="Source")
+        tree.column("#0", width=220)
+        for column, heading in zip(columns, headings):
+            tree.heading(column, text=heading)
+            tree.column(column, width=90, anchor="e")
+        tree.pack(side="top", fill="x", padx=5, pady=5)
+        summary = ttk.Label(window, text="", font=("Helvetica", 10), justify="left")
+        summary.pack(side="bottom", fill="x", padx=5, pady=5)
+        canvas = tk.Canvas(window, bg="white", height=160)
+        canvas.pack(side="top", fill="both", expand=True, padx=5)
+
+        def reset():
+            self.diagnostics.reset()
+            tree.delete(*tree.get_children())
+
+        ttk.Button(window, text="Reset", command=reset).pack(side="bottom", anchor="e", padx=5)
+
+        def ms(seconds):
+            return "" if seconds is None else f"{seconds * 1000:.2f}"
+
+        histograms = {}  # tree row -> latency summary
+
+        def refresh():
+            if not window.winfo_exists():
+                return
+            snapshot = self.diagnostics.snapshot()
+            rows = [(source, stats["count"], stats["rate"], stats["latency"])
+                    for source, stats in sorted(snapshot["sources"].items())]
+            rows += [(f"round trip {name}", stats["count"], None, stats)
+                     for name, stats in sorted(snapshot["round_trips"].items())]
+            histograms.clear()
+            for source, count, rate, latency in rows:
+                latency = latency or {}
+                values = (count, "" if rate is None else f"{rate:.1f}",
+                          ms(latency.get("p50")), ms(latency.get("p95")), ms(latency.get("max")))
+                if tree.exists(source):
+                    tree.item(source, values=values)
+                else:
+                    tree.insert("", "end", iid=source, text=source, values=values)
+                if latency.get("count"):
+                    histograms[source] = latency
+            lines = [f"Watching for {snapshot['elapsed']:.0f} s"]
+            if snapshot["bounces"]:
+                lines.append("Debounce rejections: " + ", ".join(f"{name} {count}"
+                                                               for name, count in snapshot["bounces"].items()))
+            if snapshot["rejections"]:
+                lines.append("Lane rejections: " + ", ".join(f"{reason} {count}"
+                                                           for reason, count in snapshot["rejections"].items()))
+            errors = {name: stats["errors"] for name, stats in snapshot["round_trips"].items() if stats["errors"]}
+            if errors:
+                lines.append("Round trips failed: " + ", ".join(f"{name} {count}" for name, count in errors.items()))
+            summary.config(text="\n".join(lines))
+            selection = tree.selection()
+            self._draw_histogram(canvas, selection[0] if selection else None,
+                                 histograms.get(selection[0]) if selection else None)
+            window.after(500, refresh)
+
+        def close():
+            self.diagnostics.stop()
+            window.destroy()
+
+        window.protocol("WM_DELETE_WINDOW", close)
+        self.diagnostics.start()
+        refresh()
+
+    def _draw_histogram(self, canvas, source, latency):
+        """Draws a latency histogram as one bar per bin, labelled with the bin's upper edge."""
+        canvas.delete("all")
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        if latency is None:
+            canvas.create_text(width / 2, height / 2, text="Select a source to see its latency histogram")
+            return
+        bins = latency["bins"]
+        labels = [f"{edge * 1000:g}" for edge in diagnostics.BIN_EDGES] + [">"]
+        tallest = max(bins) or 1
+        bar = (width - 20) / len(bins)
+        canvas.create_text(width / 2, 10, text=f"{source}: latency (ms, bin upper edge), {latency['count']} samples")
+        for index, count in enumerate(bins):
+            left = 10 + index * bar
+            top = height - 20 - (height - 45) * count / tallest
+            canvas.create_rectangle(left + 1, top, left + bar - 1, height - 20, fill="steelblue", outline="")
+            canvas.create_text(left + bar / 2, height - 10, text=labels[index], font=("Helvetica", 7))
+            if count:
+                canvas.create_text(left + bar / 2, top - 6, text=str(count), font=("Helvetica", 7))
 
     def _show_reports(self):
-        """Placeholder for reporting."""
-        messagebox.showinfo("Reporting", "Reporting placeholder")
+        """Opens the finish trace viewer for reviewing close finishes heat by heat."""
+        window = tk.Toplevel(self.root)
+        window.title("Reporting - Finish Traces")
+        window.geometry(Config.WINDOW_SIZE)
+        files = sorted(glob.glob(os.path.join(Config.TRACE_DIR, "*.trc")), key=os.path.getmtime, reverse=True)
+        if not files:
+            ttk.Label(window, text=f"No finish traces in {Config.TRACE_DIR}", font=("Helvetica", 14)).pack(pady=20)
+            return
+
+        heats = tk.Listbox(window, width=14, exportselection=False)
+        heats.pack(side="left", fill="y", padx=5, pady=5)
+        for path in files:
+            heats.insert("end", os.path.splitext(os.path.basename(path))[0])
+        controls = ttk.Frame(window)
+        controls.pack(side="bottom", fill="x")
+        ttk.Label(controls, text="Span (ms)").pack(side="left", padx=5)
+        span = tk.Scale(controls, from_=2, to=500, orient="horizontal", resolution=1, length=300)
+        span.set(20)
+        span.pack(side="left")
+        canvas = tk.Canvas(window, bg="white")
+        canvas.pack(side="right", fill="both", expand=True, padx=5, pady=5)
+
+        def redraw(*args):
+            selection = heats.curselection()
+            if not selection:
+                return
+            try:
+                trace = trace_recorder.load(files[selection[0]])
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Reporting", f"Could not read trace: {e}")
+                return
+            self._draw_trace(canvas, trace, span.get() / 1000)
+
+        heats.bind("<<ListboxSelect>>", redraw)
+        span.config(command=redraw)
+        canvas.bind("<Configure>", redraw)
+        heats.selection_set(0)
+        redraw()
+
+    def _draw_trace(self, canvas, trace, span):
+        """Draws each lane's beam level as a step trace centred on the first finish, with finish markers."""
+        canvas.delete("all")
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        lanes, finishes, samples = trace["lanes"], trace["finishes"], trace["samples"]
+        if not finishes:
+            return
+        first = min(finishes.values())
+        left, right = first - span / 2, first + span / 2
+        margin, row = 60, (height - 30) / lanes
+
+        def x_of(t):
+            return margin + (t - left) / (right - left) * (width - margin - 10)
+
+        canvas.create_text(width / 2, 10, text=f"Race {trace['race']}  ({span * 1000:.0f} ms span)")
+        for lane in range(1, lanes + 1):
+            top = 20 + (lane - 1) * row
+            high, low = top + row * 0.2, top + row * 0.8
+            canvas.create_text(25, (high + low) / 2, text=f"Lane {lane}")
+            lane_samples = samples[samples["lane"] == lane]
+
+            def y_of(broken):
+                return low - (low - high) * int(broken)
+
+            points, level = [], None
+            for t, broken in zip(lane_samples["time"], lane_samples["level"]):
+                if t > right:
+                    break
+                if t >= left:
+                    if level is not None:
+                        if not points:
+                            points += [x_of(left), y_of(level)]
+                        points += [x_of(t), y_of(level)]
+                    points += [x_of(t), y_of(broken)]
+                level = broken
+            if level is not None:
+                points += [x_of(left), y_of(level)] if not points else []
+                points += [x_of(right), y_of(level)]
+            if len(points) >= 4:
+                canvas.create_line(*points, fill="blue", width=2)
+            if lane in finishes:
+                x = x_of(finishes[lane])
+                canvas.create_line(x, top, x, top + row, fill="red", dash=(3, 2))
+                canvas.create_text(x + 4, top + 8, anchor="w", fill="red",
+                                   text=f"+{(finishes[lane] - first) * 1000:.3f} ms")
+        for tick in range(5):
+            t = left + (right - left) * tick / 4
+            canvas.create_text(x_of(t), height - 8, text=f"{(t - first) * 1000:+.1f}")
 
     def update_lane_status(self, lane, status):
         """Updates the status of a specific lane in the GUI."""
         logger.info(f"Updating lane {lane} status to {status}")
         # TODO: Implement lane status update logic
 
+    def show_status(self, msg):
+        """Shows a message in the status bar without blocking; safe to call from any thread."""
+        logger.info(f"GUI status: {msg}")
+        self.call_soon(lambda: self.status_label.config(text=msg))
+
     def show_message(self, msg):
         """Displays a message in the GUI."""
         logger.info(f"GUI message: {msg}")
         messagebox.showinfo("Message", msg)
 
+    def ask_yes_no(self, title, msg):
+        """Asks a yes/no question and returns the answer."""
+        logger.info(f"GUI question: {msg}")
+        return messagebox.askyesno(title, msg)
+
     def setup_and_populate_race_mode_grid(self, race_manager):
         """Builds and displays the race mode grid."""
         try:
@@ -0,0 +1,278 @@
+"""
+lane_analytics.py
+
+Purpose: Measures lane bias from the race results history and produces a track calibration report.
+
+Raw lane averages mostly measure which cars happened to run in which lane, so bias is estimated two ways that cancel
+out the cars:
+    within-race  -- each lane's time minus the mean of its race (RaceCounter), averaged per lane. Every race
+                    compares lanes on the same heat, so fast and slow cars cancel out.
+    lane swaps   -- for racers who ran in two lanes, the difference of their average times in each, averaged over
+                    racers (a paired comparison: each car is its own control).
+Confidence intervals use the normal approximation (mean +/- z * sd / sqrt(n)).
+
+Results are loaded once with NumPy and then kept current incrementally: update() fetches only rows newer than the
+last ResultID seen and folds them into running per-lane and per-racer sums, so a report after each heat costs
+almost nothing. Statistics are cached until new rows arrive.
+
+Usage: analytics = LaneAnalytics(db_handler, track_id); analytics.update() after each heat; lane_bias(),
+lane_swaps(), lane_effects(), correction_factors() and calibration_report() read the results. Run "python lane_analytics.py
+[track]" to print the report.
+"""
+
+from statistics import NormalDist
+import numpy as np
+from config import Config
+from logger import logger
+
+# Finished results for one track, oldest first; ResultID is the primary key, so fetching new rows is a range scan
+RESULTS_QUERY = """
+    SELECT ResultID, RaceCounter, RacerID, Lane, RaceTime
+    FROM raceresults
+    WHERE TrackID = %s AND ResultID > %s AND RaceTime > 0
+    ORDER BY ResultID
+"""
+
+
+class LaneAnalytics:
+    def __init__(self, db_handler, track_id=None, confidence=None):
+        """
+        Initializes LaneAnalytics. Nothing is loaded until update().
+
+        Args:
+            db_handler (DatabaseHandler): Database to read raceresults from.
+            track_id (int, optional): Track to analyse. Defaults to Config.TRACK_NUMBER.
+            confidence (float, optional): Confidence level of the intervals. Defaults to Config.LANE_BIAS_CONFIDENCE.
+        """
+        self.db_handler = db_handler
+        self.track_id = track_id or Config.TRACK_NUMBER
+        self.z = NormalDist().inv_cdf(0.5 + (confidence or Config.LANE_BIAS_CONFIDENCE) / 2)
+        self.last_result_id = 0
+        self.chunks = []  # (counters, racers, lanes, times) arrays, one per update()
+        self.counters_seen = set()
+        self.deviation_sums = {}  # lane -> [n, sum, sum of squares] of (lane time - race mean)
+        self.racer_lane_sums = {}  # (racer, lane) -> [n, sum] of race times
+        self._cache = {}
+
+    def update(self):
+        """
+        Folds results recorded since the last update into the running sums.
+
+        Returns:
+            int: Number of new results.
+        """
+        rows = self.db_handler.query(RESULTS_QUERY, (self.track_id, self.last_result_id)) or []
+        if not rows:
+            return 0
+        self.last_result_id = rows[-1]["ResultID"]
+        counters = np.array([row["RaceCounter"] for row in rows], dtype=np.int64)
+        racers = np.array([row["RacerID"] or 0 for row in rows], dtype=np.int64)
+        lanes = np.array([row["Lane"] for row in rows], dtype=np.int64)
+        times = np.array([float(row["RaceTime"]) for row in rows], dtype=np.float64)
+        self.chunks.append((counters, racers, lanes, times))
+        self._cache.clear()
+
+        new_counters = set(np.unique(counters).tolist())
+        if new_counters & self.counters_seen:
+            # A race was split across updates; its mean changed, so rebuild the within-race sums from scratch
+            self.counters_seen |= new_counters
+            self.deviation_sums.clear()
+            all_counters, all_racers, all_lanes, all_times = self._all()
+            self._add_deviations(all_counters, all_lanes, all_times)
+        else:
+            self.counters_seen |= new_counters
+            self._add_deviations(counters, lanes, times)
+        for racer, lane, race_time in zip(racers.tolist(), lanes.tolist(), times.tolist()):
+            if racer:
+                sums = self.racer_lane_sums.setdefault((racer, lane), [0, 0.0])
+                sums[0] += 1
+                sums[1] += race_time
+        logger.info(f"Lane analytics updated with {len(rows)} results (track {self.track_id}).")
+        return len(rows)
+
+    def _all(self):
+        if "all" not in self._cache:
+            if self.chunks:
+                self._cache["all"] = tuple(np.concatenate(parts) for parts in zip(*self.chunks))
+            else:
+                empty_int, empty_float = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+                self._cache["all"] = (empty_int, empty_int, empty_int, empty_float)
+        return self._cache["all"]
+
+    def _add_deviations(self, counters, lanes, times):
+        # Deviation of each time from its race's mean, vectorized with bincount over the races
+        races, race_index = np.unique(counters, return_inverse=True)
+        sizes = np.bincount(race_index)
+        means = np.bincount(race_index, weights=times) / sizes
+        multi_lane = sizes[race_index] > 1  # A race run alone has nothing to compare against
+        deviations = (times - means[race_index])[multi_lane]
+        lanes = lanes[multi_lane]
+        for lane in np.unique(lanes).tolist():
+            lane_deviations = deviations[lanes == lane]
+            sums = self.deviation_sums.setdefault(lane, [0, 0.0, 0.0])
+            sums[0] += len(lane_deviations)
+            sums[1] += float(lane_deviations.sum())
+            sums[2] += float((lane_deviations ** 2).sum())
+
+    def _interval(self, n, total, squares):
+        mean = total / n
+        variance = (squares - n * mean * mean) / (n - 1) if n > 1 else float("inf")
+        half_width = self.z * (max(variance, 0.0) / n) ** 0.5
+        return mean, mean - half_width, mean + half_width
+
+    def lane_distributions(self):
+        """
+        Summarizes each lane's race times.
+
+        Returns:
+            dict: lane -> {"n", "mean", "std", "min", "p25", "median", "p75", "max"} in seconds.
+        """
+        if "distributions" not in self._cache:
+            counters, racers, lanes, times = self._all()
+            result = {}
+            for lane in np.unique(lanes).tolist():
+                lane_times = times[lanes == lane]
+                p25, median, p75 = np.percentile(lane_times, [25, 50, 75])
+                result[lane] = {
+                    "n": len(lane_times),
+                    "mean": float(lane_times.mean()),
+                    "std": float(lane_times.std(ddof=1)) if len(lane_times) > 1 else 0.0,
+                    "min": float(lane_times.min()),
+                    "p25": float(p25),
+                    "median": float(median),
+                    "p75": float(p75),
+                    "max": float(lane_times.max()),
+                }
+            self._cache["distributions"] = result
+        return self._cache["distributions"]
+
+    def lane_bias(self):
+        """
+        Estimates each lane's bias from within-race comparisons.
+
+        Returns:
+            dict: lane -> (bias, low, high, n); bias is seconds slower (+) or faster (-) than the race average.
+        """
+        if "bias" not in self._cache:
+            self._cache["bias"] = {
+                lane: self._interval(*sums) + (sums[0],)
+                for lane, sums in sorted(self.deviation_sums.items())
+            }
+        return self._cache["bias"]
+
+    def lane_swaps(self):
+        """
+        Compares lanes pairwise using racers who ran in both.
+
+        Returns:
+            dict: (lane_a, lane_b) -> (difference, low, high, racers); difference is the average of each racer's mean
+                  time in lane_a minus their mean time in lane_b.
+        """
+        if "swaps" not in self._cache:
+            racers = sorted({racer for racer, lane in self.racer_lane_sums})
+            lanes = sorted({lane for racer, lane in self.racer_lane_sums})
+            racer_index = {racer: i for i, racer in enumerate(racers)}
+            lane_index = {lane: i for i, lane in enumerate(lanes)}
+            means = np.full((len(racers), len(lanes)), np.nan)  # racer x lane mean time
+            for (racer, lane), (n, total) in self.racer_lane_sums.items():
+                means[racer_index[racer], lane_index[lane]] = total / n
+            result = {}
+            for a in range(len(lanes)):
+                for b in range(a + 1, len(lanes)):
+                    differences = means[:, a] - means[:, b]
+                    differences = differences[~np.isnan(differences)]
+                    if len(differences):
+                        interval = self._interval(len(differences), float(differences.sum()),
+                                                  float((differences ** 2).sum()))
+                        result[(lanes[a], lanes[b])] = interval + (len(differences),)
+            self._cache["swaps"] = result
+        return self._cache["swaps"]
+
+    def lane_effects(self):
+        """
+        Combines the lane swaps into one effect per lane: with pairwise differences d(a, b) = e(a) - e(b) and the
+        effects summing to zero, e(a) is the mean of d(a, b) over every lane b (d(a, a) = 0).
+
+        Returns:
+            dict: lane -> (effect, significant); effect is seconds slower (+) or faster (-) than the average lane,
+                  significant is True if any swap comparison involving the lane excludes zero. Empty until every
+                  pair of lanes has been compared.
+        """
+        swaps = self.lane_swaps()
+        lanes = sorted({lane for pair in swaps for lane in pair})
+        if len(swaps) < len(lanes) * (len(lanes) - 1) // 2 or not lanes:
+            return {}
+        effects = {}
+        for lane in lanes:
+            total, significant = 0.0, False
+            for (a, b), (difference, low, high, racers) in swaps.items():
+                if lane in (a, b):
+                    total += difference if lane == a else -difference
+                    significant = significant or low > 0 or high < 0
+            effects[lane] = (total / len(lanes), significant)
+        return effects
+
+    def correction_factors(self, significant_only=True):
+        """
+        Per-lane factors that scale a lane's race time to what the average lane would have given. Lane swap effects
+        are used once every pair of lanes has been compared (they are far tighter, since each car is its own
+        control); until then the within-race bias is used.
+
+        Args:
+            significant_only (bool): Leave a lane at 1.0 unless its estimate is significant.
+
+        Returns:
+            dict: lane -> factor to multiply that lane's race time by.
+        """
+        distributions = self.lane_distributions()
+        if not distributions:
+            return {}
+        overall = sum(d["mean"] * d["n"] for d in distributions.values()) / sum(d["n"] for d in distributions.values())
+        effects = self.lane_effects()
+        if not effects:
+            effects = {lane: (bias, low > 0 or high < 0) for lane, (bias, low, high, n) in self.lane_bias().items()}
+        return {
+            lane: overall / (overall + effect) if significant or not significant_only else 1.0
+            for lane, (effect, significant) in effects.items()
+        }
+
+    def calibration_report(self):
+        """
+        Builds a plain-text track calibration report.
+
+        Returns:
+            str: The report.
+        """
+        level = round((2 * NormalDist().cdf(self.z) - 1) * 100)
+        lines = [f"Track {self.track_id} lane calibration ({sum(len(c[0]) for c in self.chunks)} results)", ""]
+        lines.append("Lane     n    mean   std dev    median    min      max")
+        for lane, d in self.lane_distributions().items():
+            lines.append(f"{lane:>4} {d['n']:>5} {d['mean']:>8.4f} {d['std']:>8.4f} {d['median']:>9.4f} "
+                         f"{d['min']:>8.4f} {d['max']:>8.4f}")
+        lines += ["", f"Lane bias vs. race average ({level}% confidence)"]
+        for lane, (bias, low, high, n) in self.lane_bias().items():
+            verdict = "significant" if low > 0 or high < 0 else "not significant"
+            lines.append(f"  Lane {lane}: {bias * 1000:+8.2f} ms  [{low * 1000:+.2f}, {high * 1000:+.2f}]  "
+                         f"n={n}  {verdict}")
+        lines += ["", "Lane swaps (same racer in both lanes)"]
+        for (a, b), (difference, low, high, racers) in self.lane_swaps().items():
+            lines.append(f"  Lane {a} - Lane {b}: {difference * 1000:+8.2f} ms  "
+                         f"[{low * 1000:+.2f}, {high * 1000:+.2f}]  racers={racers}")
+        effects = self.lane_effects()
+        if effects:
+            lines += ["", "Lane effects from swaps"]
+            for lane, (effect, significant) in effects.items():
+                lines.append(f"  Lane {lane}: {effect * 1000:+8.2f} ms  "
+                             f"{'significant' if significant else 'not significant'}")
+        lines += ["", "Correction factors: " + ", ".join(f"lane {lane} x{factor:.5f}"
+                                                       for lane, factor in self.correction_factors().items())]
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import sys
+    from db_handler import DatabaseHandler
+
+    analytics = LaneAnalytics(DatabaseHandler(), int(sys.argv[1]) if len(sys.argv) > 1 else None)
+    analytics.update()
+    print(analytics.calibration_report())
@@ -0,0 +1,173 @@
+"""
+lane_assignment.py
+
+Purpose: Assigns racers to lanes as RFID pads report taps. Several pads (for example one on each side of the
+track) can load the same heat at once: the racer lookup runs outside any lock, so pads query the database in
+parallel, and only the final lane reservation is serialized on RaceManager's lock. Duplicate tags are rejected
+with RaceManager's O(1) RFID set. Assignments and rejections are published on the event bus for the GUI and LEDs.
+When the heat comes from the schedule (scheduler.py), stage() hands over its racers, already looked up: a tap then
+goes straight to the racer's scheduled lane without a database round trip, and racers not in the heat are refused.
+A scheduled racer who does not show up can be skipped (skip_missing()), so the heat races with the others.
+Taps always fill RaceManager.loading, so once a heat starts racing the pads are already loading the next one.
+
+Usage: Instantiate LaneAssignmentService(race_manager, number_lanes) and call assign(rfid, pad_id) for each tap;
+wait_until_loaded() blocks until every lane of the heat has a racer.
+
+Events:
+    lane_assigned  -- lane, rfid, pad_id, racer (racer info dict), race_counter (stamped on the race entry)
+    lane_rejected  -- rfid, pad_id, reason ("duplicate", "unknown racer", "heat full", "not in this heat")
+    heat_loaded    -- heat, lanes (number of lanes filled)
+    racers_skipped -- heat, racers (lane -> racer info of each scheduled racer left out)
+"""
+
+from threading import Condition
+from event_bus import bus as default_bus
+from logger import logger
+
+
+class LaneAssignmentError(Exception):
+    """Raised when a tap cannot be given a lane; the message is shown on the pad."""
+
+
+class LaneAssignmentService:
+    def __init__(self, race_manager, number_lanes, pad_lanes=None, bus=None):
+        """
+        Initializes the LaneAssignmentService.
+
+        Args:
+            race_manager (RaceManager): Holds the heat being loaded.
+            number_lanes (int): Lanes on the track.
+            pad_lanes (dict, optional): pad_id -> lanes that pad fills first (e.g. {"1": [1, 2], "2": [3]}).
+                                        A pad falls back to any free lane once its own are taken.
+            bus (EventBus, optional): Where events are published. Defaults to the shared bus.
+        """
+        self.race_manager = race_manager
+        self.number_lanes = number_lanes
+        self.pad_lanes = pad_lanes or {}
+        self.bus = bus or default_bus
+        self.loaded = Condition(race_manager.lock)
+        self.staged = None  # rfid -> (lane, racer_info) of a scheduled heat, or None to fill lanes as racers tap
+        self.expected = number_lanes  # Racers that make the heat full
+
+    def stage(self, lanes):
+        """
+        Loads the next heat from the schedule: each racer may only take their scheduled lane.
+
+        Args:
+            lanes (dict): lane -> racer_info for the heat; lanes without a racer stay empty.
+        """
+        with self.loaded:
+            self.staged = {racer["RacerRFID"]: (lane, racer) for lane, racer in lanes.items()}
+            self.expected = len(lanes)
+
+    def unstage(self):
+        """
+        Goes back to filling lanes in the order racers tap.
+        """
+        with self.loaded:
+            self.staged = None
+            self.expected = self.number_lanes
+
+    def assign(self, rfid, pad_id=None):
+        """
+        Reserves the next free lane of the heat being loaded (the next heat, once the current one is racing) for a
+        tagged racer.
+
+        Args:
+            rfid (str): Tag read by the pad.
+            pad_id (str, optional): Pad that read the tag.
+
+        Returns:
+            tuple: (lane, racer_info)
+
+        Raises:
+            LaneAssignmentError: If the tag is already loaded, unknown, or the heat is full.
+        """
+        manager = self.race_manager
+        if manager.is_duplicate_rfid(rfid):
+            self._reject(rfid, pad_id, "duplicate")
+        if len(manager.loading.races) >= self.expected:
+            self._reject(rfid, pad_id, "heat full")
+        staged = self.staged
+        if staged is not None:
+            if rfid not in staged:
+                self._reject(rfid, pad_id, "not in this heat")
+            lane, racer_info = staged[rfid]
+        else:
+            racer_info = manager.get_racer_info(rfid)  # Slow database round trip, done without holding the lock
+            if not racer_info:
+                self._reject(rfid, pad_id, "unknown racer")
+
+        with self.loaded:
+            # Re-check under the lock: another pad may have loaded this tag while we were querying
+            if manager.is_duplicate_rfid(rfid):
+                reason = "duplicate"
+            else:
+                if staged is None:
+                    lane = self._free_lane(pad_id)
+                reason = None if lane else "heat full"
+                if lane:
+                    race_counter = manager.race_counter
+                    manager.initialize_race_entry(race_counter, lane, rfid, racer_info)
+                    filled = len(manager.loading.races)
+                    if filled >= self.expected:
+                        self.loaded.notify_all()
+        if reason:
+            self._reject(rfid, pad_id, reason)
+
+        logger.info(f"Pad {pad_id}: lane {lane} assigned to RFID {rfid}")
+        self.bus.publish("lane_assigned", lane=lane, rfid=rfid, pad_id=pad_id, racer=racer_info,
+                         race_counter=race_counter)
+        if filled >= self.expected:
+            self.bus.publish("heat_loaded", heat=manager.heat, lanes=filled)
+        return lane, racer_info
+
+    def skip_missing(self):
+        """
+        Races a scheduled heat without the racers who have not tapped in, once at least one racer has. A late
+        racer's tap is then refused as "heat full".
+
+        Returns:
+            dict: lane -> racer_info of each skipped racer; empty if nothing was skipped.
+        """
+        manager = self.race_manager
+        with self.loaded:
+            filled = len(manager.loading.races)
+            if self.staged is None or not filled or filled >= self.expected:
+                return {}
+            loaded = {race["Lane"] for race in manager.loading.races}
+            skipped = {lane: racer for lane, racer in self.staged.values() if lane not in loaded}
+            self.expected = filled
+            self.loaded.notify_all()
+        for lane, racer in skipped.items():
+            logger.warning(f"Lane {lane}: {racer['RacerFirstName']} {racer['RacerLastName']} did not show up; skipped")
+        self.bus.publish("racers_skipped", heat=manager.heat, racers=skipped)
+        self.bus.publish("heat_loaded", heat=manager.heat, lanes=filled)
+        return skipped
+
+    def wait_until_loaded(self, timeout=None):
+        """
+        Blocks until every lane of the heat being loaded has a racer.
+
+        Args:
+            timeout (float, optional): Seconds to wait; None waits forever.
+
+        Returns:
+            bool: True if the heat is fully loaded, False on timeout.
+        """
+        with self.loaded:
+            return self.loaded.wait_for(lambda: len(self.race_manager.loading.races) >= self.expected, timeout)
+
+    def _free_lane(self, pad_id):
+        # Caller holds the RaceManager lock
+        taken = {race["Lane"] for race in self.race_manager.loading.races}
+        preferred = self.pad_lanes.get(pad_id, ())
+        for lane in list(preferred) + list(range(1, self.number_lanes + 1)):
+            if lane not in taken and 1 <= lane <= self.number_lanes:
+                return lane
+        return None
+
+    def _reject(self, rfid, pad_id, reason):
+        logger.warning(f"Pad {pad_id}: RFID {rfid} rejected ({reason})")
+        self.bus.publish("lane_rejected", rfid=rfid, pad_id=pad_id, reason=reason)
+        raise LaneAssignmentError(reason)
@@ -3,6 +3,287 @@ led_controller.py
 
 Purpose: Provides high-level LED control (e.g., track lights, winner lights, countdown tree) using rpi_ws281x.
 
-Usage: Instantiate LEDController with LED count and pin, call show_pattern(), reset(), flash().
+The strip is divided into one segment per lane. Everything the winner lights can show is computed at startup as
+NumPy arrays of packed 24-bit pixels, already in the strip's color order and scaled to the configured brightness:
+each lane's segment at each placing, and each animation as a (frames x pixels) block (except the chaser, whose
+single moving pixel is cheaper to set as each frame is drawn than to store for every position). Showing a result or
+starting an effect is therefore just swapping which precomputed array the render thread draws from. The render
+thread pushes frames at a fixed rate and is woken immediately on a change, so the winner lights within one frame of
+the finish no matter how many LEDs the strip has.
+
+Usage: Instantiate LEDController(lanes) (or LEDController(lanes, strip=VirtualStrip(count)) off the Pi), call
+start(), then show_placings({lane: place}), show_pattern(name), flash(lane), reset().
 """
-# TODO: Implement LEDController methods for various animations
\ No newline at end of file
+
+import threading
+import time
+import numpy as np
+from config import Config
+from logger import logger
+
+COLORS = {
+    "BLACK": (0, 0, 0),
+    "RED": (255, 0, 0),
+    "YELLOW": (255, 150, 0),
+    "GREEN": (0, 255, 0),
+    "CYAN": (0, 255, 255),
+    "BLUE": (0, 0, 255),
+    "PURPLE": (180, 0, 255),
+    "WHITE": (255, 255, 255),
+}
+
+PLACE_LEVELS = {1: 1.0, 2: 0.35, 3: 0.12, 4: 0.05}  # Segment brightness by finishing place
+FLASH_FRAMES = 8  # Frames per on/off half of a flash
+RAINBOW_FRAMES = 256
+
+
+def pack_colors(rgb, order="RGB", brightness=255):
+    """
+    Packs RGB values into 24-bit pixels in the strip's color order, scaled by brightness.
+
+    Args:
+        rgb (array-like): (..., 3) array of 0-255 red, green, blue values.
+        order (str): Byte order the strip expects, e.g. "RGB" or "GRB".
+        brightness (int): 0-255 scale applied to every channel.
+
+    Returns:
+        numpy.ndarray: uint32 array of packed pixels with the trailing axis removed.
+    """
+    rgb = np.asarray(rgb, dtype=np.uint32) * brightness // 255
+    channel = {"R": rgb[..., 0], "G": rgb[..., 1], "B": rgb[..., 2]}
+    return (channel[order[0]] << 16) | (channel[order[1]] << 8) | channel[order[2]]
+
+
+def wheel(positions):
+    """
+    Vectorized color wheel: 0-255 positions to (..., 3) RGB, transitioning r - g - b - back to r.
+    """
+    pos = np.asarray(positions, dtype=np.int32) % 256
+    rgb = np.zeros(pos.shape + (3,), dtype=np.int32)
+    a = pos < 85
+    b = (pos >= 85) & (pos < 170)
+    c = pos >= 170
+    p = pos[a]
+    rgb[a] = np.stack([255 - p * 3, p * 3, np.zeros_like(p)], axis=-1)
+    p = pos[b] - 85
+    rgb[b] = np.stack([np.zeros_like(p), 255 - p * 3, p * 3], axis=-1)
+    p = pos[c] - 170
+    rgb[c] = np.stack([p * 3, np.zeros_like(p), 255 - p * 3], axis=-1)
+    return rgb
+
+
+class ChaseFrames:
+    nbytes = 0  # Nothing is stored per frame
+
+    def __init__(self, count, color):
+        """
+        A single lit pixel running along the strip, one position per frame. Frames are computed as they are drawn,
+        so the animation costs one frame of memory rather than a (count x count) block.
+
+        Args:
+            count (int): Number of LEDs (and frames).
+            color (int): Packed pixel value of the lit LED.
+        """
+        self.count = count
+        self.color = color
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        frame = np.zeros(self.count, dtype=np.uint32)
+        frame[index] = self.color
+        return frame
+
+
+class VirtualStrip:
+    def __init__(self, count):
+        """
+        In-memory stand-in for the LED strip. Keeps the last frame and when each frame was pushed.
+
+        Args:
+            count (int): Number of LEDs.
+        """
+        self.count = count
+        self.pixels = np.zeros(count, dtype=np.uint32)
+        self.shown = []  # time.monotonic() of each push
+
+    def show(self, frame):
+        self.pixels[:] = frame
+        self.shown.append(time.monotonic())
+        del self.shown[:-1000]
+
+
+class WS281xStrip:
+    def __init__(self, count, pin, brightness=255):
+        """
+        rpi_ws281x strip. The library is imported here so the rest of the program loads without it. Pixels are
+        already packed in the strip's color order, so the strip is opened as plain RGB.
+        """
+        from rpi_ws281x import PixelStrip, WS2811_STRIP_RGB
+        self.count = count
+        self.strip = PixelStrip(count, pin, brightness=brightness, strip_type=WS2811_STRIP_RGB)
+        self.strip.begin()
+        self.last = np.zeros(count, dtype=np.uint32)  # What the library holds; begin() starts it blank
+
+    def show(self, frame):
+        # Only pixels that differ from the last frame go through the library's setter, one call each
+        changed = np.flatnonzero(frame != self.last)
+        set_pixel = self.strip.setPixelColor
+        for index, color in zip(changed.tolist(), frame[changed].tolist()):
+            set_pixel(index, color)
+        self.last = frame.copy()
+        self.strip.show()
+
+
+class LEDController:
+    def __init__(self, lanes, leds_per_lane=None, strip=None, fps=None):
+        """
+        Initializes the LEDController and precomputes every frame it can show.
+
+        Args:
+            lanes (int): Number of lanes; the strip is split into one segment per lane.
+            leds_per_lane (int, optional): LEDs in each lane's segment. Defaults to Config.LED_WINNERLIGHTS_PER_LANE.
+            strip (optional): Output with show(frame) and count. Defaults to a WS281xStrip on Config.LED_WINNERLIGHTS_PIN.
+            fps (int, optional): Render rate. Defaults to Config.LED_FPS.
+        """
+        self.lanes = lanes
+        self.leds_per_lane = leds_per_lane or Config.LED_WINNERLIGHTS_PER_LANE
+        self.count = lanes * self.leds_per_lane
+        self.strip = strip or WS281xStrip(self.count, Config.LED_WINNERLIGHTS_PIN)
+        self.period = 1 / (fps or Config.LED_FPS)
+        self.order = Config.LED_WINNERLIGHTS_RGB.upper()
+        self.brightness = Config.LED_WINNERLIGHTS_BRIGHTNESS
+        self.blank = np.zeros(self.count, dtype=np.uint32)
+        self._precompute()
+
+        self.scene = self.blank[np.newaxis]  # (frames, pixels) being shown
+        self.scene_start = 0
+        self.loop = False
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.running = False
+        self.frames_pushed = 0
+
+    def lane_color(self, lane):
+        names = Config.LED_WINNERLIGHTS_DEF
+        return COLORS.get(names[(lane - 1) % len(names)].upper(), COLORS["WHITE"])
+
+    def _segment(self, lane):
+        start = (lane - 1) * self.leds_per_lane
+        return slice(start, start + self.leds_per_lane)
+
+    def _precompute(self):
+        # Placing frames: lane segment in the lane's color, dimmed by place
+        self.place_frames = {}
+        for lane in range(1, self.lanes + 1):
+            for place, level in PLACE_LEVELS.items():
+                frame = self.blank.copy()
+                frame[self._segment(lane)] = pack_colors(self.lane_color(lane), self.order,
+                                                         int(self.brightness * level))
+                self.place_frames[(lane, place)] = frame
+
+        # Animations, each a (frames, pixels) block or frames computed as they are drawn
+        self.patterns = {}
+        index = np.arange(self.count)
+        steps = np.arange(RAINBOW_FRAMES)[:, np.newaxis]
+        self.patterns["RAINBOW"] = pack_colors(wheel(index * 256 // self.count + steps), self.order, self.brightness)
+        self.patterns["CHASER"] = ChaseFrames(self.count, pack_colors(COLORS["WHITE"], self.order, self.brightness))
+        for lane in range(1, self.lanes + 1):
+            on = self.place_frames[(lane, 1)]
+            self.patterns[f"FLASH{lane}"] = np.stack([on] * FLASH_FRAMES + [self.blank] * FLASH_FRAMES)
+        logger.info(f"LED frames precomputed for {self.lanes} lanes, {self.count} LEDs "
+                    f"({sum(p.nbytes for p in self.patterns.values()) // 1024} KiB)")
+
+    def reconfigure(self):
+        """
+        Re-reads the lane colors and brightness from Config and recomputes the frames. Call between heats.
+        """
+        self.brightness = Config.LED_WINNERLIGHTS_BRIGHTNESS
+        self._precompute()
+        self._set_scene(self.blank[np.newaxis])
+
+    def start(self):
+        """
+        Starts the render thread.
+        """
+        self.running = True
+        threading.Thread(target=self._render, name="led-render", daemon=True).start()
+
+    def _set_scene(self, frames, loop=False):
+        with self.lock:
+            self.scene = frames
+            self.scene_start = time.monotonic()
+            self.loop = loop
+        self.wake.set()  # Render now rather than at the next tick
+
+    def _render(self):
+        last = None  # (scene, start, index) of the frame on the strip
+        next_tick = time.monotonic()
+        while self.running:
+            with self.lock:
+                scene, start, loop = self.scene, self.scene_start, self.loop
+            index = int((time.monotonic() - start) / self.period)
+            index = index % len(scene) if loop else min(index, len(scene) - 1)
+            # Indexing a block makes a new view every time, so frames are told apart by position, not identity
+            shown = (scene, start, index)
+            if last is None or shown[0] is not last[0] or shown[1:] != last[1:]:
+                try:
+                    self.strip.show(scene[index])
+                    self.frames_pushed += 1
+                except Exception as e:
+                    logger.error(f"LED push failed: {e}")
+                last = shown
+            next_tick += self.period
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                next_tick = time.monotonic()  # Fell behind; skip frames rather than burst
+                delay = 0
+            if self.wake.wait(delay):
+                self.wake.clear()
+                next_tick = time.monotonic()
+
+    def show_placings(self, placings):
+        """
+        Lights each lane by its finishing place (winner brightest). Can be called as each car finishes.
+
+        Args:
+            placings (dict): lane -> place (1-based); place 0 or missing leaves the lane dark.
+        """
+        frame = self.blank.copy()
+        for lane, place in placings.items():
+            key = (lane, min(place, max(PLACE_LEVELS)))
+            if place and key in self.place_frames:
+                frame |= self.place_frames[key]  # Segments never overlap
+        self._set_scene(frame[np.newaxis])
+
+    def show_pattern(self, name, loop=True):
+        """
+        Plays a precomputed animation: "RAINBOW", "CHASER" or "FLASH<lane>".
+        """
+        frames = self.patterns.get(name.upper())
+        if frames is None:
+            logger.warning(f"Unknown LED pattern: {name}")
+            return
+        self._set_scene(frames, loop)
+
+    def flash(self, lane, times=3):
+        """
+        Flashes a lane in its color, then leaves it lit.
+        """
+        flashes = self.patterns[f"FLASH{lane}"]
+        self._set_scene(np.concatenate([flashes] * times + [flashes[:1]]))
+
+    def reset(self):
+        """
+        Turns every LED off.
+        """
+        self._set_scene(self.blank[np.newaxis])
+
+    def stop(self):
+        """
+        Stops the render thread and blanks the strip.
+        """
+        self.running = False
+        self.wake.set()
+        self.strip.show(self.blank)
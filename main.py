@@ -5,6 +5,12 @@ Purpose: Entry point for CubCar application. Initializes and starts the RaceWork
 
 Usage: Run `python main.py` to launch the tracker GUI and workflow.
 """
+import config  # Loads and validates the settings first, so only their errors are caught here
+
+try:
+    config.load_config()
+except config.ConfigError as e:  # The settings file or environment failed validation
+    raise SystemExit(str(e))
 from workflows import RaceWorkflow
 if __name__ == '__main__':
     wf = RaceWorkflow()
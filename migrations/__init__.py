@@ -0,0 +1,7 @@
+"""
+migrations/__init__.py
+
+Purpose: Initializes the migrations subpackage holding versioned schema migrations and the migration runner.
+
+Usage: Import MigrationRunner from migrations.runner, or run `python -m migrations` to migrate and verify the schema.
+"""
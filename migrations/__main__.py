@@ -0,0 +1,31 @@
+"""
+migrations/__main__.py
+
+Purpose: Command-line entry point that migrates the configured database and checks the hot-query plans.
+
+Usage: Run `python -m migrations` to migrate and verify indexes, or `python -m migrations --check-plans`
+to also fail (exit status 1) when a hot query stops using its index.
+"""
+
+import sys
+from db_handler import DatabaseHandler
+from migrations.runner import MigrationRunner
+
+
+def main(argv):
+    db = DatabaseHandler()
+    try:
+        runner = MigrationRunner(db)
+        ok = runner.run_startup_checks()
+        if "--check-plans" in argv:
+            failures = runner.check_query_plans()
+            for failure in failures:
+                print(f"Query plan check failed: {failure}")
+            ok = ok and not failures
+        return 0 if ok else 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
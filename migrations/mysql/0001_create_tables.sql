@@ -0,0 +1,52 @@
+-- 0001_create_tables.sql
+-- Creates the tables read and written by race_manager.py and race_statistics.py.
+
+CREATE TABLE IF NOT EXISTS packnames (
+    ID INT NOT NULL AUTO_INCREMENT,
+    PackName VARCHAR(100) NOT NULL,
+    PRIMARY KEY (ID)
+);
+
+CREATE TABLE IF NOT EXISTS racerinfo (
+    RacerID INT NOT NULL AUTO_INCREMENT,
+    RacerFirstName VARCHAR(50) NOT NULL,
+    RacerLastName VARCHAR(50) NOT NULL,
+    RacerPack INT NULL,
+    RacerRFID VARCHAR(32) NULL,
+    RacerCarName VARCHAR(100) NULL,
+    RacerCarNumber INT NULL,
+    RacerInclude TINYINT(1) NOT NULL DEFAULT 1,
+    RacerCarChecked TINYINT(1) NOT NULL DEFAULT 0,
+    RacerCarWeight DECIMAL(5,2) NULL,
+    RacerPhoto VARCHAR(255) NULL,
+    PRIMARY KEY (RacerID)
+);
+
+CREATE TABLE IF NOT EXISTS trackinformation (
+    TrackID INT NOT NULL,
+    TrackName VARCHAR(50) NULL,
+    NumberLanes INT NOT NULL DEFAULT 3,
+    Heat INT NOT NULL DEFAULT 1,
+    PRIMARY KEY (TrackID)
+);
+
+CREATE TABLE IF NOT EXISTS raceresults (
+    ResultID INT NOT NULL AUTO_INCREMENT,
+    RacerID INT NULL,
+    RaceCounter INT NOT NULL,
+    RaceCarNumber INT NULL,
+    TrackID INT NOT NULL,
+    Heat INT NOT NULL DEFAULT 1,
+    Lane INT NOT NULL,
+    CarName VARCHAR(100) NULL,
+    Pack INT NULL,
+    RaceTime DECIMAL(9,6) NOT NULL DEFAULT 0,
+    ReactionTime DECIMAL(9,6) NOT NULL DEFAULT 0,
+    Placing INT NOT NULL DEFAULT 0,
+    RacerRFID VARCHAR(32) NULL,
+    RacerFirstName VARCHAR(50) NULL,
+    RacerLastName VARCHAR(50) NULL,
+    RaceMode VARCHAR(16) NULL,
+    RecordedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (ResultID)
+);
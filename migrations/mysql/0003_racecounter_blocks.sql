@@ -0,0 +1,11 @@
+-- 0003_racecounter_blocks.sql
+-- Block reservations for the "sequence" race counter strategy (coordination/race_counter.py).
+-- Each row reserves RACE_COUNTER_BLOCK_SIZE counters starting at BlockID * RACE_COUNTER_BLOCK_SIZE.
+
+CREATE TABLE IF NOT EXISTS racecounter_blocks (
+    BlockID INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    TrackID INT NOT NULL,
+    ReservedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX ix_racecounter_blocks_track ON racecounter_blocks (TrackID, BlockID);
@@ -0,0 +1,220 @@
+"""
+runner.py
+
+Purpose: Applies the versioned SQL migrations shipped in migrations/<dialect>/ and verifies that the indexes
+backing the hot queries exist and are actually chosen by the query planner.
+
+Usage: Instantiate MigrationRunner(db_handler), call run_startup_checks() at startup, or migrate(),
+verify_indexes() and check_query_plans() individually.
+"""
+
+import os
+import re
+from logger import logger
+from race_manager import RACER_INFO_QUERY
+from race_statistics import RACE_STATISTICS_QUERY
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_FILENAME_RE = re.compile(r"^(\d+)_(\w+)\.sql$")
+_CREATE_INDEX_RE = re.compile(
+    r"^CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s+ON\s+(\w+)", re.IGNORECASE
+)
+_SQLITE_PLAN_RE = re.compile(
+    r"^(?:SCAN|SEARCH) (?:TABLE )?(?:\w+ AS )?(\w+)"
+    r"(?: USING (?:COVERING )?INDEX (\w+)| USING (INTEGER PRIMARY KEY))?"
+)
+
+# Indexes the schema must provide: table -> [(leading columns, unique)]
+REQUIRED_INDEXES = {
+    "racerinfo": [(("RacerRFID",), True)],
+    "raceresults": [
+        (("TrackID", "RaceCounter"), False),
+        (("TrackID", "RaceTime"), False),
+    ],
+}
+
+# Hot queries checked against the planner: (name, sql, sample params, {table alias: acceptable index names})
+HOT_QUERIES = [
+    ("get_racer_info", RACER_INFO_QUERY, ("0",),
+     {"RI": {"ux_racerinfo_rfid"}, "PN": {"PRIMARY"}}),
+    ("fetch_race_statistics", RACE_STATISTICS_QUERY, (1,),
+     {"A": {"ix_raceresults_track_counter", "ix_raceresults_track_time"}}),
+]
+
+# EXPLAIN notes meaning the optimizer resolved the lookup through a unique index before execution
+_CONST_TABLE_NOTES = ("no matching row in const table", "Impossible WHERE noticed after reading const tables")
+
+
+class MigrationRunner:
+    def __init__(self, db_handler, dialect=None):
+        """
+        Initializes the MigrationRunner.
+
+        Args:
+            db_handler (DatabaseHandler): Connected database handler used to apply and inspect the schema.
+            dialect (str, optional): SQL dialect selecting the migrations/<dialect>/ directory.
+                                     Defaults to the handler's backend dialect.
+        """
+        self.db = db_handler
+        self.dialect = dialect or db_handler.dialect
+        self.directory = os.path.join(MIGRATIONS_DIR, self.dialect)
+
+    def available_migrations(self):
+        """
+        Lists the migration files shipped for this dialect.
+
+        Returns:
+            list[tuple]: (version, name, path) tuples sorted by version.
+        """
+        migrations = []
+        for filename in os.listdir(self.directory):
+            match = _FILENAME_RE.match(filename)
+            if match:
+                migrations.append((int(match.group(1)), match.group(2), os.path.join(self.directory, filename)))
+        return sorted(migrations)
+
+    def applied_versions(self):
+        """
+        Returns the set of migration versions already recorded in schema_migrations.
+        """
+        rows = self.db.query("SELECT Version FROM schema_migrations")
+        return {row["Version"] for row in rows}
+
+    def migrate(self):
+        """
+        Applies every pending migration in version order.
+
+        Returns:
+            int: The number of migrations applied.
+        """
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "Version INT NOT NULL PRIMARY KEY, "
+            "Name VARCHAR(255) NOT NULL, "
+            "AppliedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+        )
+        applied = self.applied_versions()
+        count = 0
+        for version, name, path in self.available_migrations():
+            if version in applied:
+                continue
+            logger.info(f"Applying migration {version:04d}_{name}")
+            for statement in self._read_statements(path):
+                self._apply_statement(statement)
+            self.db.execute("INSERT INTO schema_migrations (Version, Name) VALUES (%s, %s)", (version, name))
+            count += 1
+        logger.info(f"Schema up to date ({count} migration(s) applied)")
+        return count
+
+    def verify_indexes(self):
+        """
+        Checks that every index in REQUIRED_INDEXES exists, matching on leading columns.
+
+        Returns:
+            list[str]: A description of each missing index; empty when the schema is complete.
+        """
+        problems = []
+        for table, required in REQUIRED_INDEXES.items():
+            indexes = self.table_indexes(table)
+            for columns, unique in required:
+                found = any(
+                    tuple(cols[:len(columns)]) == columns and (is_unique or not unique)
+                    for is_unique, cols in indexes.values()
+                )
+                if not found:
+                    kind = "unique index" if unique else "index"
+                    problems.append(f"{table}: missing {kind} on ({', '.join(columns)})")
+        return problems
+
+    def check_query_plans(self):
+        """
+        Runs EXPLAIN on each hot query and checks that the planner uses the expected index.
+
+        Returns:
+            list[str]: A description of each hot query that is not using its index.
+        """
+        failures = []
+        for name, sql, params, expected in HOT_QUERIES:
+            used, notes = self._explain(sql, params)
+            for alias, index_names in expected.items():
+                if used.get(alias) in index_names:
+                    continue
+                if alias not in used and any(note in notes for note in _CONST_TABLE_NOTES):
+                    continue
+                failures.append(f"{name}: table {alias} uses {used.get(alias)!r}, expected one of {sorted(index_names)}")
+        return failures
+
+    def run_startup_checks(self):
+        """
+        Applies pending migrations and verifies the required indexes, logging any problems.
+
+        Returns:
+            bool: True if the schema is complete.
+        """
+        self.migrate()
+        problems = self.verify_indexes()
+        for problem in problems:
+            logger.error(f"Schema check failed: {problem}")
+        if not problems:
+            logger.info("Schema indexes verified")
+        return not problems
+
+    def table_indexes(self, table):
+        """
+        Reads the indexes defined on a table.
+
+        Returns:
+            dict: index name -> (unique, [column names in index order])
+        """
+        indexes = {}
+        if self.dialect == "sqlite":
+            for index in self.db.query(f"PRAGMA index_list({table})"):
+                columns = [row["name"] for row in sorted(
+                    self.db.query(f"PRAGMA index_info({index['name']})"), key=lambda r: r["seqno"])]
+                indexes[index["name"]] = (bool(index["unique"]), columns)
+            return indexes
+        rows = self.db.query(f"SHOW INDEX FROM {table}")
+        for row in sorted(rows, key=lambda r: (r["Key_name"], r["Seq_in_index"])):
+            unique, columns = indexes.setdefault(row["Key_name"], (not row["Non_unique"], []))
+            columns.append(row["Column_name"])
+        return indexes
+
+    def _explain(self, sql, params):
+        """
+        Runs the dialect's EXPLAIN for a query.
+
+        Returns:
+            tuple: ({table alias: index name or None}, planner notes as one string)
+        """
+        if self.dialect == "sqlite":
+            used = {}
+            plan = self.db.query("EXPLAIN QUERY PLAN " + sql, params)
+            for row in plan:
+                match = _SQLITE_PLAN_RE.match(row["detail"])
+                if match:
+                    used[match.group(1)] = "PRIMARY" if match.group(3) else match.group(2)
+            return used, " ".join(row["detail"] for row in plan)
+        plan = self.db.query("EXPLAIN " + sql, params)
+        used = {row.get("table"): row.get("key") for row in plan}
+        return used, " ".join(str(row.get("Extra") or "") for row in plan)
+
+    def _apply_statement(self, statement):
+        """
+        Executes one migration statement, skipping CREATE INDEX for indexes that already exist
+        so the migrations can be adopted by databases created before they were checked in.
+        """
+        match = _CREATE_INDEX_RE.match(statement)
+        if match and match.group(1) in self.table_indexes(match.group(2)):
+            logger.info(f"Index {match.group(1)} already exists, skipping")
+            return
+        self.db.execute(statement)
+
+    @staticmethod
+    def _read_statements(path):
+        """
+        Splits a migration file into statements, dropping `--` comment lines.
+        """
+        with open(path) as f:
+            lines = [line for line in f if not line.lstrip().startswith("--")]
+        return [statement.strip() for statement in "".join(lines).split(";") if statement.strip()]
@@ -0,0 +1,48 @@
+-- 0001_create_tables.sql
+-- SQLite version of the tables read and written by race_manager.py and race_statistics.py.
+
+CREATE TABLE IF NOT EXISTS packnames (
+    ID INTEGER PRIMARY KEY,
+    PackName VARCHAR(100) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS racerinfo (
+    RacerID INTEGER PRIMARY KEY,
+    RacerFirstName VARCHAR(50) NOT NULL,
+    RacerLastName VARCHAR(50) NOT NULL,
+    RacerPack INTEGER NULL,
+    RacerRFID VARCHAR(32) NULL,
+    RacerCarName VARCHAR(100) NULL,
+    RacerCarNumber INTEGER NULL,
+    RacerInclude INTEGER NOT NULL DEFAULT 1,
+    RacerCarChecked INTEGER NOT NULL DEFAULT 0,
+    RacerCarWeight DECIMAL(5,2) NULL,
+    RacerPhoto VARCHAR(255) NULL
+);
+
+CREATE TABLE IF NOT EXISTS trackinformation (
+    TrackID INTEGER PRIMARY KEY,
+    TrackName VARCHAR(50) NULL,
+    NumberLanes INTEGER NOT NULL DEFAULT 3,
+    Heat INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS raceresults (
+    ResultID INTEGER PRIMARY KEY AUTOINCREMENT,
+    RacerID INTEGER NULL,
+    RaceCounter INTEGER NOT NULL,
+    RaceCarNumber INTEGER NULL,
+    TrackID INTEGER NOT NULL,
+    Heat INTEGER NOT NULL DEFAULT 1,
+    Lane INTEGER NOT NULL,
+    CarName VARCHAR(100) NULL,
+    Pack INTEGER NULL,
+    RaceTime DECIMAL(9,6) NOT NULL DEFAULT 0,
+    ReactionTime DECIMAL(9,6) NOT NULL DEFAULT 0,
+    Placing INTEGER NOT NULL DEFAULT 0,
+    RacerRFID VARCHAR(32) NULL,
+    RacerFirstName VARCHAR(50) NULL,
+    RacerLastName VARCHAR(50) NULL,
+    RaceMode VARCHAR(16) NULL,
+    RecordedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
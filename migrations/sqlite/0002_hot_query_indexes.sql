@@ -0,0 +1,10 @@
+-- 0002_hot_query_indexes.sql
+-- Indexes backing the hot queries:
+--   RaceManager.get_racer_info    -> racerinfo by RacerRFID, packnames by ID (primary key)
+--   fetch_race_statistics          -> raceresults by TrackID with RaceTime > 0, MAX(RaceCounter)
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_racerinfo_rfid ON racerinfo (RacerRFID);
+
+CREATE INDEX IF NOT EXISTS ix_raceresults_track_counter ON raceresults (TrackID, RaceCounter);
+
+CREATE INDEX IF NOT EXISTS ix_raceresults_track_time ON raceresults (TrackID, RaceTime);
@@ -0,0 +1,11 @@
+-- 0003_racecounter_blocks.sql
+-- Block reservations for the "sequence" race counter strategy (coordination/race_counter.py).
+-- Each row reserves RACE_COUNTER_BLOCK_SIZE counters starting at BlockID * RACE_COUNTER_BLOCK_SIZE.
+
+CREATE TABLE IF NOT EXISTS racecounter_blocks (
+    BlockID INTEGER PRIMARY KEY AUTOINCREMENT,
+    TrackID INTEGER NOT NULL,
+    ReservedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_racecounter_blocks_track ON racecounter_blocks (TrackID, BlockID);
@@ -0,0 +1,12 @@
+-- 0004_heat_schedule.sql
+-- Lane-rotation chart produced by scheduler.py: which racer runs in which lane of each scheduled heat.
+-- RaceCounter is filled in once the heat has been raced, so the next heat is the lowest HeatNumber without one.
+
+CREATE TABLE IF NOT EXISTS heatschedule (
+    TrackID INTEGER NOT NULL,
+    HeatNumber INTEGER NOT NULL,
+    Lane INTEGER NOT NULL,
+    RacerID INTEGER NULL,
+    RaceCounter INTEGER NULL,
+    PRIMARY KEY (TrackID, HeatNumber, Lane)
+);
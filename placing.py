@@ -0,0 +1,128 @@
+"""
+placing.py
+
+Purpose: Computes race placings from finish timestamps as they arrive. Finishes are kept in a list sorted by
+(time, lane) with bisect, so each insert costs a binary search and placings only need recomputing from the tie
+group the new finish lands in. Finishes closer together than the tie window are a tie, resolved by the tie policy:
+"share" gives the tied lanes the same place (1, 1, 3), "time" keeps the raw timestamp order but still reports the
+tie so the result can be reviewed. Because placings depend only on the timestamps, the result is the same whichever
+sensor thread reports first.
+
+Usage: Instantiate PlacingEngine(), call reset() before each heat and add_finish(lane, finish_time) from any thread;
+placings() gives the current lane -> place.
+
+Events:
+    placings_changed -- changed ({lane: place} for lanes whose place changed), placings ({lane: place} for every
+                        finished lane), ties (lists of tied lanes)
+"""
+
+from bisect import bisect_left, insort
+from threading import Lock
+from config import Config
+from event_bus import bus as default_bus
+from logger import logger
+
+
+class PlacingEngine:
+    def __init__(self, tie_window_ms=None, tie_policy=None, bus=None):
+        """
+        Initializes the PlacingEngine.
+
+        Args:
+            tie_window_ms (float, optional): Finishes closer than this are a tie. Defaults to Config.TIE_WINDOW_MS.
+            tie_policy (str, optional): "share" or "time". Defaults to Config.TIE_POLICY.
+            bus (EventBus, optional): Where placing changes are published. Defaults to the shared bus.
+        """
+        self.tie_window = (Config.TIE_WINDOW_MS if tie_window_ms is None else tie_window_ms) / 1000
+        self.tie_policy = (tie_policy or Config.TIE_POLICY).lower()
+        if self.tie_policy not in ("share", "time"):
+            raise ValueError(f"Unknown tie policy: {self.tie_policy}")
+        self.bus = bus or default_bus
+        self.lock = Lock()
+        self.finishes = []  # (finish_time, lane), sorted
+        self.places = []  # Place of each entry in self.finishes
+        self.group_starts = []  # Index of the first finish in each entry's tie group
+        self.lanes = {}  # lane -> finish_time
+
+    def reset(self):
+        """
+        Clears every finish, ready for the next heat.
+        """
+        with self.lock:
+            self.finishes.clear()
+            self.places.clear()
+            self.group_starts.clear()
+            self.lanes.clear()
+
+    def add_finish(self, lane, finish_time):
+        """
+        Records a lane's finish and recomputes the placings it affects. A lane's first finish is kept.
+
+        Args:
+            lane (int): Lane that finished.
+            finish_time (float): time.monotonic() of the finish.
+
+        Returns:
+            dict: lane -> new place for every lane whose place changed (empty for a repeated finish).
+        """
+        with self.lock:
+            if lane in self.lanes:
+                return {}
+            self.lanes[lane] = finish_time
+            entry = (finish_time, lane)
+            index = bisect_left(self.finishes, entry)
+            insort(self.finishes, entry)
+            self.places.insert(index, 0)
+            self.group_starts.insert(index, index)
+            # Entries before the new finish's tie group cannot change
+            first = self.group_starts[index - 1] if index else 0
+            changed = self._recompute(first)
+            ties = self._ties()
+            for tied in ties:
+                if lane in tied:
+                    logger.info(f"Tie within {self.tie_window * 1000:.3f} ms: lanes {sorted(tied)}")
+            # Published under the lock so handlers always see placing changes in order
+            self.bus.publish("placings_changed", changed=changed, placings=self._placings(), ties=ties)
+            return changed
+
+    def _recompute(self, first):
+        # Caller holds self.lock. Tie groups are anchored on their first finish, so a chain of close finishes
+        # can't stretch one group past the window.
+        changed = {}
+        for i in range(first, len(self.finishes)):
+            finish_time, lane = self.finishes[i]
+            if i and finish_time - self.finishes[self.group_starts[i - 1]][0] < self.tie_window:
+                group = self.group_starts[i - 1]
+            else:
+                group = i
+            self.group_starts[i] = group
+            place = group + 1 if self.tie_policy == "share" else i + 1
+            if self.places[i] != place:
+                changed[lane] = place
+            self.places[i] = place
+        return changed
+
+    def _ties(self):
+        # Caller holds self.lock
+        groups = {}
+        for (finish_time, lane), group in zip(self.finishes, self.group_starts):
+            groups.setdefault(group, []).append(lane)
+        return [lanes for lanes in groups.values() if len(lanes) > 1]
+
+    def _placings(self):
+        # Caller holds self.lock
+        return {lane: place for (finish_time, lane), place in zip(self.finishes, self.places)}
+
+    def placings(self):
+        """
+        Returns lane -> place for every finished lane.
+        """
+        with self.lock:
+            return self._placings()
+
+    def ties(self):
+        """
+        Returns the tied lanes as a list of lane lists.
+        """
+        with self.lock:
+            return self._ties()
@@ -2,29 +2,284 @@
 race_manager.py
 
 Purpose: Manages race operations, including racer information, race results, lane tracking, and database interactions.
+
+Heat state is double-buffered (HeatState): while the current heat races and its results are written, the pads load
+the next heat into the second buffer. finish_heat() swaps them, so the next heat is ready as soon as one ends.
+
+Every change to the race state is saved to the state journal (state_journal.py) by a background writer: a change
+only counts itself, and the writer encodes one snapshot under the lock and writes it outside the lock. A burst of
+changes (a GPIO finish, its placing, the next heat's taps) thus costs the changing thread a counter update and is
+coalesced into a single fsync. flush_state() waits for the writer, e.g. before shutting down.
+
+Changes to the race state are published (lane entries are announced by the lane service as lane_assigned, finishes
+follow from the placing engine), so the event journal (event_journal.py) can rebuild the state by replaying them.
+
+Events:
+    race_state_restored      -- state (the snapshot restored from the state journal)
+    race_counter_incremented -- race_counter
+    heat_started             -- race_counter, heat
+    heat_finished            -- race_counter, heat
+    heat_voided              -- race_counter, heat
+    start_recorded           -- lanes, start_time
+    reaction_recorded        -- lane, reaction_time
+    heat_recorded            -- race_counter, heat, results (the heat's race entries, as written to
+                                raceresults)
 """
 
 from db_handler import DatabaseHandler
-from threading import Lock
+from event_bus import bus as default_bus
+from threading import Condition, Lock, Thread
+
+# Racer lookup by RFID tag; served by the unique index on racerinfo.RacerRFID (see migrations/)
+RACER_INFO_QUERY = """
+SELECT 
+    RI.RacerID,
+    RI.RacerFirstName, 
+    RI.RacerLastName, 
+    RI.RacerPack,
+    PN.PackName, 
+    RI.RacerRFID, 
+    RI.RacerCarName, 
+    RI.RacerCarNumber, 
+    RI.RacerInclude, 
+    RI.RacerCarChecked, 
+    RI.RacerCarWeight, 
+    RI.RacerPhoto
+FROM racerinfo RI LEFT OUTER JOIN packnames PN ON RI.RacerPack = PN.ID
+WHERE RI.RacerRFID = %s
+"""
+
+
+class HeatState:
+    """
+    One heat's lane entries and timings. RaceManager double-buffers these: the heat on the track (and being
+    written) and the next heat, which pads can load while the current one races.
+    """
+
+    def __init__(self):
+        self.races = []  # Local storage for race data
+        self.loaded_rfids = set()  # RFIDs in self.races, for O(1) duplicate checks
+        self.recorded_lanes = set()  # Tracks lanes with recorded reaction times
+        self.racing_start_times = {}  # Store individual start times per lane
+        self.schedule_heat = None  # HeatNumber in the heat schedule, if the heat came from it
+        self.match_id = None  # Tournament match, if the heat is one
+
+    @property
+    def race_counter(self):
+        """
+        Returns the RaceCounter the heat's entries are stamped with, or None if no racer is loaded.
+        """
+        return self.races[0]["RaceCounter"] if self.races else None
+
+    def snapshot(self):
+        return {
+            "Races": self.races,
+            "RecordedLanes": sorted(self.recorded_lanes),
+            "RacingStartTimes": self.racing_start_times,
+            "ScheduleHeat": self.schedule_heat,
+            "MatchID": self.match_id,
+        }
+
+    @classmethod
+    def from_snapshot(cls, state):
+        heat = cls()
+        heat.races = state.get("Races", [])
+        heat.loaded_rfids = {race["RacerRFID"] for race in heat.races}
+        heat.recorded_lanes = set(state.get("RecordedLanes", []))
+        heat.racing_start_times = {int(lane): start for lane, start in state.get("RacingStartTimes", {}).items()}
+        heat.schedule_heat = state.get("ScheduleHeat")
+        heat.match_id = state.get("MatchID")
+        return heat
 
 
 class RaceManager:
-    def __init__(self, db_handler, race_counter, heat, track_number, race_start_mode):
+    def __init__(self, db_handler, race_counter, heat, track_number, race_start_mode, counter_allocator=None,
+                 journal=None, bus=None):
         print("Progress: Initializing RaceManager...")
+        self.bus = bus or default_bus
         self.db_handler = db_handler  # Use DatabaseHandler instance
         self.race_counter = race_counter
+        self.counter_allocator = counter_allocator  # Optional RaceCounterAllocator for multi-track setups
+        self.journal = journal  # Optional RaceStateJournal; every state change is persisted to it
         self.heat = heat
-        self.races = []  # Local storage for race data
-        self.recorded_lanes = set()  # Tracks lanes with recorded reaction times
+        self.current = HeatState()  # Heat on the track
+        self.staging = HeatState()  # Next heat, loaded by the pads while the current heat races
+        self.racing = False  # True from start_heat() to finish_heat(); taps then go to self.staging
+        self.unwritten = []  # Finished heats waiting for their database write
         self.track_number = track_number
         self.race_start_mode = race_start_mode.lower()  # Normalize mode
-        self.racing_start_times = {}  # Store individual start times per lane
 
         # Lane tracking
         self.current_lane = 1  # Default starting lane
         self.lock = Lock()  # Thread-safe lock for lane tracking
+        self.persist_condition = Condition()  # Guards the two counts below; notified as they move
+        self.changes = 0  # State changes made, counted for the journal writer
+        self.persisted = 0  # Changes the journal holds
+        self.persist_writer = None  # Thread writing the journal, started by the first change
         print("Progress: RaceManager initialized.")
 
+    # The current heat's state, as it was before heats were double-buffered
+    @property
+    def races(self):
+        return self.current.races
+
+    @property
+    def loaded_rfids(self):
+        return self.current.loaded_rfids
+
+    @property
+    def recorded_lanes(self):
+        return self.current.recorded_lanes
+
+    @property
+    def racing_start_times(self):
+        return self.current.racing_start_times
+
+    @property
+    def loading(self):
+        """
+        Returns the heat that pad taps fill: the current heat until it starts racing, then the next one.
+        """
+        return self.staging if self.racing else self.current
+
+    # Crash-safe State Methods
+    def snapshot(self):
+        """
+        Returns the race state needed to restart after a crash.
+        """
+        return {
+            "RaceCounter": self.race_counter,
+            "Heat": self.heat,
+            "TrackID": self.track_number,
+            "RaceMode": self.race_start_mode,
+            "CurrentLane": self.current_lane,
+            **self.current.snapshot(),
+            "Racing": self.racing,
+            "Staged": self.staging.snapshot(),
+            "Unwritten": [heat.snapshot() for heat in self.unwritten],
+        }
+
+    def restore(self, state):
+        """
+        Restores the race state from a journal snapshot, including any heat that was in progress, the next heat
+        if it was being loaded, and finished heats that were not yet written.
+        """
+        self.race_counter = state["RaceCounter"]
+        self.heat = state["Heat"]
+        self.current_lane = state.get("CurrentLane", 1)
+        self.current = HeatState.from_snapshot(state)
+        self.staging = HeatState.from_snapshot(state.get("Staged", {}))
+        self.racing = state.get("Racing", False)
+        self.unwritten = [HeatState.from_snapshot(heat) for heat in state.get("Unwritten", [])]
+        print(f"Progress: Restored race counter {self.race_counter}, heat {self.heat}, {len(self.races)} lane(s) in flight, "
+              f"{len(self.staging.races)} staged, {len(self.unwritten)} heat(s) to write.")
+        self.bus.publish("race_state_restored", state=state)
+
+    # Heat Double-Buffer Methods
+    def start_heat(self):
+        """
+        Closes loading of the current heat as it starts racing; taps from now on load the next heat. A manager created
+        without a race counter takes its first one here, so no counter is allocated before a heat actually runs.
+        """
+        if self.race_counter is None:
+            self.increment_race_counter()
+        with self.lock:
+            self.racing = True
+            print(f"Progress: Race {self.race_counter} started; now loading the next heat.")
+            self._persist()
+        self.bus.publish("heat_started", race_counter=self.race_counter, heat=self.heat)
+
+    def finish_heat(self):
+        """
+        Swaps the buffers once the current heat has finished: the heat loaded meanwhile becomes current, and the
+        finished heat waits in self.unwritten until write_races_to_db(heat) stores it.
+
+        Returns:
+            HeatState: The finished heat.
+        """
+        with self.lock:
+            finished = self.current
+            self.current = self.staging
+            self.staging = HeatState()
+            self.racing = False
+            if finished.races:
+                self.unwritten.append(finished)
+            print(f"Progress: Heat finished; {len(self.current.races)} racer(s) already loaded for the next heat.")
+            self._persist()
+        self.bus.publish("heat_finished", race_counter=finished.race_counter, heat=self.heat)
+        return finished
+
+    def has_interrupted_heat(self):
+        """
+        Returns True if racers were loaded but the heat was never finished.
+        """
+        return bool(self.races)
+
+    def pending_writes(self):
+        """
+        Returns the finished heats whose database write has not completed.
+        """
+        with self.lock:
+            return list(self.unwritten)
+
+    def resume_interrupted_heat(self):
+        """
+        Keeps the restored lane assignments and timings so the interrupted heat can be finished.
+        """
+        print(f"Progress: Resuming interrupted heat {self.heat} (race {self.race_counter}).")
+        self._persist()
+
+    def void_interrupted_heat(self):
+        """
+        Discards the restored heat. The race counter is kept, so the voided counter is never reused.
+        """
+        print(f"Progress: Voiding interrupted heat {self.heat} (race {self.race_counter}).")
+        with self.lock:
+            self.current = HeatState()
+            self.racing = False
+            self.current_lane = 1
+            self._persist()
+        self.bus.publish("heat_voided", race_counter=self.race_counter, heat=self.heat)
+
+    def _persist(self):
+        # Flags the state for the journal writer; callers may hold self.lock, which the writer takes to encode
+        if not self.journal:
+            return
+        with self.persist_condition:
+            self.changes += 1
+            self.persist_condition.notify_all()
+            if self.persist_writer is None:
+                self.persist_writer = Thread(target=self._write_journal, name="state-journal", daemon=True)
+                self.persist_writer.start()
+
+    def _write_journal(self):
+        while True:
+            with self.persist_condition:
+                self.persist_condition.wait_for(lambda: self.changes > self.persisted)
+                changes = self.changes  # Everything up to here is in the snapshot taken below
+            try:
+                with self.lock:
+                    data = self.journal.encode(self.snapshot())
+                self.journal.write(data)
+            except (OSError, RuntimeError, TypeError, ValueError) as e:
+                print(f"State journal write failed: {e}")
+            with self.persist_condition:
+                self.persisted = changes
+                self.persist_condition.notify_all()
+
+    def flush_state(self, timeout=None):
+        """
+        Waits until the state journal holds every change made so far.
+
+        Args:
+            timeout (float, optional): Seconds to wait; None waits until written.
+
+        Returns:
+            bool: True if the journal is up to date.
+        """
+        with self.persist_condition:
+            return self.persist_condition.wait_for(lambda: self.persisted >= self.changes, timeout)
+
     # Lane Tracking Methods
     def increment_current_lane(self):
         """
@@ -33,6 +288,7 @@ class RaceManager:
         with self.lock:
             self.current_lane += 1
             print(f"Progress: Incremented current lane to {self.current_lane}.")
+            self._persist()
 
     def reset_current_lane(self):
         """
@@ -41,6 +297,7 @@ class RaceManager:
         with self.lock:
             self.current_lane = 1
             print("Progress: Reset current lane to 1.")
+            self._persist()
 
     def get_current_lane(self):
         """
@@ -51,9 +308,10 @@ class RaceManager:
 
     # Race Management Methods
     def initialize_race_entry(self, race_id, lane, rfid, racer_info):
-        if any(race["Lane"] == lane for race in self.races):
+        heat = self.loading
+        if any(race["Lane"] == lane for race in heat.races):
             return
-        self.races.append({
+        heat.races.append({
             "RacerID": racer_info["RacerID"],
             "RaceCounter": race_id,
             "RaceCarNumber": racer_info["RacerCarNumber"],
@@ -70,66 +328,80 @@ class RaceManager:
             "RacerLastName": racer_info["RacerLastName"],
             "RaceMode": self.race_start_mode
         })
+        heat.loaded_rfids.add(rfid)
+        self._persist()
 
     def assign_racer_info(self, lane, racer_info):
-        for race in self.races:
-            if race["Lane"] == lane:
-                race.update(racer_info)
-                return 
+        with self.lock:
+            for race in self.races:
+                if race["Lane"] == lane:
+                    race.update(racer_info)
+                    self._persist()
+                    return
 
     def record_reaction_time(self, lane, reaction_time):
-        for race in self.races:
-            if race["Lane"] == lane and race["ReactionTime"] == "00.000000":
-                race["ReactionTime"] = reaction_time
-                print(f"Progress: Recorded reaction time for lane {lane}: {reaction_time}")
+        with self.lock:
+            race = next((race for race in self.races
+                         if race["Lane"] == lane and race["ReactionTime"] == "00.000000"), None)
+            if race is None:
                 return
+            race["ReactionTime"] = reaction_time
+            self._persist()
+        print(f"Progress: Recorded reaction time for lane {lane}: {reaction_time}")
+        self.bus.publish("reaction_recorded", lane=lane, reaction_time=reaction_time)
+
+    def record_start_times(self, lanes, start_time):
+        """
+        Records when the gates for the given lanes actually dropped (time.monotonic() seconds).
+        """
+        lanes = list(lanes)
+        with self.lock:
+            for lane in lanes:
+                self.racing_start_times[lane] = start_time
+            self._persist()
+        print(f"Progress: Recorded start time for lane(s) {', '.join(str(lane) for lane in lanes)}.")
+        self.bus.publish("start_recorded", lanes=lanes, start_time=start_time)
 
     def record_race_finish(self, lane, race_time, place):
-        for race in self.races:
-            if race["Lane"] == lane:
-                race["RaceTime"] = race_time
-                race["Placing"] = place
-                print(f"Progress: Recorded finish for lane {lane}: RaceTime = {race_time}, Placing = {place}")
+        with self.lock:
+            race = next((race for race in self.races if race["Lane"] == lane), None)
+            if race is None:
                 return
+            race["RaceTime"] = race_time
+            race["Placing"] = place
+            self._persist()
+        print(f"Progress: Recorded finish for lane {lane}: RaceTime = {race_time}, Placing = {place}")
 
     def get_racer_info(self, rfid):
         print(f"Progress: Querying racer info for RFID {rfid}...")
-        query = """
-        SELECT 
-            RI.RacerID,
-            RI.RacerFirstName, 
-            RI.RacerLastName, 
-            RI.RacerPack,
-            PN.PackName, 
-            RI.RacerRFID, 
-            RI.RacerCarName, 
-            RI.RacerCarNumber, 
-            RI.RacerInclude, 
-            RI.RacerCarChecked, 
-            RI.RacerCarWeight, 
-            RI.RacerPhoto
-        FROM racerinfo RI LEFT OUTER JOIN packnames PN ON RI.RacerPack = PN.ID
-        WHERE RacerRFID = %s
-        """
         try:
-            racer_info = self.db_handler.query(query, (rfid,), fetch_one=True)
+            racer_info = self.db_handler.query(RACER_INFO_QUERY, (rfid,), fetch_one=True)
             print("Progress: Racer info retrieved." if racer_info else "Progress: Racer info not found.")
             return racer_info
         except Exception as e:
             print(f"Unexpected error in get_racer_info: {e}")
             return None
 
-    def write_races_to_db(self):
+    def write_races_to_db(self, heat=None):
+        """
+        Writes a heat's results to the database. Safe to run on a background thread for a heat returned by
+        finish_heat(), while the next heat loads and races.
+
+        Args:
+            heat (HeatState, optional): Finished heat to write. Defaults to the current heat, which is then cleared.
+        """
         if self.race_start_mode == "free":
             print("Progress: Free mode active. Skipping database writes.")
+            self._written(heat)
             return
         print("Progress: Writing race results to the database...")
+        races = self.races if heat is None else heat.races
         query = """
         INSERT INTO raceresults (RacerID, RaceCounter, RaceCarNumber, TrackID, Heat, Lane, CarName, Pack, RaceTime, ReactionTime, Placing, RacerRFID, RacerFirstName, RacerLastName, RaceMode)
         VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         """
         try:
-            for race in self.races:
+            for race in races:
                 self.db_handler.execute(query, (
                     race["RacerID"],
                     race["RaceCounter"],
@@ -148,10 +420,26 @@ class RaceManager:
                     race["RaceMode"]
                 ))
             print("Progress: Race results successfully written to the database.")
-            self.races.clear()
+            results = list(races)
+            race_counter = results[0]["RaceCounter"] if results else self.race_counter
+            if heat is None:
+                with self.lock:
+                    self.races.clear()
+                    self.loaded_rfids.clear()
+                    self._persist()
+            else:
+                self._written(heat)
+            self.bus.publish("heat_recorded", race_counter=race_counter, heat=self.heat, results=results)
         except Exception as e:
             print("Database Error during write:", e)
 
+    def _written(self, heat):
+        if heat is not None:
+            with self.lock:
+                if heat in self.unwritten:
+                    self.unwritten.remove(heat)
+                self._persist()
+
     def get_reaction_time(self, lane_index):
         for race in self.races:
             if race["Lane"] == lane_index:
@@ -161,12 +449,28 @@ class RaceManager:
     def get_current_race_counter(self):
         return self.race_counter
 
-    def increment_race_counter(self):
-        self.race_counter += 1
+    def increment_race_counter(self, race_counter=None):
+        """
+        Moves to the next race counter and stamps it on the racers already loaded for the next heat.
+
+        Args:
+            race_counter (int, optional): Counter to move to, as when replaying an event journal. Defaults to the
+                                          next one from the counter allocator, or the current counter plus one.
+        """
+        if race_counter is not None:
+            self.race_counter = race_counter
+        elif self.counter_allocator:
+            self.race_counter = self.counter_allocator.next()
+        else:
+            self.race_counter = (self.race_counter or 0) + 1
+        with self.lock:
+            # Racers loaded while the last heat raced were stamped with its counter
+            for race in self.current.races:
+                race["RaceCounter"] = self.race_counter
+                race["Heat"] = self.heat
         print(f"Progress: Race counter incremented to {self.race_counter}.")
+        self._persist()
+        self.bus.publish("race_counter_incremented", race_counter=self.race_counter)
 
     def is_duplicate_rfid(self, rfid):
-        for race in self.races:
-            if race["RacerRFID"] == rfid:
-                return True
-        return False
\ No newline at end of file
+        return rfid in self.loading.loaded_rfids
\ No newline at end of file
@@ -5,7 +5,17 @@ Purpose: Defines the RaceStatistics data class to store race-related statistics.
 """
 
 from dataclasses import dataclass
-from db_handler import execute_query  # Import the database handler
+
+# Per-track statistics; served by the (TrackID, RaceCounter) / (TrackID, RaceTime) indexes on raceresults
+RACE_STATISTICS_QUERY = """
+    SELECT MAX(A.RaceCounter) AS RaceCounter, 
+           RIGHT(MIN(A.RaceTime), 9) AS RaceTime, 
+           MAX(B.Heat) AS CurrentHeat
+    FROM raceresults A 
+    INNER JOIN trackinformation B ON A.TrackID = B.TrackID 
+    WHERE A.TrackID = %s AND A.RaceTime > 0
+"""
+
 
 @dataclass
 class RaceStatistics:
@@ -19,44 +29,34 @@ class RaceStatistics:
         Factory method to create a RaceStatistics instance from an SQL query result.
 
         Args:
-            sql_result (tuple): A tuple containing the result of the SQL query
-                                (RaceCounter, RaceTime, CurrentHeat).
+            sql_result (dict): A row containing the result of the SQL query
+                               (RaceCounter, RaceTime, CurrentHeat).
 
         Returns:
             RaceStatistics: An instance of RaceStatistics populated with the query result.
         """
         return RaceStatistics(
-            RaceCounter=sql_result[0],
-            RaceTime=sql_result[1],
-            CurrentHeat=sql_result[2]
+            RaceCounter=sql_result["RaceCounter"],
+            RaceTime=sql_result["RaceTime"],
+            CurrentHeat=sql_result["CurrentHeat"]
         )
 
 # Function to fetch race statistics
-def fetch_race_statistics(track_id):
+def fetch_race_statistics(db_handler, track_id):
     """
     Fetches race statistics for a given track ID from the database.
 
     Args:
+        db_handler (DatabaseHandler): The database handler used to run the query.
         track_id (int): The ID of the track to fetch statistics for.
 
     Returns:
         RaceStatistics: An instance of RaceStatistics populated with the query result.
     """
-    # SQL query
-    query = """
-        SELECT MAX(A.RaceCounter) AS RaceCounter, 
-               RIGHT(MIN(A.RaceTime), 9) AS RaceTime, 
-               B.Heat 
-        FROM raceresults A 
-        INNER JOIN trackinformation B ON A.TrackID = B.TrackID 
-        WHERE A.TrackID = %s AND A.RaceTime > 0;
-    """
-
-    # Execute the query using the database handler
-    result = execute_query(query, (track_id,))
+    result = db_handler.query(RACE_STATISTICS_QUERY, (track_id,), fetch_one=True)
 
     # Check if a result was returned
-    if result:
+    if result and result["RaceCounter"] is not None:
         return RaceStatistics.from_sql_result(result)
     else:
         print("No data found for the given TrackID.")
@@ -64,8 +64,10 @@ def fetch_race_statistics(track_id):
 
 # Example usage
 if __name__ == "__main__":
+    from db_handler import DatabaseHandler
+
     track_id = 1  # Replace with the desired TrackID
-    race_stats = fetch_race_statistics(track_id)
+    race_stats = fetch_race_statistics(DatabaseHandler(), track_id)
 
     if race_stats:
-        print(race_stats)
\ No newline at end of file
+        print(race_stats)
@@ -0,0 +1,311 @@
+"""
+scheduler.py
+
+Purpose: Builds a balanced lane-rotation chart for the checked-in roster, stores it, and stages each upcoming heat
+in the background so its racers are already looked up when the pads start tapping.
+
+The chart is cyclic ("Perfect-N" style): cars are numbered 0..N-1 and heat h runs car (h + offset[lane]) mod N in
+each lane. Over N heats every car runs every lane exactly once, so lane balance holds by construction and the
+only choice is the offsets. Two lanes with offsets a and b pair every car with the car (b - a) mod N places away,
+so opponents repeat least when the offset differences fall in as many different classes as possible. The offsets
+are chosen by a local search over that small space (lanes - 1 numbers), which stays fast for hundreds of cars.
+Difference class 1 is avoided where possible because it also means a car races in back-to-back heats. Each extra
+pass (Config.SCHEDULE_PASSES) picks new offsets that avoid the classes already used.
+
+Usage: scheduler = HeatScheduler(db_handler); scheduler.create() once the roster is checked in (and again only
+when the operator asks for a new chart, as it replaces the stored one); then for each heat: next_heat() (or
+stage_next() ahead of time and staged_heat()), and mark_raced() after the results are written.
+"""
+
+import random
+import threading
+import time
+from config import Config
+from logger import logger
+
+# Racers eligible for the schedule: included in the event and through car check-in
+ROSTER_QUERY = """
+    SELECT RacerID FROM racerinfo
+    WHERE RacerInclude = 1 AND RacerCarChecked = 1
+    ORDER BY RacerCarNumber, RacerID
+"""
+
+# Same columns as race_manager.RACER_INFO_QUERY, looked up by RacerID for a whole heat at once
+RACERS_BY_ID_QUERY = """
+SELECT
+    RI.RacerID,
+    RI.RacerFirstName,
+    RI.RacerLastName,
+    RI.RacerPack,
+    PN.PackName,
+    RI.RacerRFID,
+    RI.RacerCarName,
+    RI.RacerCarNumber,
+    RI.RacerInclude,
+    RI.RacerCarChecked,
+    RI.RacerCarWeight,
+    RI.RacerPhoto
+FROM racerinfo RI LEFT OUTER JOIN packnames PN ON RI.RacerPack = PN.ID
+WHERE RI.RacerID IN ({placeholders})
+"""
+
+NEXT_HEAT_QUERY = """
+    SELECT HeatNumber, Lane, RacerID FROM heatschedule
+    WHERE TrackID = %s AND RaceCounter IS NULL AND HeatNumber = (
+        SELECT MIN(HeatNumber) FROM heatschedule
+        WHERE TrackID = %s AND RaceCounter IS NULL AND HeatNumber > %s
+    )
+"""
+
+
+def _class_of(difference, cars):
+    difference %= cars
+    return min(difference, cars - difference)
+
+
+def _meetings(c, cars):
+    # Meetings per pair of cars added by one lane pair in difference class c: the pairs in class cars / 2 are met
+    # from both ends of the cycle
+    return 2 if 2 * c == cars else 1
+
+
+def _class_cost(c, count, cars, lanes):
+    # Squared meetings per pair, plus a penalty on class 1 (back-to-back heats) when there is room to avoid it
+    return count * count + (4 * count if c == 1 and cars > 2 * lanes else 0)
+
+
+def _offset_cost(offsets, cars, used):
+    counts = dict(used)
+    for i in range(len(offsets)):
+        for j in range(i + 1, len(offsets)):
+            c = _class_of(offsets[j] - offsets[i], cars)
+            counts[c] = counts.get(c, 0) + _meetings(c, cars)
+    return sum(_class_cost(c, n, cars, len(offsets)) for c, n in counts.items()), counts
+
+
+def _lower_bound(cars, lanes, used):
+    # The cost is a sum of convex per-class terms, so placing each lane pair greedily in its cheapest class gives
+    # the best cost any offsets could reach
+    counts = dict(used)
+    for _ in range(lanes * (lanes - 1) // 2):
+        best = min(range(1, cars // 2 + 1), key=lambda c: _class_cost(c, counts.get(c, 0) + _meetings(c, cars),
+                                                                       cars, lanes)
+                   - _class_cost(c, counts.get(c, 0), cars, lanes))
+        counts[best] = counts.get(best, 0) + _meetings(best, cars)
+    return sum(_class_cost(c, n, cars, lanes) for c, n in counts.items())
+
+
+def choose_offsets(cars, lanes, used=None, time_limit=None, seed=None):
+    """
+    Picks lane offsets for one pass of a cyclic chart, spreading opponent pairings over as many classes as possible.
+
+    Args:
+        cars (int): Cars in the chart (at least lanes).
+        lanes (int): Lanes on the track.
+        used (dict, optional): Difference class -> meetings per pair from earlier passes.
+        time_limit (float, optional): Seconds to search. Defaults to Config.SCHEDULE_SEARCH_SECONDS.
+        seed (int, optional): Random seed, for a reproducible chart.
+
+    Returns:
+        tuple: (offsets, class meetings including this pass)
+    """
+    used = used or {}
+    rng = random.Random(seed)
+    deadline = time.monotonic() + (Config.SCHEDULE_SEARCH_SECONDS if time_limit is None else time_limit)
+    lower_bound = _lower_bound(cars, lanes, used) if cars > 1 else 0
+
+    best, best_cost, best_counts = None, None, None
+    stale = 0  # Restarts since the best was last improved
+    while True:
+        # Random start, then move single offsets while that lowers the cost
+        offsets = [0] + rng.sample(range(1, cars), lanes - 1)
+        cost, counts = _offset_cost(offsets, cars, used)
+        improved = True
+        while improved and cost > lower_bound:
+            improved = False
+            for i in range(1, lanes):
+                for candidate in rng.sample(range(1, cars), min(cars - 1, 64)):
+                    if candidate in offsets:
+                        continue
+                    trial = offsets[:i] + [candidate] + offsets[i + 1:]
+                    trial_cost, trial_counts = _offset_cost(trial, cars, used)
+                    if trial_cost < cost:
+                        offsets, cost, counts, improved = trial, trial_cost, trial_counts, True
+        if best_cost is None or cost < best_cost:
+            best, best_cost, best_counts, stale = offsets, cost, counts, 0
+        else:
+            stale += 1
+        if best_cost <= lower_bound or stale >= 200 or time.monotonic() > deadline:
+            return best, best_counts
+
+
+def build_chart(racer_ids, lanes, passes=1, seed=None):
+    """
+    Builds a cyclic lane-rotation chart.
+
+    Args:
+        racer_ids (list): Racers to schedule, in car order.
+        lanes (int): Lanes on the track.
+        passes (int): Times each car runs each lane.
+        seed (int, optional): Random seed, for a reproducible chart.
+
+    Returns:
+        list: One list per heat of the RacerID in each lane (index 0 is lane 1); None marks an empty lane.
+    """
+    cars = list(racer_ids) + [None] * max(0, lanes - len(racer_ids))  # Fewer cars than lanes: pad with byes
+    count = len(cars)
+    chart, used = [], {}
+    for number in range(passes):
+        offsets, used = choose_offsets(count, lanes, used, seed=None if seed is None else seed + number)
+        for heat in range(count):
+            entries = [cars[(heat + offset) % count] for offset in offsets]
+            if any(entry is not None for entry in entries):
+                chart.append(entries)
+    return chart
+
+
+def fetch_racers(db_handler, racer_ids):
+    """
+    Looks up several racers in one query.
+
+    Args:
+        db_handler (DatabaseHandler): Database holding racerinfo.
+        racer_ids (iterable): RacerIDs to look up.
+
+    Returns:
+        dict: RacerID -> racer info (racers that no longer exist are left out).
+    """
+    racer_ids = tuple(racer_ids)
+    if not racer_ids:
+        return {}
+    placeholders = ", ".join(["%s"] * len(racer_ids))
+    racers = db_handler.query(RACERS_BY_ID_QUERY.format(placeholders=placeholders), racer_ids) or []
+    return {racer["RacerID"]: racer for racer in racers}
+
+
+class HeatScheduler:
+    def __init__(self, db_handler, track_id=None, lanes=None):
+        """
+        Initializes the HeatScheduler.
+
+        Args:
+            db_handler (DatabaseHandler): Database holding racerinfo and heatschedule.
+            track_id (int, optional): Track being scheduled. Defaults to Config.TRACK_NUMBER.
+            lanes (int, optional): Lanes on the track. Defaults to Config.NUMBER_LANES.
+        """
+        self.db = db_handler
+        self.track_id = track_id or Config.TRACK_NUMBER
+        self.lanes = lanes or Config.NUMBER_LANES
+        self.staged = None  # (heat_number, {lane: racer_info}) of the next heat, or None if the schedule is done
+        self.staging = None  # Thread looking up the staged heat
+
+    def load_roster(self):
+        """
+        Returns the RacerIDs of every included, checked-in racer in car-number order.
+        """
+        return [row["RacerID"] for row in self.db.query(ROSTER_QUERY) or []]
+
+    def has_schedule(self):
+        """
+        Returns True if this track has scheduled heats that have not been raced.
+        """
+        return bool(self.db.query(NEXT_HEAT_QUERY, (self.track_id, self.track_id, 0)))
+
+    def exists(self):
+        """
+        Returns True if this track has a stored schedule at all, raced or not.
+        """
+        return bool(self.db.query("SELECT 1 FROM heatschedule WHERE TrackID = %s LIMIT 1", (self.track_id,)))
+
+    def create(self, passes=None, seed=None):
+        """
+        Builds a chart for the current roster and replaces this track's stored schedule with it.
+
+        Args:
+            passes (int, optional): Times each car runs each lane. Defaults to Config.SCHEDULE_PASSES.
+            seed (int, optional): Random seed, for a reproducible chart.
+
+        Returns:
+            list: The chart (see build_chart()).
+        """
+        roster = self.load_roster()
+        if not roster:
+            logger.warning("No included, checked-in racers to schedule.")
+            return []
+        started = time.monotonic()
+        chart = build_chart(roster, self.lanes, passes or Config.SCHEDULE_PASSES, seed)
+        self.db.execute("DELETE FROM heatschedule WHERE TrackID = %s", (self.track_id,))
+        for number, entries in enumerate(chart, start=1):
+            for lane, racer_id in enumerate(entries, start=1):
+                self.db.execute(
+                    "INSERT INTO heatschedule (TrackID, HeatNumber, Lane, RacerID) VALUES (%s, %s, %s, %s)",
+                    (self.track_id, number, lane, racer_id)
+                )
+        self.staged = None
+        self.staging = None  # A lookup still running belongs to the replaced chart
+        logger.info(f"Scheduled {len(chart)} heats for {len(roster)} racers on {self.lanes} lanes "
+                    f"in {time.monotonic() - started:.2f} s")
+        return chart
+
+    def _load_heat(self, after=0):
+        rows = self.db.query(NEXT_HEAT_QUERY, (self.track_id, self.track_id, after)) or []
+        if not rows:
+            return None
+        heat_number = rows[0]["HeatNumber"]
+        lanes = {row["Lane"]: row["RacerID"] for row in rows if row["RacerID"] is not None}
+        by_id = fetch_racers(self.db, lanes.values())
+        return heat_number, {lane: by_id[racer_id] for lane, racer_id in lanes.items() if racer_id in by_id}
+
+    def next_heat(self):
+        """
+        Looks up the first heat that has not been raced.
+
+        Returns:
+            tuple or None: (heat_number, {lane: racer_info}), or None if every heat has been raced.
+        """
+        return self._load_heat()
+
+    def stage_next(self, after):
+        """
+        Starts looking up the heat after the given one in the background, so it is ready when the current heat ends.
+
+        Args:
+            after (int): Heat number currently being raced.
+        """
+        def stage():
+            try:
+                self.staged = self._load_heat(after)
+            except Exception as e:
+                logger.error(f"Could not stage the heat after {after}: {e}")
+                self.staged = None
+
+        self.staged = None
+        self.staging = threading.Thread(target=stage, name="heat-staging", daemon=True)
+        self.staging.start()
+
+    def staged_heat(self, after=0):
+        """
+        Returns the staged heat, waiting for the background lookup if it is still running; without one, looks up
+        the next heat directly.
+
+        Args:
+            after (int): Heat number still being raced (and not yet marked raced), which is skipped.
+
+        Returns:
+            tuple or None: (heat_number, {lane: racer_info}), or None if every heat has been raced.
+        """
+        if self.staging:
+            self.staging.join()
+            self.staging = None
+            if self.staged is not None:
+                return self.staged
+        return self._load_heat(after)
+
+    def mark_raced(self, heat_number, race_counter):
+        """
+        Records that a scheduled heat has been raced.
+        """
+        self.db.execute(
+            "UPDATE heatschedule SET RaceCounter = %s WHERE TrackID = %s AND HeatNumber = %s",
+            (race_counter, self.track_id, heat_number)
+        )
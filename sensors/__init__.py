@@ -3,5 +3,5 @@ sensors/__init__.py
 
 Purpose: Initializes the sensors subpackage exposing interfaces for all sensor and I/O modules.
 
-Usage: Import sensor classes for button, IR sensor, RFID reader, relay, and stepper.
+Usage: Import sensor classes for button, IR sensor, finish trace recorder, RFID reader, relay, and stepper.
 """
\ No newline at end of file
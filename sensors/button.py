@@ -3,6 +3,170 @@ button.py
 
 Purpose: Abstraction for physical button inputs (start buttons, RFID pad button) with debouncing.
 
-Usage: Instantiate Button with GPIO pin, call is_pressed() to detect events.
+Buttons are interrupt driven: nothing runs while a button is idle. Each edge is stamped with time.monotonic() as
+it arrives. Debouncing is done in time rather than by counting polls: the first edge that changes the stable
+state is accepted and keeps its timestamp (the true moment of the press), further edges within debounce_ms are
+counted as bounce and ignored, and the level is re-read once the window closes in case the contact settled back.
+A press held for hold_seconds also produces a "hold" event (the 2.5 second hold that starts the countdown).
+
+Every event is delivered to listeners, to anyone blocked in wait_for_*(), and to the event bus as "button".
+
+Usage: Instantiate Button(pin, name), then add_listener(callback) or call wait_for_press(timeout),
+wait_for_release(timeout) or wait_for_hold(timeout); is_pressed() gives the debounced state.
 """
-# TODO: Implement Button class with GPIO setup and debounce handling
+
+import threading
+from collections import namedtuple
+from config import Config
+from event_bus import bus
+from logger import logger
+
+# kind is "press", "release" or "hold"; time is time.monotonic(); duration is seconds held (release and hold)
+ButtonEvent = namedtuple("ButtonEvent", "name kind time duration")
+
+
+class Button:
+    def __init__(self, pin, name=None, active_low=True, debounce_ms=None, hold_seconds=None, backend=None):
+        """
+        Initializes the Button and starts watching its pin.
+
+        Args:
+            pin (int): BCM pin number.
+            name (str, optional): Name used in events and logs. Defaults to "button<pin>".
+            active_low (bool): True if the button pulls the pin low when pressed (internal pull-up).
+            debounce_ms (float, optional): Debounce window. Defaults to Config.BUTTON_DEBOUNCE_MS.
+            hold_seconds (float, optional): Press length reported as a hold. Defaults to
+                                            Config.BUTTON_HOLD_SECONDS; 0 disables hold events.
+            backend (optional): GPIO backend from sensors.gpio_backend. Defaults to RPiGPIOBackend.
+        """
+        if backend is None:
+            from sensors.gpio_backend import RPiGPIOBackend
+            backend = RPiGPIOBackend()
+        self.pin = pin
+        self.name = name or f"button{pin}"
+        self.active_low = active_low
+        self.debounce = (Config.BUTTON_DEBOUNCE_MS if debounce_ms is None else debounce_ms) / 1000
+        self.hold_seconds = Config.BUTTON_HOLD_SECONDS if hold_seconds is None else hold_seconds
+        self.backend = backend
+        self.listeners = []
+        self.pressed = False
+        self.pressed_at = None
+        self.last_change = float("-inf")
+        self.presses = 0  # Incremented on every accepted press; lets a hold timer know it is still current
+        self.bounces = 0  # Edges rejected as bounce
+        self.condition = threading.Condition()
+        self.last_events = {}  # kind -> last ButtonEvent
+        self.counts = {"press": 0, "release": 0, "hold": 0}
+
+        backend.setup_input(pin, pull_up=active_low)
+        self.pressed = self._read_pressed()
+        backend.watch(pin, self._on_edge)
+
+    def _read_pressed(self):
+        level = self.backend.read(self.pin)
+        return level == 0 if self.active_low else level == 1
+
+    def _on_edge(self, pin, timestamp):
+        # Runs on the GPIO library's callback thread
+        pressed = self._read_pressed()
+        with self.condition:
+            if timestamp - self.last_change < self.debounce:
+                self.bounces += 1
+                return
+            if pressed == self.pressed:
+                return
+            self.last_change = timestamp
+            self._change(pressed, timestamp)
+        # Confirm the state once the contact has had time to settle
+        threading.Timer(self.debounce, self._settle).start()
+
+    def _settle(self):
+        pressed = self._read_pressed()
+        with self.condition:
+            if pressed != self.pressed:
+                # Contact bounced back; the last real edge was inside the window we ignored
+                self.bounces += 1
+                self.last_change = self.last_change + self.debounce
+                self._change(pressed, self.last_change)
+
+    def _change(self, pressed, timestamp):
+        # Caller holds self.condition
+        self.pressed = pressed
+        if pressed:
+            self.pressed_at = timestamp
+            self.presses += 1
+            self._emit("press", timestamp, 0.0)
+            if self.hold_seconds:
+                threading.Timer(self.hold_seconds, self._check_hold, args=(self.presses,)).start()
+        else:
+            self._emit("release", timestamp, timestamp - self.pressed_at if self.pressed_at else 0.0)
+
+    def _check_hold(self, press_number):
+        with self.condition:
+            if self.pressed and self.presses == press_number:
+                self._emit("hold", self.pressed_at + self.hold_seconds, self.hold_seconds)
+
+    def _emit(self, kind, timestamp, duration):
+        # Caller holds self.condition
+        event = ButtonEvent(self.name, kind, timestamp, duration)
+        self.last_events[kind] = event
+        self.counts[kind] += 1
+        self.condition.notify_all()
+        for listener in self.listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logger.error(f"Button {self.name} listener failed: {e}")
+        bus.publish("button", name=self.name, kind=kind, time=timestamp, duration=duration)
+
+    def add_listener(self, callback):
+        """
+        Calls callback(ButtonEvent) on every press, release and hold. Runs on the GPIO callback thread.
+        """
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        self.listeners.remove(callback)
+
+    def is_pressed(self):
+        """
+        Returns the debounced state.
+        """
+        return self.pressed
+
+    def _wait_for(self, kind, timeout):
+        with self.condition:
+            count = self.counts[kind]
+            if self.condition.wait_for(lambda: self.counts[kind] != count, timeout):
+                return self.last_events[kind]
+            return None
+
+    def wait_for_press(self, timeout=None):
+        """
+        Blocks until the next press.
+
+        Args:
+            timeout (float, optional): Seconds to wait; None waits forever.
+
+        Returns:
+            ButtonEvent or None: The press, or None on timeout.
+        """
+        return self._wait_for("press", timeout)
+
+    def wait_for_release(self, timeout=None):
+        """
+        Blocks until the next release. Returns the ButtonEvent (duration is how long it was held) or None.
+        """
+        return self._wait_for("release", timeout)
+
+    def wait_for_hold(self, timeout=None):
+        """
+        Blocks until a press is held for hold_seconds. Returns the ButtonEvent or None on timeout.
+        """
+        return self._wait_for("hold", timeout)
+
+    def close(self):
+        """
+        Stops watching the pin.
+        """
+        self.backend.unwatch(self.pin)
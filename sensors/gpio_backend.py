@@ -0,0 +1,120 @@
+"""
+gpio_backend.py
+
+Purpose: Thin GPIO layer shared by the sensor and actuator classes (buttons, IR sensors, relays, steppers), with
+a real backend on RPi.GPIO and a fake one for bench testing without a Pi.
+
+Edge callbacks are stamped with time.monotonic() as the very first thing the callback does, so timestamps are
+taken within the GPIO library's interrupt thread latency rather than whenever Python code gets around to it.
+
+Usage: backend = RPiGPIOBackend() (or FakeGPIOBackend()); backend.setup_input(pin); backend.watch(pin, callback),
+where callback(pin, timestamp) runs on every edge.
+"""
+
+import threading
+import time
+
+
+class RPiGPIOBackend:
+    def __init__(self):
+        """
+        Initializes RPi.GPIO in BCM numbering. Imported here so the rest of the program loads without it.
+        """
+        import RPi.GPIO as GPIO
+        self.GPIO = GPIO
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setwarnings(False)
+
+    def setup_input(self, pin, pull_up=True):
+        pull = self.GPIO.PUD_UP if pull_up else self.GPIO.PUD_DOWN
+        self.GPIO.setup(pin, self.GPIO.IN, pull_up_down=pull)
+
+    def setup_output(self, pin, initial=0):
+        self.GPIO.setup(pin, self.GPIO.OUT, initial=initial)
+
+    def read(self, pin):
+        return self.GPIO.input(pin)
+
+    def write(self, pin, value):
+        self.GPIO.output(pin, value)
+
+    def write_many(self, pins, values):
+        """
+        Writes several outputs in one library call (RPi.GPIO accepts lists of channels).
+        """
+        self.GPIO.output(list(pins), list(values))
+
+    def watch(self, pin, callback):
+        """
+        Calls callback(pin, timestamp) on both edges of an input.
+        """
+        self.GPIO.add_event_detect(pin, self.GPIO.BOTH, callback=lambda channel: callback(channel, time.monotonic()))
+
+    def unwatch(self, pin):
+        self.GPIO.remove_event_detect(pin)
+
+    def cleanup(self, pins=None):
+        if pins is None:
+            self.GPIO.cleanup()
+        else:
+            self.GPIO.cleanup(list(pins))
+
+
+class FakeGPIOBackend:
+    def __init__(self):
+        """
+        Initializes an in-memory GPIO backend. Inputs are driven with set_input(); outputs are recorded.
+        """
+        self.levels = {}
+        self.watchers = {}
+        self.writes = []  # (pin, value, time.monotonic()) for every output write
+        self.lock = threading.Lock()
+
+    def setup_input(self, pin, pull_up=True):
+        self.levels[pin] = 1 if pull_up else 0
+
+    def setup_output(self, pin, initial=0):
+        self.levels[pin] = initial
+
+    def read(self, pin):
+        return self.levels.get(pin, 0)
+
+    def write(self, pin, value):
+        self.write_many([pin], [value])
+
+    def write_many(self, pins, values):
+        now = time.monotonic()
+        with self.lock:
+            for pin, value in zip(pins, values):
+                self.levels[pin] = value
+                self.writes.append((pin, value, now))
+
+    def watch(self, pin, callback):
+        self.watchers[pin] = callback
+
+    def unwatch(self, pin):
+        self.watchers.pop(pin, None)
+
+    def cleanup(self, pins=None):
+        for pin in list(self.watchers if pins is None else pins):
+            self.unwatch(pin)
+
+    def set_input(self, pin, level):
+        """
+        Drives an input to a level, firing its edge callback if the level changed.
+        """
+        if self.levels.get(pin) == level:
+            return
+        self.levels[pin] = level
+        callback = self.watchers.get(pin)
+        if callback:
+            callback(pin, time.monotonic())
+
+    def bounce(self, pin, level, transitions=5, interval=0.0005):
+        """
+        Drives an input to a level the way a real contact does, chattering a few times on the way.
+        """
+        for i in range(transitions):
+            self.set_input(pin, level if i % 2 == 0 else 1 - level)
+            time.sleep(interval)
+        self.set_input(pin, level)
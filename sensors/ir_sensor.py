@@ -3,6 +3,96 @@ ir_sensor.py
 
 Purpose: Reads IR beam-break sensors for finish detection.
 
-Usage: Instantiate IRSensor with channel/pin, call wait_for_beam_break() to detect event.
+Each sensor is interrupt driven: the GPIO backend stamps every edge with time.monotonic() and the first break
+after arm() is taken as the lane's finish and published on the event bus as "finish_line" (lane, time). Every edge
+is also written to a TraceRecorder, if one is given, so a close finish can be reviewed afterwards from the raw
+sensor levels.
+
+Usage: Instantiate IRSensor(lane, pin), call arm() before each race, then wait_for_beam_break(timeout) or read
+broken_at.
 """
-# TODO: Implement IRSensor with interrupt or polling logic
\ No newline at end of file
+
+import threading
+from event_bus import bus
+from logger import logger
+
+
+class IRSensor:
+    def __init__(self, lane, pin, active_low=True, backend=None, recorder=None):
+        """
+        Initializes the IRSensor and starts watching its pin.
+
+        Args:
+            lane (int): Lane the sensor watches.
+            pin (int): BCM pin number.
+            active_low (bool): True if the receiver output goes low when the beam is broken.
+            backend (optional): GPIO backend from sensors.gpio_backend. Defaults to RPiGPIOBackend.
+            recorder (TraceRecorder, optional): Receives every edge as (lane, level, timestamp).
+        """
+        if backend is None:
+            from sensors.gpio_backend import RPiGPIOBackend
+            backend = RPiGPIOBackend()
+        self.lane = lane
+        self.pin = pin
+        self.active_low = active_low
+        self.backend = backend
+        self.recorder = recorder
+        self.broken_at = None  # time.monotonic() of the first break since arm()
+        self.armed = False
+        self.event = threading.Event()
+
+        backend.setup_input(pin, pull_up=active_low)
+        backend.watch(pin, self._on_edge)
+
+    def is_broken(self):
+        """
+        Returns True while the beam is broken.
+        """
+        level = self.backend.read(self.pin)
+        return level == 0 if self.active_low else level == 1
+
+    def _on_edge(self, pin, timestamp):
+        # Runs on the GPIO library's callback thread
+        broken = self.is_broken()
+        if self.recorder:
+            self.recorder.record(self.lane, broken, timestamp)
+        if broken and self.armed:
+            self.armed = False
+            self.broken_at = timestamp
+            self.event.set()
+            bus.publish("finish_line", lane=self.lane, time=timestamp)
+
+    def arm(self):
+        """
+        Clears the last finish and waits for the next beam break.
+        """
+        self.broken_at = None
+        self.event.clear()
+        self.armed = True
+        if self.is_broken():
+            logger.warning(f"Lane {self.lane} IR beam is blocked while arming.")
+
+    def disarm(self):
+        """
+        Stops taking breaks as finishes, e.g. for a car that never finished before the race timed out.
+        """
+        self.armed = False
+
+    def wait_for_beam_break(self, timeout=None):
+        """
+        Blocks until the beam is broken after arm().
+
+        Args:
+            timeout (float, optional): Seconds to wait; None waits forever.
+
+        Returns:
+            float or None: time.monotonic() of the break, or None on timeout.
+        """
+        self.event.wait(timeout)
+        return self.broken_at
+
+    def close(self):
+        """
+        Stops watching the pin.
+        """
+        self.backend.unwatch(self.pin)
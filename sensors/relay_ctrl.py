@@ -3,6 +3,114 @@ relay_ctrl.py
 
 Purpose: Controls relays via shift register (e.g., for gate solenoids and LED strips).
 
-Usage: Instantiate RelayController with shift register pins, call set_relay(), reset_all()
+All relay outputs sit behind one 74HC595-style shift register. New states are clocked into the register while the
+outputs hold their old values, and a single latch pulse then switches every output at once, so lanes fired
+together switch within the same latch edge instead of one GPIO write apart. The latch instant is stamped with
+time.monotonic() and reported (return value, latch_log and the "relays_latched" event) so the timing core knows
+when the gates actually dropped, and the time spent in the latch write is recorded as the bound on start skew.
+
+Usage: Instantiate RelayController(data_pin, clock_pin, latch_pin), call set_relay(), set_relays(), fire(),
+reset_all().
 """
-# TODO: Implement RelayController for SPI or GPIO shift operations
+
+import threading
+import time
+from config import Config
+from event_bus import bus
+from logger import logger
+
+
+class RelayController:
+    def __init__(self, data_pin, clock_pin, latch_pin, outputs=8, active_low=False, backend=None):
+        """
+        Initializes the RelayController with every relay off.
+
+        Args:
+            data_pin (int): BCM pin wired to the register's serial data input.
+            clock_pin (int): BCM pin wired to the shift clock.
+            latch_pin (int): BCM pin wired to the storage (latch) clock.
+            outputs (int): Number of register outputs (8 per chained register).
+            active_low (bool): True if a relay energizes when its output is low.
+            backend (optional): GPIO backend from sensors.gpio_backend. Defaults to RPiGPIOBackend.
+        """
+        if backend is None:
+            from sensors.gpio_backend import RPiGPIOBackend
+            backend = RPiGPIOBackend()
+        self.data_pin = data_pin
+        self.clock_pin = clock_pin
+        self.latch_pin = latch_pin
+        self.outputs = outputs
+        self.active_low = active_low
+        self.backend = backend
+        self.state = 0  # Bit n set = relay n (0-based) energized
+        self.latch_log = []  # (mask, latched at, latch write duration in seconds), most recent last
+        self.lock = threading.Lock()
+        for pin in (data_pin, clock_pin, latch_pin):
+            backend.setup_output(pin, 0)
+        self._write(0)
+
+    def _write(self, state):
+        # Caller holds self.lock (or is __init__). Returns the latch time.
+        levels = ~state if self.active_low else state
+        write = self.backend.write
+        for bit in reversed(range(self.outputs)):  # Last bit shifted ends up on output 0
+            write(self.data_pin, (levels >> bit) & 1)
+            write(self.clock_pin, 1)
+            write(self.clock_pin, 0)
+        before = time.monotonic()
+        write(self.latch_pin, 1)
+        latched_at = time.monotonic()
+        write(self.latch_pin, 0)
+        self.state = state
+        self.latch_log.append((state, latched_at, latched_at - before))
+        del self.latch_log[:-100]
+        return latched_at
+
+    def set_relays(self, relays):
+        """
+        Sets several relays and switches them all with one latch pulse.
+
+        Args:
+            relays (dict): Relay index (0-based) -> True to energize, False to release.
+
+        Returns:
+            float: time.monotonic() of the latch edge.
+        """
+        with self.lock:
+            state = self.state
+            for index, on in relays.items():
+                state = state | (1 << index) if on else state & ~(1 << index)
+            latched_at = self._write(state)
+        bus.publish("relays_latched", mask=state, time=latched_at)
+        return latched_at
+
+    def set_relay(self, index, on):
+        """
+        Sets one relay. Returns the latch time.
+        """
+        return self.set_relays({index: on})
+
+    def fire(self, lanes, hold_ms=None):
+        """
+        Energizes the relays for the given lanes together, releasing them after hold_ms.
+
+        Args:
+            lanes (iterable): Lane numbers (1-based; lane n is relay n - 1).
+            hold_ms (int, optional): How long the relays stay energized. Defaults to Config.RELAY_HOLD_MS.
+
+        Returns:
+            float: time.monotonic() the relays switched, the same instant for every lane.
+        """
+        lanes = list(lanes)
+        latched_at = self.set_relays({lane - 1: True for lane in lanes})
+        release = {lane - 1: False for lane in lanes}
+        threading.Timer((hold_ms or Config.RELAY_HOLD_MS) / 1000, self.set_relays, args=(release,)).start()
+        logger.info(f"Relays for lane(s) {lanes} latched together")
+        return latched_at
+
+    def reset_all(self):
+        """
+        Releases every relay.
+        """
+        with self.lock:
+            self._write(0)
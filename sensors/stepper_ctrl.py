@@ -3,6 +3,194 @@ stepper_ctrl.py
 
 Purpose: Manages stepper motors for gate control using A4988 driver interfaces.
 
-Usage: Instantiate StepperController with step/dir pins, call move_steps() with direction and count.
+Moves follow a trapezoidal speed profile (accelerate, cruise, decelerate) so the gate arm starts and stops without
+skipping steps. The delay before every step is computed up front, once per move length, with the integer-friendly
+recurrence from D. Austin's "Generate stepper-motor speed profiles in real time", and cached, so nothing is
+calculated while pulses are going out. Pulses are produced either by pigpio's DMA-timed waveforms (when the pigpio
+daemon is running), which are immune to Python scheduling jitter, or by a dedicated timing thread that sleeps to
+absolute deadlines and spins the last stretch. Each move reports when it actually started and finished.
+
+Usage: Instantiate StepperController(step_pin, dir_pin), call move_steps(steps, direction) and wait on the
+returned Future for (started, finished) time.monotonic() stamps.
 """
-# TODO: Implement StepperController for motor movement and calibration
\ No newline at end of file
+
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from config import Config
+from event_bus import bus
+from logger import logger
+
+SPIN_SECONDS = 0.001  # Final stretch before a step that is busy-waited instead of slept
+PULSE_US = 5  # STEP pulse width; the A4988 needs at least 1 us
+
+
+def build_profile(steps, max_speed, acceleration):
+    """
+    Computes the delay before each step of a trapezoidal move.
+
+    Args:
+        steps (int): Steps in the move.
+        max_speed (float): Cruise speed in steps per second.
+        acceleration (float): Steps per second squared.
+
+    Returns:
+        list: Seconds to wait before each step.
+    """
+    if steps <= 0:
+        return []
+    ramp = min(int(max_speed * max_speed / (2 * acceleration)), steps // 2)
+    min_delay = 1 / max_speed
+    delay = 0.676 * math.sqrt(2 / acceleration)  # First step, with Austin's correction factor
+    ramp_up = []
+    for n in range(max(ramp, 1)):
+        if n:
+            delay = delay - 2 * delay / (4 * n + 1)
+        ramp_up.append(max(delay, min_delay))
+    ramp_up = ramp_up[:ramp]
+    cruise = [min_delay] * (steps - 2 * len(ramp_up))
+    return ramp_up + cruise + ramp_up[::-1]
+
+
+class StepperController:
+    def __init__(self, step_pin, dir_pin, enable_pin=None, max_speed=None, acceleration=None, backend=None,
+                 use_pigpio=True):
+        """
+        Initializes the StepperController and starts its timing thread.
+
+        Args:
+            step_pin (int): BCM pin wired to the driver's STEP input.
+            dir_pin (int): BCM pin wired to DIR.
+            enable_pin (int, optional): BCM pin wired to the active-low ENABLE input.
+            max_speed (float, optional): Steps per second. Defaults to Config.STEPPER_MAX_SPEED.
+            acceleration (float, optional): Steps per second squared. Defaults to Config.STEPPER_ACCELERATION.
+            backend (optional): GPIO backend from sensors.gpio_backend. Defaults to RPiGPIOBackend.
+            use_pigpio (bool): Use pigpio waveforms when the pigpio daemon is reachable.
+        """
+        self.step_pin = step_pin
+        self.dir_pin = dir_pin
+        self.enable_pin = enable_pin
+        self.max_speed = max_speed or Config.STEPPER_MAX_SPEED
+        self.acceleration = acceleration or Config.STEPPER_ACCELERATION
+        self.profiles = {}  # steps -> precomputed delays
+        self.position = 0
+        self.pi = self._connect_pigpio() if use_pigpio and backend is None else None
+        if self.pi is None:
+            if backend is None:
+                from sensors.gpio_backend import RPiGPIOBackend
+                backend = RPiGPIOBackend()
+            for pin in (step_pin, dir_pin) + ((enable_pin,) if enable_pin is not None else ()):
+                backend.setup_output(pin, 1 if pin == enable_pin else 0)
+        self.backend = backend
+        self.moves = queue.Queue()
+        threading.Thread(target=self._run, name="stepper-timing", daemon=True).start()
+
+    def _connect_pigpio(self):
+        try:
+            import pigpio
+        except ImportError:
+            return None
+        pi = pigpio.pi()
+        if not pi.connected:
+            return None
+        for pin in (self.step_pin, self.dir_pin) + ((self.enable_pin,) if self.enable_pin is not None else ()):
+            pi.set_mode(pin, pigpio.OUTPUT)
+        logger.info("Stepper using pigpio DMA waveforms")
+        return pi
+
+    def profile(self, steps):
+        """
+        Returns the cached delay list for a move of the given length.
+        """
+        if steps not in self.profiles:
+            self.profiles[steps] = build_profile(steps, self.max_speed, self.acceleration)
+        return self.profiles[steps]
+
+    def move_steps(self, steps, direction=1):
+        """
+        Queues a move on the timing thread.
+
+        Args:
+            steps (int): Steps to move.
+            direction (int): 1 or -1.
+
+        Returns:
+            Future: Resolves to (started, finished) in time.monotonic() seconds.
+        """
+        future = Future()
+        self.moves.put((steps, direction, self.profile(steps), future))
+        return future
+
+    def _run(self):
+        while True:
+            steps, direction, delays, future = self.moves.get()
+            try:
+                if self.pi:
+                    started, finished = self._move_pigpio(direction, delays)
+                else:
+                    started, finished = self._move_gpio(direction, delays)
+                self.position += steps * direction
+                future.set_result((started, finished))
+                bus.publish("stepper_moved", steps=steps, direction=direction, time=finished,
+                            started=started, position=self.position)
+            except Exception as e:
+                logger.error(f"Stepper move failed: {e}")
+                future.set_exception(e)
+
+    def _set_enabled(self, on):
+        if self.enable_pin is None:
+            return
+        if self.pi:
+            self.pi.write(self.enable_pin, 0 if on else 1)
+        else:
+            self.backend.write(self.enable_pin, 0 if on else 1)
+
+    def _move_gpio(self, direction, delays):
+        write = self.backend.write
+        self._set_enabled(True)
+        write(self.dir_pin, 1 if direction > 0 else 0)
+        started = deadline = time.monotonic()
+        for delay in delays:
+            deadline += delay
+            remaining = deadline - time.monotonic()
+            if remaining > SPIN_SECONDS:
+                time.sleep(remaining - SPIN_SECONDS)
+            while time.monotonic() < deadline:
+                pass
+            write(self.step_pin, 1)
+            write(self.step_pin, 0)
+        finished = time.monotonic()
+        self._set_enabled(False)
+        return started, finished
+
+    def _move_pigpio(self, direction, delays):
+        import pigpio
+        pi = self.pi
+        self._set_enabled(True)
+        pi.write(self.dir_pin, 1 if direction > 0 else 0)
+        mask = 1 << self.step_pin
+        pulses = []
+        for delay in delays:
+            pulses.append(pigpio.pulse(0, mask, max(int(delay * 1_000_000) - PULSE_US, 1)))  # STEP low until the edge
+            pulses.append(pigpio.pulse(mask, 0, PULSE_US))
+        pulses.append(pigpio.pulse(0, mask, 1))
+        pi.wave_clear()
+        pi.wave_add_generic(pulses)
+        wave = pi.wave_create()
+        started = time.monotonic()
+        pi.wave_send_once(wave)
+        while pi.wave_tx_busy():
+            time.sleep(0.001)
+        finished = time.monotonic()
+        pi.wave_delete(wave)
+        self._set_enabled(False)
+        return started, finished
+
+    def close(self):
+        """
+        Releases the pigpio connection, if one is in use.
+        """
+        if self.pi:
+            self.pi.stop()
@@ -0,0 +1,236 @@
+"""
+trace_recorder.py
+
+Purpose: Records a high-rate trace of the finish-line IR sensors so a close or disputed finish can be reviewed.
+
+Each lane has a fixed-size ring buffer of (timestamp, level) samples, allocated once at startup, so memory never
+grows and the capture path only writes into preallocated NumPy arrays. Samples come from two sources: every edge
+an IRSensor sees (exact interrupt timestamps), and an optional sampling thread that reads all sensors at a fixed
+rate so the trace also shows how long each beam stayed broken. The sampling thread only polls while a heat is on the
+track: arm() at gate release starts it, and disarm() at the end of the heat stops it TRACE_SECONDS_AFTER later, so
+the sensors are not read thousands of times a second between heats. After a heat, dump() writes the samples in a window
+around the finishes to one compact binary file per race (named by its race counter), which load() (and the GUI's
+report viewer) read back. The ring buffers hold a whole race (RACE_MAX_RACE_TIME) by default, since the dump only
+runs once the last lane has finished or timed out.
+
+File format (little-endian):
+    header  : b"CCTR", version (H), race counter (I), lanes (H), samples (I), window start (d)
+    finishes: lanes x finish time (d, NaN for no finish), relative to the window start
+    samples : samples x [time (d) relative to the window start, lane (B), level (B)]
+
+Usage: recorder = TraceRecorder(lanes); pass it to each IRSensor; optionally start_sampling(sensors), then arm() when
+the gates drop and disarm() when the heat ends; dump(race_counter, {lane: finish_time}) after each heat; load(path)
+to read a trace back.
+"""
+
+import os
+import struct
+import threading
+import time
+import numpy as np
+from config import Config
+from logger import logger
+
+MAGIC = b"CCTR"
+VERSION = 1
+HEADER = struct.Struct("<4sHIHId")
+SAMPLE_DTYPE = np.dtype([("time", "<f8"), ("lane", "u1"), ("level", "u1")])
+
+
+def buffer_seconds():
+    """
+    Returns the seconds each lane's ring buffer must hold: Config.TRACE_BUFFER_SECONDS if set, otherwise a whole
+    race, so the samples around the first finish survive until a timed-out lane ends the heat.
+    """
+    if Config.TRACE_BUFFER_SECONDS:
+        return Config.TRACE_BUFFER_SECONDS
+    return Config.RACE_MAX_RACE_TIME + Config.TRACE_SECONDS_BEFORE + Config.TRACE_SECONDS_AFTER + 1
+
+
+class TraceRecorder:
+    def __init__(self, lanes, capacity=None, directory=None):
+        """
+        Initializes the TraceRecorder and allocates its ring buffers.
+
+        Args:
+            lanes (int): Number of lanes.
+            capacity (int, optional): Samples kept per lane. Defaults to enough for buffer_seconds() at
+                                      Config.TRACE_SAMPLE_HZ, plus room for edges.
+            directory (str, optional): Where heat traces are written. Defaults to Config.TRACE_DIR.
+        """
+        self.lanes = lanes
+        self.capacity = capacity or int(buffer_seconds() * Config.TRACE_SAMPLE_HZ * 1.25)
+        self.directory = directory or Config.TRACE_DIR
+        self.times = np.zeros((lanes + 1, self.capacity), dtype=np.float64)  # Row 0 unused; rows are lanes
+        self.levels = np.zeros((lanes + 1, self.capacity), dtype=np.uint8)
+        self.heads = [0] * (lanes + 1)  # Total samples written per lane; head % capacity is the next slot
+        self.lock = threading.Lock()
+        self.sampling = False  # The sampling thread runs until stop_sampling()
+        self.armed = threading.Condition()  # Notified when sampling is armed or stopped
+        self.sample_until = 0.0  # time.monotonic() the sampling thread polls until; inf while armed
+
+    def record(self, lane, level, timestamp):
+        """
+        Stores one sample. Called from GPIO callbacks and the sampling thread; writes in place only.
+        """
+        with self.lock:
+            slot = self.heads[lane] % self.capacity
+            self.times[lane, slot] = timestamp
+            self.levels[lane, slot] = level
+            self.heads[lane] += 1
+
+    def start_sampling(self, sensors, rate_hz=None):
+        """
+        Starts the background thread that reads every sensor at a fixed rate while armed (see arm()).
+
+        Args:
+            sensors (list): IRSensor objects (anything with lane and is_broken()).
+            rate_hz (int, optional): Samples per second per lane. Defaults to Config.TRACE_SAMPLE_HZ.
+        """
+        self.sampling = True
+        period = 1 / (rate_hz or Config.TRACE_SAMPLE_HZ)
+        threading.Thread(target=self._sample, args=(list(sensors), period), name="trace-sampler", daemon=True).start()
+
+    def _sample(self, sensors, period):
+        while True:
+            with self.armed:
+                self.armed.wait_for(lambda: not self.sampling or time.monotonic() < self.sample_until)
+                if not self.sampling:
+                    return
+            next_tick = time.monotonic()
+            while self.sampling and next_tick < self.sample_until:
+                now = time.monotonic()
+                for sensor in sensors:
+                    self.record(sensor.lane, sensor.is_broken(), now)
+                next_tick += period
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_tick = time.monotonic()  # Fell behind; don't try to catch up in a burst
+
+    def arm(self):
+        """
+        Starts polling the sensors, e.g. as the gates drop. Polling goes on until disarm().
+        """
+        with self.armed:
+            self.sample_until = float("inf")
+            self.armed.notify_all()
+
+    def disarm(self, after=None):
+        """
+        Stops polling the sensors once the heat's trace is complete.
+
+        Args:
+            after (float, optional): Seconds to keep polling, so the trace covers the window after the last finish.
+                                     Defaults to Config.TRACE_SECONDS_AFTER.
+        """
+        with self.armed:
+            self.sample_until = min(self.sample_until,
+                                    time.monotonic() + (Config.TRACE_SECONDS_AFTER if after is None else after))
+
+    def stop_sampling(self):
+        with self.armed:
+            self.sampling = False
+            self.armed.notify_all()
+
+    def resize(self, capacity=None):
+        """
+        Reallocates the ring buffers, e.g. after RACE_MAX_RACE_TIME changed. Call between heats: samples already
+        held are dropped.
+
+        Args:
+            capacity (int, optional): Samples kept per lane. Defaults to enough for buffer_seconds().
+        """
+        capacity = capacity or int(buffer_seconds() * Config.TRACE_SAMPLE_HZ * 1.25)
+        with self.lock:
+            if capacity == self.capacity:
+                return
+            self.capacity = capacity
+            self.times = np.zeros((self.lanes + 1, capacity), dtype=np.float64)
+            self.levels = np.zeros((self.lanes + 1, capacity), dtype=np.uint8)
+            self.heads = [0] * (self.lanes + 1)
+        logger.info(f"Trace buffers resized to {capacity} samples per lane.")
+
+    def window(self, start, end):
+        """
+        Copies out the samples between two instants, oldest first.
+
+        Returns:
+            numpy.ndarray: SAMPLE_DTYPE records with absolute time.monotonic() times, sorted by time.
+        """
+        with self.lock:
+            heads = list(self.heads)
+            times = self.times.copy()
+            levels = self.levels.copy()
+        parts = []
+        for lane in range(1, self.lanes + 1):
+            count = min(heads[lane], self.capacity)
+            order = (np.arange(heads[lane] - count, heads[lane])) % self.capacity
+            lane_times = times[lane, order]
+            keep = (lane_times >= start) & (lane_times <= end)
+            part = np.zeros(int(keep.sum()), dtype=SAMPLE_DTYPE)
+            part["time"] = lane_times[keep]
+            part["lane"] = lane
+            part["level"] = levels[lane, order][keep]
+            parts.append(part)
+        samples = np.concatenate(parts) if parts else np.zeros(0, dtype=SAMPLE_DTYPE)
+        return samples[np.argsort(samples["time"], kind="stable")]
+
+    def dump(self, race, finishes, before=None, after=None):
+        """
+        Writes the trace around a heat's finishes to <directory>/race_<race>.trc.
+
+        Args:
+            race (int): Race counter of the heat, used in the file name and header.
+            finishes (dict): lane -> time.monotonic() finish time (None for no finish).
+            before (float, optional): Seconds kept before the first finish. Defaults to Config.TRACE_SECONDS_BEFORE.
+            after (float, optional): Seconds kept after the last finish. Defaults to Config.TRACE_SECONDS_AFTER.
+
+        Returns:
+            str or None: Path written, or None if no lane finished.
+        """
+        times = [t for t in finishes.values() if t is not None]
+        if not times:
+            logger.info(f"No finishes in race {race}; no trace written.")
+            return None
+        start = min(times) - (Config.TRACE_SECONDS_BEFORE if before is None else before)
+        end = max(times) + (Config.TRACE_SECONDS_AFTER if after is None else after)
+        if end < self.sample_until:
+            time.sleep(max(0.0, end - time.monotonic()))  # Still polling: let the samples after the finish arrive
+        samples = self.window(start, end)
+        samples["time"] -= start
+        finish_row = np.full(self.lanes, np.nan, dtype="<f8")
+        for lane, finish in finishes.items():
+            if finish is not None and 1 <= lane <= self.lanes:
+                finish_row[lane - 1] = finish - start
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"race_{race:07d}.trc")
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, race, self.lanes, len(samples), start))
+            f.write(finish_row.tobytes())
+            f.write(samples.tobytes())
+        logger.info(f"Wrote {len(samples)} trace samples for race {race} to {path}")
+        return path
+
+
+def load(path):
+    """
+    Reads a race trace written by TraceRecorder.dump().
+
+    Returns:
+        dict: race, lanes, start (time.monotonic() of the window start), finishes ({lane: seconds into the window}
+              for lanes that finished) and samples (SAMPLE_DTYPE records, times relative to the window start).
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, race, lanes, count, start = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} finish trace")
+    offset = HEADER.size
+    finish_row = np.frombuffer(data, dtype="<f8", count=lanes, offset=offset)
+    offset += finish_row.nbytes
+    samples = np.frombuffer(data, dtype=SAMPLE_DTYPE, count=count, offset=offset)
+    finishes = {lane + 1: float(t) for lane, t in enumerate(finish_row) if not np.isnan(t)}
+    return {"race": race, "lanes": lanes, "start": start, "finishes": finishes, "samples": samples}
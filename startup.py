@@ -0,0 +1,103 @@
+"""
+startup.py
+
+Purpose: Runs application startup in phases. The GUI is built first on the main thread; the database, serial port,
+socket server and GPIO are then initialized concurrently in background threads, each reporting its status and
+elapsed time as it comes up, so a slow or absent device no longer holds up the whole program.
+
+Usage: Instantiate StartupCoordinator(on_status), call mark() for main-thread phases, start(tasks) for the
+background phases, and summary() for the timing report.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from logger import logger
+
+
+class StartupCoordinator:
+    def __init__(self, on_status=None, max_workers=4):
+        """
+        Initializes the StartupCoordinator and starts the startup clock.
+
+        Args:
+            on_status (function, optional): Called as on_status(name, status, elapsed_ms) whenever a phase
+                                            changes state; status is "starting", "ready" or "failed".
+                                            May be called from background threads.
+            max_workers (int): Number of phases initialized concurrently.
+        """
+        self.on_status = on_status
+        self.t0 = time.perf_counter()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="startup")
+        self.timings = {}  # phase name -> (status, milliseconds since startup began)
+        self.futures = {}
+        self.lock = Lock()
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.t0) * 1000
+
+    def mark(self, name, status="ready"):
+        """
+        Records a phase completed on the calling thread (e.g. the GUI).
+        """
+        self._report(name, status)
+
+    def start(self, tasks, on_complete=None):
+        """
+        Starts the background phases.
+
+        Args:
+            tasks (list[tuple]): (name, function) pairs; each function runs once in a worker thread.
+            on_complete (function, optional): Called with the total startup time in milliseconds after every
+                                              phase has finished.
+
+        Returns:
+            dict: phase name -> Future
+        """
+        remaining = [len(tasks)]
+
+        def run(name, function):
+            self._report(name, "starting")
+            try:
+                function()
+                self._report(name, "ready")
+            except Exception as e:
+                logger.error(f"Startup phase '{name}' failed: {e}")
+                self._report(name, "failed")
+            finally:
+                with self.lock:
+                    remaining[0] -= 1
+                    finished = remaining[0] == 0
+                if finished:
+                    logger.info(self.summary())
+                    if on_complete:
+                        on_complete(self.elapsed_ms())
+
+        for name, function in tasks:
+            self.futures[name] = self.executor.submit(run, name, function)
+        self.executor.shutdown(wait=False)
+        return self.futures
+
+    def is_ready(self, name):
+        """
+        Returns True once the named phase has completed successfully.
+        """
+        with self.lock:
+            return self.timings.get(name, (None,))[0] == "ready"
+
+    def summary(self):
+        """
+        Returns a one-line report of when each phase finished.
+        """
+        with self.lock:
+            parts = [f"{name} {status} at {ms:.0f} ms" for name, (status, ms) in self.timings.items()]
+        return f"Startup: {', '.join(parts)}"
+
+    def _report(self, name, status):
+        elapsed = self.elapsed_ms()
+        if status != "starting":
+            with self.lock:
+                self.timings[name] = (status, elapsed)
+        logger.info(f"Startup phase '{name}' {status} ({elapsed:.0f} ms)")
+        if self.on_status:
+            self.on_status(name, status, elapsed)
@@ -0,0 +1,90 @@
+"""
+state_journal.py
+
+Purpose: Crash-safe journal of the live race state (race counter, heat, lane assignments and in-flight timings).
+Every save writes a complete snapshot to a temporary file, fsyncs it and atomically renames it over the
+previous one, so after a crash or power blip the file holds either the old or the new state, never a torn mix.
+
+Usage: Instantiate RaceStateJournal(path), pass it to RaceManager, and call load() at startup. RaceManager writes
+snapshots on a background thread (encode() under its lock, write() outside it).
+"""
+
+import json
+import os
+from config import Config
+from logger import logger
+
+
+class RaceStateJournal:
+    def __init__(self, path=None, fsync=True):
+        """
+        Initializes the RaceStateJournal.
+
+        Args:
+            path (str, optional): Journal file. Defaults to Config.STATE_JOURNAL_PATH.
+            fsync (bool): Flush each snapshot to disk before renaming it into place.
+        """
+        self.path = path or Config.STATE_JOURNAL_PATH
+        self.fsync = fsync
+        self.tmp_path = self.path + ".tmp"
+
+    @staticmethod
+    def encode(state):
+        """
+        Serializes a snapshot for write(). Callers that share the state with other threads encode it under their
+        lock, so the snapshot is consistent, and write it after releasing the lock.
+
+        Args:
+            state (dict): JSON-serializable race state.
+
+        Returns:
+            str: The encoded snapshot.
+        """
+        return json.dumps(state, separators=(",", ":"), default=str)
+
+    def save(self, state):
+        """
+        Atomically replaces the journal with a new snapshot.
+
+        Args:
+            state (dict): JSON-serializable race state.
+        """
+        self.write(self.encode(state))
+
+    def write(self, data):
+        """
+        Atomically replaces the journal with an encoded snapshot (see encode()).
+
+        Args:
+            data (str): The encoded snapshot.
+        """
+        with open(self.tmp_path, "w") as f:
+            f.write(data)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(self.tmp_path, self.path)
+
+    def load(self):
+        """
+        Reads the last snapshot.
+
+        Returns:
+            dict or None: The saved state, or None if there is no usable journal.
+        """
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable race state journal {self.path}: {e}")
+            return None
+
+    def clear(self):
+        """
+        Removes the journal file.
+        """
+        for path in (self.path, self.tmp_path):
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,28 @@
+"""
+storage/__init__.py
+
+Purpose: Initializes the storage subpackage providing the database backends used by DatabaseHandler.
+
+Usage: Call create_backend(name) for a "mysql" or "sqlite" backend, or import a backend class directly.
+"""
+
+
+def create_backend(name, **kwargs):
+    """
+    Creates a storage backend by name.
+
+    Args:
+        name (str): "mysql" or "sqlite".
+        **kwargs: Passed through to the backend constructor.
+
+    Returns:
+        StorageBackend: An unconnected backend instance.
+    """
+    name = name.lower()
+    if name == "mysql":
+        from storage.mysql_backend import MySQLBackend
+        return MySQLBackend(**kwargs)
+    if name == "sqlite":
+        from storage.sqlite_backend import SQLiteBackend
+        return SQLiteBackend(**kwargs)
+    raise ValueError(f"Unknown storage backend: {name}")
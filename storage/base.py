@@ -0,0 +1,51 @@
+"""
+base.py
+
+Purpose: Defines the StorageBackend interface that DatabaseHandler delegates to. Queries are written once
+with `%s` placeholders and MySQL-compatible SQL; each backend adapts them to its driver.
+
+Usage: Subclass StorageBackend and implement connect(), execute(), fetchone(), fetchall(), commit(),
+rollback() and close().
+"""
+
+
+class StorageBackend:
+    """
+    Interface for a database backend behind DatabaseHandler.query/execute. A backend has one connection and one
+    cursor and is not thread-safe on its own; DatabaseHandler serializes the threads that share it.
+    """
+
+    dialect = None  # Selects the migrations/<dialect>/ directory
+    Error = Exception  # Driver exception class treated as retryable by DatabaseHandler
+
+    def connect(self):
+        """Opens the connection."""
+        raise NotImplementedError
+
+    def execute(self, sql, params=()):
+        """Executes one statement with `%s` placeholders."""
+        raise NotImplementedError
+
+    def fetchone(self):
+        """Returns the next row of the last statement as a dict, or None."""
+        raise NotImplementedError
+
+    def fetchall(self):
+        """Returns the remaining rows of the last statement as a list of dicts."""
+        raise NotImplementedError
+
+    def commit(self):
+        """Commits the current transaction."""
+        raise NotImplementedError
+
+    def rollback(self):
+        """Rolls back the current transaction."""
+        raise NotImplementedError
+
+    def close(self):
+        """Closes the connection."""
+        raise NotImplementedError
+
+    def describe(self):
+        """Returns a short human-readable description of the connection target."""
+        return self.dialect
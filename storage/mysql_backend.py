@@ -0,0 +1,66 @@
+"""
+mysql_backend.py
+
+Purpose: MySQL storage backend using mysql.connector, connecting to the server configured in Config.
+
+Usage: Instantiate MySQLBackend(), call connect(), then execute() and fetchone()/fetchall().
+"""
+
+from config import Config
+from storage.base import StorageBackend
+
+
+class MySQLBackend(StorageBackend):
+    dialect = "mysql"
+
+    def __init__(self, host=None, user=None, password=None, database=None):
+        """
+        Initializes the MySQLBackend. mysql.connector is imported here so that the SQLite
+        backend works on machines without the MySQL driver installed.
+
+        Args:
+            host (str, optional): Server host. Defaults to Config.DB_HOST.
+            user (str, optional): User name. Defaults to Config.DB_USER.
+            password (str, optional): Password. Defaults to Config.DB_PASS.
+            database (str, optional): Schema name. Defaults to Config.DB_NAME.
+        """
+        import mysql.connector
+        self._connector = mysql.connector
+        self.Error = mysql.connector.Error
+        self.host = host or Config.DB_HOST
+        self.user = user or Config.DB_USER
+        self.password = password or Config.DB_PASS
+        self.database = database or Config.DB_NAME
+        self.conn = None
+        self.cursor = None
+
+    def connect(self):
+        self.conn = self._connector.connect(
+            host=self.host,
+            user=self.user,
+            password=self.password,
+            database=self.database
+        )
+        self.cursor = self.conn.cursor(dictionary=True)
+
+    def execute(self, sql, params=()):
+        self.cursor.execute(sql, params)
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def close(self):
+        self.cursor.close()
+        self.conn.close()
+
+    def describe(self):
+        return f"mysql://{self.user}@{self.host}/{self.database}"
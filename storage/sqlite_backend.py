@@ -0,0 +1,89 @@
+"""
+sqlite_backend.py
+
+Purpose: Embedded SQLite storage backend for offline or single-track events. Uses a local file in WAL mode,
+translates `%s` placeholders to `?` once per distinct statement, and relies on sqlite3's prepared-statement
+cache so repeated lookups and writes skip re-parsing.
+
+Usage: Set DB_BACKEND=sqlite (and optionally DB_SQLITE_PATH), or instantiate SQLiteBackend(path) directly.
+"""
+
+import re
+import sqlite3
+from functools import lru_cache
+from config import Config
+from storage.base import StorageBackend
+
+
+# RIGHT is a keyword in SQLite (RIGHT JOIN), so MySQL's RIGHT() function is renamed on translation
+_RIGHT_FUNCTION_RE = re.compile(r"\bRIGHT\s*\(", re.IGNORECASE)
+
+
+@lru_cache(maxsize=256)
+def _translate(sql):
+    """Converts a MySQL-style `%s` statement to SQLite `?` placeholders and function names."""
+    return _RIGHT_FUNCTION_RE.sub("mysql_right(", sql.replace("%s", "?"))
+
+
+def _mysql_right(value, length):
+    """SQLite implementation of MySQL's RIGHT(str, len), used by the race statistics query."""
+    if value is None:
+        return None
+    return str(value)[-length:] if length > 0 else ""
+
+
+def _dict_factory(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteBackend(StorageBackend):
+    dialect = "sqlite"
+    Error = sqlite3.Error
+
+    def __init__(self, path=None, statement_cache_size=256):
+        """
+        Initializes the SQLiteBackend.
+
+        Args:
+            path (str, optional): Database file. Defaults to Config.DB_SQLITE_PATH; ":memory:" is allowed.
+            statement_cache_size (int): Number of prepared statements sqlite3 keeps per connection.
+        """
+        self.path = path or Config.DB_SQLITE_PATH
+        self.statement_cache_size = statement_cache_size
+        self.conn = None
+        self.cursor = None
+
+    def connect(self):
+        self.conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,  # Shared by threads; DatabaseHandler's lock serializes them
+            cached_statements=self.statement_cache_size
+        )
+        self.conn.row_factory = _dict_factory
+        self.conn.create_function("mysql_right", 2, _mysql_right, deterministic=True)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.cursor = self.conn.cursor()
+
+    def execute(self, sql, params=()):
+        self.cursor.execute(_translate(sql), params)
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def close(self):
+        self.cursor.close()
+        self.conn.close()
+
+    def describe(self):
+        return f"sqlite:///{self.path}"
@@ -0,0 +1,141 @@
+"""
+sync.py
+
+Purpose: Moves data between an embedded SQLite event database and the central MySQL server. The roster
+(packnames, racerinfo, trackinformation) is pulled down before an offline event, and raceresults rows
+recorded locally are pushed back up afterwards. The local schema is migrated first, so a fresh event database
+can be pulled into directly. Pushes are idempotent: rows the server already holds for a (TrackID, RaceCounter,
+Lane) are skipped, so a push interrupted between the insert and the high-water-mark update does not duplicate them.
+
+Usage: Instantiate MySQLSync(local_db, remote_db) with two DatabaseHandlers, call pull_roster() and push_results(),
+or run `python -m storage.sync pull|push`.
+"""
+
+import sys
+from logger import logger
+from migrations.runner import MigrationRunner
+
+ROSTER_TABLES = {
+    "packnames": ["ID", "PackName"],
+    "racerinfo": [
+        "RacerID", "RacerFirstName", "RacerLastName", "RacerPack", "RacerRFID", "RacerCarName",
+        "RacerCarNumber", "RacerInclude", "RacerCarChecked", "RacerCarWeight", "RacerPhoto"
+    ],
+    "trackinformation": ["TrackID", "TrackName", "NumberLanes", "Heat"],
+}
+
+RESULT_COLUMNS = [
+    "RacerID", "RaceCounter", "RaceCarNumber", "TrackID", "Heat", "Lane", "CarName", "Pack", "RaceTime",
+    "ReactionTime", "Placing", "RacerRFID", "RacerFirstName", "RacerLastName", "RaceMode", "RecordedAt"
+]
+
+
+class MySQLSync:
+    def __init__(self, local_db, remote_db, batch_size=500):
+        """
+        Initializes the MySQLSync.
+
+        Args:
+            local_db (DatabaseHandler): Handler on the SQLite backend.
+            remote_db (DatabaseHandler): Handler on the MySQL backend.
+            batch_size (int): Number of result rows pushed per round trip.
+        """
+        self.local_db = local_db
+        self.remote_db = remote_db
+        self.batch_size = batch_size
+        MigrationRunner(self.local_db).run_startup_checks()
+        self.local_db.execute(
+            "CREATE TABLE IF NOT EXISTS sync_state ("
+            "TableName VARCHAR(64) NOT NULL PRIMARY KEY, "
+            "LastSyncedID INTEGER NOT NULL DEFAULT 0)"
+        )
+
+    def pull_roster(self):
+        """
+        Replaces the local roster tables with the rows on the MySQL server: rows are inserted or updated by primary
+        key, and local rows no longer on the server are deleted.
+
+        Returns:
+            int: The number of rows copied.
+        """
+        copied = 0
+        for table, columns in ROSTER_TABLES.items():
+            key = columns[0]
+            rows = self.remote_db.query(f"SELECT {', '.join(columns)} FROM {table}")
+            placeholders = ", ".join(["%s"] * len(columns))
+            sql = f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+            for row in rows:
+                self.local_db.execute(sql, tuple(row[column] for column in columns))
+            remote_keys = {row[key] for row in rows}
+            local_keys = {row[key] for row in self.local_db.query(f"SELECT {key} FROM {table}") or []}
+            for removed in local_keys - remote_keys:
+                self.local_db.execute(f"DELETE FROM {table} WHERE {key} = %s", (removed,))
+            copied += len(rows)
+            logger.info(f"Pulled {len(rows)} {table} row(s) from MySQL, "
+                        f"removed {len(local_keys - remote_keys)} no longer there")
+        return copied
+
+    def _already_pushed(self, rows):
+        """
+        Returns the (TrackID, RaceCounter, Lane) keys of the given rows that the MySQL server already holds.
+        """
+        tracks = sorted({row["TrackID"] for row in rows})
+        counters = [row["RaceCounter"] for row in rows]
+        existing = self.remote_db.query(
+            f"SELECT TrackID, RaceCounter, Lane FROM raceresults "
+            f"WHERE TrackID IN ({', '.join(['%s'] * len(tracks))}) AND RaceCounter BETWEEN %s AND %s",
+            (*tracks, min(counters), max(counters))
+        ) or []
+        return {(row["TrackID"], row["RaceCounter"], row["Lane"]) for row in existing}
+
+    def push_results(self):
+        """
+        Inserts locally recorded raceresults rows that have not been pushed yet into MySQL, one multi-row INSERT
+        per batch. The high-water mark is advanced after each batch, so an interrupted push resumes where it
+        stopped; rows of a batch the server already holds are skipped.
+
+        Returns:
+            int: The number of rows pushed.
+        """
+        state = self.local_db.query(
+            "SELECT LastSyncedID FROM sync_state WHERE TableName = %s", ("raceresults",), fetch_one=True)
+        last_id = state["LastSyncedID"] if state else 0
+        row_placeholders = f"({', '.join(['%s'] * len(RESULT_COLUMNS))})"
+        pushed = 0
+        while True:
+            rows = self.local_db.query(
+                f"SELECT ResultID, {', '.join(RESULT_COLUMNS)} FROM raceresults "
+                f"WHERE ResultID > %s ORDER BY ResultID LIMIT %s",
+                (last_id, self.batch_size)
+            )
+            if not rows:
+                break
+            existing = self._already_pushed(rows)
+            new_rows = [row for row in rows if (row["TrackID"], row["RaceCounter"], row["Lane"]) not in existing]
+            if new_rows:
+                self.remote_db.execute(
+                    f"INSERT INTO raceresults ({', '.join(RESULT_COLUMNS)}) "
+                    f"VALUES {', '.join([row_placeholders] * len(new_rows))}",
+                    tuple(row[column] for row in new_rows for column in RESULT_COLUMNS)
+                )
+            if len(new_rows) < len(rows):
+                logger.info(f"Skipped {len(rows) - len(new_rows)} raceresults row(s) already on MySQL")
+            last_id = rows[-1]["ResultID"]
+            self.local_db.execute(
+                "INSERT OR REPLACE INTO sync_state (TableName, LastSyncedID) VALUES (%s, %s)",
+                ("raceresults", last_id)
+            )
+            pushed += len(new_rows)
+        logger.info(f"Pushed {pushed} raceresults row(s) to MySQL")
+        return pushed
+
+if __name__ == "__main__":
+    from db_handler import DatabaseHandler
+    from storage import create_backend
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "push"
+    sync = MySQLSync(DatabaseHandler(backend=create_backend("sqlite")), DatabaseHandler(backend=create_backend("mysql")))
+    if command == "pull":
+        sync.pull_roster()
+    else:
+        sync.push_results()
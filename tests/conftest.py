@@ -0,0 +1,18 @@
+"""
+conftest.py
+
+Purpose: Shared pytest setup. Puts the project root on sys.path (the modules import each other as top-level
+modules) and runs the tests in a scratch directory, so cubcar.log, settings files and journals written by the code
+under test stay out of the checkout.
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_sessionstart(session):
+    # After pytest has resolved its test paths, before any module under test is imported
+    os.chdir(tempfile.mkdtemp(prefix="cubcar-tests-"))
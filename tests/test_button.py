@@ -0,0 +1,86 @@
+"""
+Button debounce and hold events, driven through FakeGPIOBackend.
+"""
+
+import threading
+import time
+import pytest
+from sensors.button import Button
+from sensors.gpio_backend import FakeGPIOBackend
+
+PIN = 17
+
+
+@pytest.fixture
+def backend():
+    return FakeGPIOBackend()
+
+
+def later(seconds, function, *args):
+    timer = threading.Timer(seconds, function, args=args)
+    timer.start()
+    return timer
+
+
+def test_bouncing_press_is_one_press(backend):
+    button = Button(PIN, backend=backend, debounce_ms=20)
+    pressed_at = time.monotonic()
+    backend.bounce(PIN, 0)
+    event = button.last_events["press"]
+    assert event.time - pressed_at < 0.002  # Stamped with the first edge, not the settled one
+    assert button.counts == {"press": 1, "release": 0, "hold": 0}
+    assert button.bounces == 4
+    assert button.is_pressed()
+
+
+def test_wait_for_press_and_release(backend):
+    button = Button(PIN, backend=backend, debounce_ms=5)
+    later(0.02, backend.bounce, PIN, 0)
+    assert button.wait_for_press(timeout=1).kind == "press"
+    later(0.05, backend.bounce, PIN, 1)
+    event = button.wait_for_release(timeout=1)
+    assert event is not None
+    assert 0.04 < event.duration < 0.5
+    assert not button.is_pressed()
+    assert button.wait_for_press(timeout=0.05) is None
+
+
+def test_contact_settling_back_inside_window_is_caught(backend):
+    button = Button(PIN, backend=backend, debounce_ms=10)
+    backend.set_input(PIN, 0)
+    backend.set_input(PIN, 1)  # Released again within the debounce window: ignored as bounce...
+    assert button.is_pressed()
+    assert button.wait_for_release(timeout=1) is not None  # ...until the level is re-read once it closes
+    assert button.counts == {"press": 1, "release": 1, "hold": 0}
+
+
+def test_hold_fires_once_after_hold_seconds(backend):
+    button = Button(PIN, backend=backend, debounce_ms=5, hold_seconds=0.1)
+    backend.set_input(PIN, 0)
+    event = button.wait_for_hold(timeout=1)
+    assert event is not None
+    assert event.duration == 0.1
+    assert event.time == button.pressed_at + 0.1
+    time.sleep(0.15)
+    assert button.counts["hold"] == 1
+
+
+def test_short_press_is_not_a_hold(backend):
+    button = Button(PIN, backend=backend, debounce_ms=5, hold_seconds=0.1)
+    backend.set_input(PIN, 0)
+    time.sleep(0.02)
+    backend.set_input(PIN, 1)
+    assert button.wait_for_hold(timeout=0.2) is None
+
+
+def test_listener_sees_every_event_and_close_stops_watching(backend):
+    button = Button(PIN, backend=backend, debounce_ms=1)
+    events = []
+    button.add_listener(events.append)
+    backend.set_input(PIN, 0)
+    time.sleep(0.01)
+    backend.set_input(PIN, 1)
+    time.sleep(0.01)
+    button.close()
+    backend.set_input(PIN, 0)
+    assert [event.kind for event in events] == ["press", "release"]
@@ -0,0 +1,92 @@
+"""
+ClockSync estimates, and the drag-start box's presses converted to the Pi's clock through the bench emulator.
+"""
+
+import random
+import time
+import pytest
+from comms.clock_sync import ClockSync
+from devices.esp32_draggate import ESP32RelayController
+from devices.esp32_dragstart import ESP32DragStarter
+from devices.esp32_emulator import ESP32Emulator
+
+OFFSET_US = 5_000_000_000
+
+
+def simulated_ping(offset_us, drift_ppm, clock, rng):
+    # One round trip with random (and asymmetric) latency each way, on a simulated Pi clock
+    def ping():
+        sent = clock[0]
+        outbound, inbound = rng.uniform(0.0005, 0.02), rng.uniform(0.0005, 0.02)
+        stamped = sent + outbound
+        device_us = int(stamped * 1_000_000 * (1 + drift_ppm / 1_000_000)) + offset_us
+        clock[0] = stamped + inbound + 2.0  # Resync interval
+        return sent, device_us, stamped + inbound
+    return ping
+
+
+def test_unsynchronized_clock_refuses_to_convert():
+    with pytest.raises(RuntimeError):
+        ClockSync().to_local(1)
+
+
+def test_fastest_round_trips_bound_the_offset():
+    clock = ClockSync(best=4)
+    clock.add_sample(10.0, 10_000_000 + OFFSET_US + 9_000, 10.020)  # Slow, lopsided reply
+    clock.add_sample(11.0, 11_000_000 + OFFSET_US + 100, 11.0002)
+    assert clock.uncertainty_us == pytest.approx(100)
+    for _ in range(4):
+        clock.add_sample(12.0, 12_000_000 + OFFSET_US + 100, 12.0002)
+    assert clock.offset_at(12.0001) == pytest.approx(OFFSET_US, abs=1)  # The slow sample is no longer used
+
+
+def test_offset_and_drift_are_recovered_through_jitter():
+    rng = random.Random(7)
+    now = [1000.0]
+    clock = ClockSync(window=64, best=8)
+    clock.sync(simulated_ping(OFFSET_US, 40, now, rng), samples=64)
+    assert clock.drift * 1_000_000 == pytest.approx(40, abs=15)
+    for local_s in (now[0], now[0] + 5):
+        device_us = int(local_s * 1_000_000 * (1 + 40 / 1_000_000)) + OFFSET_US
+        assert clock.to_local(device_us) == pytest.approx(local_s, abs=0.001)
+        assert clock.to_device_us(local_s) == pytest.approx(device_us, abs=1000)
+
+
+@pytest.fixture
+def emulator():
+    emulator = ESP32Emulator(clock_offset_us=OFFSET_US, drift_ppm=25)
+    emulator.start()
+    yield emulator
+    emulator.stop()
+
+
+def test_press_is_stamped_in_the_pi_timebase(emulator):
+    starter = ESP32DragStarter("127.0.0.1", emulator.port, timeout=2)
+    starter.connect()
+    try:
+        pressed_at = time.monotonic()
+        emulator.press(2)
+        lane, at = starter.wait_for_press(timeout=2)
+        assert lane == 2
+        assert at == pytest.approx(pressed_at, abs=0.005)
+        assert starter.wait_for_press(timeout=0.05) is None
+
+        go_at = time.monotonic() + 0.5
+        starter.start_tree(go_at).result(2)
+        assert starter.clock.to_local(emulator.tree_go_us) == pytest.approx(go_at, abs=0.005)
+    finally:
+        starter.close()
+
+
+def test_scheduled_relay_fire_lands_at_the_pi_instant(emulator):
+    clock = ClockSync(name="gate")
+    gate = ESP32RelayController("127.0.0.1", emulator.port, clock=clock, timeout=2)
+    try:
+        gate.connect()
+        clock.sync(gate.ping)
+        at = time.monotonic() + 0.1
+        fired_at = gate.fire_relays([1, 2], at=at, hold_ms=10).result(2)
+        assert fired_at >= at - 0.001  # Never early; how late depends on the emulator's sleep, not the link
+        assert fired_at == clock.to_local(emulator.fired[-1][1])
+    finally:
+        gate.close()
@@ -0,0 +1,218 @@
+"""
+Settings layers, validation, hot reload and comment-preserving saves, on settings files under tmp_path.
+"""
+
+import os
+import textwrap
+import pytest
+import config
+from config import Config, ConfigError
+from event_bus import bus
+
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch):
+    # Every test loads its own files; put Config back as it was afterwards
+    for name in list(config.schema()) + ["CONFIG_PATH", "PROFILE"]:
+        monkeypatch.setattr(Config, name, getattr(Config, name))
+    monkeypatch.setattr(config, "_loaded", dict(config._loaded, sources=dict(config._loaded["sources"])))
+    monkeypatch.delenv("CUBCAR_PROFILE", raising=False)
+    for name in config.schema():
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.fixture
+def ini(tmp_path):
+    path = tmp_path / "cubcar.ini"
+
+    def write(text):
+        path.write_text(textwrap.dedent(text))
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))  # A new mtime even within the clock's tick
+        return str(path)
+    return write
+
+
+def test_layers_apply_in_order(ini, monkeypatch):
+    path = ini("""
+        [cubcar]
+        NUMBER_LANES = 4
+        tie_window_ms = 2.5
+        PROFILE = track2
+
+        [profile track2]
+        TRACK_NUMBER = 2
+        TIE_WINDOW_MS = 3
+    """)
+    monkeypatch.setenv("TRACK_NUMBER", "7")
+    values, profile, sources = config.resolve(path)
+    assert profile == "track2"
+    assert (values["NUMBER_LANES"], values["TIE_WINDOW_MS"], values["TRACK_NUMBER"]) == (4, 3.0, 7)
+    assert (sources["NUMBER_LANES"], sources["TIE_WINDOW_MS"], sources["TRACK_NUMBER"]) == \
+        ("file", "profile track2", "env")
+    assert sources["SOCKET_PORT"] == "default"
+
+
+@pytest.mark.parametrize("name, text, value", [
+    ("HEAT_SCHEDULE", "yes", True),
+    ("NUMBER_LANES", " 6 ", 6),
+    ("TIE_WINDOW_MS", "0.5", 0.5),
+    ("STEPPER_PINS", "[17, 27, 22]", (17, 27, 22)),
+    ("IR_SENSOR_PINS", "None", None),
+    ("PAD_LANES", "{'1': [1, 2]}", {"1": [1, 2]}),
+])
+def test_values_are_parsed_to_their_type(name, text, value):
+    assert config.parse_value(name, text) == value
+
+
+@pytest.mark.parametrize("name, text", [
+    ("NUMBER_LANES", "three"),
+    ("PAD_LANES", "[1, 2]"),
+    ("STEPPER_PINS", "__import__('os')"),
+    ("SOCKET_PORT", "None"),
+])
+def test_unreadable_values_are_refused(name, text):
+    with pytest.raises(ConfigError, match=name):
+        config.parse_value(name, text)
+
+
+def current(**changes):
+    return {**{name: getattr(Config, name) for name in config.schema()}, **changes}
+
+
+def test_every_problem_is_reported_together():
+    problems = config.validate(current(NUMBER_LANES=12, TIE_POLICY="coin", SOCKET_PORT="80", TRACK_NUMBER=None))
+    assert len(problems) == 4
+    assert any(problem.startswith("NUMBER_LANES: 12 is outside 1..8") for problem in problems)
+    assert any("TIE_POLICY" in problem and "share" in problem for problem in problems)
+
+
+@pytest.mark.parametrize("changes, problem", [
+    ({"RACE_MIN_RACE_TIME": 30, "RACE_MAX_RACE_TIME": 20}, "RACE_MIN_RACE_TIME must be less"),
+    ({"IR_SENSOR_PINS": [5, 6], "NUMBER_LANES": 3}, "IR_SENSOR_PINS needs a pin"),
+    ({"PAD_LANES": {"1": [1, 4]}, "NUMBER_LANES": 3}, "pad 1 lists a lane outside 1..3"),
+])
+def test_settings_are_checked_against_each_other(changes, problem):
+    assert any(problem in message for message in config.validate(current(**changes)))
+
+
+@pytest.mark.parametrize("pad_lanes, problem", [
+    ([1, 2], "PAD_LANES: expected dict"),
+    (3, "PAD_LANES: expected dict"),
+    ({"1": 2}, "pad 1 needs a list of lane numbers, got 2"),
+    ({"1": [1, "2"]}, "pad 1 needs a list of lane numbers"),
+    ({"1": [True]}, "pad 1 needs a list of lane numbers"),
+    ({1: [1]}, "pad ids are text"),
+])
+def test_malformed_pad_lanes_are_reported(pad_lanes, problem):
+    problems = config.validate(current(PAD_LANES=pad_lanes))
+    assert any(problem in message for message in problems), problems
+
+
+def test_invalid_file_leaves_the_settings_alone(ini):
+    lanes = Config.NUMBER_LANES
+    path = ini("""
+        [cubcar]
+        NUMBER_LANES = 9
+        NO_SUCH_SETTING = 1
+    """)
+    with pytest.raises(ConfigError, match="NO_SUCH_SETTING: unknown setting"):
+        config.load_config(path)
+    path = ini("""
+        [cubcar]
+        NUMBER_LANES = 9
+    """)
+    with pytest.raises(ConfigError, match="NUMBER_LANES"):
+        config.load_config(path)
+    assert Config.NUMBER_LANES == lanes
+
+
+def test_reload_applies_only_hot_settings(ini):
+    path = ini("""
+        [cubcar]
+        TIE_WINDOW_MS = 1.0
+        NUMBER_LANES = 3
+    """)
+    config.load_config(path)
+    assert config.reload_config() == {}  # Unchanged file: not even re-read
+    events = []
+    handler = lambda _, data: events.append(data)
+    bus.subscribe("config_changed", handler)
+    try:
+        ini("""
+            [cubcar]
+            TIE_WINDOW_MS = 4.0
+            NUMBER_LANES = 4
+        """)
+        assert config.reload_config() == {"TIE_WINDOW_MS": 4.0}
+    finally:
+        bus.unsubscribe("config_changed", handler)
+    assert Config.TIE_WINDOW_MS == 4.0 and Config.NUMBER_LANES == 3
+    assert [(event["changed"], event["restart"]) for event in events] == [({"TIE_WINDOW_MS": 4.0}, ["NUMBER_LANES"])]
+    assert config.sources()["TIE_WINDOW_MS"] == "file"
+
+
+def test_invalid_reload_keeps_the_current_settings(ini):
+    config.load_config(ini("""
+        [cubcar]
+        TIE_WINDOW_MS = 1.0
+    """))
+    ini("""
+        [cubcar]
+        TIE_WINDOW_MS = 500
+    """)
+    assert config.reload_config() == {}
+    assert Config.TIE_WINDOW_MS == 1.0
+
+
+def test_save_keeps_comments_and_layout(ini):
+    path = ini("""
+        # Track 1 settings
+        [cubcar]
+        ; lanes on the finish line
+        NUMBER_LANES = 3
+        PAD_LANES = {"1": [1],
+            "2": [2, 3]}
+        TIE_WINDOW_MS = 1.0
+
+        [profile track2]
+        TRACK_NUMBER = 2
+    """)
+    config.load_config(path)
+    config.save_settings({"PAD_LANES": {"1": [1, 2]}, "RACE_MAX_RACE_TIME": 15}, path=path, profile="")
+    assert open(path).read() == textwrap.dedent("""
+        # Track 1 settings
+        [cubcar]
+        ; lanes on the finish line
+        NUMBER_LANES = 3
+        PAD_LANES = {'1': [1, 2]}
+        TIE_WINDOW_MS = 1.0
+        RACE_MAX_RACE_TIME = 15
+
+        [profile track2]
+        TRACK_NUMBER = 2
+    """)
+    values, _, _ = config.resolve(path)
+    assert values["PAD_LANES"] == {"1": [1, 2]} and values["RACE_MAX_RACE_TIME"] == 15
+
+
+def test_save_adds_a_missing_profile_section(ini):
+    path = ini("""
+        [cubcar]
+        NUMBER_LANES = 3
+    """)
+    config.save_settings({"TRACK_NUMBER": 5}, path=path, profile="track5")
+    assert open(path).read().endswith("NUMBER_LANES = 3\n\n[profile track5]\nTRACK_NUMBER = 5\n")
+    assert config.resolve(path, "track5")[0]["TRACK_NUMBER"] == 5
+
+
+def test_invalid_save_writes_nothing(ini):
+    path = ini("""
+        [cubcar]
+        NUMBER_LANES = 3
+    """)
+    before = open(path).read()
+    with pytest.raises(ConfigError):
+        config.save_settings({"NUMBER_LANES": 0}, path=path, profile="")
+    with pytest.raises(ConfigError, match="Unknown setting"):
+        config.save_settings({"LANES": 3}, path=path, profile="")
+    assert open(path).read() == before
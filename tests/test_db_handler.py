@@ -0,0 +1,108 @@
+"""
+DatabaseHandler shared by several threads, over a stand-in backend that notices two statements on its one cursor.
+"""
+
+import threading
+import time
+import pytest
+from db_handler import DatabaseHandler
+from storage.base import StorageBackend
+
+
+class BackendError(Exception):
+    pass
+
+
+class OneCursorBackend(StorageBackend):
+    """One cursor: a fetch returns the rows of whichever statement ran last, like the real drivers."""
+
+    dialect = "sqlite"
+    Error = BackendError
+
+    def __init__(self, failures=0):
+        self.last = None
+        self.busy = False
+        self.overlaps = 0
+        self.failures = failures  # Statements that raise before one succeeds
+        self.committed = []
+
+    def connect(self):
+        pass
+
+    def execute(self, sql, params=()):
+        if self.busy:
+            self.overlaps += 1
+        self.busy = True
+        if self.failures:
+            self.failures -= 1
+            self.busy = False
+            raise BackendError("lost connection")
+        self.last = params
+        time.sleep(0.001)  # Long enough for another thread to get in between
+
+    def fetchone(self):
+        self.busy = False
+        return {"value": self.last[0]}
+
+    def fetchall(self):
+        return [self.fetchone()]
+
+    def commit(self):
+        self.committed.append(self.last)
+        self.busy = False
+
+    def rollback(self):
+        self.busy = False
+
+    def close(self):
+        pass
+
+    def describe(self):
+        return "cursor"
+
+
+def run_threads(target, count=8):
+    threads = [threading.Thread(target=target, args=(n,)) for n in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_parallel_queries_get_their_own_rows():
+    backend = OneCursorBackend()
+    db = DatabaseHandler(backend=backend)
+    answers = {}
+
+    def look_up(n):
+        answers[n] = [db.query("SELECT %s", (f"{n}-{i}",), fetch_one=True)["value"] for i in range(20)]
+    run_threads(look_up)
+    assert answers == {n: [f"{n}-{i}" for i in range(20)] for n in range(8)}
+    assert backend.overlaps == 0
+
+
+def test_parallel_writes_commit_one_statement_each():
+    backend = OneCursorBackend()
+    db = DatabaseHandler(backend=backend)
+    run_threads(lambda n: [db.execute("INSERT %s", (n, i)) for i in range(10)])
+    assert sorted(backend.committed) == [(n, i) for n in range(8) for i in range(10)]
+    assert backend.overlaps == 0
+
+
+def test_retry_sleep_does_not_hold_the_lock():
+    backend = OneCursorBackend(failures=1)
+    db = DatabaseHandler(max_retries=2, retry_delay=0.2, backend=backend)
+    writer = threading.Thread(target=db.execute, args=("INSERT %s", ("retried",)))
+    writer.start()
+    time.sleep(0.05)  # The writer has failed once and is waiting to retry
+    started = time.monotonic()
+    assert db.query("SELECT %s", ("other",), fetch_one=True) == {"value": "other"}
+    assert time.monotonic() - started < 0.1
+    writer.join()
+    assert backend.committed == [("retried",)]
+
+
+def test_last_failure_is_raised():
+    db = DatabaseHandler(max_retries=2, retry_delay=0, backend=OneCursorBackend(failures=2))
+    with pytest.raises(BackendError):
+        db.execute("INSERT %s", (1,))
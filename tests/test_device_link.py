@@ -0,0 +1,77 @@
+"""
+DeviceLink against a scripted device on a local socket: a silent device is dropped on a request timeout.
+"""
+
+import socket
+import threading
+import pytest
+from comms.device_link import DeviceCommandError, DeviceLink
+
+
+class Device:
+    """Accepts connections on a local port. While mute it reads frames and never answers; otherwise it ACKs."""
+
+    def __init__(self):
+        self.server = socket.create_server(("127.0.0.1", 0))
+        self.port = self.server.getsockname()[1]
+        self.mute = True
+        self.connections = 0
+        self.closed = threading.Event()  # Set when the Pi closes a connection
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        with conn:
+            for line in conn.makefile():
+                if not self.mute:
+                    conn.sendall(f"{line.split('|')[0]}|ACK|ok\n".encode())
+        self.closed.set()
+
+    def close(self):
+        self.server.close()
+
+
+@pytest.fixture
+def device():
+    device = Device()
+    yield device
+    device.close()
+
+
+@pytest.fixture
+def link(device):
+    link = DeviceLink("127.0.0.1", device.port, name="gate", timeout=0.2)
+    yield link
+    link.close()
+
+
+def test_timeout_drops_the_link_and_fails_commands_in_flight(device, link):
+    scheduled = link.send_command("RELAY", 1, 0, 100)
+    with pytest.raises(TimeoutError, match="gate"):
+        link.request("TIME")
+    assert link.sock is None and link.pending == {}
+    with pytest.raises(DeviceCommandError, match="no reply"):
+        scheduled.result(0)
+    assert device.closed.wait(1)  # The reader thread was woken and the socket closed
+
+    device.mute = False
+    assert link.request("TIME") == "ok"  # A fresh connection
+    assert device.connections == 2
+
+
+def test_answered_command_never_drops_the_link(device, link):
+    device.mute = False
+    assert link.request("TIME") == "ok"
+    done = link.send_command("TIME")
+    assert link.wait(done) == "ok"
+    sock = link.sock
+    assert link.wait(done, 0.01) == "ok"  # Already answered: nothing to drop
+    assert link.sock is sock
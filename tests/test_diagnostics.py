@@ -0,0 +1,122 @@
+"""
+Diagnostics statistics from events on a private bus, and round trips to stand-in devices.
+"""
+
+import time
+import pytest
+from diagnostics import BIN_EDGES, Diagnostics, LatencyHistogram
+from event_bus import EventBus
+
+
+def test_histogram_reports_the_bin_holding_each_percentile():
+    histogram = LatencyHistogram()
+    assert histogram.summary()["p50"] is None
+    for seconds in [0.0003] * 90 + [0.004] * 9 + [7.5]:
+        histogram.add(seconds)
+    summary = histogram.summary()
+    assert summary["count"] == 100
+    assert (summary["p50"], summary["p95"], summary["max"]) == (0.0005, 0.005, 7.5)
+    assert summary["bins"][-1] == 1  # Beyond the last edge
+    assert histogram.percentile(100) == 7.5
+    assert sum(summary["bins"]) == 100 and len(summary["bins"]) == len(BIN_EDGES) + 1
+
+
+@pytest.fixture
+def bus():
+    return EventBus()
+
+
+@pytest.fixture
+def diagnostics(bus):
+    diagnostics = Diagnostics(bus=bus, window=60, ping_interval=0.01)
+    yield diagnostics
+    diagnostics.stop()
+
+
+def test_events_are_grouped_by_the_sensor_that_sent_them(bus, diagnostics):
+    diagnostics.start()
+    for lane in (1, 2, 2):
+        bus.publish("finish_line", lane=lane, time=time.monotonic() - 0.003)
+    bus.publish("lane_rejected", rfid="a", pad_id="2", reason="duplicate")
+    bus.publish("lane_rejected", rfid="b", pad_id="2", reason="unknown racer")
+    bus.publish("heat_started", race_counter=1, heat=1)
+    snapshot = diagnostics.snapshot()
+    sources = snapshot["sources"]
+    assert {source: stats["count"] for source, stats in sources.items()} == {
+        "lane 1 finish beam": 1, "lane 2 finish beam": 2, "RFID pad 2": 2, "heat_started": 1}
+    assert sources["lane 2 finish beam"]["latency"]["p50"] == 0.005  # Stamped 3 ms before it reached the bus
+    assert sources["RFID pad 2"]["latency"] is None  # Not an edge
+    assert snapshot["rejections"] == {"duplicate": 1, "unknown racer": 1}
+
+
+def test_rates_cover_only_the_window(bus):
+    diagnostics = Diagnostics(bus=bus, window=0.05, ping_interval=1)
+    diagnostics.start()
+    try:
+        for _ in range(5):
+            bus.publish("button", name="start", time=time.monotonic())
+        time.sleep(0.08)
+        bus.publish("button", name="start", time=time.monotonic())
+        stats = diagnostics.snapshot()["sources"]["button start"]
+    finally:
+        diagnostics.stop()
+    assert stats["count"] == 6
+    assert stats["rate"] == pytest.approx(1 / 0.05, rel=0.01)
+
+
+def test_nothing_is_counted_once_stopped(bus, diagnostics):
+    diagnostics.start()
+    bus.publish("finish_line", lane=1)
+    diagnostics.stop()
+    bus.publish("finish_line", lane=1)
+    assert diagnostics.snapshot()["sources"]["lane 1 finish beam"]["count"] == 1
+    diagnostics.start()  # A new session starts from zero
+    assert diagnostics.snapshot()["sources"] == {}
+
+
+class Button:
+    def __init__(self, name):
+        self.name = name
+        self.bounces = 0
+
+
+def test_button_bounces_count_from_the_start_of_the_session(diagnostics):
+    button = Button("start")
+    button.bounces = 4  # Before diagnostics were opened
+    diagnostics.watch_button(button)
+    diagnostics.start()
+    button.bounces += 3
+    assert diagnostics.snapshot()["bounces"] == {"start": 3}
+
+
+class Link:
+    """Stands in for a DeviceLink whose pings take 1.5 ms and fail every third time."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def ping(self):
+        self.calls += 1
+        if self.calls % 3 == 0:
+            raise TimeoutError("no reply")
+        sent = time.monotonic()
+        return sent, 123456, sent + 0.0015
+
+
+def test_round_trips_and_failures_are_measured_while_running(diagnostics):
+    link = Link()
+    diagnostics.add_link("gate", link)
+    diagnostics.add_round_trip("nano", lambda: 0.0004)
+    diagnostics.start()
+    deadline = time.monotonic() + 2
+    while link.calls < 7 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    diagnostics.stop()
+    time.sleep(0.03)  # Let a round already under way finish
+    calls, round_trips = link.calls, diagnostics.snapshot()["round_trips"]
+    assert round_trips["gate"]["errors"] == calls // 3
+    assert round_trips["gate"]["count"] == calls - calls // 3
+    assert round_trips["gate"]["p50"] == 0.002
+    assert round_trips["nano"]["p95"] == 0.0005 and round_trips["nano"]["errors"] == 0
+    time.sleep(0.05)
+    assert link.calls == calls  # No pinging once stopped
@@ -0,0 +1,50 @@
+"""
+ESP32RelayController command pipelining against the bench emulator.
+"""
+
+import time
+import pytest
+from comms.device_link import DeviceCommandError
+from devices.esp32_draggate import ESP32RelayController
+from devices.esp32_emulator import ESP32Emulator
+
+
+@pytest.fixture
+def gate():
+    emulator = ESP32Emulator()
+    emulator.start()
+    controller = ESP32RelayController("127.0.0.1", emulator.port, timeout=2)
+    yield emulator, controller
+    controller.close()
+    emulator.stop()
+
+
+def test_lanes_fired_together_share_one_frame(gate):
+    emulator, controller = gate
+    before = time.monotonic()
+    fired_at = controller.fire_relays([1, 3], hold_ms=10).result(2)
+    assert before <= fired_at <= time.monotonic()
+    assert [mask for mask, _ in emulator.fired] == [0b101]
+
+
+def test_relay_is_not_held_up_by_a_stepper_move(gate):
+    emulator, controller = gate
+    move = controller.move_stepper(300)  # About 0.3 s on the emulator
+    fired = controller.activate_relay(2, hold_ms=10)
+    fired.result(2)
+    assert not move.done()
+    assert move.result(2) == "300"
+    assert [mask for mask, _ in emulator.fired] == [0b10]
+
+
+def test_scheduled_fire_waits_for_its_time(gate):
+    emulator, controller = gate
+    at = time.monotonic() + 0.1
+    assert controller.fire_relays([1], at=at, hold_ms=10).result(2) >= at - 0.005
+
+
+def test_unknown_command_fails_its_future(gate):
+    emulator, controller = gate
+    with pytest.raises(DeviceCommandError):
+        controller.request("NOPE")
+    assert controller.request("TIME").isdigit()  # The connection is still usable
@@ -0,0 +1,81 @@
+"""
+EventJournal record/read round trip and Replayer reproducing a recorded heat.
+"""
+
+import datetime
+import os
+from decimal import Decimal
+from event_bus import EventBus
+from event_journal import EventJournal, Replayer, read, read_header
+
+RACERS = {
+    1: {"RacerID": 11, "RacerCarNumber": 101, "RacerCarName": "Blue", "RacerPack": 1, "RacerFirstName": "Ann",
+        "RacerLastName": "Lee"},
+    2: {"RacerID": 12, "RacerCarNumber": 102, "RacerCarName": "Red", "RacerPack": 1, "RacerFirstName": "Bo",
+        "RacerLastName": "Ray"},
+}
+
+
+def record(tmp_path, publish):
+    bus = EventBus()
+    journal = EventJournal(directory=str(tmp_path), bus=bus)
+    journal.start()
+    publish(bus)
+    journal.stop()
+    return journal.path
+
+
+def test_fields_survive_the_round_trip(tmp_path):
+    fields = {
+        "none": None, "flag": True, "count": -3, "ratio": 0.25, "name": "lane é", "raw": b"\x00\xff",
+        "weight": Decimal("5.01"), "at": datetime.datetime(2026, 5, 1, 9, 30), "day": datetime.date(2026, 5, 1),
+        "lanes": [1, 2], "pair": (1, "a"), "nested": {1: {"x": [None]}},
+    }
+    path = record(tmp_path, lambda bus: (bus.publish("sample", time=12.5, **fields), bus.publish("other", value=1)))
+    events = list(read(path))
+    assert [topic for topic, _, _ in events] == ["journal_started", "sample", "other"]
+    topic, at, replayed = events[1]
+    assert at == 12.5
+    assert replayed == {**fields, "time": 12.5}
+    assert os.path.dirname(path) == str(tmp_path)
+    assert read_header(path)[0] > 0
+
+
+def test_partial_last_record_is_ignored(tmp_path):
+    path = record(tmp_path, lambda bus: (bus.publish("first", value=1), bus.publish("second", value=2)))
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 3)
+    assert [topic for topic, _, _ in read(path)] == ["journal_started", "first"]
+
+
+def test_replay_reproduces_the_recorded_heat(tmp_path):
+    def race(bus):
+        for lane, racer in RACERS.items():
+            bus.publish("lane_assigned", lane=lane, rfid=f"tag{lane}", pad_id="1", racer=racer, race_counter=5)
+        bus.publish("heat_started", race_counter=5, heat=1)
+        bus.publish("start_recorded", lanes=[1, 2], start_time=100.0)
+        bus.publish("finish_line", lane=2, time=102.25)
+        bus.publish("finish_line", lane=1, time=102.75)
+        bus.publish("heat_finished", race_counter=5, heat=1)
+        bus.publish("heat_recorded", race_counter=5, heat=1, results=[
+            {"Lane": 1, "RacerID": 11, "RaceTime": "02.750000", "ReactionTime": "00.000000", "Placing": 2},
+            {"Lane": 2, "RacerID": 12, "RaceTime": "02.250000", "ReactionTime": "00.000000", "Placing": 2},
+        ])
+
+    path = record(tmp_path, race)
+    replayer = Replayer(read(path))
+    replay_bus_topics = []
+    replayer.bus.subscribe("*", lambda topic, data: replay_bus_topics.append(topic))
+    heats = replayer.run()
+
+    assert len(heats) == 1
+    races = {race["Lane"]: race for race in heats[0].races}
+    assert {lane: race["RacerID"] for lane, race in races.items()} == {1: 11, 2: 12}
+    assert {lane: race["Placing"] for lane, race in races.items()} == {1: 2, 2: 1}
+    assert races[2]["RaceTime"] == "02.250000"
+    assert "placings_changed" in replay_bus_topics  # Regenerated by the replay's own PlacingEngine
+    assert replayer.differences() == [(5, 2, "Placing", 2, 1)]  # The recorded result differs from the replay
+
+    # Replaying the same journal again gives the same result
+    again = Replayer(read(path)).run()
+    assert again[0].races == heats[0].races
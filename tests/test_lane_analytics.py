@@ -0,0 +1,98 @@
+"""
+LaneAnalytics on simulated results with a known lane bias, recorded in an in-memory SQLite results table.
+"""
+
+import random
+import pytest
+from db_handler import DatabaseHandler
+from lane_analytics import LaneAnalytics
+from migrations.runner import MigrationRunner
+from storage import create_backend
+
+LANE_EFFECTS = {1: 0.010, 2: 0.0, 3: -0.004, 4: -0.006}  # Seconds; they sum to zero
+
+
+@pytest.fixture
+def db():
+    handler = DatabaseHandler(max_retries=1, retry_delay=0, backend=create_backend("sqlite", path=":memory:"))
+    MigrationRunner(handler).migrate()
+    return handler
+
+
+def run_heats(db, heats, first_counter=1, track=1, seed=3):
+    # Groups of four cars of very different speeds; each group runs once in every lane (a rotation)
+    rng = random.Random(seed)
+    counter = first_counter
+    for group in range(heats):
+        racers = [group * 4 + i + 1 for i in range(4)]
+        speeds = {racer: rng.uniform(2.2, 3.2) for racer in racers}
+        for rotation in range(4):
+            for lane in LANE_EFFECTS:
+                racer = racers[(lane - 1 + rotation) % 4]
+                race_time = speeds[racer] + LANE_EFFECTS[lane] + rng.gauss(0, 0.002)
+                db.execute("INSERT INTO raceresults (RacerID, RaceCounter, TrackID, Lane, RaceTime) "
+                           "VALUES (%s, %s, %s, %s, %s)", (racer, counter, track, lane, round(race_time, 6)))
+            counter += 1
+    return counter
+
+
+def test_known_lane_bias_is_recovered_despite_car_speeds(db):
+    run_heats(db, 10)
+    analytics = LaneAnalytics(db, track_id=1, confidence=0.95)
+    assert analytics.update() == 160
+    for lane, effect in LANE_EFFECTS.items():
+        bias, low, high, n = analytics.lane_bias()[lane]
+        assert n == 40
+        assert bias == pytest.approx(effect, abs=0.002)
+        assert low < effect < high
+        assert analytics.lane_effects()[lane][0] == pytest.approx(effect, abs=0.002)
+    swap, low, high, racers = analytics.lane_swaps()[(1, 4)]
+    assert swap == pytest.approx(0.016, abs=0.002)
+    assert racers == 40
+    assert low > 0  # Each car is its own control, so the swaps are far tighter than the within-race intervals
+    assert analytics.lane_bias()[1][1] < 0 < analytics.lane_bias()[1][2]
+    assert analytics.lane_effects()[1][1]
+
+
+def test_correction_factors_cancel_the_lane_effect(db):
+    run_heats(db, 10)
+    analytics = LaneAnalytics(db, track_id=1)
+    analytics.update()
+    factors = analytics.correction_factors(significant_only=False)
+    overall = sum(d["mean"] * d["n"] for d in analytics.lane_distributions().values()) / 160
+    for lane, effect in LANE_EFFECTS.items():
+        assert (overall + effect) * factors[lane] == pytest.approx(overall, abs=0.002)
+
+
+def test_incremental_updates_match_a_single_load(db):
+    analytics = LaneAnalytics(db, track_id=1)
+    counter = run_heats(db, 3, seed=1)
+    analytics.update()
+    run_heats(db, 3, first_counter=counter, seed=2)
+    assert analytics.update() == 48
+    assert analytics.update() == 0
+    fresh = LaneAnalytics(db, track_id=1)
+    fresh.update()
+    assert analytics.lane_bias() == pytest.approx(fresh.lane_bias())
+    assert analytics.lane_swaps() == pytest.approx(fresh.lane_swaps())
+
+
+def test_race_split_across_updates_is_rebuilt(db):
+    analytics = LaneAnalytics(db, track_id=1)
+    db.execute("INSERT INTO raceresults (RacerID, RaceCounter, TrackID, Lane, RaceTime) VALUES (1, 1, 1, 1, 2.5)")
+    db.execute("INSERT INTO raceresults (RacerID, RaceCounter, TrackID, Lane, RaceTime) VALUES (2, 1, 1, 2, 2.3)")
+    analytics.update()
+    assert analytics.lane_bias()[1][0] == pytest.approx(0.1)
+    db.execute("INSERT INTO raceresults (RacerID, RaceCounter, TrackID, Lane, RaceTime) VALUES (3, 1, 1, 3, 2.1)")
+    analytics.update()
+    bias = analytics.lane_bias()
+    assert [bias[lane][0] for lane in (1, 2, 3)] == pytest.approx([0.2, 0.0, -0.2])
+
+
+def test_other_tracks_and_unfinished_lanes_are_ignored(db):
+    run_heats(db, 2, track=2)
+    db.execute("INSERT INTO raceresults (RacerID, RaceCounter, TrackID, Lane, RaceTime) VALUES (1, 99, 1, 1, 0)")
+    analytics = LaneAnalytics(db, track_id=1)
+    assert analytics.update() == 0
+    assert analytics.correction_factors() == {}
+    assert "Track 1 lane calibration (0 results)" in analytics.calibration_report()
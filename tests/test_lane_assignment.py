@@ -0,0 +1,125 @@
+"""
+LaneAssignmentService: lane reservation from several pads at once.
+"""
+
+import threading
+import time
+import pytest
+from event_bus import EventBus
+from lane_assignment import LaneAssignmentError, LaneAssignmentService
+from race_manager import RaceManager
+
+LOOKUP_SECONDS = 0.05
+
+
+class RacerDatabase:
+    """Answers the racer lookup like the database would, taking LOOKUP_SECONDS per query."""
+
+    def __init__(self, tags):
+        self.tags = tags
+
+    def query(self, sql, params=None, fetch_one=False):
+        time.sleep(LOOKUP_SECONDS)
+        rfid = params[0]
+        if rfid not in self.tags:
+            return None
+        number = self.tags.index(rfid) + 1
+        return {"RacerID": number, "RacerCarNumber": number, "RacerCarName": f"Car {number}", "RacerPack": 1,
+                "RacerFirstName": f"First{number}", "RacerLastName": f"Last{number}"}
+
+
+@pytest.fixture
+def bus():
+    return EventBus()
+
+
+@pytest.fixture
+def manager():
+    return RaceManager(RacerDatabase(["a", "b", "c", "d"]), 1, 1, 1, "normal")
+
+
+@pytest.fixture
+def service(manager, bus):
+    return LaneAssignmentService(manager, 3, bus=bus)
+
+
+def events(bus, topic):
+    seen = []
+    bus.subscribe(topic, lambda _, data: seen.append(data))
+    return seen
+
+
+def test_taps_fill_lanes_in_order_until_the_heat_is_loaded(bus, manager, service):
+    assigned, loaded = events(bus, "lane_assigned"), events(bus, "heat_loaded")
+    assert service.assign("a", "1")[0] == 1
+    assert service.assign("b", "1")[0] == 2
+    assert not service.wait_until_loaded(timeout=0)
+    lane, racer = service.assign("c", "2")
+    assert (lane, racer["RacerID"]) == (3, 3)
+    assert service.wait_until_loaded(timeout=0)
+    assert [event["lane"] for event in assigned] == [1, 2, 3]
+    assert [(event["lanes"], event["heat"]) for event in loaded] == [(3, 1)]
+    assert {race["RacerRFID"]: race["Lane"] for race in manager.races} == {"a": 1, "b": 2, "c": 3}
+
+
+def test_pad_fills_its_own_lanes_first(bus, manager):
+    service = LaneAssignmentService(manager, 3, pad_lanes={"2": [3]}, bus=bus)
+    assert service.assign("a", "2")[0] == 3
+    assert service.assign("b", "2")[0] == 1  # Its lane is taken; any free lane will do
+
+
+@pytest.mark.parametrize("tags, reason", [
+    (["a", "a"], "duplicate"),
+    (["zzz"], "unknown racer"),
+    (["a", "b", "c", "d"], "heat full"),
+])
+def test_refused_taps(bus, service, tags, reason):
+    rejected = events(bus, "lane_rejected")
+    *accepted, refused = tags
+    for rfid in accepted:
+        service.assign(rfid, "1")
+    with pytest.raises(LaneAssignmentError, match=reason):
+        service.assign(refused, "1")
+    assert [(event["rfid"], event["reason"]) for event in rejected] == [(refused, reason)]
+
+
+def test_pads_look_racers_up_in_parallel(service):
+    results = {}
+    threads = [threading.Thread(target=lambda rfid=rfid: results.__setitem__(rfid, service.assign(rfid, rfid)))
+               for rfid in ("a", "b", "c")]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(2)
+    assert time.monotonic() - started < 2.5 * LOOKUP_SECONDS  # Three lookups, overlapped
+    assert sorted(lane for lane, _ in results.values()) == [1, 2, 3]
+
+
+def test_same_tag_on_two_pads_at_once_gets_one_lane(manager, service):
+    outcomes = []
+
+    def tap(pad_id):
+        try:
+            outcomes.append(service.assign("a", pad_id)[0])
+        except LaneAssignmentError as e:
+            outcomes.append(str(e))
+
+    threads = [threading.Thread(target=tap, args=(pad_id,)) for pad_id in ("1", "2")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(2)
+    assert sorted(outcomes, key=str) == [1, "duplicate"]
+    assert len(manager.races) == 1
+
+
+def test_waiter_is_woken_by_the_last_tap(bus, manager):
+    service = LaneAssignmentService(manager, 2, bus=bus)
+    done = []
+    waiter = threading.Thread(target=lambda: done.append(service.wait_until_loaded(timeout=2)))
+    waiter.start()
+    service.assign("a", "1")
+    service.assign("b", "1")
+    waiter.join(2)
+    assert done == [True]
@@ -0,0 +1,102 @@
+"""
+Leaderboard merging and the hub's push path to displays.
+"""
+
+import json
+import socket
+import threading
+import time
+from coordination.leaderboard_hub import Leaderboard, LeaderboardClient, LeaderboardHub, TrackResultPublisher, \
+    _Subscriber
+
+
+def result(racer_id, race_time, race_counter=1):
+    return {"RacerID": racer_id, "RaceTime": race_time, "RaceCounter": race_counter, "RacerFirstName": f"R{racer_id}"}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_best_time_per_racer_across_tracks():
+    board = Leaderboard(recent_heats=2)
+    assert board.add_results(1, [result(1, "2.500000"), result(2, "2.400000")])
+    assert board.add_results(2, [result(1, "2.300000", 7)])
+    assert not board.add_results(1, [result(2, "2.450000"), result(3, "0")])  # Slower, and a DNF
+    standings = board.snapshot()["standings"]
+    assert [(row["Rank"], row["RacerID"], row["TrackID"]) for row in standings] == [(1, 1, 2), (2, 2, 1)]
+    assert standings[0]["RaceCounter"] == 7
+    assert [row["RacerID"] for row in board.snapshot(limit=1)["standings"]] == [1]
+
+
+def test_recent_heats_are_kept_per_track():
+    board = Leaderboard(recent_heats=2)
+    for counter in range(1, 4):
+        board.add_results(1, [result(counter, "3.0", counter)])
+    heats = board.snapshot()["tracks"][1]
+    assert [heat[0]["RaceCounter"] for heat in heats] == [2, 3]
+
+
+class StallingSocket:
+    """Socket whose first send blocks until released, like a display that stopped reading."""
+
+    def __init__(self):
+        self.sent = []
+        self.release = threading.Event()
+        self.sending = threading.Event()
+
+    def sendall(self, payload):
+        self.sending.set()
+        self.release.wait(2)
+        self.sent.append(payload)
+
+
+def test_stalled_display_only_gets_the_newest_leaderboard():
+    sock = StallingSocket()
+    subscriber = _Subscriber(sock, on_failed=lambda s: None)
+    subscriber.push(b"1")
+    assert sock.sending.wait(1)
+    started = time.monotonic()
+    subscriber.push(b"2")
+    subscriber.push(b"3")
+    assert time.monotonic() - started < 0.1  # Pushing never waits on the display
+    sock.release.set()
+    deadline = time.monotonic() + 1
+    while len(sock.sent) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    subscriber.close()
+    assert sock.sent == [b"1", b"3"]
+
+
+def test_track_results_reach_a_subscribed_display():
+    port = free_port()
+    hub = LeaderboardHub("127.0.0.1", port)
+    threading.Thread(target=hub.start_server, daemon=True).start()
+    updates = []
+    received = threading.Event()
+
+    def on_update(message):
+        updates.append(message)
+        if message["standings"]:
+            received.set()
+
+    deadline = time.monotonic() + 2
+    while not hub.running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    client = LeaderboardClient(on_update, "127.0.0.1", port, reconnect_delay=0.05)
+    client.start()
+    while not hub.subscribers and time.monotonic() < deadline:
+        time.sleep(0.01)
+    publisher = TrackResultPublisher(3, "127.0.0.1", port, reconnect_delay=0.05)
+    publisher.publish([result(9, "2.100000")])
+    try:
+        assert received.wait(2)
+    finally:
+        client.stop()
+        publisher.close()
+        hub.shutdown()
+    assert updates[0] == json.loads(json.dumps(updates[0]))
+    assert updates[-1]["standings"][0]["RacerID"] == 9
+    assert updates[-1]["standings"][0]["TrackID"] == 3
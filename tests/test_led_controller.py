@@ -0,0 +1,87 @@
+"""
+LEDController frames, rendered to a VirtualStrip.
+"""
+
+import sys
+import time
+import types
+import numpy as np
+import pytest
+from led.led_controller import ChaseFrames, LEDController, VirtualStrip, WS281xStrip, pack_colors
+
+
+@pytest.fixture
+def strip():
+    return VirtualStrip(12)
+
+
+@pytest.fixture
+def controller(strip):
+    # Three lanes of four LEDs, rendering at 200 frames per second; the render loop is stopped without blanking
+    # the strip, so tests can read the last frame it pushed
+    controller = LEDController(3, 4, strip=strip, fps=200)
+    controller.start()
+    yield controller
+    controller.running = False
+
+
+class PixelStrip:
+    """Stands in for rpi_ws281x.PixelStrip, exposing only its public API."""
+
+    def __init__(self, count, pin, brightness=255, strip_type=None):
+        self.pixels = [0] * count
+        self.set = []  # Pixel indexes passed to setPixelColor since the last show()
+        self.shown = []
+
+    def begin(self):
+        pass
+
+    def setPixelColor(self, index, color):
+        self.set.append(index)
+        self.pixels[index] = color
+
+    def show(self):
+        self.shown.append((list(self.pixels), self.set))
+        self.set = []
+
+
+def test_ws281x_strip_sets_only_changed_pixels(monkeypatch):
+    monkeypatch.setitem(sys.modules, "rpi_ws281x", types.SimpleNamespace(PixelStrip=PixelStrip, WS2811_STRIP_RGB=0))
+    strip = WS281xStrip(6, 18)
+    frame = np.zeros(6, dtype=np.uint32)
+    frame[2:4] = 0x00FF00
+    strip.show(frame)
+    frame = frame.copy()
+    frame[3] = 0
+    frame[5] = 0x0000FF
+    strip.show(frame)
+    assert strip.strip.shown == [([0, 0, 0xFF00, 0xFF00, 0, 0], [2, 3]), ([0, 0, 0xFF00, 0, 0, 0xFF], [3, 5])]
+
+
+def test_pack_colors_follows_the_strip_order():
+    assert pack_colors((1, 2, 3), "RGB") == 0x010203
+    assert pack_colors((1, 2, 3), "GRB") == 0x020103
+    assert pack_colors((255, 0, 0), "RGB", brightness=51) == 0x330000
+
+
+def test_chase_frames_light_one_pixel_per_frame():
+    frames = ChaseFrames(5, 7)
+    assert len(frames) == 5 and frames.nbytes == 0
+    for index in range(5):
+        assert frames[index].tolist() == [7 if i == index else 0 for i in range(5)]
+
+
+def test_placings_light_each_lane_segment(strip, controller):
+    controller.show_placings({2: 1, 3: 2})
+    time.sleep(0.05)
+    assert not strip.pixels[0:4].any()
+    np.testing.assert_array_equal(strip.pixels[4:8], controller.place_frames[(2, 1)][4:8])
+    np.testing.assert_array_equal(strip.pixels[8:12], controller.place_frames[(3, 2)][8:12])
+
+
+def test_unchanged_frame_is_pushed_once(controller):
+    time.sleep(0.02)
+    controller.show_placings({1: 1})
+    time.sleep(0.1)  # About 20 ticks of a static scene
+    assert controller.frames_pushed == 2  # The blank scene, then the placings
+
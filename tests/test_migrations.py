@@ -0,0 +1,112 @@
+"""
+MigrationRunner against a recording stand-in for a MySQL DatabaseHandler.
+"""
+
+import re
+from migrations.runner import REQUIRED_INDEXES, MigrationRunner
+
+CREATE_INDEX_RE = re.compile(r"CREATE\s+(UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s+ON\s+(\w+)\s*\(([^)]*)\)",
+                             re.IGNORECASE)
+
+
+class MySQLStandIn:
+    """Answers the statements MigrationRunner issues the way MySQL would, and records everything executed."""
+
+    dialect = "mysql"
+
+    def __init__(self, indexes=None, plans=None):
+        self.executed = []
+        self.versions = {}
+        self.indexes = indexes or {}  # table -> {index name: (unique, [columns])}
+        self.plans = plans or {}  # first words of a hot query -> EXPLAIN rows
+
+    def query(self, sql, params=None, fetch_one=False):
+        if sql.startswith("SELECT Version FROM schema_migrations"):
+            return [{"Version": version} for version in self.versions]
+        if sql.startswith("SHOW INDEX FROM "):
+            table = sql.split()[-1]
+            return [{"Key_name": name, "Non_unique": int(not unique), "Seq_in_index": seq, "Column_name": column}
+                    for name, (unique, columns) in self.indexes.get(table, {}).items()
+                    for seq, column in enumerate(columns, 1)]
+        if sql.startswith("EXPLAIN "):
+            return next((rows for key, rows in self.plans.items() if key in sql), [])
+        raise AssertionError(f"Unexpected query: {sql}")
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql)
+        if sql.startswith("INSERT INTO schema_migrations"):
+            self.versions[params[0]] = params[1]
+        match = CREATE_INDEX_RE.match(sql)
+        if match:
+            columns = [column.strip() for column in match.group(4).split(",")]
+            self.indexes.setdefault(match.group(3), {})[match.group(2)] = (bool(match.group(1)), columns)
+
+
+def test_pending_migrations_apply_in_order_and_only_once():
+    db = MySQLStandIn()
+    runner = MigrationRunner(db, dialect="mysql")
+    available = runner.available_migrations()
+    assert [version for version, _, _ in available] == sorted(version for version, _, _ in available)
+    assert runner.migrate() == len(available)
+    assert list(db.versions) == [version for version, _, _ in available]
+    executed = len(db.executed)
+    assert runner.migrate() == 0
+    assert db.executed[executed:] == [db.executed[0]]  # Only the schema_migrations bootstrap runs again
+
+
+def test_statements_are_split_without_comments():
+    runner = MigrationRunner(MySQLStandIn(), dialect="mysql")
+    for _, _, path in runner.available_migrations():
+        for statement in runner._read_statements(path):
+            assert statement and not statement.endswith(";")
+            assert "--" not in statement
+
+
+def test_existing_index_is_adopted_not_recreated():
+    db = MySQLStandIn(indexes={"racerinfo": {"ux_racerinfo_rfid": (True, ["RacerRFID"])}})
+    MigrationRunner(db, dialect="mysql").migrate()
+    assert not any("ux_racerinfo_rfid" in sql for sql in db.executed)
+    assert any("ix_raceresults_track_counter" in sql for sql in db.executed)
+
+
+def test_verify_indexes_reports_missing_and_non_unique_indexes():
+    db = MySQLStandIn()
+    runner = MigrationRunner(db, dialect="mysql")
+    runner.migrate()
+    assert runner.verify_indexes() == []
+
+    db.indexes["racerinfo"]["ux_racerinfo_rfid"] = (False, ["RacerRFID"])
+    del db.indexes["raceresults"]["ix_raceresults_track_time"]
+    assert runner.verify_indexes() == [
+        "racerinfo: missing unique index on (RacerRFID)",
+        "raceresults: missing index on (TrackID, RaceTime)",
+    ]
+    assert not runner.run_startup_checks()
+
+
+def test_leading_columns_of_a_wider_index_satisfy_a_requirement():
+    db = MySQLStandIn(indexes={
+        "racerinfo": {"rfid_and_name": (True, ["RacerRFID", "RacerLastName"])},
+        "raceresults": {"wide": (False, ["TrackID", "RaceCounter", "Lane"]), "time": (False, ["TrackID", "RaceTime"])},
+    })
+    assert MigrationRunner(db, dialect="mysql").verify_indexes() == []
+    assert set(REQUIRED_INDEXES) == {"racerinfo", "raceresults"}
+
+
+def test_query_plans_must_use_the_expected_index():
+    plans = {
+        "RI.RacerRFID": [{"table": "RI", "key": "ux_racerinfo_rfid", "Extra": None},
+                         {"table": "PN", "key": "PRIMARY", "Extra": None}],
+        "A.TrackID": [{"table": "A", "key": None, "Extra": "Using where"}],
+    }
+    failures = MigrationRunner(MySQLStandIn(plans=plans), dialect="mysql").check_query_plans()
+    assert failures == ["fetch_race_statistics: table A uses None, expected one of "
+                        "['ix_raceresults_track_counter', 'ix_raceresults_track_time']"]
+
+
+def test_lookup_resolved_from_const_tables_passes():
+    plans = {
+        "RI.RacerRFID": [{"table": None, "key": None, "Extra": "no matching row in const table"}],
+        "A.TrackID": [{"table": "A", "key": "ix_raceresults_track_time", "Extra": None}],
+    }
+    assert MigrationRunner(MySQLStandIn(plans=plans), dialect="mysql").check_query_plans() == []
@@ -0,0 +1,125 @@
+"""
+Pad protocol handling on the Pi: framed taps, resends after a reconnect and pad reboots.
+"""
+
+import threading
+import pytest
+from devices import pico_rfid
+from lane_assignment import LaneAssignmentError
+
+
+class LaneServiceStub:
+    """Stands in for LaneAssignmentService; counts assignments and can hold one up until released."""
+
+    def __init__(self, hold=False):
+        self.calls = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        if not hold:
+            self.release.set()
+
+    def assign(self, rfid, pad_id=None):
+        self.calls.append((rfid, pad_id))
+        self.entered.set()
+        self.release.wait(2)
+        if rfid == "unknown":
+            raise LaneAssignmentError("unknown racer")
+        return len(self.calls), {"RacerFirstName": "Sam", "RacerLastName": "Oak"}
+
+
+@pytest.fixture(autouse=True)
+def fresh_protocol_state(monkeypatch):
+    monkeypatch.setattr(pico_rfid, "pads", {})
+    monkeypatch.setattr(pico_rfid, "lane_service", None)
+    pico_rfid.button_pressed.clear()
+
+
+def frame(pad, seq, frame_type, payload=""):
+    return pico_rfid.handle_pico_command(f"{pad}|{seq}|{frame_type}|{payload}")
+
+
+def test_tap_before_the_database_is_up_is_refused():
+    assert frame("1", 0, "HELLO", "boot-a") == "0|ACK|"
+    assert frame("1", 1, "TAP", "tag1") == "1|ERR|Not ready"
+    assert pico_rfid.get_latest_rfid("1") == "tag1"
+
+
+def test_tap_is_assigned_once_and_a_resend_gets_the_same_reply():
+    service = LaneServiceStub()
+    pico_rfid.set_lane_service(service)
+    frame("1", 0, "HELLO", "boot-a")
+    reply = frame("1", 1, "TAP", "tag1")
+    assert reply == "1|ACK|1|Lane 1: Sam Oak"
+    assert frame("1", 1, "TAP", "tag1") == reply  # Resent after a reconnect
+    assert service.calls == [("tag1", "1")]
+
+
+def test_resend_older_than_the_reply_cache_is_a_duplicate():
+    service = LaneServiceStub()
+    pico_rfid.set_lane_service(service)
+    frame("1", 0, "HELLO", "boot-a")
+    for seq in range(1, pico_rfid.REPLY_CACHE_SIZE + 2):
+        frame("1", seq, "TAP", f"tag{seq}")
+    assert frame("1", 2, "TAP", "tag2") == "2|ACK|2|Lane 2: Sam Oak"  # Still cached
+    assert frame("1", 1, "TAP", "tag1") == "1|DUP|Already handled"
+    assert len(service.calls) == pico_rfid.REPLY_CACHE_SIZE + 1
+
+
+def test_resend_while_the_original_is_in_flight_waits_for_its_reply():
+    service = LaneServiceStub(hold=True)
+    pico_rfid.set_lane_service(service)
+    frame("1", 0, "HELLO", "boot-a")
+    replies = []
+    original = threading.Thread(target=lambda: replies.append(frame("1", 1, "TAP", "tag1")))
+    original.start()
+    assert service.entered.wait(1)
+    resend = threading.Thread(target=lambda: replies.append(frame("1", 1, "TAP", "tag1")))
+    resend.start()
+    resend.join(0.1)
+    assert resend.is_alive()  # Waiting on the original, not dispatching a second time
+    service.release.set()
+    original.join(1)
+    resend.join(1)
+    assert replies == ["1|ACK|1|Lane 1: Sam Oak"] * 2
+    assert len(service.calls) == 1
+
+
+def test_new_boot_resets_the_sequence():
+    service = LaneServiceStub()
+    pico_rfid.set_lane_service(service)
+    frame("1", 0, "HELLO", "boot-a")
+    frame("1", 1, "TAP", "tag1")
+    frame("1", 0, "HELLO", "boot-b")
+    assert frame("1", 1, "TAP", "tag2").startswith("1|ACK|2|")
+    assert [rfid for rfid, _ in service.calls] == ["tag1", "tag2"]
+
+
+def test_pads_keep_separate_sequences():
+    service = LaneServiceStub()
+    pico_rfid.set_lane_service(service)
+    for pad in ("1", "2"):
+        frame(pad, 0, "HELLO", f"boot-{pad}")
+        frame(pad, 1, "TAP", f"tag{pad}")
+    assert service.calls == [("tag1", "1"), ("tag2", "2")]
+
+
+def test_refused_tap_is_an_error_reply():
+    pico_rfid.set_lane_service(LaneServiceStub())
+    assert frame("1", 1, "TAP", "unknown") == "1|ERR|Unknown racer"
+
+
+def test_button_frame_wakes_the_workflow():
+    assert frame("1", 1, "BTN") == "1|ACK|Next Tag Please"
+    assert pico_rfid.wait_for_button_press(timeout=0)
+    assert not pico_rfid.wait_for_button_press(timeout=0)
+
+
+def test_heartbeat_and_unknown_frames():
+    assert frame("1", 0, "HB") == "0|ACK|"
+    assert frame("1", 1, "LED", "on") == "1|ERR|Unknown command"
+    assert pico_rfid.handle_pico_command("garbage") == "Unknown command"
+
+
+def test_legacy_rfid_command():
+    pico_rfid.set_lane_service(LaneServiceStub())
+    assert pico_rfid.handle_pico_command("RFID:tag9") == "Lane 1: Sam Oak"
@@ -0,0 +1,140 @@
+"""
+RaceManager's double-buffered heats: the next heat loads while the current one races, and finished heats wait for
+their database write.
+"""
+
+import pytest
+from db_handler import DatabaseHandler
+from event_bus import EventBus, bus as shared_bus
+from lane_assignment import LaneAssignmentService
+from migrations.runner import MigrationRunner
+from race_manager import RaceManager
+from storage import create_backend
+
+
+class Racers:
+    """Answers the racer lookup for tags "tag<RacerID>"."""
+
+    def query(self, sql, params=None, fetch_one=False):
+        number = int(params[0][3:])
+        return {"RacerID": number, "RacerCarNumber": number, "RacerCarName": f"Car {number}", "RacerPack": 1,
+                "RacerFirstName": f"First{number}", "RacerLastName": f"Last{number}"}
+
+
+@pytest.fixture
+def bus():
+    return EventBus()
+
+
+@pytest.fixture
+def track(bus):
+    manager = RaceManager(Racers(), 10, 1, 1, "normal")
+    return manager, LaneAssignmentService(manager, 2, bus=bus)
+
+
+@pytest.fixture
+def recorded():
+    # RaceManager announces written heats on the shared bus
+    heats = []
+    handler = lambda _, data: heats.append((data["race_counter"], len(data["results"])))
+    shared_bus.subscribe("heat_recorded", handler)
+    yield heats
+    shared_bus.unsubscribe("heat_recorded", handler)
+
+
+def lanes(heat):
+    return {race["Lane"]: race["RacerRFID"] for race in heat.races}
+
+
+def test_taps_load_the_next_heat_while_the_current_one_races(track):
+    manager, service = track
+    service.assign("tag1", "1")
+    service.assign("tag2", "1")
+    manager.start_heat()
+    assert not service.wait_until_loaded(timeout=0)  # Waits on the next heat now
+    assert service.assign("tag1", "1")[0] == 1  # Racing now is no reason to refuse the next heat
+    service.assign("tag3", "1")
+    assert service.wait_until_loaded(timeout=0)
+    assert lanes(manager.current) == {1: "tag1", 2: "tag2"}
+    assert lanes(manager.staging) == {1: "tag1", 2: "tag3"}
+
+    finished = manager.finish_heat()
+    assert lanes(finished) == {1: "tag1", 2: "tag2"}
+    assert manager.pending_writes() == [finished]
+    assert lanes(manager.current) == {1: "tag1", 2: "tag3"}
+    assert manager.staging.races == [] and manager.loading is manager.current
+
+
+def test_finishes_are_recorded_on_the_racing_heat(track):
+    manager, service = track
+    service.assign("tag1", "1")
+    manager.start_heat()
+    service.assign("tag2", "1")
+    manager.record_race_finish(1, 2.345, 1)
+    assert manager.current.races[0]["RaceTime"] == 2.345
+    assert manager.staging.races[0]["RaceTime"] == "00.000000"
+
+
+def test_next_counter_is_stamped_on_racers_loaded_early(track):
+    manager, service = track
+    service.assign("tag1", "1")
+    manager.start_heat()
+    service.assign("tag2", "1")
+    assert manager.staging.race_counter == 10
+    manager.finish_heat()
+    manager.heat = 2
+    manager.increment_race_counter()
+    assert manager.current.race_counter == 11
+    assert manager.current.races[0]["Heat"] == 2
+    assert manager.pending_writes()[0].race_counter == 10  # The finished heat keeps its own counter
+
+
+def test_finished_heats_are_written_after_the_swap_in_order(recorded):
+    db = DatabaseHandler(max_retries=1, retry_delay=0, backend=create_backend("sqlite", path=":memory:"))
+    MigrationRunner(db).migrate()
+    manager = RaceManager(db, 10, 1, 1, "normal")
+    heats = []
+    for counter, tags in ((10, ("tag1", "tag2")), (11, ("tag3",))):
+        manager.race_counter = counter
+        with manager.lock:
+            for lane, rfid in enumerate(tags, start=1):
+                manager.initialize_race_entry(counter, lane, rfid, Racers().query(None, (rfid,)))
+        manager.start_heat()
+        heats.append(manager.finish_heat())
+    assert manager.pending_writes() == heats
+    for heat in heats:
+        manager.write_races_to_db(heat)
+    assert manager.pending_writes() == []
+    assert recorded == [(10, 2), (11, 1)]
+    rows = db.query("SELECT RaceCounter, Lane, RacerRFID FROM raceresults ORDER BY ResultID")
+    assert [(row["RaceCounter"], row["Lane"], row["RacerRFID"]) for row in rows] == [
+        (10, 1, "tag1"), (10, 2, "tag2"), (11, 1, "tag3")]
+
+
+def test_both_buffers_and_unwritten_heats_survive_a_restart(track):
+    manager, service = track
+    service.assign("tag1", "1")
+    manager.start_heat()
+    manager.finish_heat()
+    service.assign("tag2", "1")
+    manager.start_heat()
+    service.assign("tag3", "2")
+    state = manager.snapshot()
+
+    restored = RaceManager(Racers(), 0, 0, 1, "normal")
+    restored.restore(state)
+    assert restored.racing
+    assert lanes(restored.current) == {1: "tag2"}
+    assert lanes(restored.staging) == {1: "tag3"}
+    assert [lanes(heat) for heat in restored.pending_writes()] == [{1: "tag1"}]
+    assert restored.is_duplicate_rfid("tag3") and not restored.is_duplicate_rfid("tag2")
+
+
+def test_free_mode_drops_finished_heats_without_writing():
+    manager = RaceManager(None, 10, 1, 1, "free")
+    with manager.lock:
+        manager.initialize_race_entry(10, 1, "tag1", Racers().query(None, ("tag1",)))
+    manager.start_heat()
+    finished = manager.finish_heat()
+    manager.write_races_to_db(finished)
+    assert manager.pending_writes() == []
@@ -0,0 +1,60 @@
+"""
+PlacingEngine placings, ties and independence from the order finishes are reported in.
+"""
+
+import itertools
+import pytest
+from event_bus import EventBus
+from placing import PlacingEngine
+
+FINISHES = {1: 2.5000, 2: 2.1000, 3: 2.1004, 4: 3.0000}  # Lanes 2 and 3 within a 1 ms window
+
+
+def run(finishes, tie_policy="share", tie_window_ms=1.0):
+    engine = PlacingEngine(tie_window_ms, tie_policy, bus=EventBus())
+    for lane, finish_time in finishes:
+        engine.add_finish(lane, finish_time)
+    return engine
+
+
+def test_share_gives_tied_lanes_the_same_place():
+    engine = run(FINISHES.items())
+    assert engine.placings() == {2: 1, 3: 1, 1: 3, 4: 4}
+    assert engine.ties() == [[2, 3]]
+
+
+def test_time_policy_keeps_timestamp_order_but_reports_the_tie():
+    engine = run(FINISHES.items(), tie_policy="time")
+    assert engine.placings() == {2: 1, 3: 2, 1: 3, 4: 4}
+    assert engine.ties() == [[2, 3]]
+
+
+@pytest.mark.parametrize("tie_policy", ["share", "time"])
+def test_result_does_not_depend_on_arrival_order(tie_policy):
+    expected = run(FINISHES.items(), tie_policy).placings()
+    for order in itertools.permutations(FINISHES.items()):
+        assert run(order, tie_policy).placings() == expected
+
+
+def test_tie_group_is_anchored_on_its_first_finish():
+    # Each finish is within the window of the one before, but the third is outside the first one's window
+    engine = run([(1, 1.0000), (2, 1.0008), (3, 1.0016)])
+    assert engine.placings() == {1: 1, 2: 1, 3: 3}
+
+
+def test_repeated_finish_keeps_the_first_and_events_report_changes():
+    bus = EventBus()
+    events = []
+    bus.subscribe("placings_changed", lambda topic, data: events.append(data["changed"]))
+    engine = PlacingEngine(1.0, "share", bus=bus)
+    assert engine.add_finish(1, 2.0) == {1: 1}
+    assert engine.add_finish(2, 1.5) == {2: 1, 1: 2}
+    assert engine.add_finish(2, 1.0) == {}
+    assert events == [{1: 1}, {2: 1, 1: 2}]
+    engine.reset()
+    assert engine.placings() == {}
+
+
+def test_unknown_tie_policy_is_rejected():
+    with pytest.raises(ValueError):
+        PlacingEngine(1.0, "coin toss", bus=EventBus())
@@ -0,0 +1,98 @@
+"""
+RaceCounterAllocator on an in-memory SQLite results database shared by several tracks.
+"""
+
+import pytest
+from coordination.race_counter import RaceCounterAllocator
+from db_handler import DatabaseHandler
+from event_bus import EventBus
+from migrations.runner import MigrationRunner
+from race_manager import RaceManager
+from storage import create_backend
+
+
+@pytest.fixture
+def db():
+    handler = DatabaseHandler(max_retries=1, retry_delay=0, backend=create_backend("sqlite", path=":memory:"))
+    MigrationRunner(handler).migrate()
+    return handler
+
+
+def record(db, track, race_counter):
+    db.execute("INSERT INTO raceresults (RaceCounter, TrackID, Lane) VALUES (%s, %s, %s)", (race_counter, track, 1))
+
+
+def test_sequence_counters_never_collide_between_tracks(db):
+    tracks = [RaceCounterAllocator(db, track, "sequence", block_size=3) for track in (1, 2, 3)]
+    issued = [allocator.next() for _ in range(7) for allocator in tracks]
+    assert len(set(issued)) == len(issued)
+    one = [counter for counter in issued[::3]]
+    assert one == sorted(one)
+
+
+def test_a_lone_sequence_track_counts_up_without_gaps(db):
+    allocator = RaceCounterAllocator(db, 4, "sequence", block_size=5)
+    assert allocator.current() is None
+    counters = [allocator.next() for _ in range(12)]
+    assert counters == list(range(counters[0], counters[0] + 12))
+    assert allocator.current() == counters[-1]
+
+
+def test_sequence_resumes_after_the_last_recorded_counter(db):
+    allocator = RaceCounterAllocator(db, 1, "sequence", block_size=10)
+    for _ in range(3):
+        record(db, 1, allocator.next())
+    resumed = RaceCounterAllocator(db, 1, "sequence", block_size=10)
+    assert resumed.current() == allocator.current()
+    assert resumed.next() == allocator.current() + 1
+
+
+def test_resume_from_the_state_journal_skips_the_lookup(db):
+    allocator = RaceCounterAllocator(db, 1, "sequence", block_size=10)
+    first = allocator.next()
+    resumed = RaceCounterAllocator(db, 1, "sequence", block_size=10, resume_from=first + 4)
+    assert resumed.next() == first + 5
+
+
+def test_range_counters_stay_in_the_track_slice(db):
+    allocator = RaceCounterAllocator(db, 2, "range", range_size=100)
+    assert allocator.next() == 200
+    record(db, 2, 250)
+    assert RaceCounterAllocator(db, 2, "range", range_size=100).next() == 251
+
+
+def test_exhausted_range_is_an_error(db):
+    allocator = RaceCounterAllocator(db, 1, "range", range_size=2)
+    allocator.next()
+    allocator.next()
+    with pytest.raises(RuntimeError):
+        allocator.next()
+
+
+def test_unknown_strategy_is_rejected(db):
+    with pytest.raises(ValueError):
+        RaceCounterAllocator(db, 1, "random")
+
+
+RACER = {"RacerID": 1, "RacerCarNumber": 1, "RacerCarName": "Car 1", "RacerPack": 1, "RacerFirstName": "First",
+         "RacerLastName": "Last"}
+
+
+def load_and_race(manager, rfid):
+    with manager.lock:
+        manager.initialize_race_entry(manager.race_counter, 1, rfid, RACER)
+    manager.start_heat()
+    return manager.finish_heat()
+
+
+def test_first_heat_takes_a_new_counter_when_it_starts(db):
+    record(db, 1, 100)  # Races from an earlier session
+    record(db, 1, 101)
+    allocator = RaceCounterAllocator(db, 1, "range", range_size=100)
+    used = allocator.current()
+    assert used == 101
+    manager = RaceManager(db, None, 1, 1, "normal", counter_allocator=allocator, bus=EventBus())
+    assert allocator.current() == used  # Nothing allocated until a heat runs
+    assert load_and_race(manager, "tag1").race_counter == used + 1
+    manager.increment_race_counter()
+    assert load_and_race(manager, "tag2").race_counter == used + 2
@@ -0,0 +1,75 @@
+"""
+RelayController shift-register ordering, driven through FakeGPIOBackend.
+"""
+
+import time
+import pytest
+from sensors.gpio_backend import FakeGPIOBackend
+from sensors.relay_ctrl import RelayController
+
+DATA, CLOCK, LATCH = 5, 6, 13
+
+
+@pytest.fixture
+def backend():
+    return FakeGPIOBackend()
+
+
+def relays(backend, **kwargs):
+    controller = RelayController(DATA, CLOCK, LATCH, backend=backend, **kwargs)
+    backend.writes.clear()  # Only what the test itself shifts out
+    return controller
+
+
+@pytest.fixture
+def controller(backend):
+    return relays(backend)
+
+
+def shifted_bits(writes):
+    # Data level at each rising clock edge, first shifted first
+    bits, data = [], 0
+    for pin, value, _ in writes:
+        if pin == DATA:
+            data = value
+        elif pin == CLOCK and value == 1:
+            bits.append(data)
+    return bits
+
+
+def test_every_bit_is_shifted_before_the_latch(backend, controller):
+    controller.set_relays({0: True, 2: True})
+    pins = [pin for pin, _, _ in backend.writes]
+    first_latch = pins.index(LATCH)
+    assert LATCH not in pins[:first_latch] and DATA not in pins[first_latch:] and CLOCK not in pins[first_latch:]
+    assert [(pin, value) for pin, value, _ in backend.writes[first_latch:]] == [(LATCH, 1), (LATCH, 0)]
+    assert shifted_bits(backend.writes) == [0, 0, 0, 0, 0, 1, 0, 1]  # Output 7 first, output 0 last
+
+
+def test_fire_switches_all_lanes_on_one_latch_edge(backend):
+    controller = relays(backend, outputs=16)
+    latched_at = controller.fire([1, 3, 10], hold_ms=50)
+    mask, at, duration = controller.latch_log[-1]
+    assert mask == 0b10_0000_0101
+    assert at == latched_at
+    assert duration >= 0
+    assert [value for pin, value, _ in backend.writes if pin == LATCH] == [1, 0]
+    assert len(shifted_bits(backend.writes)) == 16
+    time.sleep(0.2)
+    assert controller.state == 0  # Released together after hold_ms
+    assert controller.latch_log[-1][0] == 0
+
+
+def test_set_relay_keeps_other_relays(backend, controller):
+    controller.set_relay(1, True)
+    controller.set_relay(4, True)
+    controller.set_relay(1, False)
+    assert controller.state == 0b1_0000
+    controller.reset_all()
+    assert controller.state == 0
+
+
+def test_active_low_inverts_the_shifted_levels(backend):
+    controller = relays(backend, outputs=4, active_low=True)
+    controller.set_relay(0, True)
+    assert shifted_bits(backend.writes) == [1, 1, 1, 0]
@@ -0,0 +1,152 @@
+"""
+Lane-rotation charts, the stored schedule on in-memory SQLite, and loading a scheduled heat from the pads.
+"""
+
+import itertools
+from collections import Counter
+import pytest
+from db_handler import DatabaseHandler
+from event_bus import EventBus
+from lane_assignment import LaneAssignmentError, LaneAssignmentService
+from migrations.runner import MigrationRunner
+from race_manager import RaceManager
+from scheduler import HeatScheduler, build_chart
+from storage import create_backend
+
+
+def meetings(chart):
+    return Counter(frozenset(pair) for heat in chart for pair in itertools.combinations(filter(None, heat), 2))
+
+
+@pytest.mark.parametrize("cars, lanes", [(4, 4), (9, 4), (13, 3), (40, 6)])
+def test_every_car_runs_every_lane_once(cars, lanes):
+    chart = build_chart(range(1, cars + 1), lanes, seed=1)
+    assert len(chart) == cars
+    for heat in chart:
+        assert len(set(heat)) == lanes
+    for lane in range(lanes):
+        assert sorted(heat[lane] for heat in chart) == list(range(1, cars + 1))
+
+
+def test_opponents_are_spread_out():
+    chart = build_chart(range(1, 18), 4, seed=1)  # 6 lane pairs fit in the 7 difference classes other than 1
+    assert max(meetings(chart).values()) == 1
+    assert len(meetings(chart)) == 17 * 6
+
+
+def test_consecutive_heats_avoid_the_same_car_when_there_is_room():
+    chart = build_chart(range(1, 21), 4, seed=2)
+    for previous, heat in zip(chart, chart[1:]):
+        assert not set(previous) & set(heat)
+
+
+def test_extra_passes_pick_new_pairings():
+    chart = build_chart(range(1, 16), 3, passes=2, seed=3)
+    assert len(chart) == 30
+    for lane in range(3):
+        assert Counter(heat[lane] for heat in chart) == {car: 2 for car in range(1, 16)}
+    assert max(meetings(chart).values()) == 2
+    assert len(meetings(chart)) >= 90 - 15  # At most one difference class (15 pairs) is met in both passes
+
+
+def test_fewer_cars_than_lanes_leaves_lanes_empty():
+    chart = build_chart([7, 8], 4, seed=1)
+    assert len(chart) == 4
+    assert all(heat.count(None) == 2 for heat in chart)
+    for lane in range(4):
+        assert sorted(filter(None, (heat[lane] for heat in chart))) == [7, 8]
+
+
+@pytest.fixture
+def db():
+    handler = DatabaseHandler(max_retries=1, retry_delay=0, backend=create_backend("sqlite", path=":memory:"))
+    MigrationRunner(handler).migrate()
+    for number in range(1, 8):
+        handler.execute(
+            "INSERT INTO racerinfo (RacerID, RacerFirstName, RacerLastName, RacerRFID, RacerCarNumber, "
+            "RacerInclude, RacerCarChecked) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            (number, f"First{number}", f"Last{number}", f"tag{number}", 100 - number, 1, int(number != 7))
+        )
+    return handler
+
+
+def test_roster_is_checked_in_racers_in_car_order(db):
+    assert HeatScheduler(db, track_id=1, lanes=3).load_roster() == [6, 5, 4, 3, 2, 1]
+
+
+def test_stored_schedule_runs_heat_by_heat(db):
+    scheduler = HeatScheduler(db, track_id=1, lanes=3)
+    assert not scheduler.exists()
+    chart = scheduler.create(seed=4)
+    assert scheduler.has_schedule()
+    for number, entries in enumerate(chart, start=1):
+        heat_number, lanes = scheduler.next_heat()
+        assert heat_number == number
+        assert {lane: racer["RacerID"] for lane, racer in lanes.items()} == dict(enumerate(entries, start=1))
+        assert lanes[1]["RacerRFID"] == f"tag{entries[0]}"
+        scheduler.mark_raced(heat_number, 100 + number)
+    assert scheduler.next_heat() is None
+    assert not scheduler.has_schedule() and scheduler.exists()
+    assert HeatScheduler(db, track_id=2, lanes=3).next_heat() is None  # Each track has its own schedule
+
+
+def test_staged_heat_is_the_one_after_the_heat_being_raced(db):
+    scheduler = HeatScheduler(db, track_id=1, lanes=3)
+    chart = scheduler.create(seed=4)
+    scheduler.stage_next(after=1)
+    heat_number, lanes = scheduler.staged_heat(after=1)
+    assert heat_number == 2
+    assert [lanes[lane]["RacerID"] for lane in (1, 2, 3)] == chart[1]
+    assert scheduler.staged_heat(after=1)[0] == 2  # Without a staged lookup it queries directly
+
+
+def test_new_chart_replaces_the_stored_one(db):
+    scheduler = HeatScheduler(db, track_id=1, lanes=3)
+    scheduler.create(seed=4)
+    scheduler.mark_raced(1, 101)
+    scheduler.create(seed=5)
+    assert scheduler.next_heat()[0] == 1
+    assert db.query("SELECT COUNT(*) AS n FROM heatschedule WHERE TrackID = 1", fetch_one=True)["n"] == 18
+
+
+def racer(number):
+    return {"RacerID": number, "RacerRFID": f"tag{number}", "RacerFirstName": f"First{number}",
+            "RacerLastName": f"Last{number}", "RacerCarNumber": number, "RacerCarName": None, "RacerPack": None}
+
+
+@pytest.fixture
+def staged():
+    bus = EventBus()
+    manager = RaceManager(None, 1, 1, 1, "normal", bus=bus)  # No database: a staged heat never looks racers up
+    service = LaneAssignmentService(manager, 4, bus=bus)
+    service.stage({1: racer(5), 3: racer(2), 4: racer(9)})
+    return bus, manager, service
+
+
+def test_staged_racers_go_to_their_scheduled_lane(staged):
+    bus, manager, service = staged
+    assert service.assign("tag2", "1")[0] == 3
+    assert service.assign("tag9", "1")[0] == 4
+    with pytest.raises(LaneAssignmentError, match="not in this heat"):
+        service.assign("tag6", "1")
+    assert not service.wait_until_loaded(timeout=0)
+    service.assign("tag5", "2")
+    assert service.wait_until_loaded(timeout=0)  # Three racers fill the heat; lane 2 stays empty
+    with pytest.raises(LaneAssignmentError, match="duplicate"):
+        service.assign("tag5", "2")
+
+
+def test_no_shows_are_skipped_and_late_taps_refused(staged):
+    bus, manager, service = staged
+    skipped_events = []
+    bus.subscribe("racers_skipped", lambda _, data: skipped_events.append(data["racers"]))
+    assert service.skip_missing() == {}  # Nobody has tapped in yet
+    service.assign("tag2", "1")
+    skipped = service.skip_missing()
+    assert sorted(skipped) == [1, 4]
+    assert skipped_events == [skipped]
+    assert service.wait_until_loaded(timeout=0)
+    with pytest.raises(LaneAssignmentError, match="heat full"):
+        service.assign("tag5", "1")
+    service.unstage()
+    assert service.expected == 4
@@ -0,0 +1,101 @@
+"""
+SerialCommunicator against a stand-in Nano on a fake serial module: pings, other replies, and the write lock.
+"""
+
+import importlib
+import queue
+import sys
+import threading
+import time
+import types
+import pytest
+
+
+class Nano:
+    """Stands in for serial.Serial wired to the sketch: "<ACK>" for every command, "<PONG|n>" for "PING|n"."""
+
+    def __init__(self, port, baud, timeout=1):
+        self.timeout = timeout
+        self.is_open = True
+        self.pong_delay = 0.0
+        self.answer_pings = True
+        self.written = []
+        self.incoming = queue.Queue()
+
+    def write(self, data):
+        self.written.append(data)
+        command = data.decode().strip()
+        if command.startswith("PING|"):
+            if self.answer_pings:
+                reply = f"<PONG|{command[5:]}>\n".encode()
+                threading.Timer(self.pong_delay, self.incoming.put, (reply,)).start()
+        else:
+            self.incoming.put(b"<ACK>\n")
+
+    def readline(self):
+        try:
+            return self.incoming.get(timeout=self.timeout)
+        except queue.Empty:
+            return b""
+
+    def close(self):
+        self.is_open = False
+
+
+@pytest.fixture
+def serial_comm(monkeypatch):
+    fake = types.SimpleNamespace(Serial=Nano, SerialException=OSError)
+    monkeypatch.setitem(sys.modules, "serial", fake)
+    monkeypatch.delitem(sys.modules, "comms.serial_comm", raising=False)
+    yield importlib.import_module("comms.serial_comm")
+    sys.modules.pop("comms.serial_comm", None)  # Bound to the fake serial module
+
+
+@pytest.fixture
+def comm(serial_comm):
+    comm = serial_comm.SerialCommunicator("/dev/fake", 9600, timeout=0.2)
+    yield comm
+    comm.close()
+
+
+def test_ping_leaves_other_replies_for_read(comm):
+    comm.send("LED|1|1|3|FULL|80|RED\n")
+    comm.ser.pong_delay = 0.01
+    assert 0.01 <= comm.ping() < 0.1
+    comm.send("CLEAR_LCD\n")
+    assert [comm.read(), comm.read()] == ["<ACK>", "<ACK>"]
+    assert comm.read() == ""  # Nothing left, and the pong was never handed to read()
+
+
+def test_commands_are_not_held_up_by_a_slow_ping(comm):
+    comm.ser.pong_delay = 0.15
+    pinger = threading.Thread(target=comm.ping)
+    pinger.start()
+    time.sleep(0.02)  # The ping is written and waiting
+    started = time.monotonic()
+    comm.send("CLEAR_LCD\n")
+    assert time.monotonic() - started < 0.05
+    pinger.join()
+    assert [line.decode().strip() for line in comm.ser.written] == ["PING|1", "CLEAR_LCD"]
+
+
+def test_unanswered_ping_times_out_and_its_late_reply_is_dropped(comm):
+    comm.ser.answer_pings = False
+    with pytest.raises(TimeoutError, match="ping 1"):
+        comm.ping()
+    comm.ser.incoming.put(b"<PONG|1>\n")
+    comm.ser.answer_pings = True
+    assert comm.ping() < 0.1  # Timed to its own reply, not the late one
+    assert comm.read() == ""
+    assert comm.pongs == {} and comm.waiting == set()
+
+
+def test_concurrent_pings_each_get_their_own_reply(comm):
+    comm.ser.pong_delay = 0.02
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(comm.ping())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 4 and all(0.02 <= result < 0.15 for result in results)
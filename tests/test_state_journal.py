@@ -0,0 +1,101 @@
+"""
+RaceStateJournal files and RaceManager's crash recovery through it.
+"""
+
+import time
+from event_bus import EventBus
+from race_manager import RaceManager
+from state_journal import RaceStateJournal
+
+RACER = {"RacerID": 3, "RacerCarNumber": 33, "RacerCarName": "Comet", "RacerPack": 1, "RacerFirstName": "Max",
+         "RacerLastName": "Ng"}
+
+
+class SlowJournal(RaceStateJournal):
+    """Counts writes and takes a while over each, like an fsync on an SD card."""
+
+    def __init__(self, path):
+        super().__init__(path, fsync=False)
+        self.writes = 0
+
+    def write(self, data):
+        time.sleep(0.02)
+        self.writes += 1
+        super().write(data)
+
+
+def make_manager(journal):
+    return RaceManager(None, 40, 2, 1, "normal", journal=journal, bus=EventBus())
+
+
+def load_lane(manager, lane, rfid):
+    with manager.lock:
+        manager.initialize_race_entry(manager.race_counter, lane, rfid, dict(RACER, RacerID=lane))
+
+
+def test_snapshot_round_trip(tmp_path):
+    journal = RaceStateJournal(str(tmp_path / "state.json"))
+    assert journal.load() is None
+    journal.save({"RaceCounter": 7, "Races": [{"Lane": 1}]})
+    assert journal.load() == {"RaceCounter": 7, "Races": [{"Lane": 1}]}
+    assert not (tmp_path / "state.json.tmp").exists()
+    journal.clear()
+    assert journal.load() is None
+
+
+def test_torn_temporary_file_leaves_the_last_snapshot(tmp_path):
+    journal = RaceStateJournal(str(tmp_path / "state.json"))
+    journal.save({"RaceCounter": 7})
+    (tmp_path / "state.json.tmp").write_text('{"RaceCounter": 8, "Ra')  # Power lost mid-write
+    assert journal.load() == {"RaceCounter": 7}
+
+
+def test_unreadable_journal_is_ignored(tmp_path):
+    (tmp_path / "state.json").write_text("not json")
+    assert RaceStateJournal(str(tmp_path / "state.json")).load() is None
+
+
+def test_interrupted_heat_is_restored_after_a_crash(tmp_path):
+    journal = RaceStateJournal(str(tmp_path / "state.json"), fsync=False)
+    manager = make_manager(journal)
+    load_lane(manager, 1, "tag1")
+    load_lane(manager, 2, "tag2")
+    manager.start_heat()
+    manager.record_start_times([1, 2], 100.0)
+    load_lane(manager, 1, "tag3")  # Next heat, loading while this one races
+    assert manager.flush_state(timeout=2)
+
+    restored = make_manager(RaceStateJournal(str(tmp_path / "state.json")))
+    restored.restore(journal.load())
+    assert restored.snapshot() == manager.snapshot()
+    assert restored.has_interrupted_heat()
+    assert restored.racing_start_times == {1: 100.0, 2: 100.0}
+    assert restored.is_duplicate_rfid("tag3") and not restored.is_duplicate_rfid("tag1")
+
+
+def test_voided_heat_keeps_its_race_counter(tmp_path):
+    journal = RaceStateJournal(str(tmp_path / "state.json"), fsync=False)
+    manager = make_manager(journal)
+    load_lane(manager, 1, "tag1")
+    manager.void_interrupted_heat()
+    assert manager.flush_state(timeout=2)
+    state = journal.load()
+    assert state["Races"] == [] and state["RaceCounter"] == 40
+
+
+def test_bursts_of_changes_are_coalesced(tmp_path):
+    journal = SlowJournal(str(tmp_path / "state.json"))
+    manager = make_manager(journal)
+    started = time.monotonic()
+    for lane in range(1, 51):
+        load_lane(manager, lane, f"tag{lane}")
+    assert time.monotonic() - started < 0.5  # Changes never wait for the disk
+    assert manager.flush_state(timeout=5)
+    assert journal.writes < 10
+    assert len(journal.load()["Races"]) == 50
+
+
+def test_manager_without_a_journal_is_always_flushed():
+    manager = make_manager(None)
+    load_lane(manager, 1, "tag1")
+    assert manager.flush_state(timeout=0)
@@ -0,0 +1,93 @@
+"""
+StepperController pulse trains: the waveform handed to a stand-in pigpio, and the timing thread on FakeGPIOBackend.
+"""
+
+import sys
+import types
+import pytest
+from sensors.gpio_backend import FakeGPIOBackend
+from sensors.stepper_ctrl import StepperController
+
+STEP, DIR = 20, 21
+
+
+class Pi:
+    """Stands in for a connected pigpio.pi(); keeps the pulses of the last wave."""
+
+    connected = True
+
+    def __init__(self):
+        self.pulses = []
+        self.levels = {}
+
+    def set_mode(self, pin, mode):
+        pass
+
+    def write(self, pin, level):
+        self.levels[pin] = level
+
+    def wave_clear(self):
+        self.pulses = []
+
+    def wave_add_generic(self, pulses):
+        self.pulses += pulses
+
+    def wave_create(self):
+        return 0
+
+    def wave_send_once(self, wave):
+        pass
+
+    def wave_tx_busy(self):
+        return 0
+
+    def wave_delete(self, wave):
+        pass
+
+    def stop(self):
+        pass
+
+
+@pytest.fixture
+def pi(monkeypatch):
+    pi = Pi()
+    pulse = lambda on, off, delay: types.SimpleNamespace(gpio_on=on, gpio_off=off, delay=delay)
+    monkeypatch.setitem(sys.modules, "pigpio", types.SimpleNamespace(pi=lambda: pi, pulse=pulse, OUTPUT=1))
+    return pi
+
+
+def rising_edges(pulses, pin):
+    edges, level = 0, 0
+    for pulse in pulses:
+        if pulse.gpio_on & 1 << pin and not level:
+            edges, level = edges + 1, 1
+        if pulse.gpio_off & 1 << pin:
+            level = 0
+    return edges, level
+
+
+@pytest.mark.parametrize("steps", [1, 7, 200])
+def test_pigpio_wave_has_one_rising_edge_per_step(pi, steps):
+    stepper = StepperController(STEP, DIR, max_speed=2000, acceleration=20000)
+    assert stepper.pi is pi
+    stepper.move_steps(steps, direction=-1).result(timeout=2)
+    assert rising_edges(pi.pulses, STEP) == (steps, 0)  # And STEP is left low
+    assert pi.levels[DIR] == 0
+    assert stepper.position == -steps
+
+
+def test_pigpio_wave_timing_follows_the_profile(pi):
+    stepper = StepperController(STEP, DIR, max_speed=2000, acceleration=20000)
+    stepper.move_steps(50).result(timeout=2)
+    periods = [gap.delay + high.delay for gap, high in zip(pi.pulses[0::2], pi.pulses[1::2])]
+    assert periods == [int(delay * 1_000_000) for delay in stepper.profile(50)]
+
+
+def test_timing_thread_pulses_step_once_per_step():
+    backend = FakeGPIOBackend()
+    stepper = StepperController(STEP, DIR, max_speed=4000, acceleration=80000, backend=backend)
+    backend.writes.clear()
+    started, finished = stepper.move_steps(30).result(timeout=2)
+    levels = [value for pin, value, _ in backend.writes if pin == STEP]
+    assert levels == [1, 0] * 30
+    assert finished - started >= sum(stepper.profile(30)) * 0.9
@@ -0,0 +1,139 @@
+"""
+SQLite backend, schema migrations and MySQLSync, on in-memory databases.
+"""
+
+import threading
+import pytest
+from db_handler import DatabaseHandler
+from migrations.runner import MigrationRunner, REQUIRED_INDEXES
+from race_manager import RACER_INFO_QUERY
+from storage import create_backend
+from storage.sync import MySQLSync, RESULT_COLUMNS
+
+
+def memory_db():
+    return DatabaseHandler(max_retries=1, retry_delay=0, backend=create_backend("sqlite", path=":memory:"))
+
+
+def migrated_db():
+    db = memory_db()
+    MigrationRunner(db).migrate()
+    return db
+
+
+def add_racer(db, racer_id, rfid, pack=1):
+    db.execute("INSERT OR REPLACE INTO packnames (ID, PackName) VALUES (%s, %s)", (pack, f"Pack {pack}"))
+    db.execute(
+        "INSERT INTO racerinfo (RacerID, RacerFirstName, RacerLastName, RacerPack, RacerRFID, RacerCarName, "
+        "RacerCarNumber) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+        (racer_id, f"First{racer_id}", f"Last{racer_id}", pack, rfid, f"Car {racer_id}", racer_id)
+    )
+
+
+def add_result(db, race_counter, lane, track=1):
+    values = {column: None for column in RESULT_COLUMNS}
+    values.update(RacerID=lane, RaceCounter=race_counter, TrackID=track, Heat=1, Lane=lane, RaceTime="02.500000",
+                  ReactionTime="00.100000", Placing=lane, RaceMode="normal", RecordedAt="2026-01-01 10:00:00")
+    db.execute(f"INSERT INTO raceresults ({', '.join(RESULT_COLUMNS)}) "
+               f"VALUES ({', '.join(['%s'] * len(RESULT_COLUMNS))})", tuple(values[c] for c in RESULT_COLUMNS))
+
+
+def result_keys(db):
+    return sorted((row["TrackID"], row["RaceCounter"], row["Lane"])
+                  for row in db.query("SELECT TrackID, RaceCounter, Lane FROM raceresults"))
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_backend("postgres")
+
+
+def test_backend_translates_placeholders_and_right():
+    db = memory_db()
+    assert db.dialect == "sqlite"
+    row = db.query("SELECT %s + %s AS total, RIGHT(%s, 3) AS tail", (1, 2, "racer"), fetch_one=True)
+    assert row == {"total": 3, "tail": "cer"}
+
+
+def test_migrations_apply_once_and_provide_required_indexes():
+    db = memory_db()
+    runner = MigrationRunner(db)
+    assert runner.migrate() == len(runner.available_migrations())
+    assert runner.migrate() == 0
+    assert runner.applied_versions() == {version for version, _, _ in runner.available_migrations()}
+    assert runner.verify_indexes() == []
+    assert runner.run_startup_checks()
+    assert set(REQUIRED_INDEXES) <= {row["name"] for row in db.query("SELECT name FROM sqlite_master")}
+
+
+def test_missing_index_is_reported():
+    db = migrated_db()
+    db.execute("DROP INDEX ux_racerinfo_rfid")
+    assert MigrationRunner(db).verify_indexes() == ["racerinfo: missing unique index on (RacerRFID)"]
+
+
+def test_hot_queries_use_their_indexes():
+    db = migrated_db()
+    assert MigrationRunner(db).check_query_plans() == []
+
+
+def test_threads_share_one_connection(tmp_path):
+    db = DatabaseHandler(max_retries=1, retry_delay=0, backend=create_backend("sqlite", path=str(tmp_path / "t.db")))
+    MigrationRunner(db).migrate()
+    for racer_id in range(1, 9):
+        add_racer(db, racer_id, f"tag{racer_id}")
+    found, errors = {}, []
+
+    def race(lane):
+        try:
+            for heat in range(25):
+                add_result(db, heat * 10 + lane, lane)
+                found[lane] = db.query(RACER_INFO_QUERY, (f"tag{lane}",), fetch_one=True)["RacerID"]
+        except Exception as err:
+            errors.append(err)
+    threads = [threading.Thread(target=race, args=(lane,)) for lane in range(1, 9)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert found == {lane: lane for lane in range(1, 9)}
+    assert len(result_keys(db)) == 200
+
+
+def test_racer_lookup_by_rfid():
+    db = migrated_db()
+    add_racer(db, 7, "ABC123")
+    racer = db.query(RACER_INFO_QUERY, ("ABC123",), fetch_one=True)
+    assert racer["RacerID"] == 7
+    assert db.query(RACER_INFO_QUERY, ("nope",), fetch_one=True) is None
+
+
+def test_pull_roster_copies_and_drops_removed_rows():
+    local, remote = memory_db(), migrated_db()
+    add_racer(remote, 1, "A")
+    add_racer(remote, 2, "B")
+    sync = MySQLSync(local, remote)
+    sync.pull_roster()
+    assert [row["RacerID"] for row in local.query("SELECT RacerID FROM racerinfo ORDER BY RacerID")] == [1, 2]
+
+    remote.execute("DELETE FROM racerinfo WHERE RacerID = %s", (1,))
+    remote.execute("UPDATE racerinfo SET RacerCarName = %s WHERE RacerID = %s", ("Renamed", 2))
+    sync.pull_roster()
+    assert local.query("SELECT RacerID, RacerCarName FROM racerinfo") == [{"RacerID": 2, "RacerCarName": "Renamed"}]
+
+
+def test_push_results_resumes_and_skips_rows_already_pushed():
+    local, remote = memory_db(), migrated_db()
+    sync = MySQLSync(local, remote, batch_size=2)
+    for race_counter, lane in [(1, 1), (1, 2), (2, 1), (2, 2), (3, 1)]:
+        add_result(local, race_counter, lane)
+    add_result(remote, 2, 1)  # Pushed before an interrupted push could record its high-water mark
+
+    assert sync.push_results() == 4
+    assert result_keys(remote) == result_keys(local)
+    assert sync.push_results() == 0
+
+    add_result(local, 4, 1)
+    assert sync.push_results() == 1
+    assert result_keys(remote) == result_keys(local)
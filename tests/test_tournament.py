@@ -0,0 +1,159 @@
+"""
+Tournament brackets run to the end with simulated heats, seeding from recorded times, and resuming from the journal.
+"""
+
+import pytest
+from event_bus import EventBus
+from state_journal import RaceStateJournal
+from tournament import Tournament
+
+
+class SeedDatabase:
+    """Answers the seeding query from a dict of RacerID -> list of race times."""
+
+    def __init__(self, times=None):
+        self.times = times or {}
+
+    def query(self, sql, params=None, fetch_one=False):
+        return [{"RacerID": racer_id, "Heats": len(self.times[racer_id]), "TotalTime": sum(self.times[racer_id])}
+                for racer_id in params if racer_id in self.times]
+
+
+def speed(racer_id):
+    return 2.0 + racer_id / 100  # Racer 1 is the fastest car
+
+
+def race(match):
+    # Every car runs at its own speed, so the heat finishes in RacerID order
+    ranked = sorted(match.values(), key=speed)
+    return [{"RacerID": racer_id, "Lane": lane, "RaceTime": speed(racer_id), "Placing": ranked.index(racer_id) + 1}
+            for lane, racer_id in match.items()]
+
+
+def run(tournament, limit=100):
+    for _ in range(limit):
+        match = tournament.next_match()
+        if match is None:
+            return
+        assert tournament.record_heat(race(match[1]))
+    raise AssertionError("Tournament did not finish")
+
+
+@pytest.fixture
+def bus():
+    return EventBus()
+
+
+@pytest.fixture
+def make(tmp_path, bus):
+    def make(format, lanes=4, advance=2, rounds=3, db=None):
+        journal = RaceStateJournal(str(tmp_path / "tournament.json"), fsync=False)
+        return Tournament(db or SeedDatabase(), format, lanes=lanes, advance=advance, rounds=rounds,
+                          journal=journal, bus=bus)
+    return make
+
+
+@pytest.mark.parametrize("format", ["single", "double", "points"])
+def test_fastest_car_wins_every_format(make, bus, format):
+    finished = []
+    bus.subscribe("tournament_finished", lambda _, data: finished.append(data["standings"]))
+    tournament = make(format)
+    tournament.create(range(12, 0, -1), seeded=True)  # Seeded slowest first, so the bracket has to sort them out
+    run(tournament)
+    assert tournament.finished and tournament.next_match() is None
+    standings = tournament.ranked()
+    assert standings[0]["RacerID"] == 1
+    assert [s["RacerID"] for s in finished[0]] == [s["RacerID"] for s in standings]
+    assert sorted(s["RacerID"] for s in standings) == list(range(1, 13))
+
+
+def test_single_elimination_rounds_shrink_to_a_final(make, bus):
+    rounds = []
+    bus.subscribe("tournament_round", lambda _, data: rounds.append([m["bracket"] for m in data["matches"]]))
+    tournament = make("single")
+    tournament.create(range(1, 13), seeded=True)
+    run(tournament)
+    assert rounds == [["winners"] * 3, ["winners"] * 2, ["final"]]
+    standings = tournament.ranked()
+    assert [s["final"] for s in standings[:3]] == [1, 2, 3]
+    assert all(s["out"] == 1 for s in standings[6:])
+
+
+def test_double_elimination_needs_two_defeats(make):
+    tournament = make("double")
+    tournament.create(range(1, 13), seeded=True)
+    run(tournament)
+    for standing in tournament.ranked():
+        assert standing["losses"] <= 2
+        assert standing["out"] is None or standing["losses"] == 2
+    assert any(standing["losses"] == 1 and standing["final"] for standing in tournament.ranked())
+
+
+def test_first_round_is_dealt_serpentine_by_seed(make):
+    tournament = make("single")
+    tournament.create(range(1, 9), seeded=True)
+    heats = [sorted(match["racers"]) for match in tournament.matches]
+    assert heats == [[1, 4, 5, 8], [2, 3, 6, 7]]  # The top two seeds start in different heats
+
+
+def test_points_rounds_group_similar_records(make):
+    tournament = make("points", rounds=2)
+    tournament.create(range(1, 9), seeded=True)
+    for _ in range(2):
+        tournament.record_heat(race(tournament.next_match()[1]))
+    assert tournament.round == 2
+    heats = [sorted(match["racers"]) for match in tournament.matches]
+    assert heats == [[1, 2, 3, 4], [5, 6, 7, 8]]  # Round one winners meet each other
+
+
+def test_seeds_come_from_average_times(make):
+    tournament = make("single", db=SeedDatabase({3: [2.1, 2.3], 1: [2.5], 2: [2.0, 2.8]}))
+    assert tournament.seed([1, 2, 3, 4, 5]) == [3, 2, 1, 4, 5]  # No times yet: after the others, in entry order
+
+
+def test_heats_outside_the_tournament_are_ignored(make):
+    tournament = make("single")
+    tournament.create(range(1, 9), seeded=True)
+    assert not tournament.record_heat([{"RacerID": 99, "RaceTime": 2.0, "Placing": 1}])
+    assert not tournament.record_heat([{"RacerID": 1, "RaceTime": 2.0, "Placing": 1},
+                                       {"RacerID": 2, "RaceTime": 2.1, "Placing": 2}])  # Not in the same heat
+
+
+def test_no_show_finishes_last(make):
+    tournament = make("single")
+    tournament.create(range(1, 9), seeded=True)
+    match_id, lanes = tournament.next_match()
+    results = [entry for entry in race(lanes) if entry["RacerID"] != 1]
+    assert tournament.record_heat(results)
+    assert tournament.standings[1]["out"] == 1
+
+
+def test_bracket_resumes_from_the_journal(make, bus):
+    tournament = make("double")
+    tournament.create(range(1, 11), seeded=True)
+    for _ in range(4):
+        tournament.record_heat(race(tournament.next_match()[1]))
+    resumed = make("double")
+    resumed.restore(tournament.journal.load())
+    assert resumed.next_match() == tournament.next_match()
+    run(tournament)
+    run(resumed)
+    assert resumed.ranked() == tournament.ranked()
+
+
+def test_attached_tournament_follows_recorded_heats(make, bus):
+    tournament = make("single")
+    tournament.create(range(1, 9), seeded=True)
+    tournament.attach()
+    match_id, lanes = tournament.next_match()
+    bus.publish("heat_recorded", results=race(lanes))
+    assert tournament.next_match()[0] != match_id
+    tournament.detach()
+    match_id, lanes = tournament.next_match()
+    bus.publish("heat_recorded", results=race(lanes))
+    assert tournament.next_match()[0] == match_id
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        Tournament(SeedDatabase(), "swiss", journal=RaceStateJournal("unused.json"), bus=EventBus())
@@ -0,0 +1,77 @@
+"""
+TraceRecorder sampling between arm() and disarm(), and heat traces written with dump() and read back with load().
+"""
+
+import time
+import pytest
+from sensors.trace_recorder import TraceRecorder, load
+
+
+class Sensor:
+    """Stands in for an IRSensor; counts how often it is read."""
+
+    def __init__(self, lane):
+        self.lane = lane
+        self.reads = 0
+        self.broken = False
+
+    def is_broken(self):
+        self.reads += 1
+        return self.broken
+
+
+@pytest.fixture
+def recorder(tmp_path):
+    recorder = TraceRecorder(2, capacity=5000, directory=str(tmp_path))
+    yield recorder
+    recorder.stop_sampling()
+
+
+@pytest.fixture
+def sensors(recorder):
+    sensors = [Sensor(1), Sensor(2)]
+    recorder.start_sampling(sensors, rate_hz=1000)
+    return sensors
+
+
+def test_sensors_are_not_polled_until_armed(recorder, sensors):
+    time.sleep(0.05)
+    assert [sensor.reads for sensor in sensors] == [0, 0]
+
+
+def test_polling_stops_the_trailing_window_after_disarm(recorder, sensors):
+    recorder.arm()
+    time.sleep(0.05)
+    assert sensors[0].reads > 10
+    disarmed = time.monotonic()
+    recorder.disarm(after=0.05)
+    time.sleep(0.1)
+    reads = sensors[0].reads
+    time.sleep(0.05)
+    assert sensors[0].reads == reads  # Idle again
+    last = max(recorder.window(0, float("inf"))["time"])
+    assert disarmed + 0.03 <= last <= disarmed + 0.08
+
+
+def test_sampling_can_be_armed_again_for_the_next_heat(recorder, sensors):
+    recorder.arm()
+    recorder.disarm(after=0)
+    time.sleep(0.02)
+    reads = sensors[1].reads
+    recorder.arm()
+    time.sleep(0.03)
+    assert sensors[1].reads > reads
+
+
+def test_dump_waits_for_the_samples_after_the_last_finish(recorder, sensors):
+    recorder.arm()
+    finish = time.monotonic()
+    recorder.record(1, 1, finish)  # The finish edge
+    sensors[0].broken = True
+    recorder.disarm(after=0.05)
+    path = recorder.dump(7, {1: finish, 2: None}, before=0.01, after=0.04)
+    trace = load(path)
+    assert trace["race"] == 7 and trace["finishes"] == {1: pytest.approx(0.01)}
+    lane1 = trace["samples"][trace["samples"]["lane"] == 1]
+    assert lane1["time"].max() >= 0.045  # Polled samples up to the end of the window
+    assert lane1["level"][lane1["time"] >= 0.01].all()
@@ -0,0 +1,325 @@
+"""
+tournament.py
+
+Purpose: Runs a finals tournament on top of the RaceManager: single elimination, double elimination, or points
+rounds. Racers are seeded from their accumulated race times, each round is dealt into heats of up to one racer per
+lane, and results are applied automatically as RaceManager records each heat ("heat_recorded").
+
+Formats:
+    single  -- the top Config.TOURNAMENT_ADVANCE finishers of each heat go through, the rest are out. Once no more
+               racers remain than there are lanes, they race one final heat.
+    double  -- as single, but a first defeat drops a racer into the losers bracket and only a second one puts them
+               out. The unbeaten and once-beaten racers meet in one grand final heat once they fit on the track.
+    points  -- Config.TOURNAMENT_ROUNDS rounds; each heat scores one point per racer beaten, and every round after
+               the first pairs racers with similar points.
+
+Standings are running per-racer sums updated from each heat's results, so closing a round only sorts what is already
+in memory. The whole bracket (standings and the current round's heats) is saved through a RaceStateJournal after
+every change, so a restart resumes exactly where the tournament was.
+
+Usage: tournament = Tournament(db_handler, format); tournament.create(racer_ids) (or restore(journal.load())),
+then attach() to follow recorded heats and next_match() to get the next heat to race.
+
+Events:
+    tournament_round    -- round, matches (lists of match dicts for the new round)
+    tournament_finished -- standings (racer standings, champion first)
+"""
+
+from threading import RLock
+from config import Config
+from event_bus import bus as default_bus
+from logger import logger
+from state_journal import RaceStateJournal
+
+FORMATS = ("single", "double", "points")
+
+# Accumulated times for seeding: faster average race time seeds higher
+SEED_QUERY = """
+    SELECT RacerID, COUNT(*) AS Heats, SUM(RaceTime) AS TotalTime
+    FROM raceresults
+    WHERE RaceTime > 0 AND RacerID IN ({placeholders})
+    GROUP BY RacerID
+"""
+
+
+def _deal(racers, lanes, serpentine=True):
+    # Splits racers (best first) into the fewest heats that fit on the track, with sizes differing by at most one.
+    # Serpentine dealing keeps the top seeds apart; otherwise heats are consecutive runs of similar racers.
+    heats = -(-len(racers) // lanes)
+    if not serpentine:
+        size, extra = divmod(len(racers), heats)
+        groups, start = [], 0
+        for number in range(heats):
+            end = start + size + (1 if number < extra else 0)
+            groups.append(racers[start:end])
+            start = end
+        return groups
+    groups = [[] for _ in range(heats)]
+    for i, racer in enumerate(racers):
+        turn, position = divmod(i, heats)
+        groups[position if turn % 2 == 0 else heats - 1 - position].append(racer)
+    return groups
+
+
+class Tournament:
+    def __init__(self, db_handler, format=None, lanes=None, advance=None, rounds=None, journal=None, bus=None):
+        """
+        Initializes the Tournament. Nothing is raced until create() or restore().
+
+        Args:
+            db_handler (DatabaseHandler): Database holding raceresults, for seeding.
+            format (str, optional): "single", "double" or "points". Defaults to Config.TOURNAMENT_FORMAT.
+            lanes (int, optional): Lanes on the track. Defaults to Config.NUMBER_LANES.
+            advance (int, optional): Racers going through from each elimination heat. Defaults to
+                                     Config.TOURNAMENT_ADVANCE, or half the lanes if that is None.
+            rounds (int, optional): Rounds in the points format. Defaults to Config.TOURNAMENT_ROUNDS.
+            journal (RaceStateJournal, optional): Where the bracket is saved. Defaults to one at
+                                                  Config.TOURNAMENT_PATH.
+            bus (EventBus, optional): Where tournament events are published. Defaults to the shared bus.
+        """
+        self.db_handler = db_handler
+        self.format = (format or Config.TOURNAMENT_FORMAT or "").lower()
+        if self.format not in FORMATS:
+            raise ValueError(f"Unknown tournament format: {self.format}")
+        self.lanes = lanes or Config.NUMBER_LANES
+        self.advance = max(1, advance or Config.TOURNAMENT_ADVANCE or self.lanes // 2)
+        self.rounds = rounds or Config.TOURNAMENT_ROUNDS
+        self.journal = journal or RaceStateJournal(Config.TOURNAMENT_PATH)
+        self.bus = bus or default_bus
+        self.lock = RLock()  # Reentrant: event handlers may call back in, e.g. next_match() on tournament_round
+        self.round = 0
+        self.standings = {}  # RacerID -> running totals, see _new_standing()
+        self.matches = []  # Heats of the current round: {"id", "bracket", "racers" (lane order), "done"}
+        self.finished = False
+
+    @staticmethod
+    def _new_standing(seed):
+        return {"seed": seed, "points": 0, "heats": 0, "time": 0.0, "best": None, "losses": 0, "out": None,
+                "final": None}
+
+    def seed(self, racer_ids):
+        """
+        Orders racers by their average race time so far; racers without a time follow in the given order.
+
+        Args:
+            racer_ids (list): RacerIDs to seed.
+
+        Returns:
+            list: The RacerIDs, top seed first.
+        """
+        racer_ids = list(racer_ids)
+        if not racer_ids:
+            return []
+        placeholders = ", ".join(["%s"] * len(racer_ids))
+        rows = self.db_handler.query(SEED_QUERY.format(placeholders=placeholders), tuple(racer_ids)) or []
+        averages = {row["RacerID"]: float(row["TotalTime"]) / row["Heats"] for row in rows if row["Heats"]}
+        order = {racer_id: i for i, racer_id in enumerate(racer_ids)}
+        return sorted(racer_ids, key=lambda racer_id: (racer_id not in averages, averages.get(racer_id, 0.0),
+                                                       order[racer_id]))
+
+    def create(self, racer_ids, seeded=False):
+        """
+        Starts a new tournament, replacing any saved one, and deals the first round.
+
+        Args:
+            racer_ids (list): RacerIDs entered.
+            seeded (bool): True if racer_ids is already in seed order; otherwise they are seeded from their times.
+        """
+        seeds = list(racer_ids) if seeded else self.seed(racer_ids)
+        with self.lock:
+            self.round = 0
+            self.standings = {racer_id: self._new_standing(number) for number, racer_id in enumerate(seeds, start=1)}
+            self.matches = []
+            self.finished = False
+            logger.info(f"Starting a {self.format} tournament for {len(seeds)} racers on {self.lanes} lanes.")
+            self._next_round()
+            self._save()
+
+    def attach(self):
+        """
+        Follows heats as RaceManager records them.
+        """
+        self.bus.subscribe("heat_recorded", self.on_heat_recorded)
+
+    def detach(self):
+        """
+        Stops following recorded heats.
+        """
+        self.bus.unsubscribe("heat_recorded", self.on_heat_recorded)
+
+    def on_heat_recorded(self, topic, event):
+        """
+        Applies a recorded heat to the tournament.
+        """
+        self.record_heat(event["results"])
+
+    def next_match(self, exclude=()):
+        """
+        Returns the next heat of the current round that has not been raced.
+
+        Args:
+            exclude (iterable): Match ids to skip, such as a heat that is racing but not yet recorded.
+
+        Returns:
+            tuple or None: (match id, {lane: RacerID}), or None once the tournament is finished or every heat left
+                           in the round is excluded.
+        """
+        with self.lock:
+            for match in self.matches:
+                if not match["done"] and match["id"] not in exclude:
+                    return match["id"], {lane: racer_id for lane, racer_id in enumerate(match["racers"], start=1)}
+            return None
+
+    def record_heat(self, results):
+        """
+        Applies a heat's results to the match it belongs to, and deals the next round once every match in this one
+        has been raced. Heats that are not part of the tournament are ignored.
+
+        Args:
+            results (list): Race entries with RacerID, RaceTime and Placing (as in RaceManager.races).
+
+        Returns:
+            bool: True if the heat was a tournament match.
+        """
+        with self.lock:
+            entries = {race["RacerID"]: race for race in results if race.get("RacerID") in self.standings}
+            match = next((m for m in self.matches if not m["done"] and entries
+                          and set(entries) <= set(m["racers"])), None)
+            if match is None:
+                return False
+            self._score(match, entries)
+            match["done"] = True
+            if all(m["done"] for m in self.matches):
+                self._next_round()
+            self._save()
+            return True
+
+    def _score(self, match, entries):
+        # Caller holds self.lock. Racers in the match without a result (no-shows) count as finishing last.
+        def finish(racer_id):
+            race = entries.get(racer_id)
+            place = int(race["Placing"]) if race and race.get("Placing") else 0
+            race_time = float(race["RaceTime"]) if race and race.get("RaceTime") else 0.0
+            return (place or len(match["racers"]) + 1, race_time if race_time > 0 else float("inf"))
+
+        ranked = sorted(match["racers"], key=finish)
+        size = len(ranked)
+        for racer_id in ranked:
+            standing = self.standings[racer_id]
+            place, race_time = finish(racer_id)
+            standing["heats"] += 1
+            standing["points"] += sum(1 for other in ranked if finish(other)[0] > place)
+            if race_time != float("inf"):
+                standing["time"] += race_time
+                standing["best"] = race_time if standing["best"] is None else min(standing["best"], race_time)
+
+        if match["bracket"] == "final":
+            for racer_id in ranked:
+                self.standings[racer_id]["final"] = finish(racer_id)[0]
+        elif match["bracket"] != "points":
+            for racer_id in ranked[min(self.advance, size - 1):]:
+                standing = self.standings[racer_id]
+                standing["losses"] += 1
+                if self.format == "single" or standing["losses"] >= 2:
+                    standing["out"] = self.round
+        logger.info(f"Tournament match {match['id']} recorded: {', '.join(str(r) for r in ranked)}")
+
+    def _next_round(self):
+        # Caller holds self.lock
+        if any(m["bracket"] == "final" for m in self.matches) or \
+                (self.format == "points" and self.round >= self.rounds):
+            self._finish()
+            return
+        self.round += 1
+        by_seed = sorted((r for r, s in self.standings.items() if s["out"] is None),
+                         key=lambda r: self.standings[r]["seed"])
+        if self.format == "points":
+            # First round by seed, then by points so racers with similar records meet
+            ranked = sorted(by_seed, key=lambda r: (-self.standings[r]["points"], self.standings[r]["seed"]))
+            groups = [("points", group) for group in _deal(ranked, self.lanes, serpentine=self.round == 1)]
+        elif len(by_seed) <= self.lanes:
+            groups = [("final", by_seed)]
+        else:
+            pools = [("winners", [r for r in by_seed if not self.standings[r]["losses"]]),
+                     ("losers", [r for r in by_seed if self.standings[r]["losses"]])]
+            # A racer alone in a pool (or dealt a heat of one) has a bye this round
+            groups = [(bracket, group) for bracket, pool in pools if len(pool) > 1
+                      for group in _deal(pool, self.lanes) if len(group) > 1]
+        self.matches = []
+        for number, (bracket, group) in enumerate(groups, start=1):
+            # Rotate the lane order each round so no seed keeps the same lane
+            shift = (self.round - 1) % len(group)
+            self.matches.append({"id": f"R{self.round}-{number}", "bracket": bracket,
+                                 "racers": group[shift:] + group[:shift], "done": False})
+        logger.info(f"Tournament round {self.round}: {len(self.matches)} heat(s).")
+        self.bus.publish("tournament_round", round=self.round, matches=[dict(m) for m in self.matches])
+
+    def _finish(self):
+        # Caller holds self.lock
+        self.matches = []
+        self.finished = True
+        standings = self._ranked()
+        champion = standings[0]["RacerID"] if standings else None
+        logger.info(f"Tournament finished after {self.round} round(s); champion is racer {champion}.")
+        self.bus.publish("tournament_finished", standings=standings)
+
+    def _ranked(self):
+        # Caller holds self.lock
+        def key(racer_id):
+            s = self.standings[racer_id]
+            average = s["time"] / s["heats"] if s["heats"] and s["time"] else float("inf")
+            if self.format == "points":
+                return (-s["points"], average, s["seed"])
+            # Still in (by final place), then by how late the racer went out
+            return (s["out"] is not None, -(s["out"] or 0), s["final"] or 0, -s["points"], s["seed"])
+
+        return [dict(self.standings[racer_id], RacerID=racer_id) for racer_id in sorted(self.standings, key=key)]
+
+    def ranked(self):
+        """
+        Returns the current standings, best first, as dicts of RacerID, seed, points, heats, time (total seconds),
+        best, losses, out (round eliminated in, or None) and final (place in the final, or None).
+        """
+        with self.lock:
+            return self._ranked()
+
+    def snapshot(self):
+        """
+        Returns the bracket state needed to resume the tournament.
+        """
+        return {
+            "Format": self.format,
+            "Lanes": self.lanes,
+            "Advance": self.advance,
+            "Rounds": self.rounds,
+            "Round": self.round,
+            "Finished": self.finished,
+            "Standings": {str(racer_id): standing for racer_id, standing in self.standings.items()},
+            "Matches": self.matches,
+        }
+
+    def restore(self, state):
+        """
+        Resumes a tournament from a journal snapshot.
+
+        Args:
+            state (dict): A snapshot from snapshot().
+        """
+        with self.lock:
+            self.format = state["Format"]
+            self.lanes = state["Lanes"]
+            self.advance = state["Advance"]
+            self.rounds = state["Rounds"]
+            self.round = state["Round"]
+            self.finished = state["Finished"]
+            self.standings = {int(racer_id): standing for racer_id, standing in state["Standings"].items()}
+            self.matches = state["Matches"]
+        logger.info(f"Resumed {self.format} tournament at round {self.round} "
+                    f"({sum(1 for m in self.matches if not m['done'])} heat(s) left in the round).")
+
+    def _save(self):
+        # Caller holds self.lock
+        try:
+            self.journal.save(self.snapshot())
+        except OSError as e:
+            logger.error(f"Could not save the tournament bracket: {e}")
@@ -3,6 +3,10 @@ workflows.py
 
 Purpose: Orchestrates race workflows by coordinating GUI, database, and device communications.
 
+Heats are pipelined: once a heat is loaded and starts racing, the next heat is staged and the pads load it into
+RaceManager's second heat buffer, and a finished heat's database write runs on a background writer thread, so the
+next heat can start while the last one is still being stored.
+
 Usage: Instantiate RaceWorkflow, call run() to begin the main loop.
 """
 
@@ -10,22 +14,78 @@ from db_handler import DatabaseHandler
 from comms.serial_comm import SerialCommunicator
 from comms.socket_comm import SocketCommunicator
 from gui import RaceGUI
-from config import Config
+from config import Config, reload_config
 from logger import logger
 from race_manager import RaceManager
+from migrations.runner import MigrationRunner
+from coordination.race_counter import RaceCounterAllocator
+from coordination.leaderboard_hub import TrackResultPublisher
+from state_journal import RaceStateJournal
+from startup import StartupCoordinator
+from sensors.button import Button
+from sensors.relay_ctrl import RelayController
+from sensors.stepper_ctrl import StepperController
+from sensors.ir_sensor import IRSensor
+from sensors.trace_recorder import TraceRecorder
+from led.led_controller import LEDController
+from comms.clock_sync import ClockSync
+from comms.device_link import DeviceCommandError
+from devices.esp32_draggate import ESP32RelayController
+from devices.esp32_dragstart import ESP32DragStarter
+from devices.pico_rfid import handle_pico_command, wait_for_button_press, set_lane_service
+from lane_assignment import LaneAssignmentService
+from placing import PlacingEngine
+from lane_analytics import LaneAnalytics
+from scheduler import HeatScheduler, fetch_racers
+from tournament import Tournament
+from diagnostics import Diagnostics
+from event_journal import EventJournal
+from event_bus import bus
+from concurrent.futures import ThreadPoolExecutor
 import RPi.GPIO as GPIO
+import threading
 import time
 
 
 class RaceWorkflow:
     def __init__(self):
+        self.startup = StartupCoordinator()
         self.config = Config()
-        self.db = DatabaseHandler()
-        self.gui = RaceGUI()
-        self.serial = SerialCommunicator(self.config.ARDUINO_PORT, self.config.ARDUINO_BAUD)
-        self.socket_comm = None  # TODO: Initialize socket communicators for remote devices
-        self.relay_shifter = None  # TODO: Initialize relay shifter if applicable
-        self.race_manager = RaceManager(self.db, 0, 1, self.config.TRACK_NUMBER, self.config.RACE_START_MODE)
+        self.event_journal = EventJournal() if self.config.EVENT_JOURNAL_DIR else None
+        if self.event_journal:
+            self.event_journal.start()  # Before any device is contacted, so the journal holds the whole run
+        self.gui = RaceGUI()  # Built first so the window appears before any device is contacted
+        self.startup.on_status = self.gui.update_device_status
+        self.startup.mark("gui")
+        self.db = None
+        self.serial = None
+        self.socket_comm = None
+        self.relay_shifter = None
+        self.gate_stepper = None
+        self.winner_lights = None
+        self.ir_sensors = {}  # lane -> IRSensor
+        self.trace_recorder = None
+        self.placing_engine = PlacingEngine()
+        self.race_times = {}  # lane -> race time string of the current heat
+        self.finished_lanes = set()  # Lanes whose finish was accepted this heat
+        self.finish_condition = threading.Condition()  # Notified as each finish is handled
+        self.gate_controller = None
+        self.drag_starter = None
+        self.start_switch = None
+        self.go_at = None  # time.monotonic() instant the countdown tree reaches "go"
+        self.journal = RaceStateJournal()
+        self.counter_allocator = None
+        self.race_manager = None
+        self.lane_service = None
+        self.lane_analytics = None
+        self.scheduler = None
+        self.tournament = None
+        self.next_heat_staged = False  # True once the heat being loaded has its racers staged (or needs none)
+        self.results_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="results-writer")  # In order
+        self.last_write = None  # Future of the latest heat write
+        self.result_publisher = TrackResultPublisher(self.config.TRACK_NUMBER) if self.config.HUB_HOST else None
+        self.diagnostics = Diagnostics()  # Idle until the sensor test window starts it
+        self.gui.diagnostics = self.diagnostics
 
     def run(self):
         """
@@ -42,18 +102,168 @@ class RaceWorkflow:
 
     def initialize_program(self):
         """
-        Initializes the program by setting up configuration, database connection, and devices.
+        Initializes the database connection and devices concurrently in the background while the GUI runs.
         """
         logger.info("Initializing program...")
-        self.setup_gpio_and_relays()
-        self.gui.show_message("Program Initialized")
+        self.startup.start([
+            ("database", self.initialize_database),
+            ("serial", self.initialize_serial),
+            ("socket", self.initialize_socket_server),
+            ("gpio", self.setup_gpio_and_relays),
+            ("gates", self.initialize_gate_controller),
+            ("drag start", self.initialize_drag_starter),
+        ], on_complete=self.gui.show_startup_complete)
+
+    def initialize_database(self):
+        """
+        Connects to the database, applies migrations and restores the race state from the journal.
+        """
+        self.db = DatabaseHandler()
+        MigrationRunner(self.db).run_startup_checks()
+        saved_state = self.journal.load()
+        self.counter_allocator = RaceCounterAllocator(
+            self.db, self.config.TRACK_NUMBER,
+            resume_from=saved_state["RaceCounter"] if saved_state else None
+        )
+        # No counter yet: the first heat allocates one when it starts (a restored journal supplies its own)
+        self.race_manager = RaceManager(self.db, None, 1, self.config.TRACK_NUMBER, self.config.RACE_START_MODE,
+                                        counter_allocator=self.counter_allocator, journal=self.journal)
+        self.lane_service = LaneAssignmentService(self.race_manager, self.config.NUMBER_LANES, self.config.PAD_LANES)
+        set_lane_service(self.lane_service)
+        bus.subscribe("lane_assigned", self.on_lane_assigned)
+        self.lane_analytics = LaneAnalytics(self.db, self.config.TRACK_NUMBER)
+        self.lane_analytics.update()
+        if self.config.HEAT_SCHEDULE:
+            self.scheduler = HeatScheduler(self.db, self.config.TRACK_NUMBER, self.config.NUMBER_LANES)
+            if not self.scheduler.exists():  # A finished schedule is kept; only the operator replaces it
+                self.scheduler.create()
+            self.gui.add_menu_command("Regenerate Heat Schedule", self.regenerate_schedule)
+            self.gui.add_menu_command("Skip Missing Racers", self.skip_missing_racers)
+        if self.config.TOURNAMENT_FORMAT:
+            self.start_tournament()
+        bus.subscribe("finish_line", self.on_finish_line)
+        bus.subscribe("placings_changed", self.on_placings_changed)
+        if saved_state and saved_state.get("TrackID") == self.config.TRACK_NUMBER:
+            self.race_manager.restore(saved_state)
+            for heat in self.race_manager.pending_writes():
+                self.last_write = self.results_writer.submit(self.update_database_with_results, heat)
+            self.gui.call_soon(self.recover_interrupted_heat)
+
+    def start_tournament(self):
+        """
+        Resumes the saved tournament bracket, or seeds a new one from the checked-in roster if none is saved, and
+        follows the heats RaceManager records. A saved bracket, even a finished one, is only replaced by the
+        operator ("Reset Tournament").
+        """
+        self.tournament = Tournament(self.db)
+        saved = self.tournament.journal.load()
+        if saved:
+            if saved.get("Format") != self.tournament.format:
+                logger.warning(f"Keeping the saved {saved.get('Format')} tournament; reset it to race "
+                               f"a {self.tournament.format} one.")
+            self.tournament.restore(saved)
+        else:
+            self.tournament.create(HeatScheduler(self.db, self.config.TRACK_NUMBER).load_roster())
+        self.tournament.attach()
+        self.gui.add_menu_command("Reset Tournament", self.reset_tournament)
+
+    def reset_tournament(self):
+        """
+        Replaces the saved tournament with a new bracket seeded from the checked-in roster (the "Reset Tournament"
+        menu action), after the operator confirms. Heats already loaded race as they are; the new bracket starts
+        with the heat staged after them.
+        """
+        if not self.gui.ask_yes_no("Tournament", "Discard the saved tournament bracket and seed a new "
+                                                 f"{self.config.TOURNAMENT_FORMAT} tournament?"):
+            return
+
+        def reset():
+            tournament = Tournament(self.db)
+            tournament.create(HeatScheduler(self.db, self.config.TRACK_NUMBER).load_roster())
+            with self.race_manager.lock:
+                for heat in (self.race_manager.current, self.race_manager.staging):
+                    heat.match_id = None  # Matches of the replaced bracket
+            self.tournament.detach()
+            self.tournament = tournament
+            tournament.attach()
+
+        threading.Thread(target=reset, name="tournament-reset", daemon=True).start()
+
+    def initialize_serial(self):
+        """
+        Opens the serial connection to the Arduino Nano.
+        """
+        self.serial = SerialCommunicator(self.config.ARDUINO_PORT, self.config.ARDUINO_BAUD)
+        self.diagnostics.add_round_trip("Nano", self.serial.ping)
+
+    def initialize_socket_server(self):
+        """
+        Starts the socket server for the remote devices in a background thread.
+        """
+        self.socket_comm = SocketCommunicator()
+        self.socket_comm.register_device_handler("PICO", handle_pico_command)
+        threading.Thread(target=self.socket_comm.start_server, daemon=True).start()
+
+    def initialize_gate_controller(self):
+        """
+        Connects to the drag-gate ESP32, if one is configured.
+        """
+        if not self.config.ESP32_GATE_HOST:
+            logger.info("No drag-gate ESP32 configured.")
+            return
+        clock = ClockSync(name="ESP32 gate controller")
+        self.gate_controller = ESP32RelayController(self.config.ESP32_GATE_HOST, clock=clock)
+        self.gate_controller.connect()
+        clock.sync(self.gate_controller.ping)
+        clock.start(self.gate_controller.ping, self.config.CLOCK_RESYNC_SECONDS)
+        self.diagnostics.add_link("ESP32 gates", self.gate_controller)
+
+    def initialize_drag_starter(self):
+        """
+        Connects to the drag-start ESP32 and synchronizes its clock, if one is configured.
+        """
+        if not self.config.ESP32_START_HOST:
+            logger.info("No drag-start ESP32 configured.")
+            return
+        self.drag_starter = ESP32DragStarter(self.config.ESP32_START_HOST)
+        self.drag_starter.connect()
+        self.diagnostics.add_link("ESP32 drag start", self.drag_starter)
+
+    def recover_interrupted_heat(self):
+        """
+        Offers to resume or void a heat that was in progress when the program last stopped.
+        """
+        if not self.race_manager.has_interrupted_heat():
+            return
+        heat = self.race_manager.heat
+        logger.warning(f"Found interrupted heat {heat} in the state journal")
+        if self.gui.ask_yes_no("Interrupted Heat", f"Heat {heat} was interrupted. Resume it?\n(No voids the heat.)"):
+            self.race_manager.resume_interrupted_heat()
+        else:
+            self.race_manager.void_interrupted_heat()
 
     def setup_gpio_and_relays(self):
         """
         Configures GPIO pins and relay hardware.
         """
         logger.info("Setting up GPIO pins and relays...")
-        # TODO: Add GPIO and relay setup logic.
+        if self.config.START_SWITCH_PIN is not None:
+            self.start_switch = Button(self.config.START_SWITCH_PIN, "start switch", hold_seconds=0)
+            self.diagnostics.watch_button(self.start_switch)
+        if self.config.RELAY_SR_PINS:
+            registers = -(-self.config.NUMBER_LANES // 8)  # 8 outputs per chained shift register
+            self.relay_shifter = RelayController(*self.config.RELAY_SR_PINS, outputs=8 * registers)
+        if self.config.STEPPER_PINS:
+            self.gate_stepper = StepperController(*self.config.STEPPER_PINS)
+        if self.config.IR_SENSOR_PINS:
+            self.trace_recorder = TraceRecorder(self.config.NUMBER_LANES)
+            for lane, pin in enumerate(self.config.IR_SENSOR_PINS[:self.config.NUMBER_LANES], start=1):
+                self.ir_sensors[lane] = IRSensor(lane, pin, recorder=self.trace_recorder)
+            self.trace_recorder.start_sampling(self.ir_sensors.values())
+            bus.subscribe("start_recorded", lambda topic, event: self.trace_recorder.arm())  # The gates dropped
+        if self.config.LED_WINNERLIGHTS_PIN is not None:
+            self.winner_lights = LEDController(self.config.NUMBER_LANES)
+            self.winner_lights.start()
 
     def increment_race_counter(self):
         """
@@ -67,10 +277,40 @@ class RaceWorkflow:
         Displays the close starting gates modal and waits for gates to close.
         """
         logger.info("Displaying close starting gates modal...")
+        self.apply_config_changes()
+        if self.winner_lights:
+            self.winner_lights.reset()
+        if self.gate_controller:
+            self.gate_controller.reset_gates()
+        elif self.gate_stepper:
+            self.gate_stepper.move_steps(self.config.GATE_RESET_STEPS).result()
         self.gui.show_message("Close Starting Gates")
         while not self.gates_closed():
             time.sleep(0.1)
         logger.info("Starting gates closed.")
+        self.placing_engine.reset()
+        self.race_times.clear()
+        with self.finish_condition:
+            self.finished_lanes.clear()
+        for sensor in self.ir_sensors.values():
+            sensor.arm()
+
+    def apply_config_changes(self):
+        """
+        Picks up edits to the settings file between heats. Settings read for each heat (race times, countdown,
+        relays) take effect through Config directly; the ones cached by long-lived objects are passed on here.
+        """
+        changed = reload_config()
+        if "RACE_START_MODE" in changed:
+            self.race_manager.race_start_mode = changed["RACE_START_MODE"].lower()
+        if "TIE_WINDOW_MS" in changed or "TIE_POLICY" in changed:
+            self.placing_engine = PlacingEngine()
+        if "PAD_LANES" in changed:
+            self.lane_service.pad_lanes = changed["PAD_LANES"]
+        if self.trace_recorder and "RACE_MAX_RACE_TIME" in changed:
+            self.trace_recorder.resize()  # The buffers must still hold the first finish when a lane times out
+        if self.winner_lights and ("LED_WINNERLIGHTS_BRIGHTNESS" in changed or "LED_WINNERLIGHTS_DEF" in changed):
+            self.winner_lights.reconfigure()
 
     def gates_closed(self):
         """
@@ -87,48 +327,143 @@ class RaceWorkflow:
 
     def load_racers(self):
         """
-        Loads racers into lanes using the loading modal.
+        Waits while the RFID pads load racers into the lanes, then for the loading button.
+
+        Taps arrive on the socket server threads and are assigned by the LaneAssignmentService, so any number of
+        pads can fill the heat at once.
         """
         logger.info("Loading racers...")
-        for lane in range(1, self.config.NUMBER_LANES + 1):
-            while True:
-                rfid = self.read_rfid_card()
-                racer_info = self.lookup_racer_info(rfid)
-                if racer_info:
-                    self.race_manager.initialize_race_entry(
-                        self.race_manager.get_current_race_counter(),
-                        lane,
-                        rfid,
-                        racer_info
-                    )
-                    self.gui.show_message(f"Lane {lane}: {racer_info['RacerFirstName']} {racer_info['RacerLastName']}")
-                    self.wait_for_rfid_button_press()
-                    break
-                else:
-                    self.gui.show_message("Racer not found. Try again.")
+        if not self.next_heat_staged:
+            if self.tournament and self.last_write:
+                self.last_write.result()  # The next round is only dealt once the last match is recorded
+            self.stage_next_heat()
+        while not self.lane_service.wait_until_loaded(self.no_show_timeout()):
+            self.skip_missing_racers()
+        self.wait_for_rfid_button_press()
+        # The heat's lineup is set: from here on the pads load the next heat while this one races
+        self.race_manager.start_heat()
+        self.stage_next_heat()
+
+    def loading_scheduled_heat(self):
+        """
+        Returns True if the heat being loaded was staged from the heat schedule (not a tournament match).
+        """
+        return (self.scheduler is not None and self.lane_service.staged is not None
+                and self.race_manager.loading.match_id is None)
 
-    def read_rfid_card(self):
+    def no_show_timeout(self):
         """
-        Reads RFID card data for racer identification.
+        Returns how long the heat being loaded waits for its racers: Config.SCHEDULE_NO_SHOW_SECONDS for a
+        scheduled heat, otherwise None (until every lane is filled).
         """
-        logger.info("Reading RFID card...")
-        # TODO: Add RFID card reading logic.
-        return "sample_rfid"
+        if not self.loading_scheduled_heat():
+            return None
+        return self.config.SCHEDULE_NO_SHOW_SECONDS
 
-    def lookup_racer_info(self, rfid):
+    def skip_missing_racers(self):
         """
-        Looks up racer information in the database.
+        Lets a scheduled heat race without the racers who have not tapped in (the "Skip Missing Racers" menu
+        action, or after Config.SCHEDULE_NO_SHOW_SECONDS). Nothing is skipped until at least one racer is loaded.
         """
-        logger.info(f"Looking up racer info for RFID: {rfid}")
-        # TODO: Add logic to query racer information from the database.
-        return {"RacerFirstName": "John", "RacerLastName": "Doe", "RacerCarName": "Speedster"}
+        if not self.loading_scheduled_heat():
+            return
+        skipped = self.lane_service.skip_missing()
+        for lane, racer in skipped.items():
+            self.gui.call_soon(self.gui.update_lane_status, lane,
+                               f"No show: {racer['RacerFirstName']} {racer['RacerLastName']}")
+
+    def regenerate_schedule(self):
+        """
+        Replaces this track's heat schedule with a new chart for the current roster (the "Regenerate Heat Schedule"
+        menu action), after the operator confirms. Heats already loaded race as they are; the new chart starts
+        with the heat staged after them.
+        """
+        if not self.gui.ask_yes_no("Heat Schedule", "Replace the heat schedule with a new chart for the checked-in "
+                                                    "racers?\n(Heats already raced keep their results.)"):
+            return
+
+        def regenerate():
+            self.scheduler.create()
+            with self.race_manager.lock:
+                for heat in (self.race_manager.current, self.race_manager.staging):
+                    heat.schedule_heat = None  # Heat numbers of the replaced chart
+
+        threading.Thread(target=regenerate, name="heat-schedule", daemon=True).start()
+
+    def stage_next_heat(self):
+        """
+        Stages the heat the pads load next: the next tournament match or scheduled heat, or free tapping.
+        """
+        if self.tournament and not self.tournament.finished:
+            self.next_heat_staged = self.stage_tournament_heat()
+        elif self.scheduler:
+            self.next_heat_staged = self.stage_scheduled_heat()
+        else:
+            self.lane_service.unstage()
+            self.next_heat_staged = True
+
+    def stage_scheduled_heat(self):
+        """
+        Hands the next scheduled heat to the lane service and starts looking up the one after it, so that is ready
+        by the time this heat has been raced.
+
+        Returns:
+            bool: True, as the heat is always ready to load (from the schedule, or from taps once it is done).
+        """
+        racing = self.race_manager.current.schedule_heat if self.race_manager.racing else None
+        heat = self.scheduler.staged_heat(after=racing or 0)
+        if heat is None:
+            logger.info("Every scheduled heat has been raced; filling lanes as racers tap.")
+            self.lane_service.unstage()
+            return True
+        number, lanes = heat
+        self.race_manager.loading.schedule_heat = number
+        self.lane_service.stage(lanes)
+        for lane, racer in lanes.items():
+            self.gui.call_soon(self.gui.update_lane_status, lane,
+                               f"Heat {number}: {racer['RacerFirstName']} {racer['RacerLastName']}")
+        self.scheduler.stage_next(number)
+        return True
+
+    def stage_tournament_heat(self):
+        """
+        Hands the next tournament match to the lane service.
+
+        Returns:
+            bool: False if no match can be staged until the racing heat is recorded (it ends the round).
+        """
+        racing = self.race_manager.current.match_id if self.race_manager.racing else None
+        match = self.tournament.next_match(exclude=(racing,))
+        if match is None:
+            self.lane_service.stage({})  # Nobody may load until the next round is dealt
+            return self.tournament.finished
+        match_id, lanes = match
+        racers = fetch_racers(self.db, lanes.values())
+        lanes = {lane: racers[racer_id] for lane, racer_id in lanes.items() if racer_id in racers}
+        self.race_manager.loading.match_id = match_id
+        self.lane_service.stage(lanes)
+        for lane, racer in lanes.items():
+            self.gui.call_soon(self.gui.update_lane_status, lane,
+                               f"Match {match_id}: {racer['RacerFirstName']} {racer['RacerLastName']}")
+        return True
+
+    def on_lane_assigned(self, topic, event):
+        """
+        Shows a lane assignment in the GUI and lights the lane on the track.
+        """
+        lane = event["lane"]
+        racer = event["racer"]
+        self.gui.call_soon(self.gui.update_lane_status, lane, f"{racer['RacerFirstName']} {racer['RacerLastName']}")
+        if self.serial:
+            color = self.config.LED_WINNERLIGHTS_DEF[(lane - 1) % len(self.config.LED_WINNERLIGHTS_DEF)]
+            self.serial.send(f"LED|{lane}|1|3|LIGHT_UP_BANK|{self.config.LED_WINNERLIGHTS_BRIGHTNESS}|{color}\n")
 
     def wait_for_rfid_button_press(self):
         """
         Waits for the RFID pad button to be pressed and released.
         """
         logger.info("Waiting for RFID button press...")
-        # TODO: Implement logic to wait for button press.
+        wait_for_button_press()
 
     def using_timer_modal(self):
         """
@@ -151,7 +486,48 @@ class RaceWorkflow:
         Activates the countdown timer.
         """
         logger.info("Activating countdown timer...")
-        # TODO: Add logic to activate countdown timer.
+        self.go_at = time.monotonic() + self.config.COUNTDOWN_SECONDS
+        if self.gate_controller:
+            # A fresh clock sample just before the start. If the gate does not answer, the timeout drops its
+            # connection and the relay command reconnects; the earlier samples still map the clock meanwhile
+            try:
+                self.gate_controller.clock.add_sample(*self.gate_controller.ping())
+            except (TimeoutError, DeviceCommandError) as e:
+                logger.warning(f"Gate clock sample failed before the start: {e}")
+        if self.drag_starter:
+            self.drag_starter.clear_presses()
+            self.drag_starter.wait(self.drag_starter.start_tree(self.go_at))
+
+    def monitor_lane_buttons(self):
+        """
+        Waits for each lane's drag-start button and releases the gates.
+
+        Press times arrive stamped by the drag-start ESP32 and already converted to the Pi's clock, so reaction
+        times are measured from "go" without Wi-Fi latency. In "drag" mode each lane's gate drops on its own
+        press; in "collaborate" mode all gates drop together after the last press. Lanes still waiting when the
+        slow beaver time runs out are released anyway.
+        """
+        lanes = range(1, self.config.NUMBER_LANES + 1)
+        if not self.drag_starter:
+            logger.warning("No drag-start ESP32 configured; releasing all lanes.")
+            self.release_gates(lanes)
+            return
+        collaborate = self.config.RACE_START_MODE.lower() == "collaborate"
+        waiting = set(lanes)
+        deadline = self.go_at + self.config.RACE_SLOW_BEAVER_TIME
+        while waiting:
+            press = self.drag_starter.wait_for_press(deadline - time.monotonic())
+            if press is None:
+                logger.info(f"Slow beaver time reached; lanes {sorted(waiting)} released without a press.")
+                break
+            lane, pressed_at = press
+            if lane not in waiting:
+                continue
+            waiting.discard(lane)
+            self.race_manager.record_reaction_time(lane, f"{pressed_at - self.go_at:09.6f}")
+            if not collaborate:
+                self.release_gates([lane], at=max(self.go_at, time.monotonic()))
+        self.release_gates(lanes if collaborate else sorted(waiting))
 
     def start_race_without_timer(self):
         """
@@ -161,38 +537,112 @@ class RaceWorkflow:
         if self.config.RACE_START_MODE.lower() == "starter":
             self.wait_for_rfid_button_press()
             self.trigger_all_relays()
-        elif self.config.RACE_START_MODE.lower() == "free":
-            logger.info("Free mode: No relays involved, simple start switch used.")
+        elif self.config.RACE_START_MODE.lower() in ["simple", "free"]:
+            logger.info("No relays involved, simple start switch used.")
+            if self.start_switch:
+                # The press is stamped in the GPIO callback, so the start time is the switch edge itself
+                press = self.start_switch.wait_for_press()
+                self.race_manager.record_start_times(range(1, self.config.NUMBER_LANES + 1), press.time)
 
     def trigger_all_relays(self):
         """
         Triggers all relays for the race start.
         """
         logger.info("Triggering all relays...")
-        # TODO: Add logic to trigger all relays.
+        self.release_gates(range(1, self.config.NUMBER_LANES + 1))
+
+    def release_gates(self, lanes, at=None):
+        """
+        Drops the starting gates for the given lanes and records when they actually dropped.
+
+        Args:
+            lanes (iterable): Lane numbers.
+            at (float, optional): time.monotonic() instant to drop them; None drops them now.
+        """
+        lanes = list(lanes)
+        if not lanes:
+            return
+        if self.gate_controller:
+            # One frame for every lane, so all gates drop in the same port write on the ESP32
+            fired_at = self.gate_controller.wait(self.gate_controller.fire_relays(lanes, at),
+                                                 self.config.SOCKET_TIMEOUT + 1)
+        elif self.relay_shifter:
+            delay = at - time.monotonic() if at is not None else 0
+            if delay > 0:
+                time.sleep(delay)
+            # One latch pulse switches every lane's relay at the same instant
+            fired_at = self.relay_shifter.fire(lanes)
+        else:
+            logger.warning("No gate relays configured; relays not triggered.")
+            return
+        self.race_manager.record_start_times(lanes, fired_at)
 
     def monitor_race(self):
         """
-        Monitors the race, capturing completion times and updating the GUI.
+        Waits until every lane has finished or the race times out. Finishes are recorded as the sensors report
+        them (see on_finish_line), so this only bounds the race. A trip too early to be a finish re-arms its
+        sensor, so the lane is waited on until a real finish is accepted, not just until its first break.
         """
         logger.info("Monitoring race...")
-        for lane in range(1, self.config.NUMBER_LANES + 1):
-            if self.ir_sensor_triggered(lane):
-                self.record_finish(lane)
+        deadline = time.monotonic() + self.config.RACE_MAX_RACE_TIME
+        lanes = set(self.ir_sensors)
+        with self.finish_condition:
+            while not lanes <= self.finished_lanes:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.finish_condition.wait(remaining)
 
     def ir_sensor_triggered(self, lane):
         """
         Checks if the IR sensor for a specific lane has been triggered.
         """
-        # TODO: Implement logic to check IR sensor.
-        return False
+        sensor = self.ir_sensors.get(lane)
+        return sensor is not None and sensor.broken_at is not None
 
-    def record_finish(self, lane):
+    def on_finish_line(self, topic, event):
         """
-        Records the finish time for a specific lane.
+        Records a finish reported by a lane's IR sensor. Runs on the GPIO callback thread.
+        """
+        self.record_finish(event["lane"], event["time"])
+
+    def record_finish(self, lane, finished_at):
+        """
+        Records the finish time for a specific lane and hands it to the placing engine.
+
+        Args:
+            lane (int): Lane that finished.
+            finished_at (float): time.monotonic() of the finish.
         """
         logger.info(f"Recording finish for lane {lane}...")
-        # TODO: Capture race completion time and update race manager.
+        started_at = self.race_manager.racing_start_times.get(lane)
+        if started_at is not None:
+            if finished_at - started_at < self.config.RACE_MIN_RACE_TIME:
+                logger.info(f"Ignoring lane {lane} finish {finished_at - started_at:.3f} s after the start.")
+                if lane in self.ir_sensors:
+                    self.ir_sensors[lane].arm()
+                return
+            self.race_times[lane] = f"{finished_at - started_at:09.6f}"
+        self.placing_engine.add_finish(lane, finished_at)
+        with self.finish_condition:
+            self.finished_lanes.add(lane)
+            self.finish_condition.notify_all()
+
+    def on_placings_changed(self, topic, event):
+        """
+        Stores placings that changed with the new finish, and shows them in the GUI and on the winner lights.
+        """
+        for lane, place in event["changed"].items():
+            self.race_manager.record_race_finish(lane, self.race_times.get(lane, "00.000000"), place)
+            self.gui.call_soon(self.gui.update_lane_status, lane, f"Place {place}")
+        self.show_winner_lights(event["placings"])
+
+    def show_winner_lights(self, placings=None):
+        """
+        Lights each finished lane's winner light by its placing.
+        """
+        if self.winner_lights:
+            self.winner_lights.show_placings(placings if placings is not None else self.placing_engine.placings())
 
     def handle_race_completion(self):
         """
@@ -202,22 +652,45 @@ class RaceWorkflow:
         for lane in range(1, self.config.NUMBER_LANES + 1):
             if not self.ir_sensor_triggered(lane):
                 self.record_timeout(lane)
-        self.update_database_with_results()
-        self.gui.show_message("Race Complete")
+        for sensor in self.ir_sensors.values():
+            sensor.disarm()  # A late car must not finish in the next heat
+        self.show_winner_lights()
+        finished = self.race_manager.finish_heat()
+        if self.trace_recorder:
+            self.trace_recorder.disarm()
+            finishes = {lane: sensor.broken_at for lane, sensor in self.ir_sensors.items()}
+            self.trace_recorder.dump(finished.race_counter or self.race_manager.race_counter, finishes)
+        self.increment_race_counter()  # Restamps the racers already loaded for the next heat
+        self.last_write = self.results_writer.submit(self.update_database_with_results, finished)
+        self.gui.show_status(f"Race {finished.race_counter} complete")
 
     def record_timeout(self, lane):
         """
         Records a timeout for a specific lane.
         """
         logger.info(f"Recording timeout for lane {lane}...")
+        bus.publish("lane_timeout", lane=lane)
         # TODO: Set race time, reaction time, and placing to zero for the lane.
 
-    def update_database_with_results(self):
+    def update_database_with_results(self, heat):
         """
-        Updates the database with race results.
+        Updates the database with a finished heat's results. Runs on the results writer thread.
+
+        Args:
+            heat (HeatState): Heat returned by RaceManager.finish_heat().
         """
         logger.info("Updating database with race results...")
-        # TODO: Write race results to the database.
+        try:
+            results = list(heat.races)
+            self.race_manager.write_races_to_db(heat)
+            if self.scheduler and heat.schedule_heat is not None:
+                self.scheduler.mark_raced(heat.schedule_heat, heat.race_counter)
+            if self.lane_analytics:
+                self.lane_analytics.update()
+            if self.result_publisher:
+                self.result_publisher.publish(results)
+        except Exception as e:
+            logger.error(f"Error writing race {heat.race_counter} results: {e}")
 
     def shutdown(self):
         """
@@ -225,7 +698,35 @@ class RaceWorkflow:
         """
         logger.info("Shutting down workflow...")
         try:
+            self.diagnostics.stop()  # Stops its round trips before the links close
+            if self.start_switch:
+                self.start_switch.close()
+            if self.relay_shifter:
+                self.relay_shifter.reset_all()
+            if self.gate_stepper:
+                self.gate_stepper.close()
+            if self.winner_lights:
+                self.winner_lights.stop()
+            if self.trace_recorder:
+                self.trace_recorder.stop_sampling()
+            for sensor in self.ir_sensors.values():
+                sensor.close()
             GPIO.cleanup()
-            self.db.close()
+            self.results_writer.shutdown(wait=True)  # Finish writing heats before the database closes
+            if self.race_manager:
+                self.race_manager.flush_state(timeout=5)
+            if self.socket_comm:
+                self.socket_comm.shutdown()
+            if self.serial:
+                self.serial.close()
+            if self.gate_controller:
+                self.gate_controller.clock.stop()
+                self.gate_controller.close()
+            if self.drag_starter:
+                self.drag_starter.close()
+            if self.db:
+                self.db.close()
+            if self.event_journal:
+                self.event_journal.stop()
         except Exception as e:
             logger.error(f"Error during shutdown: {e}")